@@ -0,0 +1,265 @@
+"""Bill reconstruction module.
+
+`BillEngine` rebuilds the statements of arbitrary billing periods from the stored daily
+consumption, unit rates and standing charges. Every day of a period is charged its
+consumption at the unit rate in force plus the standing charge in force, in pence inc.
+VAT, the rate and charge in force being the last ones starting on or before the day.
+
+All periods of all meters of a fuel are computed in one vectorized pass: the days of
+every period are laid out in one array, the readings of every (meter, day) are found
+by keys combining meter and day, and the rates and charges in force by the
+`RateTimeline` of every meter, so n billed days against k stored rows cost
+O(n log k).
+"""
+
+from datetime import date
+from typing import Any, List, Literal, Optional
+
+import numpy as np
+import pandas as pd
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    ElectricityConsumptionTable,
+    ElectricityRatesTable,
+    ElectricityStandingChargesTable,
+    GasConsumptionTable,
+    GasRatesTable,
+    GasStandingChargesTable,
+)
+from energy_analyzer.utils.config import ProjectConfig
+from energy_analyzer.utils.data_models import RateTimeline
+
+CONFIG = ProjectConfig()
+
+Fuel = Literal["electricity", "gas"]
+
+FUEL_TABLES = {
+    "electricity": (
+        ElectricityConsumptionTable,
+        ElectricityRatesTable,
+        ElectricityStandingChargesTable,
+    ),
+    "gas": (GasConsumptionTable, GasRatesTable, GasStandingChargesTable),
+}
+STATEMENT_COLUMNS = [
+    "meter_id",
+    "period_start",
+    "period_end",
+    "days",
+    "read_days",
+    "unpriced_days",
+    "consumption",
+    "energy_cost",
+    "standing_charge",
+    "total_cost",
+]
+# days are offset so the keys of days before 1970 stay ordered too
+DAY_OFFSET = 1 << 31
+
+
+def get_billing_periods(meter_ids: List[str], boundaries: List[Any]) -> pd.DataFrame:
+    """Get the billing periods between successive boundaries for every meter.
+
+    Args:
+        meter_ids: meters to be billed
+        boundaries: first day of every period followed by the day after the last
+            one, e.g. `pd.date_range("2024-01-15", periods=13, freq="MS")`
+
+    Returns:
+        periods: meter_id, period_start and period_end (inclusive) of every period of
+            every meter
+    """
+    days = pd.to_datetime(pd.Series(boundaries)).dt.normalize()
+    starts = days.iloc[:-1].dt.date.to_numpy()
+    ends = (days.iloc[1:] - pd.Timedelta(days=1)).dt.date.to_numpy()
+    return pd.DataFrame(
+        {
+            "meter_id": np.repeat(np.asarray(meter_ids, dtype=object), len(starts)),
+            "period_start": np.tile(starts, len(meter_ids)),
+            "period_end": np.tile(ends, len(meter_ids)),
+        }
+    )
+
+
+def _to_days(dates: Any) -> np.ndarray:
+    """Convert dates to int64 days since 1970-01-01."""
+    return (
+        pd.to_datetime(pd.Series(dates))
+        .to_numpy()
+        .astype("datetime64[D]")
+        .astype(np.int64)
+    )
+
+
+def _to_keys(meter_codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Combine meter codes and days into int64 keys ordered by meter, then day."""
+    return (meter_codes.astype(np.int64) << 32) | (days + DAY_OFFSET)
+
+
+class BillEngine:
+    """Bill reconstruction engine class."""
+
+    def __init__(self, db_connector: DbConnector) -> None:
+        """Class constructor method.
+
+        Args:
+            db_connector: connector of the database holding the daily tables
+        """
+        self.db_connector = db_connector
+
+    @staticmethod
+    def compute_statements(
+        periods: pd.DataFrame,
+        consumption: pd.DataFrame,
+        rates: pd.DataFrame,
+        standing_charges: pd.DataFrame,
+    ) -> pd.DataFrame:
+        """Compute the statements of billing periods from daily rows.
+
+        Args:
+            periods: meter_id, period_start and period_end (inclusive) of every
+                period, periods may overlap and differ between meters
+            consumption: meter_id, date and consumption (kWh) of the daily readings
+            rates: meter_id, date and unit_rate_inc_vat (p/kWh) of the unit rates
+            standing_charges: meter_id, date and standing_charge_inc_vat (p/day) of
+                the standing charges
+
+        Returns:
+            statements: `STATEMENT_COLUMNS` of every period in the order of `periods`,
+                days without reading are billed the standing charge only, and read days
+                without rate or standing charge in force count as unpriced
+
+        Raises:
+            ValueError: if a period ends before it starts
+        """
+        meter_codes, meter_ids = pd.factorize(periods["meter_id"])
+        period_starts = _to_days(periods["period_start"])
+        lengths = _to_days(periods["period_end"]) - period_starts + 1
+        if (lengths < 1).any():
+            raise ValueError("Billing periods must end on or after their start")
+
+        # one row per day of every period
+        period_index = np.repeat(np.arange(len(periods)), lengths)
+        first_rows = np.cumsum(lengths) - lengths
+        days = period_starts[period_index] + (
+            np.arange(len(period_index)) - first_rows[period_index]
+        )
+        day_meters = meter_codes[period_index]
+        # days start at local midnight, as the stored rates and charges
+        day_starts = pd.Series(days.astype("datetime64[D]")).dt.tz_localize(
+            CONFIG.local_timezone
+        )
+
+        codes = meter_ids.get_indexer(consumption["meter_id"])
+        known = codes >= 0
+        read_keys = _to_keys(codes[known], _to_days(consumption["date"])[known])
+        day_consumption = np.append(
+            consumption["consumption"].to_numpy(dtype=np.float64)[known], np.nan
+        )[pd.Index(read_keys).get_indexer(_to_keys(day_meters, days))]
+
+        def in_force(data: pd.DataFrame, column: str) -> np.ndarray:
+            codes = meter_ids.get_indexer(data["meter_id"])
+            values = np.full(len(days), np.nan)
+            for code in np.unique(codes[codes >= 0]):
+                timeline = RateTimeline.from_frame(
+                    data[codes == code], value_column=column, interval=None
+                )
+                selected = day_meters == code
+                values[selected] = timeline.rate_at(day_starts[selected])
+            return values
+
+        day_rates = in_force(rates, "unit_rate_inc_vat")
+        day_standing_charges = in_force(standing_charges, "standing_charge_inc_vat")
+
+        read = ~np.isnan(day_consumption)
+        day_consumption = np.where(read, day_consumption, 0.0)
+        energy_cost = day_consumption * day_rates
+        unpriced = read & (np.isnan(day_rates) | np.isnan(day_standing_charges))
+
+        def total(weights: np.ndarray) -> np.ndarray:
+            return np.bincount(period_index, weights=weights, minlength=len(periods))
+
+        statements = pd.DataFrame(
+            {
+                "meter_id": periods["meter_id"].to_numpy(),
+                "period_start": periods["period_start"].to_numpy(),
+                "period_end": periods["period_end"].to_numpy(),
+                "days": lengths,
+                "read_days": total(read.astype(np.float64)).astype(np.int64),
+                "unpriced_days": total(unpriced.astype(np.float64)).astype(np.int64),
+                "consumption": total(day_consumption),
+                "energy_cost": total(np.nan_to_num(energy_cost)),
+                "standing_charge": total(np.nan_to_num(day_standing_charges)),
+            }
+        )
+        statements["total_cost"] = (
+            statements["energy_cost"] + statements["standing_charge"]
+        )
+        return statements[STATEMENT_COLUMNS]
+
+    def _read(
+        self,
+        table: Any,
+        column: str,
+        date_from: Optional[date],
+        date_to: date,
+    ) -> pd.DataFrame:
+        """Read the date, meter_id and one value column of a daily table.
+
+        Args:
+            table: daily table
+            column: name of the value column
+            date_from: first day to be read, from the start if None
+            date_to: last day to be read
+
+        Returns:
+            rows: rows of every meter in the range, through the query result cache
+        """
+        self.db_connector.create_table(table.__tablename__)
+        return self.db_connector.read_cached(
+            table, date_from, date_to, columns=["meter_id", column]
+        )
+
+    def get_statements(self, fuel: Fuel, periods: pd.DataFrame) -> pd.DataFrame:
+        """Reconstruct the statements of billing periods from the database.
+
+        Args:
+            fuel: "electricity" or "gas"
+            periods: meter_id, period_start and period_end (inclusive) of every
+                period, e.g. from `get_billing_periods`
+
+        Returns:
+            statements: `STATEMENT_COLUMNS` of every period, costs in pence inc. VAT
+        """
+        if periods.empty:
+            return pd.DataFrame(columns=STATEMENT_COLUMNS)
+        consumption_table, rates_table, standing_charges_table = FUEL_TABLES[fuel]
+        date_from = pd.to_datetime(periods["period_start"]).min().date()
+        date_to = pd.to_datetime(periods["period_end"]).max().date()
+        return self.compute_statements(
+            periods,
+            self._read(consumption_table, "consumption", date_from, date_to),
+            # rates and charges in force at the start may have started before it
+            self._read(rates_table, "unit_rate_inc_vat", None, date_to),
+            self._read(
+                standing_charges_table, "standing_charge_inc_vat", None, date_to
+            ),
+        )
+
+
+if __name__ == "__main__":
+    from energy_analyzer.database.db_models import DEFAULT_METER_ID
+    from energy_analyzer.utils.config import ProjectConfig
+
+    config = ProjectConfig()
+    bill_engine = BillEngine(DbConnector(config.db_url.get_secret_value()))
+
+    print(
+        bill_engine.get_statements(
+            "electricity",
+            get_billing_periods(
+                [DEFAULT_METER_ID], pd.date_range("2024-01-01", periods=13, freq="MS")
+            ),
+        )
+    )
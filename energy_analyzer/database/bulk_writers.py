@@ -0,0 +1,192 @@
+"""Bulk write module.
+
+`DbConnector` writes DataFrames through the fastest path of each backend:
+- PostgreSQL: `COPY ... FROM STDIN` (psycopg2 and psycopg), upserts go through a
+    temporary table and one `INSERT ... SELECT ... ON CONFLICT DO UPDATE`
+- DuckDB: the DataFrame is registered as a view and inserted with one
+    `INSERT [OR REPLACE] INTO ... SELECT`, without leaving the process
+- SQLite and other databases: one multi-row `INSERT` through the table definition,
+    `INSERT ... ON CONFLICT DO UPDATE` for upserts
+
+Values are bound through the table column types, so dates are stored as dates on every
+backend instead of the timestamps strings `DataFrame.to_sql` writes into SQLite.
+"""
+
+import io
+import uuid
+from typing import Any, List
+
+import pandas as pd
+from sqlalchemy import Connection, Table, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def get_columns(table: Table, data: pd.DataFrame) -> List[str]:
+    """Get the table columns present in the data.
+
+    Args:
+        table: destination table
+        data: rows to be written
+
+    Returns:
+        columns: names of the columns to be written, in table order
+    """
+    unknown_columns = set(data.columns) - set(table.columns.keys())
+    if unknown_columns:
+        raise ValueError(f"Columns {sorted(unknown_columns)} not in {table.name}")
+    return [column for column in table.columns.keys() if column in data.columns]
+
+
+def to_records(data: pd.DataFrame, columns: List[str]) -> List[dict[str, Any]]:
+    """Convert rows to parameter dictionaries, missing values become NULL.
+
+    Args:
+        data: rows to be written
+        columns: names of the columns to be written
+
+    Returns:
+        records: one dictionary of Python values per row
+    """
+    values = data[columns].astype(object)
+    return values.where(values.notna(), None).to_dict("records")
+
+
+def _copy_from_dataframe(
+    connection: Connection, table_name: str, data: pd.DataFrame, columns: List[str]
+) -> None:
+    """Stream rows into a PostgreSQL table with COPY.
+
+    Args:
+        connection: PostgreSQL connection
+        table_name: destination table name
+        data: rows to be written
+        columns: names of the columns to be written
+    """
+    buffer = io.StringIO()
+    data[columns].to_csv(buffer, index=False, header=False)
+    quote = connection.dialect.identifier_preparer.quote
+    copy_sql = (
+        f"COPY {quote(table_name)} ({', '.join(map(quote, columns))}) "
+        + "FROM STDIN WITH (FORMAT csv)"
+    )
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+        else:
+            with cursor.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def _insert_from_dataframe(
+    connection: Connection,
+    table: Table,
+    data: pd.DataFrame,
+    columns: List[str],
+    or_replace: bool = False,
+) -> None:
+    """Insert rows into a DuckDB table straight from the DataFrame.
+
+    Args:
+        connection: DuckDB connection
+        table: destination table
+        data: rows to be written
+        columns: names of the columns to be written
+        or_replace: replace rows with the same primary key
+    """
+    view_name = f"_bulk_{uuid.uuid4().hex}"
+    quote = connection.dialect.identifier_preparer.quote
+    column_list = ", ".join(map(quote, columns))
+    duckdb_connection = connection.connection.driver_connection
+    duckdb_connection.register(view_name, data[columns])
+    try:
+        connection.execute(
+            text(
+                f"INSERT {'OR REPLACE ' if or_replace else ''}"
+                + f"INTO {quote(table.name)} ({column_list}) "
+                + f"SELECT {column_list} FROM {view_name}"
+            )
+        )
+    finally:
+        duckdb_connection.unregister(view_name)
+
+
+def bulk_append(connection: Connection, table: Table, data: pd.DataFrame) -> None:
+    """Append rows to a table.
+
+    Args:
+        connection: connection of the write transaction
+        table: destination table
+        data: rows to be written
+    """
+    columns = get_columns(table, data)
+    match connection.dialect.name:
+        case "postgresql" if connection.dialect.driver in ("psycopg2", "psycopg"):
+            _copy_from_dataframe(connection, table.name, data, columns)
+        case "duckdb":
+            _insert_from_dataframe(connection, table, data, columns)
+        case _:
+            connection.execute(insert(table), to_records(data, columns))
+
+
+def bulk_upsert(connection: Connection, table: Table, data: pd.DataFrame) -> None:
+    """Insert rows, or update the stored rows with the same primary key.
+
+    Args:
+        connection: connection of the write transaction
+        table: destination table with a primary key
+        data: rows to be written, including every primary key column
+    """
+    columns = get_columns(table, data)
+    primary_key = [column.name for column in table.primary_key.columns]
+    missing_keys = set(primary_key) - set(columns)
+    if missing_keys:
+        raise ValueError(f"Primary key columns {sorted(missing_keys)} missing")
+    updated = [column for column in columns if column not in primary_key]
+
+    match connection.dialect.name:
+        case "postgresql" if connection.dialect.driver in ("psycopg2", "psycopg"):
+            staging = f"_upsert_{uuid.uuid4().hex}"
+            quote = connection.dialect.identifier_preparer.quote
+            column_list = ", ".join(map(quote, columns))
+            updates = ", ".join(
+                f"{quote(column)} = EXCLUDED.{quote(column)}" for column in updated
+            )
+            connection.execute(
+                text(
+                    f"CREATE TEMP TABLE {staging} "
+                    + f"(LIKE {quote(table.name)}) ON COMMIT DROP"
+                )
+            )
+            _copy_from_dataframe(connection, staging, data, columns)
+            connection.execute(
+                text(
+                    f"INSERT INTO {quote(table.name)} ({column_list}) "
+                    + f"SELECT {column_list} FROM {staging} "
+                    + f"ON CONFLICT ({', '.join(map(quote, primary_key))}) "
+                    + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+                )
+            )
+        case "duckdb":
+            _insert_from_dataframe(connection, table, data, columns, or_replace=True)
+        case "postgresql" | "sqlite":
+            dialect_insert = (
+                postgresql.insert
+                if connection.dialect.name == "postgresql"
+                else sqlite.insert
+            )
+            stmt = dialect_insert(table)
+            stmt = (
+                stmt.on_conflict_do_update(
+                    index_elements=primary_key,
+                    set_={column: stmt.excluded[column] for column in updated},
+                )
+                if updated
+                else stmt.on_conflict_do_nothing(index_elements=primary_key)
+            )
+            connection.execute(stmt, to_records(data, columns))
+        case name:
+            raise NotImplementedError(f"Upsert is not supported on {name}")
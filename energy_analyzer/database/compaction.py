@@ -0,0 +1,383 @@
+"""Detail readings compaction module.
+
+Detail tables (half-hourly consumption, 5 minute inverter telemetry) grow by thousands
+of rows per meter and month. Rows older than `compaction_max_age_days` are rolled up
+into `reading_rollups`, one row per table, meter (or inverter), value column and hour
+or day holding the sum, min, max and count of the readings, and are then removed from
+the detail table. With `compaction_archive_enabled` the removed rows are first written
+to a cold Parquet archive, and are only deleted once the file is complete:
+
+    <compaction_archive_dir>/<table>/year=<YYYY>/month=<MM>/part-<start>-<end>.parquet
+
+Compaction is incremental: detail tables only hold rows that haven't been compacted
+yet, and readings arriving late for an already compacted bucket are merged into its
+rollup. Every month is compacted in its own transaction. Half-hourly import and
+telemetry rows are kept until the solar self-consumption analysis has processed them.
+"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Literal, Optional
+
+import pandas as pd
+from pydantic import BaseModel
+from sqlalchemy import Connection, Float, Table, delete, func, select
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    Base,
+    ElectricityHalfHourlyConsumptionTable,
+    GasHalfHourlyConsumptionTable,
+    ReadingRollupTable,
+    SolisTelemetryTable,
+)
+from energy_analyzer.database.self_consumption import SelfConsumptionManager
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+GRAIN_FREQUENCIES = {"hour": "h", "day": "D"}
+ROLLUP_COLUMNS = [
+    "series",
+    "field",
+    "grain",
+    "bucket_start",
+    "value_sum",
+    "value_min",
+    "value_max",
+    "value_count",
+    "meter_id",
+]
+
+
+class CompactionPolicy(BaseModel):
+    """Detail table compaction policy dataclass."""
+
+    table_name: str
+    timestamp_column: str
+    value_columns: List[str]
+    meter_column: str = "meter_id"
+    grain: Literal["hour", "day"] = "hour"
+    max_age_days: int = CONFIG.compaction_max_age_days
+    # rows read by `SelfConsumptionManager.refresh` are kept until it has run
+    self_consumption_input: bool = False
+
+
+COMPACTION_POLICIES = [
+    CompactionPolicy(
+        table_name=ElectricityHalfHourlyConsumptionTable.__tablename__,
+        timestamp_column="interval_start",
+        value_columns=["consumption"],
+        self_consumption_input=True,
+    ),
+    CompactionPolicy(
+        table_name=GasHalfHourlyConsumptionTable.__tablename__,
+        timestamp_column="interval_start",
+        value_columns=["consumption"],
+    ),
+    CompactionPolicy(
+        table_name=SolisTelemetryTable.__tablename__,
+        timestamp_column="recorded_at",
+        value_columns=[
+            column.name
+            for column in SolisTelemetryTable.__table__.columns
+            if isinstance(column.type, Float)
+        ],
+        meter_column="sn",
+        self_consumption_input=True,
+    ),
+]
+
+
+def aggregate_readings(detail: pd.DataFrame, policy: CompactionPolicy) -> pd.DataFrame:
+    """Aggregate detail readings into rollup rows.
+
+    Args:
+        detail: detail rows with the timestamp, meter and value columns of the policy
+        policy: compaction policy of the detail table
+
+    Returns:
+        rollups: rows in the `reading_rollups` layout, missing readings are skipped
+    """
+    readings = (
+        detail.rename(columns={policy.meter_column: "meter_id"})
+        .melt(
+            id_vars=[policy.timestamp_column, "meter_id"],
+            value_vars=policy.value_columns,
+            var_name="field",
+            value_name="value",
+        )
+        .dropna(subset=["value"])
+    )
+    readings["bucket_start"] = pd.to_datetime(
+        readings[policy.timestamp_column]
+    ).dt.floor(GRAIN_FREQUENCIES[policy.grain])
+
+    rollups = readings.groupby(
+        ["meter_id", "field", "bucket_start"], as_index=False
+    ).agg(
+        value_sum=("value", "sum"),
+        value_min=("value", "min"),
+        value_max=("value", "max"),
+        value_count=("value", "count"),
+    )
+    return rollups.assign(series=policy.table_name, grain=policy.grain)[ROLLUP_COLUMNS]
+
+
+def merge_rollups(rollups: pd.DataFrame) -> pd.DataFrame:
+    """Merge rollup rows of the same bucket.
+
+    Args:
+        rollups: rollup rows, possibly several per series, field, grain and bucket
+
+    Returns:
+        rollups: one rollup row per series, meter, field, grain and bucket
+    """
+    return rollups.groupby(
+        ["series", "meter_id", "field", "grain", "bucket_start"], as_index=False
+    ).agg(
+        value_sum=("value_sum", "sum"),
+        value_min=("value_min", "min"),
+        value_max=("value_max", "max"),
+        value_count=("value_count", "sum"),
+    )[ROLLUP_COLUMNS]
+
+
+class Compactor:
+    """Detail readings compactor class."""
+
+    def __init__(
+        self, db_connector: DbConnector, archive_dir: Optional[str | Path] = None
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            db_connector: connector of the database holding the detail tables
+            archive_dir: cold archive directory, `compaction_archive_dir` by default
+        """
+        self.db_connector = db_connector
+        self.archive_dir = Path(archive_dir or CONFIG.compaction_archive_dir)
+
+    def _create_tables(self) -> None:
+        """Create or migrate the detail and rollup tables."""
+        for policy in COMPACTION_POLICIES:
+            self.db_connector.create_table(policy.table_name)
+        self.db_connector.create_table(ReadingRollupTable.__tablename__)
+
+    @staticmethod
+    def _get_table(policy: CompactionPolicy) -> Table:
+        """Get the detail table of a policy."""
+        return Base.metadata.tables[policy.table_name]
+
+    def _read_detail(
+        self, policy: CompactionPolicy, start: datetime, end: datetime
+    ) -> pd.DataFrame:
+        """Read the detail rows of a time window.
+
+        Args:
+            policy: compaction policy of the detail table
+            start: first timestamp to be read (inclusive)
+            end: last timestamp to be read (exclusive)
+
+        Returns:
+            detail: timestamp, meter and value columns of the window
+        """
+        table = self._get_table(policy)
+        timestamp = table.columns[policy.timestamp_column]
+        stmt = select(
+            timestamp,
+            table.columns[policy.meter_column],
+            *(table.columns[column] for column in policy.value_columns),
+        ).where(timestamp >= start, timestamp < end)
+        with self.db_connector.session_scope(read_only=True) as session:
+            return pd.DataFrame(
+                session.execute(stmt).all(), columns=stmt.selected_columns.keys()
+            )
+
+    def _archive(
+        self, policy: CompactionPolicy, detail: pd.DataFrame, start: datetime
+    ) -> Path:
+        """Write compacted detail rows to the cold Parquet archive.
+
+        Args:
+            policy: compaction policy of the detail table
+            detail: detail rows of one month
+            start: first timestamp of the month
+
+        Returns:
+            path: written Parquet file
+        """
+        timestamps = pd.to_datetime(detail[policy.timestamp_column])
+        file_name = (
+            f"part-{timestamps.min():%Y%m%dT%H%M}-{timestamps.max():%Y%m%dT%H%M}"
+        )
+        path = (
+            self.archive_dir
+            / policy.table_name
+            / f"year={start:%Y}"
+            / f"month={start:%m}"
+            / f"{file_name}.parquet"
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # a partly written file is never taken for an archived month
+        temporary_path = path.with_suffix(".tmp")
+        detail.to_parquet(temporary_path, index=False)
+        temporary_path.replace(path)
+        return path
+
+    def _write_rollups(
+        self, connection: Connection, policy: CompactionPolicy, rollups: pd.DataFrame
+    ) -> None:
+        """Merge new rollups with the stored ones of the same buckets.
+
+        Args:
+            connection: connection of the compaction transaction
+            policy: compaction policy of the detail table
+            rollups: new rollup rows
+        """
+        rollup_table = ReadingRollupTable.__table__
+        in_buckets = (
+            rollup_table.c.series == policy.table_name,
+            rollup_table.c.grain == policy.grain,
+            rollup_table.c.bucket_start >= rollups["bucket_start"].min(),
+            rollup_table.c.bucket_start <= rollups["bucket_start"].max(),
+        )
+        stmt = select(*rollup_table.columns).where(*in_buckets)
+        stored = pd.DataFrame(connection.execute(stmt).all(), columns=ROLLUP_COLUMNS)
+        if not stored.empty:
+            stored["bucket_start"] = pd.to_datetime(stored["bucket_start"])
+            rollups = merge_rollups(pd.concat([stored, rollups], ignore_index=True))
+
+        connection.execute(delete(rollup_table).where(*in_buckets))
+        rollups.to_sql(rollup_table.name, connection, if_exists="append", index=False)
+
+    def compact(self, policy: CompactionPolicy, now: Optional[datetime] = None) -> int:
+        """Compact the detail rows older than the policy maximum age.
+
+        Inputs of the self-consumption analysis are only compacted up to the first
+        interval it may still process.
+
+        Args:
+            policy: compaction policy of the detail table
+            now: current UTC time, used to compute the cut-off
+
+        Returns:
+            rows: number of detail rows compacted
+        """
+        self._create_tables()
+        table = self._get_table(policy)
+        timestamp = table.columns[policy.timestamp_column]
+        now = pd.Timestamp(now) if now else pd.Timestamp.now(tz="UTC").tz_localize(None)
+        cutoff = now - pd.Timedelta(days=policy.max_age_days)
+        if policy.self_consumption_input and (
+            pending_from := SelfConsumptionManager(self.db_connector).get_pending_from()
+        ):
+            cutoff = min(cutoff, pd.Timestamp(pending_from))
+        # only whole buckets are compacted
+        cutoff = cutoff.floor(GRAIN_FREQUENCIES[policy.grain])
+
+        with self.db_connector.session_scope(read_only=True) as session:
+            oldest = session.execute(
+                select(func.min(timestamp)).where(timestamp < cutoff)
+            ).scalar()
+        if oldest is None:
+            return 0
+
+        compacted = 0
+        month_start = pd.Timestamp(oldest).to_period("M").start_time
+        while month_start < cutoff:
+            month_end = min(month_start + pd.DateOffset(months=1), cutoff)
+            detail = self._read_detail(
+                policy, month_start.to_pydatetime(), month_end.to_pydatetime()
+            )
+            if not detail.empty:
+                if CONFIG.compaction_archive_enabled:
+                    self._archive(policy, detail, month_start)
+                with self.db_connector.engine.begin() as connection:
+                    self._write_rollups(
+                        connection, policy, aggregate_readings(detail, policy)
+                    )
+                    connection.execute(
+                        delete(table).where(
+                            timestamp >= month_start.to_pydatetime(),
+                            timestamp < month_end.to_pydatetime(),
+                        )
+                    )
+                for table_name in (policy.table_name, ReadingRollupTable.__tablename__):
+                    self.db_connector.query_cache.invalidate(
+                        table_name, month_start, month_end
+                    )
+                compacted += len(detail)
+            month_start = month_end
+
+        logging.info(f"Compacted {compacted} rows of {policy.table_name}.")
+        return compacted
+
+    def compact_all(self, now: Optional[datetime] = None) -> dict[str, int]:
+        """Compact every detail table with a compaction policy.
+
+        Args:
+            now: current UTC time, used to compute the cut-offs
+
+        Returns:
+            rows: number of detail rows compacted per table
+        """
+        return {
+            policy.table_name: self.compact(policy, now)
+            for policy in COMPACTION_POLICIES
+        }
+
+    def get_rollups(
+        self,
+        policy: CompactionPolicy,
+        start: datetime,
+        end: datetime,
+        meter_id: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Get the rollups of a time window, compacted or not.
+
+        Buckets still in the detail table are aggregated on the fly, so long-range
+        queries read rollups whatever the age of the readings.
+
+        Args:
+            policy: compaction policy of the detail table
+            start: first bucket to be read (inclusive)
+            end: last timestamp to be read (exclusive)
+            meter_id: meter (inverter serial number for telemetry) of the rollups,
+                every meter by default
+
+        Returns:
+            rollups: rollup rows of the window ordered by meter, field and bucket
+        """
+        self._create_tables()
+        rollup_table = ReadingRollupTable.__table__
+        stmt = select(*rollup_table.columns).where(
+            rollup_table.c.series == policy.table_name,
+            rollup_table.c.grain == policy.grain,
+            rollup_table.c.bucket_start >= start,
+            rollup_table.c.bucket_start < end,
+        )
+        if meter_id is not None:
+            stmt = stmt.where(rollup_table.c.meter_id == meter_id)
+        with self.db_connector.session_scope(read_only=True) as session:
+            stored = pd.DataFrame(session.execute(stmt).all(), columns=ROLLUP_COLUMNS)
+        stored["bucket_start"] = pd.to_datetime(stored["bucket_start"])
+
+        detail = self._read_detail(policy, start, end)
+        if meter_id is not None:
+            detail = detail[detail[policy.meter_column] == meter_id]
+        hot = aggregate_readings(detail, policy)
+        frames = [frame for frame in (stored, hot) if not frame.empty]
+        if not frames:
+            return stored
+        return (
+            merge_rollups(pd.concat(frames, ignore_index=True))
+            .sort_values(["meter_id", "field", "bucket_start"])
+            .reset_index(drop=True)
+        )
+
+
+if __name__ == "__main__":
+    compactor = Compactor(DbConnector(CONFIG.db_url.get_secret_value()))
+
+    print(compactor.compact_all())
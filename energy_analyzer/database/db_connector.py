@@ -1,26 +1,284 @@
-"""Database connector module."""
+"""Database connector module.
+
+Engines are created once per process and database url and shared by every
+`DbConnector`, so connectors are cheap to create anywhere. Each operation runs in its
+own short-lived session. A forked child drops the connections inherited from its
+parent and opens its own.
+
+The backend is picked by the url: PostgreSQL for shared deployments, or an embedded
+in-process database for single households, tests and benchmarks, either SQLite
+(`sqlite:///path.db`, tuned with WAL journaling) or DuckDB (`duckdb:///path.duckdb`,
+needs the `duckdb` extra). Writes use the bulk path of each backend, see
+`energy_analyzer.database.bulk_writers`.
+
+Tables are created on first use, and tables of an existing database are first migrated
+to their model (see `energy_analyzer.database.migrations`).
+
+History is read back with `DbConnector.read_range`, which streams a date range of a
+table through a server-side cursor in fixed size batches, so memory stays bounded
+whatever the length of the history. `DbConnector.read_cached` serves repeated range
+and aggregation queries from the query result cache, which every write through the
+connector invalidates for the dates it touches.
+"""
 
 import logging
-from datetime import date
-from typing import Literal
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Iterator, List, Literal, Optional
 
 import pandas as pd
-from sqlalchemy import create_engine, desc, select
-from sqlalchemy.orm import Session
+import pyarrow as pa
+from sqlalchemy import Engine, Table, create_engine, delete, desc, event, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from energy_analyzer.database.bulk_writers import bulk_append, bulk_upsert
+from energy_analyzer.database.db_models import DEFAULT_METER_ID, Base, OctopusTables
+from energy_analyzer.database.migrations import migrate_table
+from energy_analyzer.database.partitions import PartitionManager, is_partitioned
+from energy_analyzer.database.query_cache import (
+    QueryCache,
+    QueryCacheKey,
+    get_query_cache,
+    get_time_column,
+)
+from energy_analyzer.utils.config import ProjectConfig
+from energy_analyzer.utils.data_models import BatchValidator
+
+CONFIG = ProjectConfig()
+EMBEDDED_BACKENDS = ("sqlite", "duckdb")
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -64000,
+}
+
+_ENGINES: dict[tuple[str, bool], Engine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def _get_pool_options(database_url: str) -> dict[str, Any]:
+    """Get the connection pool options for a database url.
+
+    Args:
+        database_url: SQLAlchemy database url
+
+    Returns:
+        pool_options: keyword arguments of `create_engine`
+    """
+    if make_url(database_url).get_backend_name() in EMBEDDED_BACKENDS:
+        # embedded databases pick their own pool class depending on the file/memory
+        # database
+        return {"pool_pre_ping": CONFIG.db_pool_pre_ping}
+    return {
+        "pool_size": CONFIG.db_pool_size,
+        "max_overflow": CONFIG.db_max_overflow,
+        "pool_pre_ping": CONFIG.db_pool_pre_ping,
+        "pool_recycle": CONFIG.db_pool_recycle,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """Tune every new SQLite connection for bulk appends and concurrent reads."""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+
+def get_engine(database_url: str, echo: bool = False) -> Engine:
+    """Get the pooled engine of this process for a database url.
+
+    Args:
+        database_url: SQLAlchemy database url
+        echo: log all the statements
+
+    Returns:
+        engine: engine shared within the process
+    """
+    key = (database_url, echo)
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            engine = create_engine(
+                database_url, echo=echo, **_get_pool_options(database_url)
+            )
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _set_sqlite_pragmas)
+            _ENGINES[key] = engine
+        return engine
+
+
+def _dispose_engines_after_fork() -> None:
+    """Drop the pooled connections inherited from the parent process."""
+    global _ENGINES_LOCK
+    _ENGINES_LOCK = threading.Lock()
+    for engine in _ENGINES.values():
+        # close=False leaves the parent's connections open for the parent
+        engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_dispose_engines_after_fork)
+
 
-from energy_analyzer.database.db_models import OctopusTables
+def with_meter_id(data: pd.DataFrame, table: Table) -> pd.DataFrame:
+    """Assign rows without a meter to the default meter.
+
+    Args:
+        data: rows to be written
+        table: destination table
+
+    Returns:
+        data: rows with a `meter_id` column if the table has one
+    """
+    if "meter_id" in table.columns and "meter_id" not in data:
+        return data.assign(meter_id=DEFAULT_METER_ID)
+    return data
 
 
 class DbConnector:
     """Database connector."""
 
-    def __init__(self, database_url: str, echo: bool = False):
-        """Class constructor method."""
-        self.engine = create_engine(
-            database_url,
-            echo=echo,
+    def __init__(
+        self,
+        database_url: str,
+        echo: bool = False,
+        query_cache: Optional[QueryCache] = None,
+    ):
+        """Class constructor method.
+
+        Args:
+            database_url: SQLAlchemy database url
+            echo: log all the statements
+            query_cache: query result cache, the one of the database in this process
+                by default
+        """
+        self.engine = get_engine(database_url, echo=echo)
+        self.query_cache = query_cache or get_query_cache(database_url)
+        self.session_factory = sessionmaker(self.engine, expire_on_commit=False)
+        self.partition_manager = PartitionManager(self.engine)
+        self._created_tables: set[str] = set()
+        self._validators: dict[str, BatchValidator] = {}
+
+    @contextmanager
+    def session_scope(self, read_only: bool = False) -> Iterator[Session]:
+        """Open a short-lived session for one operation.
+
+        The transaction is committed on success and rolled back on error. Read-only
+        sessions are always rolled back and, on PostgreSQL, run in a READ ONLY
+        transaction.
+
+        Args:
+            read_only: the operation only reads data
+
+        Yields:
+            session: database session
+        """
+        session = self.session_factory()
+        try:
+            if read_only and self.engine.dialect.name == "postgresql":
+                session.execute(text("SET TRANSACTION READ ONLY"))
+            yield session
+            if read_only:
+                session.rollback()
+            else:
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def create_table(self, table_name: str) -> None:
+        """Create a table, or migrate the existing one to its model, once.
+
+        Partitioned tables get the partitions of the current month and the months
+        ahead, so rows of today can be written by any connection.
+
+        Args:
+            table_name: name of a `db_models` table
+        """
+        if table_name not in self._created_tables:
+            migrate_table(self.engine, table_name)
+            Base.metadata.tables[table_name].create(self.engine, checkfirst=True)
+            self.partition_manager.ensure_partitions(
+                table_name, date.today(), date.today()
+            )
+            self._created_tables.add(table_name)
+
+    def _prepare_table(self, data: pd.DataFrame, table_name: str) -> None:
+        """Create a table and the partitions of new rows before writing them.
+
+        Args:
+            data: rows to be written
+            table_name: name of a `db_models` table
+        """
+        self.create_table(table_name)
+        if "date" in data:
+            self.partition_manager.ensure_partitions(
+                table_name, data["date"].min(), data["date"].max()
+            )
+
+    def apply_retention(self) -> dict[str, List[str]]:
+        """Detach the partitions past `db_partition_retention_months` of every table.
+
+        Run once per asset run, writes don't check the retention.
+
+        Returns:
+            detached: names of the detached partitions of every table with any
+        """
+        detached = {}
+        for table in Base.metadata.sorted_tables:
+            if is_partitioned(table) and (
+                partitions := self.partition_manager.apply_retention(table.name)
+            ):
+                self.query_cache.invalidate(table.name)
+                detached[table.name] = partitions
+        return detached
+
+    def validate(self, data: pd.DataFrame, table_name: str) -> None:
+        """Validate rows before writing them to a `db_models` table.
+
+        Args:
+            data: rows to be written
+            table_name: name of the table
+
+        Raises:
+            BatchValidationError: if a column has values of the wrong type, missing
+                or implausible values, or if rows share a primary key
+        """
+        if not CONFIG.db_validate_on_ingest:
+            return
+        if table_name not in self._validators:
+            self._validators[table_name] = BatchValidator.for_table(table_name)
+        self._validators[table_name].validate(data).raise_for_errors()
+
+    def invalidate_cache(self, data: Optional[pd.DataFrame], table_name: str) -> None:
+        """Drop the cached query results the rows written to a table may change.
+
+        Args:
+            data: rows written, the whole table is invalidated if None or undated
+            table_name: name of the written table
+        """
+        table = Base.metadata.tables.get(table_name)
+        time_column = get_time_column(table) if table is not None else None
+        meter_ids = (
+            set(data["meter_id"].unique())
+            if data is not None and "meter_id" in data
+            else None
         )
-        self.session = Session(self.engine)
+        if data is None or time_column is None or time_column not in data:
+            self.query_cache.invalidate(table_name, meter_ids=meter_ids)
+        else:
+            self.query_cache.invalidate(
+                table_name,
+                data[time_column].min(),
+                data[time_column].max(),
+                meter_ids=meter_ids,
+            )
 
     def add_data_to_db(
         self,
@@ -30,44 +288,247 @@ class DbConnector:
     ) -> None:
         """Add data in DataFrame form to respective database table.
 
+        Rows of `db_models` tables are validated, then written with the bulk append
+        path of the backend, after the monthly partitions of the new rows are
+        created on partitioned tables. "replace" empties the table but keeps its
+        definition.
+
         Args:
             data: new data to be added to db table
             table_name: name of the table to which data to be added
+            if_exists: what to do with the rows already in the table
 
         Returns:
             nothing: adds data to database table
         """
-        if not data.empty:
-            data.to_sql(table_name, self.engine, if_exists=if_exists, index=False)
-        else:
+        if data.empty:
             logging.info("No new data to be added to db.")
+            return
+
+        table = Base.metadata.tables.get(table_name)
+        if table is not None:
+            data = with_meter_id(data, table)
+        if table is None or if_exists == "fail":
+            with self.engine.begin() as connection:
+                data.to_sql(table_name, connection, if_exists=if_exists, index=False)
+        else:
+            self.validate(data, table_name)
+            self._prepare_table(data, table_name)
+            with self.engine.begin() as connection:
+                if if_exists == "replace":
+                    connection.execute(delete(table))
+                bulk_append(connection, table, data)
+        self.invalidate_cache(None if if_exists == "replace" else data, table_name)
+
+    def upsert_data_to_db(self, data: pd.DataFrame, table_name: str) -> None:
+        """Insert rows, or update the stored rows with the same primary key.
+
+        Args:
+            data: rows of a `db_models` table, including the primary key columns
+            table_name: name of the table to which data to be written
+        """
+        if data.empty:
+            logging.info("No new data to be upserted to db.")
+            return
+
+        table = Base.metadata.tables[table_name]
+        data = with_meter_id(data, table)
+        self.validate(data, table_name)
+        self._prepare_table(data, table_name)
+        with self.engine.begin() as connection:
+            bulk_upsert(connection, table, data)
+        self.invalidate_cache(data, table_name)
 
-    def get_latest_row(self, table: OctopusTables, column_name: str = "date") -> date:
+    def get_latest_row(
+        self,
+        table: OctopusTables,
+        column_name: str = "date",
+        meter_id: Optional[str] = None,
+    ) -> date:
         """Get latest row from a specific column.
 
         Args:
             table: a selected table to get the data from
             column_name: a name of the column from which the last row to be retrieved
+            meter_id: only consider the rows of this meter, e.g. its watermark
 
         Returns:
             the latest record of specified table, column
         """
-        with self.session as session:
+        self.create_table(table.__tablename__)
+        with self.session_scope(read_only=True) as session:
             table_column = table.db_table().columns.__getattr__(column_name)
             stmt = select(table_column).order_by(desc(table_column)).limit(1)
-            result = session.execute(stmt)
-            session.commit()
-            return result.scalar_one()
+            if meter_id is not None:
+                stmt = stmt.where(table.__table__.c.meter_id == meter_id)
+            return session.execute(stmt).scalar_one()
+
+    def read_range(
+        self,
+        table: OctopusTables,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        columns: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        as_arrow: bool = False,
+        column_name: str = "date",
+        meter_id: Optional[str] = None,
+    ) -> Iterator[pd.DataFrame | pa.RecordBatch]:
+        """Stream a date range of a table in batches.
+
+        Only the requested columns are selected and the range is filtered by the
+        database. Rows are fetched through a server-side cursor (`stream_results`), so
+        at most one batch is held in memory at a time.
+
+        Args:
+            table: a selected table to read the data from
+            date_from: first date to be read (inclusive), from the start by default
+            date_to: last date to be read (inclusive), up to the end by default, a
+                date includes every timestamp of that day
+            columns: names of the columns to be read, all columns by default
+            batch_size: number of rows per batch, `db_read_batch_size` by default
+            as_arrow: yield Arrow record batches instead of DataFrames
+            column_name: name of the date column the range applies to
+            meter_id: only read the rows of this meter, rows of every meter if None
+
+        Yields:
+            batch: rows of the range ordered by date
+        """
+        db_table = table.__table__
+        date_column = db_table.columns[column_name]
+        selected_columns = (
+            [db_table.columns[column] for column in columns]
+            if columns
+            else list(db_table.columns)
+        )
+        stmt = select(*selected_columns).order_by(date_column)
+        if date_from is not None:
+            stmt = stmt.where(date_column >= date_from)
+        if date_to is not None and not isinstance(date_to, datetime):
+            # the last day ends before midnight, not at it
+            stmt = stmt.where(date_column < date_to + timedelta(days=1))
+        elif date_to is not None:
+            stmt = stmt.where(date_column <= date_to)
+        if meter_id is not None:
+            stmt = stmt.where(db_table.c.meter_id == meter_id)
+
+        batch_size = batch_size or CONFIG.db_read_batch_size
+        self.create_table(db_table.name)
+        with self.engine.connect() as connection:
+            if self.engine.dialect.name == "postgresql":
+                connection.execute(text("SET TRANSACTION READ ONLY"))
+            result = connection.execution_options(
+                stream_results=True, yield_per=batch_size
+            ).execute(stmt)
+            keys = list(result.keys())
+            for rows in result.partitions():
+                if as_arrow:
+                    yield pa.RecordBatch.from_arrays(
+                        [pa.array(values) for values in zip(*rows)], names=keys
+                    )
+                else:
+                    yield pd.DataFrame(rows, columns=keys)
+
+    def read_cached(
+        self,
+        table: OctopusTables,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        columns: Optional[List[str]] = None,
+        aggregation: Optional[Literal["sum", "mean", "min", "max", "count"]] = None,
+        period: Optional[Literal["day", "week", "month"]] = None,
+        meter_id: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Read a date range of a table, optionally aggregated, through the cache.
+
+        Args:
+            table: a selected table to read the data from
+            date_from: first date (or time) to be read (inclusive), from the start by
+                default
+            date_to: last date (or time) to be read (inclusive), up to the end by
+                default
+            columns: names of the value columns to be read, all columns by default
+            aggregation: aggregation of the value columns, rows as stored if None
+            period: aggregate per day, week (starting on Monday) or month, over the
+                whole range if None
+            meter_id: only read the rows of this meter, rows of every meter if None
+
+        Returns:
+            result: rows of the range, or one aggregated row per period
+        """
+        db_table = table.__table__
+        time_column = get_time_column(db_table) or "date"
+        # a date and the midnight starting it are different bounds of a timestamp range
+        date_from, date_to = [
+            pd.Timestamp(bound).to_pydatetime()
+            if isinstance(bound, datetime)
+            else bound
+            for bound in (date_from, date_to)
+        ]
+        key = QueryCacheKey(
+            db_table.name,
+            date_from,
+            date_to,
+            tuple(columns) if columns else None,
+            aggregation,
+            period,
+            meter_id,
+        )
+        if (
+            CONFIG.query_cache_enabled
+            and (result := self.query_cache.get(key)) is not None
+        ):
+            return result
+
+        selected_columns = [time_column, *columns] if columns else None
+        batches = list(
+            self.read_range(
+                table,
+                date_from,
+                date_to,
+                columns=selected_columns,
+                column_name=time_column,
+                meter_id=meter_id,
+            )
+        )
+        result = (
+            pd.concat(batches, ignore_index=True)
+            if batches
+            else pd.DataFrame(columns=selected_columns or db_table.columns.keys())
+        )
+        if aggregation:
+            values = result.drop(columns=[time_column])
+            if period:
+                times = pd.to_datetime(result[time_column])
+                groups = {
+                    "day": times.dt.normalize(),
+                    "week": times.dt.normalize()
+                    - pd.to_timedelta(times.dt.weekday, unit="D"),
+                    "month": times.dt.to_period("M").dt.start_time,
+                }[period]
+                result = (
+                    values.groupby(groups.rename("period_start"))
+                    .agg(aggregation)
+                    .reset_index()
+                )
+            else:
+                result = values.agg(aggregation).to_frame().T
+
+        if CONFIG.query_cache_enabled:
+            self.query_cache.put(key, result)
+        return result
 
     def reset_database(self) -> None:
         """Reset Database."""
         Base.metadata.drop_all(self.engine)
         Base.metadata.create_all(self.engine)
+        self.partition_manager = PartitionManager(self.engine)
+        self._created_tables.clear()
+        self.query_cache.clear()
 
 
 if __name__ == "__main__":
     from energy_analyzer.database.db_models import (
-        Base,
         ElectricityRatesTable,
         ElectricityWeeklyConsumptionTable2024,
     )
@@ -1,10 +1,26 @@
-"""Database models."""
+"""Database models.
 
-from typing import Type, Union
+On PostgreSQL the rates and daily consumption tables are range partitioned by month on
+`date` (see `energy_analyzer.database.partitions`) and carry a BRIN index on it. Other
+databases ignore both and create plain tables.
 
-from sqlalchemy import Date, Float, String, Table
+Every Octopus table has a `meter_id` primary key column, the id of the meter in the
+meter registry (see `energy_analyzer.octopus_data.meter_registry`). Rows written
+without it belong to the `DEFAULT_METER_ID` meter, the one set in `ProjectConfig`.
+
+The rates tables record the `tariff_code` of the agreement that priced every day, so
+the history of a meter that changed tariff can be stitched into a `RateTimeline` (see
+`energy_analyzer.utils.data_models`). A standing charges row, in pence per day, is in
+force from its `date` until the next row of its meter starts.
+"""
+
+from typing import Any, Type, Union
+
+from sqlalchemy import Date, DateTime, Float, Index, Integer, String, Table
 from sqlalchemy.orm import DeclarativeBase, Mapped, MappedAsDataclass, mapped_column
 
+DEFAULT_METER_ID = "default"
+
 
 class Base(DeclarativeBase, MappedAsDataclass):
     """Tables dafinition base class."""
@@ -15,51 +31,157 @@ class Base(DeclarativeBase, MappedAsDataclass):
         return Table(cls.__tablename__, Base.metadata)
 
 
+def meter_id_column() -> Mapped[str]:
+    """Create the `meter_id` primary key column of a table with one series per meter."""
+    return mapped_column(
+        String, primary_key=True, server_default=DEFAULT_METER_ID, init=False
+    )
+
+
+def partitioned_by_month(table_name: str) -> tuple[Any, ...]:
+    """Get the table arguments of a table range partitioned by month on `date`.
+
+    Args:
+        table_name: name of the partitioned table
+
+    Returns:
+        table_args: `__table_args__` of the table
+    """
+    return (
+        Index(f"ix_{table_name}_date_brin", "date", postgresql_using="brin").ddl_if(
+            dialect="postgresql"
+        ),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
+
 class ElectricityRatesTable(Base):
     """Electricity rates table."""
 
     __tablename__ = "electricity_rates"
+    __table_args__ = partitioned_by_month(__tablename__)
+
+    date: Mapped[Date] = mapped_column(Date, primary_key=True)
+    unit_rate_exc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
+    unit_rate_inc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
+    tariff_code: Mapped[str] = mapped_column(String, nullable=True, default=None)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class ElectricityExportRatesTable(Base):
+    """Electricity export rates table."""
+
+    __tablename__ = "electricity_export_rates"
+    __table_args__ = partitioned_by_month(__tablename__)
 
     date: Mapped[Date] = mapped_column(Date, primary_key=True)
     unit_rate_exc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
     unit_rate_inc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
+    tariff_code: Mapped[str] = mapped_column(String, nullable=True, default=None)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class GasRatesTable(Base):
     """Electricity rates table."""
 
     __tablename__ = "gas_rates"
+    __table_args__ = partitioned_by_month(__tablename__)
 
     date: Mapped[Date] = mapped_column(Date, primary_key=True)
     unit_rate_exc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
     unit_rate_inc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
+    tariff_code: Mapped[str] = mapped_column(String, nullable=True, default=None)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class ElectricityStandingChargesTable(Base):
+    """Electricity standing charges table."""
+
+    __tablename__ = "electricity_standing_charges"
+
+    date: Mapped[Date] = mapped_column(Date, primary_key=True)
+    standing_charge_exc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
+    standing_charge_inc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
+    tariff_code: Mapped[str] = mapped_column(String, nullable=True, default=None)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class GasStandingChargesTable(Base):
+    """Gas standing charges table."""
+
+    __tablename__ = "gas_standing_charges"
+
+    date: Mapped[Date] = mapped_column(Date, primary_key=True)
+    standing_charge_exc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
+    standing_charge_inc_vat: Mapped[Float] = mapped_column(Float, nullable=False)
+    tariff_code: Mapped[str] = mapped_column(String, nullable=True, default=None)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class ElectricityConsumptionTable(Base):
     """Electricity consumption table."""
 
     __tablename__ = "electricity_consumption"
+    __table_args__ = partitioned_by_month(__tablename__)
 
     date: Mapped[Date] = mapped_column(Date, primary_key=True)
     consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class ElectricityExportTable(Base):
     """Electricity export table."""
 
     __tablename__ = "electricity_export"
+    __table_args__ = partitioned_by_month(__tablename__)
 
     date: Mapped[Date] = mapped_column(Date, primary_key=True)
     export_value: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class ElectricityNetFlowTable(Base):
+    """Electricity net flow table, import minus export."""
+
+    __tablename__ = "electricity_net_flow"
+    __table_args__ = partitioned_by_month(__tablename__)
+
+    date: Mapped[Date] = mapped_column(Date, primary_key=True)
+    consumption: Mapped[Float] = mapped_column(Float, nullable=True)
+    export_value: Mapped[Float] = mapped_column(Float, nullable=True)
+    net_consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class GasConsumptionTable(Base):
     """Gas consumption table."""
 
     __tablename__ = "gas_consumption"
+    __table_args__ = partitioned_by_month(__tablename__)
 
     date: Mapped[Date] = mapped_column(Date, primary_key=True)
     consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class ElectricityHalfHourlyConsumptionTable(Base):
+    """Electricity half-hourly consumption table, interval starts in UTC."""
+
+    __tablename__ = "electricity_half_hourly_consumption"
+
+    interval_start: Mapped[DateTime] = mapped_column(DateTime, primary_key=True)
+    consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class GasHalfHourlyConsumptionTable(Base):
+    """Gas half-hourly consumption table, interval starts in UTC."""
+
+    __tablename__ = "gas_half_hourly_consumption"
+
+    interval_start: Mapped[DateTime] = mapped_column(DateTime, primary_key=True)
+    consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class ElectricityWeeklyConsumptionTable2022(Base):
@@ -69,6 +191,7 @@ class ElectricityWeeklyConsumptionTable2022(Base):
 
     week: Mapped[str] = mapped_column(String, primary_key=True)
     consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class ElectricityWeeklyConsumptionTable2023(Base):
@@ -78,6 +201,7 @@ class ElectricityWeeklyConsumptionTable2023(Base):
 
     week: Mapped[str] = mapped_column(String, primary_key=True)
     consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class ElectricityWeeklyConsumptionTable2024(Base):
@@ -87,6 +211,7 @@ class ElectricityWeeklyConsumptionTable2024(Base):
 
     week: Mapped[str] = mapped_column(String, primary_key=True)
     consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class GasWeeklyConsumptionTable2022(Base):
@@ -96,6 +221,7 @@ class GasWeeklyConsumptionTable2022(Base):
 
     week: Mapped[str] = mapped_column(String, primary_key=True)
     consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class GasWeeklyConsumptionTable2023(Base):
@@ -105,6 +231,7 @@ class GasWeeklyConsumptionTable2023(Base):
 
     week: Mapped[str] = mapped_column(String, primary_key=True)
     consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 class GasWeeklyConsumptionTable2024(Base):
@@ -114,13 +241,117 @@ class GasWeeklyConsumptionTable2024(Base):
 
     week: Mapped[str] = mapped_column(String, primary_key=True)
     consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class EnergyRollupTable(Base):
+    """Daily, weekly and monthly consumption and cost rollup table."""
+
+    __tablename__ = "energy_rollups"
+
+    fuel: Mapped[str] = mapped_column(String, primary_key=True)
+    period: Mapped[str] = mapped_column(String, primary_key=True)
+    period_start: Mapped[Date] = mapped_column(Date, primary_key=True)
+    consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    cost_inc_vat: Mapped[Float] = mapped_column(Float, nullable=True)
+    days: Mapped[int] = mapped_column(Integer, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class ReadingRollupTable(Base):
+    """Compacted detail readings table."""
+
+    __tablename__ = "reading_rollups"
+
+    series: Mapped[str] = mapped_column(String, primary_key=True)
+    field: Mapped[str] = mapped_column(String, primary_key=True)
+    grain: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket_start: Mapped[DateTime] = mapped_column(DateTime, primary_key=True)
+    value_sum: Mapped[Float] = mapped_column(Float, nullable=False)
+    value_min: Mapped[Float] = mapped_column(Float, nullable=False)
+    value_max: Mapped[Float] = mapped_column(Float, nullable=False)
+    value_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    meter_id: Mapped[str] = meter_id_column()
+
+
+class SolisTelemetryTable(Base):
+    """Solis inverter telemetry table."""
+
+    __tablename__ = "solis_telemetry"
+
+    sn: Mapped[str] = mapped_column(String, primary_key=True)
+    recorded_at: Mapped[DateTime] = mapped_column(DateTime, primary_key=True)
+    ac_power: Mapped[Float] = mapped_column(Float, nullable=True)
+    ac_voltage: Mapped[Float] = mapped_column(Float, nullable=True)
+    ac_current: Mapped[Float] = mapped_column(Float, nullable=True)
+    ac_frequency: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_voltage_pv1: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_voltage_pv2: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_voltage_pv3: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_voltage_pv4: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_current_pv1: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_current_pv2: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_current_pv3: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_current_pv4: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_power_pv1: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_power_pv2: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_power_pv3: Mapped[Float] = mapped_column(Float, nullable=True)
+    dc_power_pv4: Mapped[Float] = mapped_column(Float, nullable=True)
+    inverter_temperature: Mapped[Float] = mapped_column(Float, nullable=True)
+    daily_generation: Mapped[Float] = mapped_column(Float, nullable=True)
+    monthly_generation: Mapped[Float] = mapped_column(Float, nullable=True)
+    annual_generation: Mapped[Float] = mapped_column(Float, nullable=True)
+    total_generation: Mapped[Float] = mapped_column(Float, nullable=True)
+    grid_power: Mapped[Float] = mapped_column(Float, nullable=True)
+    grid_sell_today: Mapped[Float] = mapped_column(Float, nullable=True)
+    grid_purchased_today: Mapped[Float] = mapped_column(Float, nullable=True)
+    grid_sell_total: Mapped[Float] = mapped_column(Float, nullable=True)
+    grid_purchased_total: Mapped[Float] = mapped_column(Float, nullable=True)
+    load_power: Mapped[Float] = mapped_column(Float, nullable=True)
+    load_total: Mapped[Float] = mapped_column(Float, nullable=True)
+
+
+class SolisDailyGenerationTable(Base):
+    """Solis inverter daily generation table."""
+
+    __tablename__ = "solis_daily_generation"
+
+    sn: Mapped[str] = mapped_column(String, primary_key=True)
+    date: Mapped[Date] = mapped_column(Date, primary_key=True)
+    generation: Mapped[Float] = mapped_column(Float, nullable=True)
+    grid_sell: Mapped[Float] = mapped_column(Float, nullable=True)
+    grid_purchased: Mapped[Float] = mapped_column(Float, nullable=True)
+    load: Mapped[Float] = mapped_column(Float, nullable=True)
+
+
+class SolarSelfConsumptionTable(Base):
+    """Half-hourly solar self-consumption table, interval starts in UTC."""
+
+    __tablename__ = "solar_self_consumption"
+
+    interval_start: Mapped[DateTime] = mapped_column(DateTime, primary_key=True)
+    generation: Mapped[Float] = mapped_column(Float, nullable=False)
+    grid_import: Mapped[Float] = mapped_column(Float, nullable=False)
+    grid_export: Mapped[Float] = mapped_column(Float, nullable=False)
+    self_consumption: Mapped[Float] = mapped_column(Float, nullable=False)
+    load: Mapped[Float] = mapped_column(Float, nullable=False)
+    unit_rate_inc_vat: Mapped[Float] = mapped_column(Float, nullable=True)
+    savings_inc_vat: Mapped[Float] = mapped_column(Float, nullable=True)
+    meter_id: Mapped[str] = meter_id_column()
 
 
 OctopusTables = Union[
     Type[ElectricityRatesTable],
     Type[ElectricityConsumptionTable],
+    Type[ElectricityExportRatesTable],
+    Type[ElectricityExportTable],
+    Type[ElectricityNetFlowTable],
     Type[GasRatesTable],
     Type[GasConsumptionTable],
+    Type[ElectricityStandingChargesTable],
+    Type[GasStandingChargesTable],
+    Type[ElectricityHalfHourlyConsumptionTable],
+    Type[GasHalfHourlyConsumptionTable],
     Type[ElectricityWeeklyConsumptionTable2022],
     Type[ElectricityWeeklyConsumptionTable2023],
     Type[ElectricityWeeklyConsumptionTable2024],
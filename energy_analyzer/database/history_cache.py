@@ -0,0 +1,172 @@
+"""Memory-mapped history cache module.
+
+Keeps one uncompressed Arrow IPC file per series of `HISTORY_SERIES`:
+
+    <history_cache_dir>/<fuel>_<series>.arrow
+
+Loading maps the file into memory: the columns point straight at the page cache, so
+opening years of half-hourly readings costs a few system calls, without parsing or a
+Python object per row. The ingestion assets append the rows they write to the
+database, so the cache never needs a full reload from the API or the database;
+`refresh_from_db` catches up with rows written by other means.
+"""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import DEFAULT_METER_ID, Base
+from energy_analyzer.database.history_store import (
+    HISTORY_SERIES,
+    HistorySeries,
+    get_arrow_schema,
+    get_model,
+)
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+
+
+class HistoryCache:
+    """Memory-mapped history cache class."""
+
+    def __init__(self, root: Optional[str | Path] = None) -> None:
+        """Class constructor method.
+
+        Args:
+            root: cache directory, `ProjectConfig.history_cache_dir` by default
+        """
+        self.root = Path(root or CONFIG.history_cache_dir)
+
+    @staticmethod
+    def _get_series(fuel: str, series: str) -> HistorySeries:
+        """Get a cached series by fuel and series name."""
+        return next(
+            history_series
+            for history_series in HISTORY_SERIES
+            if (history_series.fuel, history_series.series) == (fuel, series)
+        )
+
+    def _get_path(self, history_series: HistorySeries) -> Path:
+        """Get the cache file of a series."""
+        return self.root / f"{history_series.fuel}_{history_series.series}.arrow"
+
+    def load(self, fuel: str, series: str) -> pa.Table:
+        """Map the cached rows of a series.
+
+        Args:
+            fuel: "electricity", "gas" or "all" for the rollups
+            series: series name, e.g. "rates" or "consumption"
+
+        Returns:
+            history: cached rows ordered by time, backed by the memory-mapped file
+        """
+        history_series = self._get_series(fuel, series)
+        path = self._get_path(history_series)
+        if not path.exists():
+            return get_arrow_schema(
+                Base.metadata.tables[history_series.table_name]
+            ).empty_table()
+        # the returned buffers keep the mapping open
+        return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+
+    def append(self, fuel: str, series: str, data: pd.DataFrame | pa.Table) -> int:
+        """Add rows to the cache of a series.
+
+        Rows with the time and meter of an already cached row replace it.
+
+        Args:
+            fuel: "electricity", "gas" or "all" for the rollups
+            series: series name, e.g. "rates" or "consumption"
+            data: new rows with columns of the series table, missing ones are null
+                and a missing meter_id is the default meter
+
+        Returns:
+            rows: number of cached rows
+        """
+        history_series = self._get_series(fuel, series)
+        schema = get_arrow_schema(Base.metadata.tables[history_series.table_name])
+        if isinstance(data, pd.DataFrame):
+            data = pa.Table.from_pandas(data, preserve_index=False)
+        if data.num_rows == 0:
+            return self.load(fuel, series).num_rows
+        new_rows = pa.table(
+            [
+                data.column(field.name).cast(field.type)
+                if field.name in data.column_names
+                else pa.repeat(DEFAULT_METER_ID, data.num_rows)
+                if field.name == "meter_id"
+                else pa.nulls(data.num_rows, field.type)
+                for field in schema
+            ],
+            schema=schema,
+        )
+
+        cached = self.load(fuel, series)
+        time_column = history_series.time_column
+        kept = cached
+        for meter_id in pc.unique(new_rows.column("meter_id")):
+            meter_times = new_rows.filter(
+                pc.equal(new_rows.column("meter_id"), meter_id)
+            ).column(time_column)
+            kept = kept.filter(
+                pc.invert(
+                    pc.and_(
+                        pc.equal(kept.column("meter_id"), meter_id),
+                        pc.is_in(kept.column(time_column), meter_times),
+                    )
+                )
+            )
+        history = (
+            pa.concat_tables([kept, new_rows]).sort_by(time_column).combine_chunks()
+        )
+
+        path = self._get_path(history_series)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with pa.OSFile(str(temporary_path), "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                writer.write_table(history)
+        os.replace(temporary_path, path)
+        return history.num_rows
+
+    def refresh_from_db(self, db_connector: DbConnector, fuel: str, series: str) -> int:
+        """Append the rows of the database newer than the cached ones.
+
+        Args:
+            db_connector: connector of the database holding the series table
+            fuel: "electricity", "gas" or "all" for the rollups
+            series: series name, e.g. "rates" or "consumption"
+
+        Returns:
+            rows: number of cached rows
+        """
+        history_series = self._get_series(fuel, series)
+        cached = self.load(fuel, series)
+        date_from = (
+            pc.max(cached.column(history_series.time_column)).as_py()
+            if cached.num_rows
+            else None
+        )
+        batches = list(
+            db_connector.read_range(
+                get_model(history_series.table_name),
+                date_from=date_from,
+                as_arrow=True,
+                column_name=history_series.time_column,
+            )
+        )
+        if not batches:
+            return cached.num_rows
+        return self.append(fuel, series, pa.Table.from_batches(batches))
+
+
+if __name__ == "__main__":
+    history_cache = HistoryCache()
+
+    print(history_cache.load("electricity", "rates").to_pandas())
@@ -0,0 +1,389 @@
+"""Parquet history store module.
+
+Mirrors the database tables into a hive partitioned Parquet dataset under
+`history_store_dir` for offline analysis:
+
+    fuel=<fuel>/series=<series>/year=<YYYY>/month=<MM>/part-0.parquet
+
+Every sync only rewrites the month of the last exported row, which may have received
+rows since, and writes the months after it. The exported position of every table is
+kept in `_sync_state.json`. The yearly weekly consumption tables are replaced on every
+run and derived from the daily consumption, so they are not mirrored.
+
+Reads filter on the `year`/`month` partition fields first, so only the files of the
+requested months are opened, and the files are memory mapped.
+"""
+
+import json
+import logging
+import os
+from datetime import date
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+from pydantic import BaseModel
+from sqlalchemy import Date, DateTime, Float, Integer, String, Table
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    Base,
+    ElectricityConsumptionTable,
+    ElectricityExportRatesTable,
+    ElectricityExportTable,
+    ElectricityHalfHourlyConsumptionTable,
+    ElectricityNetFlowTable,
+    ElectricityRatesTable,
+    EnergyRollupTable,
+    GasConsumptionTable,
+    GasHalfHourlyConsumptionTable,
+    GasRatesTable,
+    ReadingRollupTable,
+)
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+STATE_FILE = "_sync_state.json"
+ARROW_TYPES = {
+    DateTime: pa.timestamp("us"),
+    Date: pa.date32(),
+    Float: pa.float64(),
+    Integer: pa.int64(),
+    String: pa.string(),
+}
+
+
+class HistorySeries(BaseModel):
+    """Mirrored table dataclass."""
+
+    table_name: str
+    fuel: str
+    series: str
+    time_column: str
+
+
+HISTORY_SERIES = [
+    HistorySeries(
+        table_name=ElectricityRatesTable.__tablename__,
+        fuel="electricity",
+        series="rates",
+        time_column="date",
+    ),
+    HistorySeries(
+        table_name=GasRatesTable.__tablename__,
+        fuel="gas",
+        series="rates",
+        time_column="date",
+    ),
+    HistorySeries(
+        table_name=ElectricityConsumptionTable.__tablename__,
+        fuel="electricity",
+        series="consumption",
+        time_column="date",
+    ),
+    HistorySeries(
+        table_name=GasConsumptionTable.__tablename__,
+        fuel="gas",
+        series="consumption",
+        time_column="date",
+    ),
+    HistorySeries(
+        table_name=ElectricityExportTable.__tablename__,
+        fuel="electricity",
+        series="export",
+        time_column="date",
+    ),
+    HistorySeries(
+        table_name=ElectricityExportRatesTable.__tablename__,
+        fuel="electricity",
+        series="export_rates",
+        time_column="date",
+    ),
+    HistorySeries(
+        table_name=ElectricityNetFlowTable.__tablename__,
+        fuel="electricity",
+        series="net_flow",
+        time_column="date",
+    ),
+    HistorySeries(
+        table_name=ElectricityHalfHourlyConsumptionTable.__tablename__,
+        fuel="electricity",
+        series="half_hourly_consumption",
+        time_column="interval_start",
+    ),
+    HistorySeries(
+        table_name=GasHalfHourlyConsumptionTable.__tablename__,
+        fuel="gas",
+        series="half_hourly_consumption",
+        time_column="interval_start",
+    ),
+    HistorySeries(
+        table_name=EnergyRollupTable.__tablename__,
+        fuel="all",
+        series="energy_rollups",
+        time_column="period_start",
+    ),
+    HistorySeries(
+        table_name=ReadingRollupTable.__tablename__,
+        fuel="all",
+        series="reading_rollups",
+        time_column="bucket_start",
+    ),
+]
+
+
+class ParquetHistoryStore:
+    """Parquet history store class."""
+
+    def __init__(self, root: Optional[str | Path] = None) -> None:
+        """Class constructor method.
+
+        Args:
+            root: dataset directory, `ProjectConfig.history_store_dir` by default
+        """
+        self.root = Path(root or CONFIG.history_store_dir)
+        self.filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    def _get_series_dir(self, fuel: str, series: str) -> Path:
+        """Get the dataset directory of one series."""
+        return self.root / f"fuel={fuel}" / f"series={series}"
+
+    def _load_state(self) -> dict[str, str]:
+        """Load the last exported time of every table."""
+        state_path = self.root / STATE_FILE
+        return json.loads(state_path.read_text()) if state_path.exists() else {}
+
+    def _save_state(self, state: dict[str, str]) -> None:
+        """Save the last exported time of every table."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.root / f"{STATE_FILE}.{os.getpid()}.tmp"
+        temporary_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+        os.replace(temporary_path, self.root / STATE_FILE)
+
+    def _write_month(
+        self, history_series: HistorySeries, month: pd.Period, batches: List
+    ) -> None:
+        """Replace the partition of one month.
+
+        Args:
+            history_series: mirrored table
+            month: month of the rows
+            batches: Arrow record batches of the month
+        """
+        month_dir = (
+            self._get_series_dir(history_series.fuel, history_series.series)
+            / f"year={month.year}"
+            / f"month={month.month:02d}"
+        )
+        month_dir.mkdir(parents=True, exist_ok=True)
+        temporary_path = month_dir / f"part-0.parquet.{os.getpid()}.tmp"
+        table = Base.metadata.tables[history_series.table_name]
+        pq.write_table(
+            pa.Table.from_batches(batches).cast(get_arrow_schema(table)), temporary_path
+        )
+        os.replace(temporary_path, month_dir / "part-0.parquet")
+
+    @staticmethod
+    def _split_by_month(
+        batches: Iterator[pa.RecordBatch], time_column: str
+    ) -> Iterator[tuple[pd.Period, List[pa.RecordBatch]]]:
+        """Group time ordered record batches by month.
+
+        Args:
+            batches: record batches ordered by the time column
+            time_column: name of the time column
+
+        Yields:
+            month: month of the rows
+            batches: record batches of the month
+        """
+        month, month_batches = None, []
+        for batch in batches:
+            months = pd.PeriodIndex(
+                pd.to_datetime(batch.column(time_column).to_pandas()), freq="M"
+            )
+            for batch_month in months.unique():
+                rows = batch.filter(pa.array(months == batch_month))
+                if batch_month != month and month_batches:
+                    yield month, month_batches
+                    month_batches = []
+                month = batch_month
+                month_batches.append(rows)
+        if month_batches:
+            yield month, month_batches
+
+    def sync_table(
+        self, db_connector: DbConnector, history_series: HistorySeries
+    ) -> int:
+        """Export the rows of one table added since the last sync.
+
+        Args:
+            db_connector: connector of the database to be mirrored
+            history_series: mirrored table
+
+        Returns:
+            rows: number of rows written
+        """
+        state = self._load_state()
+        table = Base.metadata.tables[history_series.table_name]
+        table.create(db_connector.engine, checkfirst=True)
+
+        # the month of the last exported row is exported again with its new rows
+        date_from = None
+        if last_exported := state.get(history_series.table_name):
+            month_start = pd.Timestamp(last_exported).to_period("M").start_time
+            date_from = (
+                month_start.to_pydatetime()
+                if isinstance(table.columns[history_series.time_column].type, DateTime)
+                else month_start.date()
+            )
+        batches = db_connector.read_range(
+            get_model(history_series.table_name),
+            date_from=date_from,
+            as_arrow=True,
+            column_name=history_series.time_column,
+        )
+
+        rows, last_time = 0, None
+        for month, month_batches in self._split_by_month(
+            batches, history_series.time_column
+        ):
+            self._write_month(history_series, month, month_batches)
+            rows += sum(batch.num_rows for batch in month_batches)
+            last_time = month_batches[-1].column(history_series.time_column)[-1]
+
+        if last_time is not None:
+            state[history_series.table_name] = pd.Timestamp(
+                last_time.as_py()
+            ).isoformat()
+            self._save_state(state)
+        logging.info(f"Exported {rows} rows of {history_series.table_name}.")
+        return rows
+
+    def sync(self, db_connector: DbConnector) -> dict[str, int]:
+        """Export the rows of every mirrored table added since the last sync.
+
+        Args:
+            db_connector: connector of the database to be mirrored
+
+        Returns:
+            rows: number of rows written per table
+        """
+        return {
+            history_series.table_name: self.sync_table(db_connector, history_series)
+            for history_series in HISTORY_SERIES
+        }
+
+    def read(
+        self,
+        fuel: str,
+        series: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pa.Table:
+        """Read a date range of one series.
+
+        Args:
+            fuel: "electricity", "gas" or "all" for the rollups
+            series: series name, e.g. "rates" or "consumption"
+            date_from: first date to be read (inclusive)
+            date_to: last date to be read (inclusive)
+            columns: names of the columns to be read, all columns by default
+
+        Returns:
+            history: rows of the range ordered by time
+        """
+        history_series = next(
+            history_series
+            for history_series in HISTORY_SERIES
+            if (history_series.fuel, history_series.series) == (fuel, series)
+        )
+        series_dir = self._get_series_dir(fuel, series)
+        if not series_dir.exists():
+            return pa.table({})
+
+        dataset = ds.dataset(
+            str(series_dir),
+            format="parquet",
+            partitioning="hive",
+            filesystem=self.filesystem,
+        )
+        year, month = ds.field("year"), ds.field("month")
+        time = ds.field(history_series.time_column)
+        time_type = dataset.schema.field(history_series.time_column).type
+
+        predicates = []
+        if date_from is not None:
+            start = pd.Timestamp(date_from)
+            predicates += [
+                (year > start.year) | ((year == start.year) & (month >= start.month)),
+                time >= _to_scalar(start, time_type),
+            ]
+        if date_to is not None:
+            end = pd.Timestamp(date_to)
+            predicates += [
+                (year < end.year) | ((year == end.year) & (month <= end.month)),
+                time < _to_scalar(end + pd.Timedelta(days=1), time_type),
+            ]
+
+        history = dataset.to_table(
+            columns=columns
+            or [name for name in dataset.schema.names if name not in ("year", "month")],
+            filter=_and_all(predicates),
+        )
+        if history_series.time_column in history.column_names:
+            history = history.sort_by(history_series.time_column)
+        return history
+
+
+def get_arrow_schema(table: Table) -> pa.Schema:
+    """Get the Arrow schema of a table, so every partition has the same schema."""
+    return pa.schema(
+        [
+            (
+                column.name,
+                next(
+                    arrow_type
+                    for column_type, arrow_type in ARROW_TYPES.items()
+                    if isinstance(column.type, column_type)
+                ),
+            )
+            for column in table.columns
+        ]
+    )
+
+
+def get_model(table_name: str) -> type[Base]:
+    """Get the model class of a table."""
+    return next(
+        mapper.class_
+        for mapper in Base.registry.mappers
+        if mapper.local_table.name == table_name
+    )
+
+
+def _to_scalar(timestamp: pd.Timestamp, time_type: pa.DataType) -> pa.Scalar:
+    """Convert a timestamp to an Arrow scalar comparable with a time column."""
+    if pa.types.is_timestamp(time_type):
+        return pa.scalar(timestamp.to_pydatetime(), type=time_type)
+    return pa.scalar(timestamp.date(), type=time_type)
+
+
+def _and_all(predicates: List[ds.Expression]) -> Optional[ds.Expression]:
+    """Combine dataset filter expressions with AND."""
+    combined = None
+    for predicate in predicates:
+        combined = predicate if combined is None else combined & predicate
+    return combined
+
+
+if __name__ == "__main__":
+    history_store = ParquetHistoryStore()
+
+    print(history_store.sync(DbConnector(CONFIG.db_url.get_secret_value())))
+    print(history_store.read("electricity", "rates").to_pandas())
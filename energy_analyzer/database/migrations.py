@@ -0,0 +1,233 @@
+"""Schema migrations module.
+
+Tables are created from `db_models` with `checkfirst`, which leaves the tables of an
+existing database as they are. `migrate_table` brings such a table up to its model:
+- columns missing from the table are added, with their server default on the stored
+  rows, so rows written before `meter_id` existed belong to `DEFAULT_METER_ID`
+- required columns without a server default are added as nullable and filled from
+  the other columns of the row, see `COLUMN_BACKFILLS`: the baseline stored rates
+  without their VAT exclusive value
+- date columns stored as timestamps, as `DataFrame.to_sql` writes them, are converted
+  to dates
+- the primary key is rebuilt if its columns differ from the model ones, in place on
+  PostgreSQL and by copying the table into a new one on the embedded databases, which
+  can't alter a primary key
+
+Every step compares the live table with the model first, so a migrated table is left
+untouched and migrating is safe on every start.
+"""
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    Date,
+    DateTime,
+    Engine,
+    MetaData,
+    Table,
+    inspect,
+    text,
+)
+
+from energy_analyzer.database.db_models import Base
+
+# domestic energy is charged 5% VAT
+COLUMN_BACKFILLS = {
+    "unit_rate_exc_vat": "unit_rate_inc_vat / 1.05",
+    "standing_charge_exc_vat": "standing_charge_inc_vat / 1.05",
+}
+
+
+def _get_column_ddl(connection: Connection, column: Column) -> str:
+    """Get the definition of a column added to an existing table.
+
+    Args:
+        connection: connection of the migration transaction
+        column: model column
+
+    Returns:
+        ddl: quoted name, type, default and, on PostgreSQL, nullability of the column
+
+    Raises:
+        ValueError: if the column can't be filled for the stored rows, required
+            columns need a server default or a `COLUMN_BACKFILLS` entry
+    """
+    dialect = connection.dialect
+    ddl = (
+        f"{dialect.identifier_preparer.quote(column.name)} "
+        + f"{column.type.compile(dialect=dialect)}"
+    )
+    if column.server_default is not None:
+        ddl += f" DEFAULT '{column.server_default.arg}'"
+    elif not column.nullable and column.name not in COLUMN_BACKFILLS:
+        raise ValueError(
+            f"Column {column.table.name}.{column.name} is required and has no server "
+            + "default, so it can't be added to the stored rows."
+        )
+    # embedded databases can't add constrained columns, the primary key rebuild
+    # copies the rows into a table with the constraint, backfilled columns get it
+    # once filled
+    if (
+        not column.nullable
+        and column.server_default is not None
+        and dialect.name == "postgresql"
+    ):
+        ddl += " NOT NULL"
+    return ddl
+
+
+def _backfill_column(connection: Connection, column: Column) -> None:
+    """Fill a column added without a server default from the other columns.
+
+    Args:
+        connection: connection of the migration transaction
+        column: model column listed in `COLUMN_BACKFILLS`
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    table_name, column_name = quote(column.table.name), quote(column.name)
+    connection.execute(
+        text(f"UPDATE {table_name} SET {column_name} = {COLUMN_BACKFILLS[column.name]}")
+    )
+    if not column.nullable and connection.dialect.name == "postgresql":
+        connection.execute(
+            text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} SET NOT NULL")
+        )
+
+
+def _copy_table(connection: Connection, table: Table) -> None:
+    """Replace a table by a copy created from its model.
+
+    Args:
+        connection: connection of the migration transaction
+        table: model table, whose columns all exist in the database
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    migrated = table.to_metadata(MetaData(), name=f"{table.name}__migrated")
+    migrated.create(connection)
+    connection.execute(
+        migrated.insert().from_select(
+            [column.name for column in table.columns], table.select()
+        )
+    )
+    connection.execute(text(f"DROP TABLE {quote(table.name)}"))
+    connection.execute(
+        text(f"ALTER TABLE {quote(migrated.name)} RENAME TO {quote(table.name)}")
+    )
+
+
+def _convert_to_date(connection: Connection, column: Column) -> None:
+    """Convert a column stored as timestamps to dates.
+
+    SQLite keeps the declared type of a column, the copy of the table made afterwards
+    gets the model one.
+
+    Args:
+        connection: connection of the migration transaction
+        column: model date column
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    table_name, column_name = quote(column.table.name), quote(column.name)
+    if connection.dialect.name == "sqlite":
+        connection.execute(
+            text(f"UPDATE {table_name} SET {column_name} = date({column_name})")
+        )
+    else:
+        connection.execute(
+            text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE DATE")
+        )
+
+
+def _rebuild_primary_key(
+    connection: Connection, table: Table, name: Optional[str]
+) -> None:
+    """Replace the primary key of a table by the model one.
+
+    Args:
+        connection: connection of the migration transaction
+        table: model table, whose columns all exist in the database
+        name: name of the current primary key constraint, None without one
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    if connection.dialect.name == "postgresql":
+        primary_key = ", ".join(quote(column.name) for column in table.primary_key)
+        drop_constraint = f"DROP CONSTRAINT {quote(name)}, " if name else ""
+        connection.execute(
+            text(
+                f"ALTER TABLE {quote(table.name)} {drop_constraint}"
+                + f"ADD PRIMARY KEY ({primary_key})"
+            )
+        )
+    else:
+        _copy_table(connection, table)
+
+
+def migrate_table(engine: Engine, table_name: str) -> List[str]:
+    """Bring an existing table up to its `db_models` definition.
+
+    Args:
+        engine: engine of the database holding the table
+        table_name: name of a `db_models` table
+
+    Returns:
+        changes: descriptions of the applied changes, empty if the table was up to
+            date or doesn't exist
+    """
+    table = Base.metadata.tables[table_name]
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table(table_name):
+            return []
+        existing = {
+            column["name"]: column["type"]
+            for column in inspector.get_columns(table_name)
+        }
+        primary_key = inspector.get_pk_constraint(table_name)
+
+        changes = []
+        for column in table.columns:
+            if column.name not in existing:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {quote(table_name)} "
+                        + f"ADD COLUMN {_get_column_ddl(connection, column)}"
+                    )
+                )
+                changes.append(f"added column {column.name}")
+                if column.server_default is None and column.name in COLUMN_BACKFILLS:
+                    _backfill_column(connection, column)
+
+        converted = [
+            column
+            for column in table.columns
+            if isinstance(column.type, Date)
+            and isinstance(existing.get(column.name), DateTime)
+        ]
+        for column in converted:
+            _convert_to_date(connection, column)
+            changes.append(f"converted column {column.name} to dates")
+
+        model_primary_key = {column.name for column in table.primary_key}
+        if set(primary_key["constrained_columns"]) != model_primary_key:
+            _rebuild_primary_key(connection, table, primary_key.get("name"))
+            changes.append(f"rebuilt primary key on {sorted(model_primary_key)}")
+        elif converted and connection.dialect.name == "sqlite":
+            _copy_table(connection, table)
+
+    if changes:
+        logging.info(f"Migrated {table_name}: {', '.join(changes)}.")
+    return changes
+
+
+if __name__ == "__main__":
+    from energy_analyzer.database.db_connector import get_engine
+    from energy_analyzer.utils.config import ProjectConfig
+
+    config = ProjectConfig()
+    engine = get_engine(config.db_url.get_secret_value())
+
+    for table_name in Base.metadata.tables:
+        print(table_name, migrate_table(engine, table_name))
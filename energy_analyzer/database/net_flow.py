@@ -0,0 +1,113 @@
+"""Electricity net flow module.
+
+`electricity_net_flow` holds the import (`consumption`), the export (`export_value`)
+and their difference (`net_consumption`, negative on days exporting more than
+importing) of every day with either reading. Both series are published by Octopus
+separately and at their own pace, so after new import or export rows are written only
+their days are recomputed, with a missing side counted as 0 until it arrives. Rows are
+stored under the import meter, the export readings may come from a separate meter.
+"""
+
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
+    ElectricityConsumptionTable,
+    ElectricityExportTable,
+    ElectricityNetFlowTable,
+    OctopusTables,
+)
+
+
+class NetFlowManager:
+    """Electricity net flow manager class."""
+
+    def __init__(self, db_connector: DbConnector) -> None:
+        """Class constructor method.
+
+        Args:
+            db_connector: connector of the database holding the import and export tables
+        """
+        self.db_connector = db_connector
+
+    def _read(
+        self,
+        table: OctopusTables,
+        column: str,
+        date_from: date,
+        date_to: date,
+        meter_id: str,
+    ) -> pd.DataFrame:
+        """Read the daily values of a meter, indexed by date."""
+        batches = list(
+            self.db_connector.read_range(
+                table, date_from, date_to, columns=["date", column], meter_id=meter_id
+            )
+        )
+        if not batches:
+            return pd.DataFrame({column: pd.Series(dtype=float)})
+        data = pd.concat(batches, ignore_index=True)
+        return data.set_index(pd.to_datetime(data["date"]))[[column]]
+
+    def refresh(
+        self,
+        date_from: date,
+        date_to: date,
+        meter_id: str = DEFAULT_METER_ID,
+        export_meter_id: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Recompute the net flow of the given days.
+
+        Args:
+            date_from: first day with new import or export data
+            date_to: last day with new import or export data
+            meter_id: import meter
+            export_meter_id: export meter, the import meter by default
+
+        Returns:
+            net_flow: date, consumption, export_value and net_consumption of every day
+                with import or export data
+        """
+        for table in (
+            ElectricityConsumptionTable,
+            ElectricityExportTable,
+            ElectricityNetFlowTable,
+        ):
+            self.db_connector.create_table(table.__tablename__)
+
+        net_flow = self._read(
+            ElectricityConsumptionTable, "consumption", date_from, date_to, meter_id
+        ).join(
+            self._read(
+                ElectricityExportTable,
+                "export_value",
+                date_from,
+                date_to,
+                export_meter_id or meter_id,
+            ),
+            how="outer",
+        )
+        net_flow["net_consumption"] = net_flow["consumption"].fillna(0.0) - net_flow[
+            "export_value"
+        ].fillna(0.0)
+        net_flow = net_flow.rename_axis("date").reset_index()
+        net_flow["date"] = net_flow["date"].dt.date
+        net_flow["meter_id"] = meter_id
+
+        self.db_connector.upsert_data_to_db(
+            net_flow, ElectricityNetFlowTable.__tablename__
+        )
+        return net_flow
+
+
+if __name__ == "__main__":
+    from energy_analyzer.utils.config import ProjectConfig
+
+    config = ProjectConfig()
+    net_flow_manager = NetFlowManager(DbConnector(config.db_url.get_secret_value()))
+
+    print(net_flow_manager.refresh(date(2024, 1, 1), date(2024, 12, 31)))
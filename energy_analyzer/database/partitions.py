@@ -0,0 +1,278 @@
+"""Monthly table partitions module.
+
+Tables declared with `partitioned_by_month` are created `PARTITION BY RANGE (date)` on
+PostgreSQL. Every month is a partition named `<table>_<YYYY>_<MM>`; inserts need the
+partition of their month to exist, so `PartitionManager.ensure_partitions` creates the
+months of the incoming rows plus `db_partitions_ahead` months before every write.
+Queries filtering on `date` only scan the partitions of the requested months.
+
+Old history is removed by detaching whole partitions, a catalog change instead of a
+`DELETE` of every row. Detached partitions are left as plain tables to be archived or
+dropped.
+
+Other databases don't support partitioning and every method is a no-op there.
+"""
+
+import logging
+import re
+import threading
+from datetime import date
+from typing import List, Optional
+
+import pandas as pd
+from sqlalchemy import Engine, Table, text
+
+from energy_analyzer.database.db_models import Base
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+PARTITION_SUFFIX = re.compile(r"_(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def get_month_starts(date_from: date, date_to: date) -> List[date]:
+    """Get the first day of every month between two dates.
+
+    Args:
+        date_from: a day of the first month
+        date_to: a day of the last month
+
+    Returns:
+        month_starts: first days of the months, oldest first
+    """
+    months = pd.period_range(
+        pd.Timestamp(date_from).to_period("M"),
+        pd.Timestamp(date_to).to_period("M"),
+        freq="M",
+    )
+    return [month.start_time.date() for month in months]
+
+
+def get_retention_cutoff(
+    today: date, retention_months: Optional[int]
+) -> Optional[date]:
+    """Get the first month kept by the partition retention.
+
+    Args:
+        today: current day
+        retention_months: number of past months kept, everything is kept if None
+
+    Returns:
+        cutoff: first day of the oldest kept month, None if everything is kept
+    """
+    if retention_months is None:
+        return None
+    before = pd.Timestamp(today) - pd.DateOffset(months=retention_months)
+    return get_month_starts(before.date(), before.date())[0]
+
+
+def is_partitioned(table: Table) -> bool:
+    """Check whether a table is range partitioned on PostgreSQL."""
+    return bool(table.dialect_options["postgresql"]["partition_by"])
+
+
+class PartitionManager:
+    """Monthly table partition manager class."""
+
+    def __init__(self, engine: Engine) -> None:
+        """Class constructor method.
+
+        Args:
+            engine: engine of the database holding the partitioned tables
+        """
+        self.engine = engine
+        self.enabled = engine.dialect.name == "postgresql"
+        self._existing: dict[str, set[date]] = {}
+        # tables created before partitioning was declared
+        self._plain_tables: set[str] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_partition_name(table_name: str, month_start: date) -> str:
+        """Get the name of the partition holding one month of a table."""
+        return f"{table_name}_{month_start:%Y_%m}"
+
+    @classmethod
+    def get_create_statement(cls, table_name: str, month_start: date) -> str:
+        """Get the DDL creating the partition of one month of a table.
+
+        Args:
+            table_name: name of the partitioned table
+            month_start: first day of the month
+
+        Returns:
+            statement: `CREATE TABLE` of the partition, bounds are [month, next month)
+        """
+        partition_name = cls.get_partition_name(table_name, month_start)
+        month_end = (pd.Timestamp(month_start) + pd.DateOffset(months=1)).date()
+        return (
+            f'CREATE TABLE IF NOT EXISTS "{partition_name}" '
+            + f'PARTITION OF "{table_name}" '
+            + f"FOR VALUES FROM ('{month_start}') TO ('{month_end}')"
+        )
+
+    @classmethod
+    def get_detach_statement(cls, table_name: str, month_start: date) -> str:
+        """Get the DDL detaching the partition of one month of a table.
+
+        Args:
+            table_name: name of the partitioned table
+            month_start: first day of the month
+
+        Returns:
+            statement: `ALTER TABLE ... DETACH PARTITION` of the partition
+        """
+        return (
+            f'ALTER TABLE "{table_name}" '
+            + f'DETACH PARTITION "{cls.get_partition_name(table_name, month_start)}"'
+        )
+
+    def _get_partitioned_table(self, table_name: str) -> Optional[Table]:
+        """Get a table if partitions are managed for it, None otherwise."""
+        table = Base.metadata.tables.get(table_name)
+        if (
+            self.enabled
+            and table is not None
+            and is_partitioned(table)
+            and table_name not in self._plain_tables
+        ):
+            return table
+        return None
+
+    def list_partitions(self, table_name: str) -> List[date]:
+        """List the months having a partition.
+
+        Args:
+            table_name: name of the partitioned table
+
+        Returns:
+            month_starts: first days of the partitioned months, oldest first
+        """
+        if self._get_partitioned_table(table_name) is None:
+            return []
+
+        relkind = text("SELECT relkind FROM pg_class WHERE relname = :table_name")
+        stmt = text(
+            "SELECT child.relname FROM pg_inherits "
+            + "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            + "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            + "WHERE parent.relname = :table_name"
+        )
+        with self.engine.connect() as connection:
+            kind = connection.execute(relkind, {"table_name": table_name}).scalar()
+            if kind not in (None, "p"):
+                logging.warning(
+                    f"{table_name} is not partitioned, recreate it to partition it."
+                )
+                self._plain_tables.add(table_name)
+                return []
+            names = connection.execute(stmt, {"table_name": table_name}).scalars()
+            month_starts = sorted(
+                date(int(match["year"]), int(match["month"]), 1)
+                for name in names
+                if (match := PARTITION_SUFFIX.search(name))
+            )
+        self._existing[table_name] = set(month_starts)
+        return month_starts
+
+    def ensure_partitions(
+        self, table_name: str, date_from: date, date_to: date
+    ) -> List[str]:
+        """Create the missing monthly partitions of a date range.
+
+        Args:
+            table_name: name of the partitioned table
+            date_from: first date to be written
+            date_to: last date to be written, `db_partitions_ahead` more months are
+                created after it
+
+        Returns:
+            partitions: names of the created partitions
+        """
+        if self._get_partitioned_table(table_name) is None:
+            return []
+
+        last_month = pd.Timestamp(date_to) + pd.DateOffset(
+            months=CONFIG.db_partitions_ahead
+        )
+        created = []
+        with self._lock:
+            if table_name not in self._existing:
+                self.list_partitions(table_name)
+            if table_name in self._plain_tables:
+                return created
+            existing = self._existing[table_name]
+            missing = [
+                month_start
+                for month_start in get_month_starts(date_from, last_month.date())
+                if month_start not in existing
+            ]
+            if not missing:
+                return created
+
+            with self.engine.begin() as connection:
+                for month_start in missing:
+                    connection.execute(
+                        text(self.get_create_statement(table_name, month_start))
+                    )
+                    created.append(self.get_partition_name(table_name, month_start))
+            existing.update(missing)
+
+        logging.info(f"Created partitions {created} of {table_name}.")
+        return created
+
+    def detach_partitions(self, table_name: str, before: date) -> List[str]:
+        """Detach the partitions of every month ending before a date.
+
+        Args:
+            table_name: name of the partitioned table
+            before: months starting before this month are detached
+
+        Returns:
+            partitions: names of the detached partitions, now standalone tables
+        """
+        if self._get_partitioned_table(table_name) is None:
+            return []
+
+        first_kept = get_month_starts(before, before)[0]
+        with self._lock:
+            expired = [
+                month_start
+                for month_start in self.list_partitions(table_name)
+                if month_start < first_kept
+            ]
+            detached = []
+            with self.engine.begin() as connection:
+                for month_start in expired:
+                    connection.execute(
+                        text(self.get_detach_statement(table_name, month_start))
+                    )
+                    detached.append(self.get_partition_name(table_name, month_start))
+            self._existing.get(table_name, set()).difference_update(expired)
+
+        if detached:
+            logging.info(f"Detached partitions {detached} of {table_name}.")
+        return detached
+
+    def apply_retention(self, table_name: str) -> List[str]:
+        """Detach the partitions older than `db_partition_retention_months`.
+
+        Args:
+            table_name: name of the partitioned table
+
+        Returns:
+            partitions: names of the detached partitions
+        """
+        cutoff = get_retention_cutoff(
+            date.today(), CONFIG.db_partition_retention_months
+        )
+        if cutoff is None:
+            return []
+        return self.detach_partitions(table_name, cutoff)
+
+
+if __name__ == "__main__":
+    from energy_analyzer.database.db_connector import get_engine
+
+    partition_manager = PartitionManager(get_engine(CONFIG.db_url.get_secret_value()))
+
+    print(partition_manager.list_partitions("electricity_consumption"))
@@ -0,0 +1,370 @@
+"""Query result cache module.
+
+`DbConnector.read_cached` results are kept in a least recently used cache bounded by
+`query_cache_max_entries` and `query_cache_max_bytes`, keyed by table, exact range
+bounds, meter, columns and aggregation. Every write through `DbConnector` invalidates
+the cached results of the meters written whose range overlaps the days written.
+
+Without `query_cache_dir` the cache is private to the process, with one cache per
+database: writes made by other processes, e.g. the workers of `ingest_meters`, are not
+seen and their results are served until they are evicted. With `query_cache_dir` set,
+results are also persisted as Parquet and survive restarts, and invalidations are
+appended to a shared log in the same directory, so a process serving dashboards drops
+results made stale by an ingest run in another process. A directory serves a single
+database.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Collection, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Date, DateTime, Table
+
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+INVALIDATION_LOG = "_invalidations.jsonl"
+
+
+def _bound_to_json(bound: Optional[date]) -> Optional[str]:
+    """Serialise a range bound, a date or a timestamp."""
+    return bound.isoformat() if bound is not None else None
+
+
+def _bound_from_json(value: Optional[str]) -> Optional[date]:
+    """Deserialise a range bound, timestamps keep their time."""
+    if value is None:
+        return None
+    return datetime.fromisoformat(value) if "T" in value else date.fromisoformat(value)
+
+
+def _to_day(bound: date) -> date:
+    """Get the day of a range bound."""
+    return bound.date() if isinstance(bound, datetime) else bound
+
+
+class QueryCacheKey(NamedTuple):
+    """Query result cache key class."""
+
+    table_name: str
+    date_from: Optional[date]
+    date_to: Optional[date]
+    columns: Optional[tuple[str, ...]]
+    aggregation: Optional[str]
+    period: Optional[str]
+    meter_id: Optional[str] = None
+
+    def overlaps(
+        self,
+        table_name: str,
+        date_from: Optional[date],
+        date_to: Optional[date],
+        meter_ids: Optional[Collection[str]] = None,
+    ) -> bool:
+        """Check whether rows written to a table range may change the result.
+
+        Ranges are compared by day, a result is stale if it shares a day with the
+        rows written.
+
+        Args:
+            table_name: name of the written table
+            date_from: first date written, open if None
+            date_to: last date written, open if None
+            meter_ids: meters written, every meter if None
+        """
+        if table_name != self.table_name:
+            return False
+        if (
+            meter_ids is not None
+            and self.meter_id is not None
+            and self.meter_id not in meter_ids
+        ):
+            return False
+        if date_from is not None and self.date_to is not None:
+            if _to_day(date_from) > _to_day(self.date_to):
+                return False
+        if date_to is not None and self.date_from is not None:
+            if _to_day(date_to) < _to_day(self.date_from):
+                return False
+        return True
+
+    def to_json(self) -> str:
+        """Serialise the key."""
+        return json.dumps(
+            [
+                self.table_name,
+                _bound_to_json(self.date_from),
+                _bound_to_json(self.date_to),
+                list(self.columns) if self.columns else None,
+                self.aggregation,
+                self.period,
+                self.meter_id,
+            ]
+        )
+
+    @classmethod
+    def from_json(cls, value: str) -> "QueryCacheKey":
+        """Deserialise a key."""
+        table_name, date_from, date_to, columns, aggregation, period, *meter_id = (
+            json.loads(value)
+        )
+        return cls(
+            table_name,
+            _bound_from_json(date_from),
+            _bound_from_json(date_to),
+            tuple(columns) if columns else None,
+            aggregation,
+            period,
+            *meter_id,
+        )
+
+
+def get_time_column(table: Table) -> Optional[str]:
+    """Get the name of the date or timestamp primary key column of a table."""
+    return next(
+        (
+            column.name
+            for column in table.primary_key.columns
+            if isinstance(column.type, (Date, DateTime))
+        ),
+        None,
+    )
+
+
+class QueryCache:
+    """Query result cache class."""
+
+    def __init__(
+        self,
+        max_entries: int = CONFIG.query_cache_max_entries,
+        max_bytes: int = CONFIG.query_cache_max_bytes,
+        cache_dir: Optional[str | Path] = CONFIG.query_cache_dir,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            max_entries: maximum number of results kept in memory
+            max_bytes: maximum total size of the results kept in memory
+            cache_dir: directory of the persisted results, in memory only if None
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[QueryCacheKey, tuple[pd.DataFrame, int]] = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._log_offset = 0
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            log_path = self.cache_dir / INVALIDATION_LOG
+            self._log_offset = log_path.stat().st_size if log_path.exists() else 0
+
+    def _get_path(self, key: QueryCacheKey) -> Path:
+        """Get the persisted result file of a key."""
+        digest = hashlib.sha256(key.to_json().encode()).hexdigest()
+        return self.cache_dir / key.table_name / f"{digest}.parquet"
+
+    def _evict(self) -> None:
+        """Drop the least recently used results above the memory bounds."""
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._size > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+
+    def _drop(
+        self,
+        table_name: str,
+        date_from: Optional[date],
+        date_to: Optional[date],
+        meter_ids: Optional[Collection[str]] = None,
+    ) -> int:
+        """Drop the results of a table range from memory and disk."""
+        stale = [
+            key
+            for key in self._entries
+            if key.overlaps(table_name, date_from, date_to, meter_ids)
+        ]
+        for key in stale:
+            _, size = self._entries.pop(key)
+            self._size -= size
+
+        if self.cache_dir:
+            for path in (self.cache_dir / table_name).glob("*.parquet"):
+                try:
+                    metadata = pq.read_schema(path).metadata or {}
+                    key = QueryCacheKey.from_json(metadata[b"query_cache_key"].decode())
+                except (OSError, KeyError, pa.ArrowInvalid):
+                    path.unlink(missing_ok=True)
+                    continue
+                if key.overlaps(table_name, date_from, date_to, meter_ids):
+                    path.unlink(missing_ok=True)
+        return len(stale)
+
+    def _apply_invalidation_log(self) -> None:
+        """Apply the invalidations logged by other processes since the last check."""
+        if not self.cache_dir:
+            return
+        log_path = self.cache_dir / INVALIDATION_LOG
+        if not log_path.exists() or log_path.stat().st_size == self._log_offset:
+            return
+        with log_path.open() as log:
+            log.seek(self._log_offset)
+            lines = log.readlines()
+            self._log_offset = log.tell()
+        for line in lines:
+            table_name, date_from, date_to, *meter_ids = json.loads(line)
+            stale = [
+                key
+                for key in self._entries
+                if key.overlaps(
+                    table_name,
+                    _bound_from_json(date_from),
+                    _bound_from_json(date_to),
+                    *meter_ids,
+                )
+            ]
+            for key in stale:
+                _, size = self._entries.pop(key)
+                self._size -= size
+
+    def get(self, key: QueryCacheKey) -> Optional[pd.DataFrame]:
+        """Get a cached result.
+
+        Args:
+            key: query of the result
+
+        Returns:
+            result: a copy of the cached result, None if it isn't cached
+        """
+        with self._lock:
+            self._apply_invalidation_log()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0].copy()
+
+            if self.cache_dir and (path := self._get_path(key)).exists():
+                try:
+                    result = pd.read_parquet(path)
+                except OSError:
+                    result = None
+                if result is not None:
+                    self._put(key, result)
+                    self.hits += 1
+                    return result.copy()
+
+            self.misses += 1
+            return None
+
+    def _put(self, key: QueryCacheKey, result: pd.DataFrame) -> None:
+        """Keep a result in memory."""
+        if key in self._entries:
+            self._size -= self._entries.pop(key)[1]
+        size = int(result.memory_usage(deep=True).sum())
+        self._entries[key] = (result, size)
+        self._size += size
+        self._evict()
+
+    def put(self, key: QueryCacheKey, result: pd.DataFrame) -> None:
+        """Cache a result.
+
+        Args:
+            key: query of the result
+            result: query result
+        """
+        result = result.copy()
+        with self._lock:
+            self._put(key, result)
+            if self.cache_dir:
+                table = pa.Table.from_pandas(result, preserve_index=False)
+                table = table.replace_schema_metadata(
+                    {
+                        **(table.schema.metadata or {}),
+                        b"query_cache_key": key.to_json().encode(),
+                    }
+                )
+                path = self._get_path(key)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+                pq.write_table(table, temporary_path)
+                os.replace(temporary_path, path)
+
+    def invalidate(
+        self,
+        table_name: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        meter_ids: Optional[Collection[str]] = None,
+    ) -> int:
+        """Drop the cached results a write to a table range may have changed.
+
+        Args:
+            table_name: name of the written table
+            date_from: first date written, open if None
+            date_to: last date written, open if None
+            meter_ids: meters written, every meter if None
+
+        Returns:
+            dropped: number of results dropped from memory
+        """
+        date_from = pd.Timestamp(date_from).date() if date_from is not None else None
+        date_to = pd.Timestamp(date_to).date() if date_to is not None else None
+        meter_ids = sorted(meter_ids) if meter_ids is not None else None
+        with self._lock:
+            self._apply_invalidation_log()
+            dropped = self._drop(table_name, date_from, date_to, meter_ids)
+            if self.cache_dir:
+                log_path = self.cache_dir / INVALIDATION_LOG
+                with log_path.open("a") as log:
+                    log.write(
+                        json.dumps(
+                            [
+                                table_name,
+                                _bound_to_json(date_from),
+                                _bound_to_json(date_to),
+                                meter_ids,
+                            ]
+                        )
+                        + "\n"
+                    )
+
+        if dropped:
+            logging.info(f"Invalidated {dropped} cached results of {table_name}.")
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every cached result from memory."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_QUERY_CACHES: dict[str, QueryCache] = {}
+
+
+def get_query_cache(database_url: str) -> QueryCache:
+    """Get the query result cache of a database shared within the process.
+
+    Args:
+        database_url: SQLAlchemy url of the database
+
+    Returns:
+        query_cache: the cache of the results read from the database
+    """
+    if database_url not in _QUERY_CACHES:
+        _QUERY_CACHES[database_url] = QueryCache()
+    return _QUERY_CACHES[database_url]
@@ -0,0 +1,235 @@
+"""Consumption and cost rollups module.
+
+`energy_rollups` holds the consumption (kWh) and cost (pence inc. VAT) of every fuel
+and meter per day, ISO week and calendar month. After new consumption or rates rows
+are written only the periods of their meter containing them are recomputed from the
+raw tables, and reports read single rows by primary key instead of aggregating raw
+history.
+"""
+
+from datetime import date, timedelta
+from typing import Literal
+
+import pandas as pd
+from sqlalchemy import delete, select
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
+    ElectricityConsumptionTable,
+    ElectricityRatesTable,
+    EnergyRollupTable,
+    GasConsumptionTable,
+    GasRatesTable,
+)
+from energy_analyzer.utils.config import ProjectConfig
+from energy_analyzer.utils.data_models import RateTimeline
+
+CONFIG = ProjectConfig()
+Fuel = Literal["electricity", "gas"]
+Period = Literal["day", "week", "month"]
+
+FUEL_TABLES = {
+    "electricity": (ElectricityConsumptionTable, ElectricityRatesTable),
+    "gas": (GasConsumptionTable, GasRatesTable),
+}
+PERIODS: tuple[Period, ...] = ("day", "week", "month")
+
+
+def get_period_start(dates: pd.Series, period: Period) -> pd.Series:
+    """Get the first day of the period every date belongs to.
+
+    Args:
+        dates: datetime64 series of days
+        period: "day", "week" (ISO weeks starting on Monday) or "month"
+
+    Returns:
+        period_start: datetime64 series of period first days
+    """
+    match period:
+        case "day":
+            return dates
+        case "week":
+            return dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+        case "month":
+            return dates.dt.to_period("M").dt.start_time.astype(dates.dtype)
+        case _:
+            raise ValueError(f"Unsupported period: {period}")
+
+
+class RollupManager:
+    """Consumption and cost rollup manager class."""
+
+    def __init__(self, db_connector: DbConnector) -> None:
+        """Class constructor method.
+
+        Args:
+            db_connector: connector of the database holding the raw tables
+        """
+        self.db_connector = db_connector
+
+    def _read_window(
+        self, fuel: Fuel, date_from: date, date_to: date, meter_id: str
+    ) -> pd.DataFrame:
+        """Read daily consumption priced at the unit rate of its day.
+
+        Args:
+            fuel: "electricity" or "gas"
+            date_from: first day to be read
+            date_to: last day to be read
+            meter_id: meter of the consumption and rates
+
+        Returns:
+            daily_data: date, consumption and cost_inc_vat of every day with
+                consumption, cost_inc_vat NaN on days without a rate
+        """
+        consumption_table, rates_table = FUEL_TABLES[fuel]
+        consumption = self.db_connector.read_cached(
+            consumption_table,
+            date_from,
+            date_to,
+            columns=["consumption"],
+            meter_id=meter_id,
+        )
+        rates = self.db_connector.read_cached(
+            rates_table,
+            date_from,
+            date_to,
+            columns=["unit_rate_inc_vat"],
+            meter_id=meter_id,
+        )
+
+        daily_data = consumption.assign(
+            date=pd.to_datetime(consumption["date"]).dt.normalize()
+        ).reset_index(drop=True)
+        unit_rates = RateTimeline.from_frame(rates).rate_at(
+            daily_data["date"].dt.tz_localize(CONFIG.local_timezone)
+        )
+        daily_data["cost_inc_vat"] = daily_data["consumption"] * unit_rates
+        return daily_data
+
+    def refresh(
+        self,
+        fuel: Fuel,
+        date_from: date,
+        date_to: date,
+        meter_id: str = DEFAULT_METER_ID,
+    ) -> int:
+        """Recompute the rollups of every period containing the given days.
+
+        Args:
+            fuel: "electricity" or "gas"
+            date_from: first day with new consumption or rates data
+            date_to: last day with new consumption or rates data
+            meter_id: meter with new data
+
+        Returns:
+            rows: number of rollup rows written
+        """
+        self.db_connector.create_table(EnergyRollupTable.__tablename__)
+        days = pd.Series(pd.to_datetime([date_from, date_to])).dt.normalize()
+        affected = {
+            period: get_period_start(days, period).dt.date.tolist()
+            for period in PERIODS
+        }
+        # whole weeks and months around the new days are re-aggregated
+        window_from = min(period_from for period_from, _ in affected.values())
+        window_to = max(
+            affected["week"][1] + timedelta(days=6),
+            (pd.Timestamp(affected["month"][1]) + pd.offsets.MonthEnd(0)).date(),
+        )
+        daily_data = self._read_window(fuel, window_from, window_to, meter_id)
+
+        rollups = []
+        for period, (period_from, period_to) in affected.items():
+            rollup = (
+                daily_data.assign(
+                    period_start=get_period_start(daily_data["date"], period).dt.date
+                )
+                .groupby("period_start", as_index=False)
+                .agg(
+                    consumption=("consumption", "sum"),
+                    cost_inc_vat=("cost_inc_vat", "sum"),
+                    days=("date", "count"),
+                )
+            )
+            rollup = rollup[rollup["period_start"].between(period_from, period_to)]
+            rollups.append(rollup.assign(fuel=fuel, period=period, meter_id=meter_id))
+        new_rollups = pd.concat(rollups, ignore_index=True)
+
+        with self.db_connector.engine.begin() as connection:
+            for period, (period_from, period_to) in affected.items():
+                connection.execute(
+                    delete(EnergyRollupTable).where(
+                        EnergyRollupTable.meter_id == meter_id,
+                        EnergyRollupTable.fuel == fuel,
+                        EnergyRollupTable.period == period,
+                        EnergyRollupTable.period_start.between(period_from, period_to),
+                    )
+                )
+            if not new_rollups.empty:
+                new_rollups.to_sql(
+                    EnergyRollupTable.__tablename__,
+                    connection,
+                    if_exists="append",
+                    index=False,
+                )
+        self.db_connector.query_cache.invalidate(
+            EnergyRollupTable.__tablename__, window_from, window_to
+        )
+        return len(new_rollups)
+
+    def get_rollups(
+        self,
+        fuel: Fuel,
+        period: Period,
+        date_from: date,
+        date_to: date,
+        meter_id: str = DEFAULT_METER_ID,
+    ) -> pd.DataFrame:
+        """Get consumption and cost rollups.
+
+        Args:
+            fuel: "electricity" or "gas"
+            period: "day", "week" or "month"
+            date_from: first period start to be returned
+            date_to: last period start to be returned
+            meter_id: meter of the rollups
+
+        Returns:
+            rollups: period_start, consumption, cost_inc_vat and days of every period
+        """
+        self.db_connector.create_table(EnergyRollupTable.__tablename__)
+        rollups = EnergyRollupTable.__table__
+        stmt = (
+            select(
+                rollups.c.period_start,
+                rollups.c.consumption,
+                rollups.c.cost_inc_vat,
+                rollups.c.days,
+            )
+            .where(
+                rollups.c.meter_id == meter_id,
+                rollups.c.fuel == fuel,
+                rollups.c.period == period,
+                rollups.c.period_start.between(date_from, date_to),
+            )
+            .order_by(rollups.c.period_start)
+        )
+        with self.db_connector.session_scope(read_only=True) as session:
+            return pd.DataFrame(
+                session.execute(stmt).all(), columns=stmt.selected_columns.keys()
+            )
+
+
+if __name__ == "__main__":
+    from energy_analyzer.utils.config import ProjectConfig
+
+    config = ProjectConfig()
+    rollup_manager = RollupManager(DbConnector(config.db_url.get_secret_value()))
+
+    print(
+        rollup_manager.get_rollups(
+            "electricity", "month", date(2024, 1, 1), date(2024, 12, 1)
+        )
+    )
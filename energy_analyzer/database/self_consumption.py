@@ -0,0 +1,375 @@
+"""Solar self-consumption analytics module.
+
+`solar_self_consumption` holds one row per half-hour interval of the Octopus import
+meter, with the solar generation of every Solis inverter over the same interval:
+- generation: average `ac_power` of the 5 minute Solis readings of the interval,
+  summed over inverters, in kWh
+- grid_export: average positive `grid_power` (fed into the grid) over the interval
+- self_consumption: generation not exported
+- load: grid import plus self-consumption
+- savings_inc_vat: self-consumption priced at the unit rate of the local day, in pence
+
+Readings are bucketed by flooring their UTC timestamps to the half-hour, which are the
+half-hours of the Europe/London clock too, and intervals are assigned to the local day
+they start in, so rates and daily summaries follow the meter days across DST changes.
+
+Every manager combines the inverters with the import meter and rates of one
+`meter_id`. `SelfConsumptionManager.refresh` only processes the intervals from the last
+stored one, which may have been incomplete, up to the last interval covered by both
+sources, one `self_consumption_chunk_days` chunk at a time, so it can run after every
+ingest.
+Ratios are computed over whole periods by `get_summary`.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
+    ElectricityHalfHourlyConsumptionTable,
+    ElectricityRatesTable,
+    SolarSelfConsumptionTable,
+    SolisTelemetryTable,
+)
+from energy_analyzer.database.rollups import Period, get_period_start
+from energy_analyzer.utils.config import ProjectConfig
+from energy_analyzer.utils.data_models import RateTimeline
+
+CONFIG = ProjectConfig()
+INTERVAL = pd.Timedelta(minutes=30)
+INTERVAL_HOURS = INTERVAL / pd.Timedelta(hours=1)
+ENERGY_COLUMNS = [
+    "generation",
+    "grid_import",
+    "grid_export",
+    "self_consumption",
+    "load",
+    "savings_inc_vat",
+]
+
+
+def floor_to_interval(times: pd.Series) -> np.ndarray:
+    """Floor naive UTC timestamps to the start of their half-hour interval.
+
+    Args:
+        times: naive UTC timestamps
+
+    Returns:
+        interval_start: datetime64[ns] array of interval starts
+    """
+    return (
+        times.to_numpy(dtype="datetime64[ns]")
+        .astype("datetime64[30m]")
+        .astype("datetime64[ns]")
+    )
+
+
+def get_local_dates(interval_start: pd.Series) -> pd.Series:
+    """Get the local day every naive UTC interval starts in.
+
+    Args:
+        interval_start: naive UTC interval starts
+
+    Returns:
+        dates: datetime64 series of local days
+    """
+    return (
+        interval_start.dt.tz_localize("UTC")
+        .dt.tz_convert(CONFIG.local_timezone)
+        .dt.tz_localize(None)
+        .dt.normalize()
+    )
+
+
+class SelfConsumptionManager:
+    """Solar self-consumption analytics manager class."""
+
+    def __init__(
+        self,
+        db_connector: DbConnector,
+        chunk_days: int = CONFIG.self_consumption_chunk_days,
+        meter_id: str = DEFAULT_METER_ID,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            db_connector: connector of the database holding the Solis and Octopus tables
+            chunk_days: days of readings processed at a time
+            meter_id: import meter of the household with the inverters
+        """
+        self.db_connector = db_connector
+        self.chunk = timedelta(days=chunk_days)
+        self.meter_id = meter_id
+
+    def _read_bounds(self) -> Optional[tuple[datetime, datetime]]:
+        """Get the first and last interval start to be processed.
+
+        Returns:
+            bounds: first and last interval start, None if there is nothing to process
+        """
+        for table in (
+            ElectricityHalfHourlyConsumptionTable,
+            ElectricityRatesTable,
+            SolarSelfConsumptionTable,
+            SolisTelemetryTable,
+        ):
+            self.db_connector.create_table(table.__tablename__)
+        meter = ElectricityHalfHourlyConsumptionTable.interval_start
+        telemetry = SolisTelemetryTable.recorded_at
+        stmts = [
+            select(func.min(meter), func.max(meter)).where(
+                ElectricityHalfHourlyConsumptionTable.meter_id == self.meter_id
+            ),
+            select(func.min(telemetry), func.max(telemetry)),
+            select(func.max(SolarSelfConsumptionTable.interval_start)).where(
+                SolarSelfConsumptionTable.meter_id == self.meter_id
+            ),
+        ]
+        with self.db_connector.session_scope(read_only=True) as session:
+            (meter_from, meter_to), (solar_from, solar_to), (last_stored,) = [
+                session.execute(stmt).one() for stmt in stmts
+            ]
+        if meter_to is None or solar_to is None:
+            return None
+
+        last = min(
+            pd.Timestamp(meter_to),
+            pd.Timestamp(floor_to_interval(pd.Series([solar_to]))[0]),
+        )
+        if last_stored is not None:
+            first = pd.Timestamp(last_stored)
+        else:
+            # intervals before the first solar reading are not analysed
+            first = max(
+                pd.Timestamp(meter_from),
+                pd.Timestamp(floor_to_interval(pd.Series([solar_from]))[0]),
+            )
+        return (first, last) if first <= last else None
+
+    def get_pending_from(self) -> Optional[datetime]:
+        """Get the start of the readings a later refresh may still analyse.
+
+        Returns:
+            pending_from: the last stored interval, which is processed again, or the
+                first Solis interval if none is stored yet, None without Solis readings
+        """
+        for table in (SolarSelfConsumptionTable, SolisTelemetryTable):
+            self.db_connector.create_table(table.__tablename__)
+        stmts = [
+            select(func.max(SolarSelfConsumptionTable.interval_start)).where(
+                SolarSelfConsumptionTable.meter_id == self.meter_id
+            ),
+            select(func.min(SolisTelemetryTable.recorded_at)),
+        ]
+        with self.db_connector.session_scope(read_only=True) as session:
+            last_stored, solar_from = [session.execute(stmt).scalar() for stmt in stmts]
+        if solar_from is None:
+            return None
+        if last_stored is not None:
+            return pd.Timestamp(last_stored).to_pydatetime()
+        return pd.Timestamp(
+            floor_to_interval(pd.Series([solar_from]))[0]
+        ).to_pydatetime()
+
+    def _read_solar(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Bucket the Solis readings of every inverter into half-hour intervals.
+
+        Args:
+            start: first interval start
+            end: first interval start past the window
+
+        Returns:
+            solar: interval_start, generation and grid_export in kWh
+        """
+        telemetry = SolisTelemetryTable.__table__
+        stmt = select(
+            telemetry.c.sn,
+            telemetry.c.recorded_at,
+            telemetry.c.ac_power,
+            telemetry.c.grid_power,
+        ).where(telemetry.c.recorded_at >= start, telemetry.c.recorded_at < end)
+        with self.db_connector.session_scope(read_only=True) as session:
+            readings = pd.DataFrame(
+                session.execute(stmt).all(), columns=stmt.selected_columns.keys()
+            )
+        if readings.empty:
+            return pd.DataFrame(
+                {
+                    "interval_start": pd.Series(dtype="datetime64[ns]"),
+                    "generation": pd.Series(dtype=float),
+                    "grid_export": pd.Series(dtype=float),
+                }
+            )
+
+        readings = pd.DataFrame(
+            {
+                "sn": readings["sn"],
+                "interval_start": floor_to_interval(
+                    pd.to_datetime(readings["recorded_at"])
+                ),
+                "generation": pd.to_numeric(readings["ac_power"]).clip(lower=0),
+                "grid_export": pd.to_numeric(readings["grid_power"]).clip(lower=0),
+            }
+        )
+        # average power in W over each interval, then energy summed over inverters
+        return (
+            readings.groupby(["sn", "interval_start"])[["generation", "grid_export"]]
+            .mean()
+            .mul(INTERVAL_HOURS / 1000)
+            .groupby(level="interval_start")
+            .sum(min_count=1)
+            .reset_index()
+        )
+
+    def _read_meter(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Read the half-hourly import with the unit rate of its local day.
+
+        Args:
+            start: first interval start
+            end: first interval start past the window
+
+        Returns:
+            meter: interval_start, grid_import and unit_rate_inc_vat
+        """
+        meter = ElectricityHalfHourlyConsumptionTable.__table__
+        rates = ElectricityRatesTable.__table__
+        meter_stmt = select(meter.c.interval_start, meter.c.consumption).where(
+            meter.c.meter_id == self.meter_id,
+            meter.c.interval_start >= start,
+            meter.c.interval_start < end,
+        )
+        rates_stmt = select(rates.c.date, rates.c.unit_rate_inc_vat).where(
+            rates.c.meter_id == self.meter_id,
+            rates.c.date >= (start - timedelta(days=1)).date(),
+            rates.c.date <= end.date(),
+        )
+        with self.db_connector.session_scope(read_only=True) as session:
+            meter_data = pd.DataFrame(
+                session.execute(meter_stmt).all(),
+                columns=["interval_start", "grid_import"],
+            )
+            rates_data = pd.DataFrame(
+                session.execute(rates_stmt).all(), columns=["date", "unit_rate_inc_vat"]
+            )
+
+        meter_data["interval_start"] = pd.to_datetime(
+            meter_data["interval_start"]
+        ).astype("datetime64[ns]")
+        meter_data["unit_rate_inc_vat"] = RateTimeline.from_frame(rates_data).rate_at(
+            meter_data["interval_start"].to_numpy()
+        )
+        return meter_data
+
+    def refresh(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> int:
+        """Recompute the intervals not analysed yet, or a given window.
+
+        Args:
+            start: first interval start, the last stored interval by default
+            end: last interval start, the last one covered by both sources by default
+
+        Returns:
+            rows: number of interval rows written
+        """
+        bounds = self._read_bounds()
+        if bounds is None and (start is None or end is None):
+            return 0
+        first = pd.Timestamp(start) if start is not None else bounds[0]
+        last = pd.Timestamp(end) if end is not None else bounds[1]
+
+        rows = 0
+        chunk_start = first
+        while chunk_start <= last:
+            chunk_end = min(chunk_start + self.chunk, last + INTERVAL)
+            intervals = self._read_meter(chunk_start, chunk_end).merge(
+                self._read_solar(chunk_start, chunk_end),
+                on="interval_start",
+                how="left",
+            )
+            # inverters don't report at night, intervals without readings generate 0
+            intervals[["generation", "grid_export"]] = (
+                intervals[["generation", "grid_export"]].astype(float).fillna(0.0)
+            )
+            intervals["self_consumption"] = (
+                intervals["generation"] - intervals["grid_export"]
+            ).clip(lower=0)
+            intervals["load"] = intervals["grid_import"] + intervals["self_consumption"]
+            intervals["savings_inc_vat"] = (
+                intervals["self_consumption"] * intervals["unit_rate_inc_vat"]
+            )
+            intervals["meter_id"] = self.meter_id
+            self.db_connector.upsert_data_to_db(
+                intervals, SolarSelfConsumptionTable.__tablename__
+            )
+            rows += len(intervals)
+            chunk_start = chunk_end
+        return rows
+
+    def get_summary(
+        self, date_from: date, date_to: date, period: Period = "day"
+    ) -> pd.DataFrame:
+        """Get the energy flows and ratios of every local period.
+
+        Args:
+            date_from: first local day to be summarised
+            date_to: last local day to be summarised
+            period: "day", "week" or "month"
+
+        Returns:
+            summary: period_start, the kWh of every flow, savings_inc_vat in pence,
+                self_consumption_ratio (self-consumed share of the generation),
+                self_sufficiency (self-consumed share of the load) and export_ratio
+                (exported share of the generation)
+        """
+        self.db_connector.create_table(SolarSelfConsumptionTable.__tablename__)
+        table = SolarSelfConsumptionTable.__table__
+        # local days start up to a day apart from UTC days
+        stmt = select(
+            table.c.interval_start, *(table.c[c] for c in ENERGY_COLUMNS)
+        ).where(
+            table.c.meter_id == self.meter_id,
+            table.c.interval_start >= date_from - timedelta(days=1),
+            table.c.interval_start < date_to + timedelta(days=2),
+        )
+        with self.db_connector.session_scope(read_only=True) as session:
+            intervals = pd.DataFrame(
+                session.execute(stmt).all(), columns=stmt.selected_columns.keys()
+            )
+
+        dates = get_local_dates(
+            pd.to_datetime(intervals["interval_start"]).astype("datetime64[ns]")
+        )
+        in_range = dates.between(pd.Timestamp(date_from), pd.Timestamp(date_to))
+        summary = (
+            intervals[in_range]
+            .assign(period_start=get_period_start(dates[in_range], period).dt.date)
+            .groupby("period_start", as_index=False)[ENERGY_COLUMNS]
+            .sum(min_count=1)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            generation = summary["generation"].replace(0, np.nan)
+            summary["self_consumption_ratio"] = summary["self_consumption"] / generation
+            summary["self_sufficiency"] = summary["self_consumption"] / summary[
+                "load"
+            ].replace(0, np.nan)
+            summary["export_ratio"] = summary["grid_export"] / generation
+        return summary
+
+
+if __name__ == "__main__":
+    self_consumption_manager = SelfConsumptionManager(
+        DbConnector(CONFIG.db_url.get_secret_value())
+    )
+
+    print(f"Refreshed {self_consumption_manager.refresh()} intervals.")
+    print(
+        self_consumption_manager.get_summary(
+            date(2024, 1, 1), date(2024, 12, 31), "month"
+        )
+    )
@@ -1,39 +1,186 @@
 """Main module."""
 
+import asyncio
+from datetime import date
+from typing import List, Literal, Optional
+
 import pandas as pd
-from dagster import asset, get_dagster_logger
+from dagster import AssetOut, asset, get_dagster_logger, multi_asset
+from sqlalchemy.exc import NoResultFound
 
+from energy_analyzer.database.compaction import Compactor
 from energy_analyzer.database.db_connector import DbConnector
 from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
     ElectricityConsumptionTable,
+    ElectricityExportRatesTable,
+    ElectricityExportTable,
+    ElectricityHalfHourlyConsumptionTable,
     ElectricityRatesTable,
+    ElectricityStandingChargesTable,
     ElectricityWeeklyConsumptionTable2024,
     GasConsumptionTable,
+    GasHalfHourlyConsumptionTable,
     GasRatesTable,
+    GasStandingChargesTable,
     GasWeeklyConsumptionTable2024,
+    OctopusTables,
 )
+from energy_analyzer.database.history_cache import HistoryCache
+from energy_analyzer.database.history_store import ParquetHistoryStore
+from energy_analyzer.database.net_flow import NetFlowManager
+from energy_analyzer.database.rollups import Fuel, RollupManager
+from energy_analyzer.database.self_consumption import SelfConsumptionManager
 from energy_analyzer.octopus_data.data_extract import DataExtractor
 from energy_analyzer.octopus_data.data_handler import (
     DailyDataHandler,
+    HalfHourlyDataHandler,
     WeeklyDataHandler,
 )
+from energy_analyzer.octopus_data.meter_ingestion import ingest_meters
+from energy_analyzer.octopus_data.meter_registry import Meter, MeterRegistry
+from energy_analyzer.octopus_data.tariff_catalogue import TariffCatalogue
 from energy_analyzer.octopus_data.url_generator import UrlGenerator
+from energy_analyzer.solis_data.backfill import SolisBackfill
+from energy_analyzer.solis_data.solis_data import SolisClient
 from energy_analyzer.utils.config import ProjectConfig
+from energy_analyzer.utils.profiling import profile_asset
 
 CONFIG = ProjectConfig()
 URL_GENERATOR = UrlGenerator()
 DB_CONNECTOR = DbConnector(CONFIG.db_url.get_secret_value())
+ROLLUP_MANAGER = RollupManager(DB_CONNECTOR)
+SELF_CONSUMPTION_MANAGER = SelfConsumptionManager(DB_CONNECTOR)
+NET_FLOW_MANAGER = NetFlowManager(DB_CONNECTOR)
+COMPACTOR = Compactor(DB_CONNECTOR)
+HISTORY_STORE = ParquetHistoryStore()
+HISTORY_CACHE = HistoryCache()
+TARIFF_CATALOGUE = TariffCatalogue()
 LOGGER = get_dagster_logger()
+CONFIG_TARIFF_CODES = {
+    ("electricity", "import"): CONFIG.e_tariff_code,
+    ("electricity", "export"): CONFIG.e_export_tariff_code,
+    ("gas", "import"): CONFIG.g_tariff_code,
+}
+
+
+def refresh_after_ingest(
+    fuel: Fuel, series: Literal["rates", "consumption"], data: pd.DataFrame
+) -> None:
+    """Refresh the rollups and the history cache with the days just added.
+
+    Args:
+        fuel: "electricity" or "gas"
+        series: "rates" or "consumption"
+        data: daily rows added to a consumption or rates table
+    """
+    if data.empty:
+        return
+    rows = ROLLUP_MANAGER.refresh(fuel, data["date"].min(), data["date"].max())
+    LOGGER.info(f"Refreshed {rows} {fuel} rollup rows.")
+    rows = HISTORY_CACHE.append(fuel, series, data)
+    LOGGER.info(f"Cached {rows} {fuel} {series} rows.")
+
+
+def refresh_net_flow(data: pd.DataFrame) -> None:
+    """Recompute the electricity net flow of the days just added.
+
+    Args:
+        data: daily rows added to the electricity import or export table
+    """
+    if data.empty:
+        return
+    net_flow = NET_FLOW_MANAGER.refresh(data["date"].min(), data["date"].max())
+    LOGGER.info(f"Refreshed {len(net_flow)} net flow rows.")
+    HISTORY_CACHE.append("electricity", "net_flow", net_flow)
+
+
+def get_rates_urls(
+    fuel: Fuel, direction: Literal["import", "export"], rates_url: str
+) -> List[tuple[Optional[str], str]]:
+    """Get the rates urls of the tariffs in force for a meter of the config.
+
+    Args:
+        fuel: "electricity" or "gas"
+        direction: "import" or "export"
+        rates_url: rates url of the tariff set in the config
+
+    Returns:
+        rates_urls: tariff code and url of every discovered agreement with
+            `tariff_discovery_enabled`, the config tariff and its url otherwise
+    """
+    if not CONFIG.tariff_discovery_enabled:
+        return [(CONFIG_TARIFF_CODES[(fuel, direction)], rates_url)]
+    return URL_GENERATOR.get_meter_rates_urls(get_config_meter(fuel, direction))
+
+
+def get_standing_charges_urls(
+    fuel: Fuel, standing_charges_url: str
+) -> List[tuple[Optional[str], str]]:
+    """Get the standing charges urls of the tariffs in force for a meter of the config.
+
+    Args:
+        fuel: "electricity" or "gas"
+        standing_charges_url: standing charges url of the tariff set in the config
+
+    Returns:
+        standing_charges_urls: tariff code and url of every discovered agreement with
+            `tariff_discovery_enabled`, the config tariff and its url otherwise
+    """
+    if not CONFIG.tariff_discovery_enabled:
+        return [(CONFIG_TARIFF_CODES[(fuel, "import")], standing_charges_url)]
+    return URL_GENERATOR.get_meter_standing_charges_urls(
+        get_config_meter(fuel, "import")
+    )
+
+
+def get_config_meter(fuel: Fuel, direction: Literal["import", "export"]) -> Meter:
+    """Get a meter of the config with its discovered agreements.
+
+    Args:
+        fuel: "electricity" or "gas"
+        direction: "import" or "export"
+
+    Returns:
+        meter: meter of the config, with the agreements of its account
+    """
+    meter = next(
+        meter
+        for meter in MeterRegistry.from_config().get_meters(fuel=fuel)
+        if meter.direction == direction
+    )
+    return TARIFF_CATALOGUE.attach_agreements(meter)
+
+
+def get_update_point(table: OctopusTables, column_name: str = "date") -> date:
+    """Get the latest date of the default meter, older than any reading without one.
+
+    Args:
+        table: table of a series being ingested
+        column_name: time column of the table
+
+    Returns:
+        update_point: date (or time) after which fetched rows are new
+    """
+    try:
+        return DB_CONNECTOR.get_latest_row(
+            table, column_name=column_name, meter_id=DEFAULT_METER_ID
+        )
+    except NoResultFound:
+        return date(1970, 1, 1)
 
 
 @asset(name="Get_Octopus_Electricity_Rates_Data")
+@profile_asset
 def get_electricity_rates_data() -> pd.DataFrame:
     """Get Octopus electricity data."""
     LOGGER.info("Extracting electricity rates data.")
     data_extractor = DataExtractor()
 
-    electricity_raw = data_extractor.get_standard_unit_rates(
-        rates_url=URL_GENERATOR.get_electricity_rates_url()
+    electricity_raw = data_extractor.get_tariff_rates(
+        get_rates_urls(
+            "electricity", "import", URL_GENERATOR.get_electricity_rates_url()
+        )
     )
 
     daily_data_handler = DailyDataHandler()
@@ -44,7 +191,7 @@ def get_electricity_rates_data() -> pd.DataFrame:
         electricity_rates_df
     )
 
-    update_point = DB_CONNECTOR.get_latest_row(ElectricityRatesTable)
+    update_point = get_update_point(ElectricityRatesTable)
     data_to_add_to_db = daily_data_handler.select_data_to_add_to_db(
         electricity_rates_formatted, update_point
     )
@@ -53,6 +200,7 @@ def get_electricity_rates_data() -> pd.DataFrame:
 
 
 @asset(name="Add_Octopus_Electricity_Rates_Data_to_Database")
+@profile_asset
 def add_electricity_rates_data_to_db(
     Get_Octopus_Electricity_Rates_Data: pd.DataFrame,
 ) -> None:
@@ -66,15 +214,17 @@ def add_electricity_rates_data_to_db(
         Get_Octopus_Electricity_Rates_Data,
         table_name=ElectricityRatesTable.__tablename__,
     )
+    refresh_after_ingest("electricity", "rates", Get_Octopus_Electricity_Rates_Data)
 
 
 @asset(name="Get_Octopus_Gas_Rates_Data", deps=[add_electricity_rates_data_to_db])
+@profile_asset
 def get_gas_rates_data() -> pd.DataFrame:
     """Get Octopus standard unit rates data."""
     data_extractor = DataExtractor()
 
-    gas_raw = data_extractor.get_standard_unit_rates(
-        rates_url=URL_GENERATOR.get_gas_rates_url()
+    gas_raw = data_extractor.get_tariff_rates(
+        get_rates_urls("gas", "import", URL_GENERATOR.get_gas_rates_url())
     )
 
     daily_data_handler = DailyDataHandler()
@@ -85,7 +235,7 @@ def get_gas_rates_data() -> pd.DataFrame:
         gas_rates_df
     )
 
-    update_point = DB_CONNECTOR.get_latest_row(GasRatesTable)
+    update_point = get_update_point(GasRatesTable)
     data_to_add_to_db = daily_data_handler.select_data_to_add_to_db(
         gas_rates_formatted, update_point
     )
@@ -94,6 +244,7 @@ def get_gas_rates_data() -> pd.DataFrame:
 
 
 @asset(name="Add_Octopus_Gas_Rates_Data_to_Database")
+@profile_asset
 def add_gas_rates_data_to_db(Get_Octopus_Gas_Rates_Data: pd.DataFrame) -> None:
     """Add Octopus gas rates data to database.
 
@@ -103,40 +254,143 @@ def add_gas_rates_data_to_db(Get_Octopus_Gas_Rates_Data: pd.DataFrame) -> None:
     DB_CONNECTOR.add_data_to_db(
         Get_Octopus_Gas_Rates_Data, table_name=GasRatesTable.__tablename__
     )
+    refresh_after_ingest("gas", "rates", Get_Octopus_Gas_Rates_Data)
 
 
 @asset(
-    name="Get_Octopus_Electricity_Daily_Consumption_Data",
+    name="Get_Octopus_Electricity_Export_Rates_Data",
     deps=[add_gas_rates_data_to_db],
 )
-def get_electricity_consumption_data() -> pd.DataFrame:
-    """Get Octopus electricity consumption data."""
+@profile_asset
+def get_electricity_export_rates_data() -> pd.DataFrame:
+    """Get Octopus electricity export rates data."""
     data_extractor = DataExtractor()
 
-    electricity_consumption_raw = data_extractor.get_consumption_values(
-        consumption_url=URL_GENERATOR.get_electricity_consumption_url(year_from="2022"),
-        api_key=CONFIG.octopus_api_key.get_secret_value(),
+    export_rates_raw = data_extractor.get_tariff_rates(
+        get_rates_urls(
+            "electricity", "export", URL_GENERATOR.get_electricity_export_rates_url()
+        )
     )
 
     daily_data_handler = DailyDataHandler()
 
-    electricity_consumption_df = daily_data_handler.parse_data_to_df(
-        electricity_consumption_raw
-    )
+    export_rates_df = daily_data_handler.parse_data_to_df(export_rates_raw)
 
-    electricity_consumption_formatted = daily_data_handler.format_consumption_data(
-        electricity_consumption_df
+    export_rates_formatted = daily_data_handler.format_standard_unit_rates_data(
+        export_rates_df
     )
 
-    update_point = DB_CONNECTOR.get_latest_row(ElectricityConsumptionTable)
+    update_point = get_update_point(ElectricityExportRatesTable)
     data_to_add_to_db = daily_data_handler.select_data_to_add_to_db(
-        electricity_consumption_formatted, update_point
+        export_rates_formatted, update_point
     )
 
     return data_to_add_to_db
 
 
+@asset(name="Add_Octopus_Electricity_Export_Rates_Data_to_Database")
+@profile_asset
+def add_electricity_export_rates_data_to_db(
+    Get_Octopus_Electricity_Export_Rates_Data: pd.DataFrame,
+) -> None:
+    """Add Octopus electricity export rates data to database.
+
+    Args:
+        data: electricity export standard unit rates data in the form of DataFrame
+    """
+    DB_CONNECTOR.add_data_to_db(
+        Get_Octopus_Electricity_Export_Rates_Data,
+        table_name=ElectricityExportRatesTable.__tablename__,
+    )
+    rows = HISTORY_CACHE.append(
+        "electricity", "export_rates", Get_Octopus_Electricity_Export_Rates_Data
+    )
+    LOGGER.info(f"Cached {rows} electricity export_rates rows.")
+
+
+@asset(
+    name="Add_Octopus_Standing_Charges_to_Database",
+    deps=[add_electricity_export_rates_data_to_db],
+)
+@profile_asset
+def add_standing_charges_to_db() -> None:
+    """Add new Octopus electricity and gas standing charges to database."""
+    data_extractor = DataExtractor()
+    daily_data_handler = DailyDataHandler()
+
+    for fuel, standing_charges_table, standing_charges_url in (
+        (
+            "electricity",
+            ElectricityStandingChargesTable,
+            URL_GENERATOR.get_electricity_standing_charges_url(),
+        ),
+        (
+            "gas",
+            GasStandingChargesTable,
+            URL_GENERATOR.get_gas_standing_charges_url(),
+        ),
+    ):
+        standing_charges_raw = data_extractor.get_tariff_standing_charges(
+            get_standing_charges_urls(fuel, standing_charges_url)
+        )
+        if not standing_charges_raw:
+            continue
+        standing_charges_formatted = daily_data_handler.format_standing_charges_data(
+            daily_data_handler.parse_data_to_df(standing_charges_raw)
+        )
+        data_to_add_to_db = daily_data_handler.select_data_to_add_to_db(
+            standing_charges_formatted, get_update_point(standing_charges_table)
+        )
+        DB_CONNECTOR.add_data_to_db(
+            data_to_add_to_db, table_name=standing_charges_table.__tablename__
+        )
+        LOGGER.info(f"Added {len(data_to_add_to_db)} {fuel} standing charges.")
+
+
+@multi_asset(
+    outs={
+        "Get_Octopus_Electricity_Daily_Consumption_Data": AssetOut(),
+        "Get_Octopus_Electricity_Daily_Export_Data": AssetOut(),
+    },
+    deps=[add_electricity_export_rates_data_to_db],
+)
+@profile_asset
+def get_electricity_import_export_data() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Get Octopus electricity import and export data, fetched concurrently."""
+    data_extractor = DataExtractor()
+
+    electricity_consumption_raw, electricity_export_raw = (
+        data_extractor.get_consumption_values_concurrently(
+            consumption_urls=[
+                URL_GENERATOR.get_electricity_consumption_url(year_from="2022"),
+                URL_GENERATOR.get_electricity_export_url(year_from="2022"),
+            ],
+            api_key=CONFIG.octopus_api_key.get_secret_value(),
+        )
+    )
+
+    daily_data_handler = DailyDataHandler()
+
+    electricity_consumption_formatted = daily_data_handler.format_consumption_data(
+        daily_data_handler.parse_data_to_df(electricity_consumption_raw)
+    )
+    electricity_export_formatted = daily_data_handler.format_export_data(
+        daily_data_handler.parse_data_to_df(electricity_export_raw)
+    )
+
+    consumption_to_add_to_db = daily_data_handler.select_data_to_add_to_db(
+        electricity_consumption_formatted,
+        get_update_point(ElectricityConsumptionTable),
+    )
+    export_to_add_to_db = daily_data_handler.select_data_to_add_to_db(
+        electricity_export_formatted, get_update_point(ElectricityExportTable)
+    )
+
+    return consumption_to_add_to_db, export_to_add_to_db
+
+
 @asset(name="Add_Octopus_Electricity_Consumption_Data_to_Database")
+@profile_asset
 def add_electricity_consumption_data_to_db(
     Get_Octopus_Electricity_Daily_Consumption_Data: pd.DataFrame,
 ) -> None:
@@ -149,12 +403,38 @@ def add_electricity_consumption_data_to_db(
         Get_Octopus_Electricity_Daily_Consumption_Data,
         table_name=ElectricityConsumptionTable.__tablename__,
     )
+    refresh_after_ingest(
+        "electricity", "consumption", Get_Octopus_Electricity_Daily_Consumption_Data
+    )
+    refresh_net_flow(Get_Octopus_Electricity_Daily_Consumption_Data)
+
+
+@asset(name="Add_Octopus_Electricity_Export_Data_to_Database")
+@profile_asset
+def add_electricity_export_data_to_db(
+    Get_Octopus_Electricity_Daily_Export_Data: pd.DataFrame,
+) -> None:
+    """Add Octopus electricity export data to database.
+
+    Args:
+        data: electricity export data in the form of DataFrame
+    """
+    DB_CONNECTOR.add_data_to_db(
+        Get_Octopus_Electricity_Daily_Export_Data,
+        table_name=ElectricityExportTable.__tablename__,
+    )
+    rows = HISTORY_CACHE.append(
+        "electricity", "export", Get_Octopus_Electricity_Daily_Export_Data
+    )
+    LOGGER.info(f"Cached {rows} electricity export rows.")
+    refresh_net_flow(Get_Octopus_Electricity_Daily_Export_Data)
 
 
 @asset(
     name="Get_Octopus_Gas_Daily_Consumption_Data",
     deps=[add_electricity_consumption_data_to_db],
 )
+@profile_asset
 def get_gas_consumption_data() -> pd.DataFrame:
     """Get Octopus gas consumption data."""
     data_extractor = DataExtractor()
@@ -172,7 +452,7 @@ def get_gas_consumption_data() -> pd.DataFrame:
         gas_consumption_df, CONFIG.gas_m3_to_kwh_conversion
     )
 
-    update_point = DB_CONNECTOR.get_latest_row(GasConsumptionTable)
+    update_point = get_update_point(GasConsumptionTable)
     data_to_add_to_db = daily_data_handler.select_data_to_add_to_db(
         gas_consumption_formatted, update_point
     )
@@ -181,6 +461,7 @@ def get_gas_consumption_data() -> pd.DataFrame:
 
 
 @asset(name="Add_Octopus_Gas_Consumption_Data_to_Database")
+@profile_asset
 def add_gas_consumption_data_to_db(
     Get_Octopus_Gas_Daily_Consumption_Data: pd.DataFrame,
 ) -> None:
@@ -193,12 +474,14 @@ def add_gas_consumption_data_to_db(
         Get_Octopus_Gas_Daily_Consumption_Data,
         table_name=GasConsumptionTable.__tablename__,
     )
+    refresh_after_ingest("gas", "consumption", Get_Octopus_Gas_Daily_Consumption_Data)
 
 
 @asset(
     name="Get_Octopus_Electricity_Weekly_Consumption_Data",
     deps=[add_gas_consumption_data_to_db],
 )
+@profile_asset
 def get_electricity_weekly_consumption_data() -> pd.DataFrame:
     """Get Octopus electricity weekly consumption data."""
     data_extractor = DataExtractor()
@@ -224,6 +507,7 @@ def get_electricity_weekly_consumption_data() -> pd.DataFrame:
 
 
 @asset(name="Add_Octopus_Electricity_Weekly_Consumption_Data_to_Database")
+@profile_asset
 def add_electricity_weekly_consumption_data_to_db(
     Get_Octopus_Electricity_Weekly_Consumption_Data: pd.DataFrame,
 ) -> None:
@@ -243,6 +527,7 @@ def add_electricity_weekly_consumption_data_to_db(
     name="Get_Octopus_Gas_Weekly_Consumption_Data",
     deps=[add_electricity_weekly_consumption_data_to_db],
 )
+@profile_asset
 def get_gas_weekly_consumption_data() -> pd.DataFrame:
     """Get Octopus gas weekly consumption data."""
     data_extractor = DataExtractor()
@@ -266,6 +551,7 @@ def get_gas_weekly_consumption_data() -> pd.DataFrame:
 
 
 @asset(name="Add_Octopus_Gas_Weekly_Consumption_Data_to_Database")
+@profile_asset
 def add_gas_weekly_consumption_data_to_db(
     Get_Octopus_Gas_Weekly_Consumption_Data: pd.DataFrame,
 ) -> None:
@@ -279,3 +565,106 @@ def add_gas_weekly_consumption_data_to_db(
         table_name=GasWeeklyConsumptionTable2024.__tablename__,
         if_exists="replace",
     )
+
+
+@asset(
+    name="Add_Octopus_Half_Hourly_Consumption_to_Database",
+    deps=[add_electricity_consumption_data_to_db],
+)
+@profile_asset
+def add_half_hourly_consumption_to_db() -> None:
+    """Add new Octopus electricity and gas half-hourly consumption to database."""
+    data_extractor = DataExtractor()
+    half_hourly_data_handler = HalfHourlyDataHandler()
+
+    for fuel, consumption_table, consumption_url, conversion in (
+        (
+            "electricity",
+            ElectricityHalfHourlyConsumptionTable,
+            URL_GENERATOR.get_electricity_half_hourly_consumption_url(),
+            1,
+        ),
+        (
+            "gas",
+            GasHalfHourlyConsumptionTable,
+            URL_GENERATOR.get_gas_half_hourly_consumption_url(),
+            CONFIG.gas_m3_to_kwh_conversion,
+        ),
+    ):
+        consumption_raw = data_extractor.get_consumption_values(
+            consumption_url=consumption_url,
+            api_key=CONFIG.octopus_api_key.get_secret_value(),
+        )
+        if not consumption_raw:
+            continue
+        consumption_formatted = half_hourly_data_handler.format_consumption_data(
+            half_hourly_data_handler.parse_data_to_df(consumption_raw), conversion
+        )
+        data_to_add_to_db = half_hourly_data_handler.select_data_to_add_to_db(
+            consumption_formatted,
+            get_update_point(consumption_table, column_name="interval_start"),
+        )
+        DB_CONNECTOR.add_data_to_db(
+            data_to_add_to_db, table_name=consumption_table.__tablename__
+        )
+        LOGGER.info(f"Added {len(data_to_add_to_db)} {fuel} half-hourly readings.")
+
+
+@asset(name="Backfill_Solis_Telemetry")
+@profile_asset
+def backfill_solis_telemetry() -> None:
+    """Load the Solis days not loaded yet, up to yesterday, into `solis_telemetry`."""
+    if CONFIG.solis_key_id is None or CONFIG.solis_key_secret is None:
+        LOGGER.info("No Solis API key configured, skipping.")
+        return
+    solis_backfill = SolisBackfill(SolisClient(), DB_CONNECTOR)
+    for table_name, rows in asyncio.run(solis_backfill.run()).items():
+        LOGGER.info(f"Backfilled {rows} rows of {table_name}.")
+    if solis_backfill.failed:
+        LOGGER.warning(
+            f"{len(solis_backfill.failed)} Solis requests failed, retried next run."
+        )
+
+
+@asset(
+    name="Refresh_Solar_Self_Consumption",
+    deps=[add_half_hourly_consumption_to_db, backfill_solis_telemetry],
+)
+@profile_asset
+def refresh_solar_self_consumption() -> None:
+    """Analyse the half-hour intervals with new Solis and Octopus readings."""
+    rows = SELF_CONSUMPTION_MANAGER.refresh()
+    LOGGER.info(f"Refreshed {rows} self-consumption intervals.")
+
+
+@asset(name="Ingest_Registered_Meters")
+@profile_asset
+def ingest_registered_meters() -> None:
+    """Ingest the daily data of every meter of the registry, a process per meter."""
+    if not CONFIG.meter_registry_path:
+        LOGGER.info("No meter registry configured, skipping.")
+        return
+    meter_registry = MeterRegistry.load(CONFIG.meter_registry_path)
+    for key, rows in ingest_meters(list(meter_registry)).items():
+        LOGGER.info(f"Ingested {rows} rows of meter {key}.")
+
+
+@asset(
+    name="Compact_Detail_Readings",
+    deps=[add_gas_weekly_consumption_data_to_db, refresh_solar_self_consumption],
+)
+@profile_asset
+def compact_detail_readings() -> None:
+    """Roll up old detail readings, then detach the partitions past retention."""
+    for table_name, rows in COMPACTOR.compact_all().items():
+        LOGGER.info(f"Compacted {rows} rows of {table_name}.")
+    for table_name, partitions in DB_CONNECTOR.apply_retention().items():
+        LOGGER.info(f"Detached partitions {partitions} of {table_name}.")
+
+
+@asset(name="Sync_Parquet_History", deps=[compact_detail_readings])
+@profile_asset
+def sync_parquet_history() -> None:
+    """Mirror the rows added to the database since the last sync into Parquet."""
+    for table_name, rows in HISTORY_STORE.sync(DB_CONNECTOR).items():
+        LOGGER.info(f"Exported {rows} rows of {table_name}.")
@@ -1,22 +1,95 @@
 """Energy rates analyzer."""
 
-from typing import Any, List
+from datetime import date
+from typing import Any, List, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from energy_analyzer.database.history_cache import HistoryCache
+from energy_analyzer.database.history_store import ParquetHistoryStore
+from energy_analyzer.utils.data_models import ReadingSeries
 
 
 class EnergyAnalyzer:
     """Energy Analyzer class."""
 
-    def __init__(self, data: List[dict[str, Any]]) -> None:
-        """Class initiator method."""
+    def __init__(
+        self,
+        data: List[dict[str, Any]] | pd.DataFrame | pa.Table | ReadingSeries,
+    ) -> None:
+        """Class initiator method.
+
+        Args:
+            data: energy rates as API results, a DataFrame, an Arrow table or a
+                "unit_rate_inc_vat" reading series
+        """
         self.data = data
+        self._df: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_history_cache(
+        cls,
+        history_cache: HistoryCache,
+        fuel: str = "electricity",
+        meter_id: Optional[str] = None,
+    ) -> "EnergyAnalyzer":
+        """Create an analyzer of the unit rates in the memory-mapped history cache.
+
+        Args:
+            history_cache: history cache
+            fuel: "electricity" or "gas"
+            meter_id: meter of the rates, every cached row by default
+
+        Returns:
+            energy_analyzer: analyzer of the rates ordered by date
+        """
+        rates = history_cache.load(fuel, "rates")
+        if meter_id is not None:
+            rates = rates.filter(pc.equal(rates.column("meter_id"), meter_id))
+        return cls(rates)
+
+    @classmethod
+    def from_history_store(
+        cls,
+        history_store: ParquetHistoryStore,
+        fuel: str = "electricity",
+        date_from: Optional[date] = None,
+        meter_id: Optional[str] = None,
+    ) -> "EnergyAnalyzer":
+        """Create an analyzer of the unit rates mirrored in the Parquet history.
+
+        Args:
+            history_store: Parquet history store
+            fuel: "electricity" or "gas"
+            date_from: first day of rates to be analyzed, all history by default
+            meter_id: meter of the rates, every mirrored row by default
+
+        Returns:
+            energy_analyzer: analyzer of the rates ordered by date
+        """
+        columns = ["date", "unit_rate_inc_vat"]
+        if meter_id is None:
+            return cls(history_store.read(fuel, "rates", date_from, columns=columns))
+        rates = history_store.read(
+            fuel, "rates", date_from, columns=columns + ["meter_id"]
+        )
+        return cls(
+            rates.filter(pc.equal(rates.column("meter_id"), meter_id)).select(columns)
+        )
 
     def energy_data_to_df(self) -> pd.DataFrame:
-        """Transform energy data into DataFrame."""
-        df = pd.DataFrame(self.data)
-        print(df)
-        return df
+        """Transform energy data into DataFrame, once."""
+        if self._df is None:
+            if isinstance(self.data, pa.Table):
+                # numeric columns without nulls are used in place, dates stay numeric
+                self._df = self.data.to_pandas(split_blocks=True, date_as_object=False)
+            elif isinstance(self.data, ReadingSeries):
+                self._df = self.data.to_pandas(time_name="date")
+            else:
+                self._df = pd.DataFrame(self.data)
+        return self._df
 
     def get_last_value(self) -> float:
         """Get the energy last value."""
@@ -1,13 +1,177 @@
-"""Data extractor module."""
+"""Data extractor module.
 
-from typing import Any, List
+Every request to the Octopus API holds one of `octopus_max_concurrent_requests` slots
+while it is in flight, whichever thread sends it. Processes ingesting meters in
+parallel share a single set of slots through `set_request_slots`, so the cap holds for
+the whole deployment.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional, Tuple
 
 import requests
 
+from energy_analyzer.octopus_data.landing_zone import LandingZone
+from energy_analyzer.utils.config import ProjectConfig
+from energy_analyzer.utils.data_models import ReadingSeries
+
+CONFIG = ProjectConfig()
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_request_slots: Any = threading.BoundedSemaphore(CONFIG.octopus_max_concurrent_requests)
+
+
+def set_request_slots(request_slots: Any) -> None:
+    """Share the API request slots of this process with other processes.
+
+    Args:
+        request_slots: semaphore bounding the requests in flight, e.g. a
+            `multiprocessing.BoundedSemaphore` created by the parent process
+    """
+    global _request_slots
+    _request_slots = request_slots
+
 
 class DataExtractor:
     """Data extractor class."""
 
+    def __init__(
+        self,
+        landing_zone: Optional[LandingZone] = None,
+        replay: Optional[bool] = None,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            landing_zone: raw payload archive, the configured one by default when
+                `landing_zone_enabled` is set
+            replay: read the results from the landing zone instead of the API,
+                `landing_zone_replay` by default
+        """
+        # a session keeps the connections to the API open between the pages
+        self.session = requests.Session()
+        self.replay = CONFIG.landing_zone_replay if replay is None else replay
+        if landing_zone is None and (CONFIG.landing_zone_enabled or self.replay):
+            landing_zone = LandingZone()
+        self.landing_zone = landing_zone
+
+    def _get(
+        self, url: str, auth: Optional[Tuple[str, str]] = None
+    ) -> requests.Response:
+        """Send a GET request, retrying on rate limiting, server errors and timeouts.
+
+        Args:
+            url: API request url
+            auth: basic auth credentials
+
+        Returns:
+            response: successful API response
+        """
+        attempt = 0
+        while True:
+            try:
+                # the slot is not held while backing off
+                with _request_slots:
+                    response = self.session.get(
+                        url, auth=auth, timeout=CONFIG.octopus_request_timeout
+                    )
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt >= CONFIG.octopus_max_retries:
+                    raise
+                delay = CONFIG.octopus_retry_backoff * 2**attempt
+                logging.warning(f"{url} -> {error!r}, retrying in {delay:.1f}s.")
+            else:
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt >= CONFIG.octopus_max_retries
+                ):
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                delay = (
+                    float(retry_after)
+                    if retry_after.isdigit()
+                    else CONFIG.octopus_retry_backoff * 2**attempt
+                )
+                logging.warning(
+                    f"{url} -> {response.status_code}, retrying in {delay:.1f}s."
+                )
+            attempt += 1
+            time.sleep(delay)
+
+    def _iter_pages(
+        self, url: str, auth: Optional[Tuple[str, str]] = None
+    ) -> Iterator[List[dict[str, Any]]]:
+        """Get the results of an API request page by page.
+
+        Args:
+            url: API request url of the first page
+            auth: basic auth credentials
+
+        Yields:
+            results: results of one page in a format of list of dictionaries
+        """
+        if self.replay:
+            yield self.landing_zone.replay(url)
+            return
+
+        next_url: Optional[str] = url
+        while next_url:
+            output = self._get(next_url, auth=auth).json()
+            if self.landing_zone is not None:
+                self.landing_zone.archive(next_url, output)
+            yield output["results"]
+            next_url = output.get("next")
+
+    def _get_results(
+        self, url: str, auth: Optional[Tuple[str, str]] = None
+    ) -> List[dict[str, Any]]:
+        """Get the results of all the pages of an API request.
+
+        Args:
+            url: API request url of the first page
+            auth: basic auth credentials
+
+        Returns:
+            results: results of every page in a format of list of dictionaries
+        """
+        results: List[dict[str, Any]] = []
+        for page in self._iter_pages(url, auth=auth):
+            results.extend(page)
+        return results
+
+    def _get_series(
+        self,
+        url: str,
+        time_key: str,
+        value_key: str,
+        name: str,
+        auth: Optional[Tuple[str, str]] = None,
+    ) -> ReadingSeries:
+        """Get the results of all the pages of an API request as a reading series.
+
+        Every page is packed into the series arrays as soon as it arrives, so only
+        one page of dictionaries is alive at a time.
+
+        Args:
+            url: API request url of the first page
+            time_key: key of the result timestamps
+            value_key: key of the result values
+            name: name of the series values
+            auth: basic auth credentials
+
+        Returns:
+            series: readings of every page ordered by time
+        """
+        series = ReadingSeries(name)
+        for page in self._iter_pages(url, auth=auth):
+            series.extend_records(page, time_key, value_key)
+        series.sort()
+        return series
+
     def get_standard_unit_rates(self, rates_url: str) -> List[dict[str, Any]]:
         """Export standard unit rates.
 
@@ -18,9 +182,76 @@ class DataExtractor:
             output["results"]: standard unit rates data in
                                 a format of list of dictionaries
         """
-        response = requests.get(rates_url)
-        output = response.json()
-        return output["results"]
+        return self._get_results(rates_url)
+
+    def get_standing_charges(self, standing_charges_url: str) -> List[dict[str, Any]]:
+        """Get standing charges.
+
+        Args:
+            standing_charges_url: standing charges url of a tariff
+
+        Returns:
+            standing_charges: daily standing charges with their validity
+        """
+        return self._get_results(standing_charges_url)
+
+    def get_tariff_rates(
+        self, rates_urls: List[tuple[Optional[str], str]]
+    ) -> List[dict[str, Any]]:
+        """Get the standard unit rates of successive tariffs.
+
+        Args:
+            rates_urls: tariff code and standard unit rates url of every tariff
+
+        Returns:
+            rates: standard unit rates of every tariff, with its "tariff_code"
+        """
+        return [
+            {**rate, "tariff_code": tariff_code}
+            for tariff_code, rates_url in rates_urls
+            for rate in self.get_standard_unit_rates(rates_url)
+        ]
+
+    def get_tariff_standing_charges(
+        self, standing_charges_urls: List[tuple[Optional[str], str]]
+    ) -> List[dict[str, Any]]:
+        """Get the standing charges of successive tariffs.
+
+        Args:
+            standing_charges_urls: tariff code and standing charges url of every
+                tariff
+
+        Returns:
+            standing_charges: standing charges of every tariff, with its "tariff_code"
+        """
+        return [
+            {**standing_charge, "tariff_code": tariff_code}
+            for tariff_code, standing_charges_url in standing_charges_urls
+            for standing_charge in self.get_standing_charges(standing_charges_url)
+        ]
+
+    def get_account(self, account_url: str, api_key: str) -> dict[str, Any]:
+        """Get the meter points and agreement history of an account.
+
+        Args:
+            account_url: accounts endpoint url of the account
+            api_key: API Key of the account
+
+        Returns:
+            account: account number and properties with their meter points
+        """
+        return self._get(account_url, auth=(api_key, "")).json()
+
+    def get_products(self, products_url: str) -> List[dict[str, Any]]:
+        """Get the products catalogue.
+
+        Args:
+            products_url: products endpoint url
+
+        Returns:
+            products: products of every page in a format of list of dictionaries
+        """
+        return self._get_results(products_url)
 
     def get_consumption_values(
         self,
@@ -37,14 +268,67 @@ class DataExtractor:
             output["results"]: standard unit rates data in
                                 a format of list of dictionaries
         """
-        response = requests.get(consumption_url, auth=(api_key, ""))
-        output = response.json()
-        return output["results"]
+        return self._get_results(consumption_url, auth=(api_key, ""))
+
+    def get_consumption_values_concurrently(
+        self, consumption_urls: List[str], api_key: str
+    ) -> List[List[dict[str, Any]]]:
+        """Extract the consumption values of several meters at the same time.
+
+        Every request runs in its own thread with its own session, e.g. to fetch the
+        import and export meters in the time of the slowest one.
+
+        Args:
+            consumption_urls: consumption urls of the meters
+            api_key: API Key required for the requests
+
+        Returns:
+            results: results of every url, in the order of the urls
+        """
+
+        def extract(consumption_url: str) -> List[dict[str, Any]]:
+            data_extractor = DataExtractor(self.landing_zone, self.replay)
+            return data_extractor.get_consumption_values(consumption_url, api_key)
+
+        with ThreadPoolExecutor(max(len(consumption_urls), 1)) as executor:
+            return list(executor.map(extract, consumption_urls))
+
+    def get_standard_unit_rates_series(self, rates_url: str) -> ReadingSeries:
+        """Export standard unit rates as a reading series.
+
+        Args:
+            rates_url: specific standard unit rates url for the API request
+
+        Returns:
+            series: unit rates including VAT by start of validity
+        """
+        return self._get_series(
+            rates_url, "valid_from", "value_inc_vat", "unit_rate_inc_vat"
+        )
+
+    def get_consumption_series(
+        self, consumption_url: str, api_key: str
+    ) -> ReadingSeries:
+        """Extract consumption values from the API call as a reading series.
+
+        Args:
+            consumption_url: specific consumption url for the API request
+            api_key: API Key required for the request
+
+        Returns:
+            series: consumption by start of interval
+        """
+        return self._get_series(
+            consumption_url,
+            "interval_start",
+            "consumption",
+            "consumption",
+            auth=(api_key, ""),
+        )
 
 
 if __name__ == "__main__":
     from energy_analyzer.octopus_data.url_generator import UrlGenerator
-    from energy_analyzer.utils.config import ProjectConfig
 
     config = ProjectConfig()
     url_generator = UrlGenerator()
@@ -7,6 +7,10 @@ import pandas as pd
 from dateutil import parser
 from dateutil.parser import parse
 
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+
 
 class _DataHandler:
     """Data extractor class."""
@@ -38,6 +42,9 @@ class _DataHandler:
             new_data: only new data to be added to db
         """
         # print(data.iloc[:, 0])
+        if isinstance(update_point, date):
+            # datetime64 columns cannot be compared with datetime.date objects
+            update_point = pd.Timestamp(update_point)
         new_data = data[(data.iloc[:, 0] > update_point)]
         return new_data
 
@@ -52,23 +59,55 @@ class DailyDataHandler(_DataHandler):
             df: raw data in DataFrame format
 
         Returns:
-            standard_unit_rates_data: formatted data
+            standard_unit_rates_data: formatted data, dated by the local day the rate
+                starts on, of the `octopus_payment_method` payment method only
         """
-        standard_unit_rates_data = df.loc[:, ["valid_from", "value_inc_vat"]]
+        if "payment_method" in df:
+            # rates without payment method apply to every payment method
+            df = df[
+                df["payment_method"].isna()
+                | (df["payment_method"] == CONFIG.octopus_payment_method)
+            ]
+        columns = ["valid_from", "value_exc_vat", "value_inc_vat"]
+        if "tariff_code" in df:
+            columns.append("tariff_code")
+        standard_unit_rates_data = df.loc[:, columns]
         standard_unit_rates_data.rename(
             columns={
                 "valid_from": "date",
+                "value_exc_vat": "unit_rate_exc_vat",
                 "value_inc_vat": "unit_rate_inc_vat",
             },
             inplace=True,
         )
-        standard_unit_rates_data["date"] = standard_unit_rates_data["date"].apply(
-            lambda x: parse(parser.isoparse(x).strftime("%Y-%m-%d"))
+        # rates are published in UTC, days starting in summer time start at 23:00 UTC
+        standard_unit_rates_data["date"] = (
+            pd.to_datetime(standard_unit_rates_data["date"], utc=True)
+            .dt.tz_convert(CONFIG.local_timezone)
+            .dt.tz_localize(None)
+            .dt.normalize()
         )
         standard_unit_rates_data.sort_values(by=["date"], inplace=True)
 
         return standard_unit_rates_data
 
+    def format_standing_charges_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Format standing charges data.
+
+        Args:
+            df: raw data in DataFrame format
+
+        Returns:
+            standing_charges_data: formatted data, a row per change of the charge, of
+                the `octopus_payment_method` payment method only
+        """
+        return self.format_standard_unit_rates_data(df).rename(
+            columns={
+                "unit_rate_exc_vat": "standing_charge_exc_vat",
+                "unit_rate_inc_vat": "standing_charge_inc_vat",
+            }
+        )
+
     def format_consumption_data(
         self,
         df: pd.DataFrame,
@@ -97,6 +136,48 @@ class DailyDataHandler(_DataHandler):
 
         return consumption_data
 
+    def format_export_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Format export data.
+
+        Args:
+            df: raw data of the export meter in DataFrame format
+
+        Returns:
+            export_data: formatted data
+        """
+        return self.format_consumption_data(df).rename(
+            columns={"consumption": "export_value"}
+        )
+
+
+class HalfHourlyDataHandler(_DataHandler):
+    """Half-hourly data extractor class."""
+
+    def format_consumption_data(
+        self,
+        df: pd.DataFrame,
+        gas_m3_to_kwh_conversion: float = 1,
+    ) -> pd.DataFrame:
+        """Format half-hourly consumption data.
+
+        Args:
+            df: raw data of consumption requested without grouping in DataFrame format
+            gas_m3_to_kwh_conversion: conversion factor of gas readings in m3
+
+        Returns:
+            consumption_data: interval_start in UTC and consumption in kWh
+        """
+        consumption_data = df.loc[:, ["interval_start", "consumption"]]
+        consumption_data["interval_start"] = pd.to_datetime(
+            consumption_data["interval_start"], utc=True
+        ).dt.tz_localize(None)
+        consumption_data["consumption"] = consumption_data["consumption"].multiply(
+            gas_m3_to_kwh_conversion
+        )
+        consumption_data.sort_values(by=["interval_start"], inplace=True)
+
+        return consumption_data
+
 
 class WeeklyDataHandler(_DataHandler):
     """Weekly data extractor class."""
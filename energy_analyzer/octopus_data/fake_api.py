@@ -0,0 +1,377 @@
+"""Local Octopus API stand-in module.
+
+Serves the endpoints built by `UrlGenerator` from `SyntheticOctopusData`:
+- /products/<product>/<fuel>-tariffs/<tariff>/standard-unit-rates/
+- /products/<product>/<fuel>-tariffs/<tariff>/standing-charges/
+- /<fuel>-meter-points/<mpan or mprn>/meters/<serial>/consumption/
+- /accounts/<number>/
+- /products/
+
+`period_from`, `period_to`, `group_by`, `page_size` and `page` behave like the real
+API, including `next`/`previous` links, standing charges include the charge in force
+at `period_from`, and consumption and account endpoints require basic auth.
+Latency, 429 and 5xx responses can be injected to test retries and tail latency.
+
+Start it and point the project at it:
+
+```bash
+python -m energy_analyzer.octopus_data.fake_api --port 8765 --latency 0.05
+OCTOPUS_API_URL=http://127.0.0.1:8765/v1 dagster dev
+```
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from energy_analyzer.octopus_data.synthetic_data import SyntheticOctopusData
+
+RATES_PATH = re.compile(
+    r"^/products/(?P<product>[^/]+)/(?P<fuel>electricity|gas)-tariffs/"
+    + r"(?P<tariff>[^/]+)/standard-unit-rates/?$"
+)
+STANDING_CHARGES_PATH = re.compile(
+    r"^/products/(?P<product>[^/]+)/(?P<fuel>electricity|gas)-tariffs/"
+    + r"(?P<tariff>[^/]+)/standing-charges/?$"
+)
+CONSUMPTION_PATH = re.compile(
+    r"^/(?P<fuel>electricity|gas)-meter-points/(?P<point>[^/]+)/meters/"
+    + r"(?P<serial>[^/]+)/consumption/?$"
+)
+ACCOUNT_PATH = re.compile(r"^/accounts/(?P<account>[^/]+)/?$")
+PRODUCTS_PATH = re.compile(r"^/products/?$")
+MAX_PAGE_SIZE = {
+    "rates": 1500,
+    "standing_charges": 1500,
+    "consumption": 25000,
+    "products": 100,
+}
+DEFAULT_PAGE_SIZE = 100
+
+
+class FakeOctopusApi:
+    """Fake Octopus API class."""
+
+    def __init__(
+        self,
+        synthetic_data: Optional[SyntheticOctopusData] = None,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        rate_limit_probability: float = 0.0,
+        server_error_probability: float = 0.0,
+        retry_after: int = 1,
+        path_prefix: str = "/v1",
+        seed: int = 0,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            synthetic_data: data to serve, two years for one meter by default
+            latency: fixed delay added to every response in seconds
+            latency_jitter: mean of an exponential delay added on top of latency,
+                gives the long tail of a real API
+            rate_limit_probability: share of requests answered with 429
+            server_error_probability: share of requests answered with 500/502/503
+            retry_after: Retry-After header value sent with 429 responses
+            path_prefix: API version prefix of every endpoint
+            seed: random generator seed of the injected faults
+        """
+        self.synthetic_data = synthetic_data or SyntheticOctopusData()
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit_probability = rate_limit_probability
+        self.server_error_probability = server_error_probability
+        self.retry_after = retry_after
+        self.path_prefix = path_prefix.rstrip("/")
+        self.request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._series: dict[Tuple, Tuple[np.ndarray, List[dict[str, Any]]]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _get_series(
+        self, kind: str, meter: int = 0, group_by: Optional[str] = None
+    ) -> Tuple[np.ndarray, List[dict[str, Any]]]:
+        """Get generated results sorted oldest first with their start timestamps.
+
+        Args:
+            kind: "rates", "standing_charges", "products" or "consumption"
+            meter: meter index
+            group_by: consumption grouping
+
+        Returns:
+            starts: interval starts in epoch nanoseconds
+            results: generated results
+        """
+        key = (kind, meter, group_by)
+        with self._lock:
+            if key not in self._series:
+                if kind == "rates":
+                    results = self.synthetic_data.standard_unit_rates()
+                    start_key = "valid_from"
+                elif kind == "standing_charges":
+                    results = self.synthetic_data.standing_charges()
+                    start_key = "valid_from"
+                elif kind == "products":
+                    results = self.synthetic_data.products()
+                    start_key = None
+                else:
+                    results = self.synthetic_data.consumption(meter, group_by)
+                    start_key = "interval_start"
+                results.reverse()
+                # products are not filtered by period, only paginated
+                starts = (
+                    pd.to_datetime(
+                        [result[start_key] for result in results],
+                        utc=True,
+                        format="ISO8601",
+                    )
+                    .as_unit("ns")
+                    .asi8
+                    if start_key
+                    else np.zeros(len(results), dtype=np.int64)
+                )
+                self._series[key] = (starts, results)
+            return self._series[key]
+
+    def _get_meter(self, point: str) -> int:
+        """Map a meter point to a synthetic meter index, unknown ones by a hash."""
+        for index, meter in enumerate(self.synthetic_data.meters):
+            if point in (meter["mpan"], meter["mprn"], meter["export_mpan"]):
+                return index
+        return zlib.crc32(point.encode()) % len(self.synthetic_data.meters)
+
+    @staticmethod
+    def _parse_timestamp(value: Optional[str]) -> Optional[int]:
+        """Parse a period boundary query parameter into epoch nanoseconds."""
+        if not value:
+            return None
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize("UTC")
+        return timestamp.as_unit("ns").value
+
+    def _inject_fault(self) -> Optional[Tuple[HTTPStatus, dict[str, str]]]:
+        """Draw the injected latency and fault of a request."""
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency
+            if self.latency_jitter:
+                delay += self._random.expovariate(1 / self.latency_jitter)
+            draw = self._random.random()
+            server_error = self._random.choice(
+                [
+                    HTTPStatus.INTERNAL_SERVER_ERROR,
+                    HTTPStatus.BAD_GATEWAY,
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                ]
+            )
+        if delay:
+            time.sleep(delay)
+        if draw < self.rate_limit_probability:
+            return HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": str(self.retry_after)}
+        if draw < self.rate_limit_probability + self.server_error_probability:
+            return server_error, {}
+        return None
+
+    def handle(
+        self, url: str, authorization: Optional[str] = None
+    ) -> Tuple[HTTPStatus, dict[str, str], dict[str, Any]]:
+        """Answer an API request, counting the requests in flight.
+
+        Args:
+            url: requested url with the query string
+            authorization: Authorization header of the request
+
+        Returns:
+            status: HTTP status
+            headers: extra response headers
+            body: JSON response body
+        """
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return self._handle(url, authorization)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _handle(
+        self, url: str, authorization: Optional[str] = None
+    ) -> Tuple[HTTPStatus, dict[str, str], dict[str, Any]]:
+        """Answer an API request."""
+        fault = self._inject_fault()
+        if fault:
+            status, headers = fault
+            return status, headers, {"detail": status.phrase}
+
+        split_url = urlsplit(url)
+        path = split_url.path
+        if not path.startswith(self.path_prefix):
+            return HTTPStatus.NOT_FOUND, {}, {"detail": "Not found."}
+        path = path[len(self.path_prefix) :]
+        query = {key: values[-1] for key, values in parse_qs(split_url.query).items()}
+
+        if not authorization and (
+            CONSUMPTION_PATH.match(path) or ACCOUNT_PATH.match(path)
+        ):
+            return (
+                HTTPStatus.UNAUTHORIZED,
+                {"WWW-Authenticate": 'Basic realm="api"'},
+                {"detail": "Authentication credentials were not provided."},
+            )
+        if RATES_PATH.match(path):
+            kind, meter, group_by = "rates", 0, None
+        elif STANDING_CHARGES_PATH.match(path):
+            kind, meter, group_by = "standing_charges", 0, None
+        elif PRODUCTS_PATH.match(path):
+            kind, meter, group_by = "products", 0, None
+        elif match := ACCOUNT_PATH.match(path):
+            return HTTPStatus.OK, {}, self.synthetic_data.account(match["account"])
+        elif match := CONSUMPTION_PATH.match(path):
+            kind, meter = "consumption", self._get_meter(match["point"])
+            group_by = query.get("group_by")
+            if group_by not in (None, "day", "week"):
+                return HTTPStatus.BAD_REQUEST, {}, {"group_by": ["Invalid choice."]}
+        else:
+            return HTTPStatus.NOT_FOUND, {}, {"detail": "Not found."}
+
+        try:
+            period_from = self._parse_timestamp(query.get("period_from"))
+            period_to = self._parse_timestamp(query.get("period_to"))
+            page_size = min(
+                int(query.get("page_size", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE[kind]
+            )
+            page = int(query.get("page", 1))
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, {}, {"detail": str(error)}
+
+        starts, results = self._get_series(kind, meter, group_by)
+        first = 0 if period_from is None else np.searchsorted(starts, period_from)
+        if kind == "standing_charges" and period_from is not None:
+            # the charge in force at period_from started before it
+            first = max(np.searchsorted(starts, period_from, side="right") - 1, 0)
+        last = len(starts) if period_to is None else np.searchsorted(starts, period_to)
+        count = max(int(last - first), 0)
+
+        # newest first, as the API returns them
+        page_end = last - (page - 1) * page_size
+        page_start = max(page_end - page_size, first)
+        if page < 1 or (page > 1 and page_end <= first):
+            return HTTPStatus.NOT_FOUND, {}, {"detail": "Invalid page."}
+        page_results = results[page_start:page_end][::-1]
+
+        base_url = f"{split_url.scheme}://{split_url.netloc}{split_url.path}"
+        next_url = (
+            f"{base_url}?{urlencode({**query, 'page': page + 1})}"
+            if page_start > first
+            else None
+        )
+        previous_url = (
+            f"{base_url}?{urlencode({**query, 'page': page - 1})}" if page > 1 else None
+        )
+        body = SyntheticOctopusData.to_payload(
+            page_results, next_url, previous_url, count
+        )
+        return HTTPStatus.OK, {}, body
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving in a background thread.
+
+        Args:
+            host: interface to listen on
+            port: port to listen on, 0 picks a free one
+
+        Returns:
+            api_url: base url to be used as `octopus_api_url`
+        """
+        api = self
+
+        class _RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa: N802
+                host_header = self.headers.get("Host", f"{host}:{port}")
+                status, headers, body = api.handle(
+                    f"http://{host_header}{self.path}",
+                    self.headers.get("Authorization"),
+                )
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        server_host, server_port = self._server.server_address[:2]
+        return f"http://{server_host}:{server_port}{self.path_prefix}"
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> str:
+        """Start the server on a free port."""
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop the server."""
+        self.stop()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--meters", type=int, default=1)
+    arg_parser.add_argument(
+        "--date-from", type=date.fromisoformat, default="2022-07-01"
+    )
+    arg_parser.add_argument("--date-to", type=date.fromisoformat, default=date.today())
+    arg_parser.add_argument("--latency", type=float, default=0.0)
+    arg_parser.add_argument("--latency-jitter", type=float, default=0.0)
+    arg_parser.add_argument("--rate-limit-probability", type=float, default=0.0)
+    arg_parser.add_argument("--server-error-probability", type=float, default=0.0)
+    args = arg_parser.parse_args()
+
+    fake_api = FakeOctopusApi(
+        SyntheticOctopusData(args.date_from, args.date_to, args.meters),
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        rate_limit_probability=args.rate_limit_probability,
+        server_error_probability=args.server_error_probability,
+    )
+    print(f"Serving fake Octopus API on {fake_api.start(args.host, args.port)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake_api.stop()
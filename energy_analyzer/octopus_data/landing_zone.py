@@ -0,0 +1,136 @@
+"""Raw API payload landing zone module.
+
+Every page returned by the Octopus API is archived as gzip compressed JSON:
+
+    <landing_zone_dir>/<endpoint>/date=<fetch date>/<sha256 of the payload>.json.gz
+
+`<endpoint>` is the url path below the API version (plus `group_by` for consumption),
+so every fetch of the same series lands in the same folder whatever the period. A page
+whose content was already archived for the endpoint is not written again.
+
+In replay mode the archived pages of an endpoint are merged, de-duplicated on the
+interval start and filtered by the `period_from`/`period_to` of the requested url, so
+`DataExtractor` returns the same results as the API without any network call.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from dateutil import parser
+
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+INTERVAL_START_KEYS = ("valid_from", "interval_start")
+
+
+class LandingZone:
+    """Raw payload landing zone class."""
+
+    def __init__(self, root: Optional[str | Path] = None) -> None:
+        """Class constructor method.
+
+        Args:
+            root: landing zone directory, `ProjectConfig.landing_zone_dir` by default
+        """
+        self.root = Path(root or CONFIG.landing_zone_dir)
+
+    def _get_endpoint_dir(self, url: str) -> Path:
+        """Get the folder of the series requested by the url.
+
+        Args:
+            url: API request url
+
+        Returns:
+            endpoint_dir: endpoint folder within the landing zone
+        """
+        split_url = urlsplit(url)
+        path = re.sub(r"^/v\d+/", "", split_url.path).strip("/")
+        group_by = parse_qs(split_url.query).get("group_by", [None])[-1]
+        if group_by:
+            path += f"/group_by={group_by}"
+        return self.root.joinpath(
+            *(re.sub(r"[^\w.=-]", "_", part) for part in path.split("/"))
+        )
+
+    def archive(self, url: str, payload: dict[str, Any]) -> Optional[Path]:
+        """Archive one API response page.
+
+        Args:
+            url: API request url of the page
+            payload: API response body
+
+        Returns:
+            path: archived file, None if the same content was already archived
+        """
+        content = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+        digest = hashlib.sha256(content).hexdigest()
+        endpoint_dir = self._get_endpoint_dir(url)
+        if any(endpoint_dir.glob(f"date=*/{digest}.json.gz")):
+            return None
+
+        fetched_at = datetime.now(timezone.utc)
+        path = endpoint_dir / f"date={fetched_at:%Y-%m-%d}" / f"{digest}.json.gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = {"url": url, "fetched_at": fetched_at.isoformat(), "payload": payload}
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_bytes(gzip.compress(json.dumps(record).encode()))
+        os.replace(temporary_path, path)
+        return path
+
+    @staticmethod
+    def _parse_timestamp(value: str) -> datetime:
+        """Parse an API timestamp, naive ones are UTC."""
+        timestamp = parser.isoparse(value)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp
+
+    def replay(self, url: str) -> List[dict[str, Any]]:
+        """Get the results of an API request from the archive.
+
+        Args:
+            url: API request url, only the endpoint and the period are used
+
+        Returns:
+            results: archived results newest first, as the API returns them
+        """
+        endpoint_dir = self._get_endpoint_dir(url)
+        query = parse_qs(urlsplit(url).query)
+        period_from = query.get("period_from", [None])[-1]
+        period_to = query.get("period_to", [None])[-1]
+        period_from = self._parse_timestamp(period_from) if period_from else None
+        period_to = self._parse_timestamp(period_to) if period_to else None
+
+        records = [
+            json.loads(gzip.decompress(path.read_bytes()))
+            for path in endpoint_dir.glob("date=*/*.json.gz")
+        ]
+        records.sort(key=lambda record: record["fetched_at"])
+
+        # later fetches overwrite earlier versions of the same interval
+        results: dict[datetime, dict[str, Any]] = {}
+        for record in records:
+            for result in record["payload"]["results"]:
+                start_key = next(key for key in INTERVAL_START_KEYS if key in result)
+                results[self._parse_timestamp(result[start_key])] = result
+
+        return [
+            results[start]
+            for start in sorted(results, reverse=True)
+            if (period_from is None or start >= period_from)
+            and (period_to is None or start < period_to)
+        ]
+
+
+if __name__ == "__main__":
+    landing_zone = LandingZone()
+
+    print(landing_zone.root)
@@ -0,0 +1,196 @@
+"""Multi-meter ingestion module.
+
+Fans the daily rates, standing charges and consumption ingestion of every registered
+meter out over a pool of `meter_ingest_workers` processes, one meter per task. Every
+meter is fetched from its own watermark, its rows are upserted under its `meter_id`,
+and its rollups and net flow are refreshed for the days it added. The workers share the
+`octopus_max_concurrent_requests` API request slots of the parent process, so adding
+workers speeds the ingestion up until the API cap is reached, never past it.
+
+With `tariff_discovery_enabled`, the agreements of the meters are read from the cached
+account catalogue first, and the rates and standing charges of every period come from
+the tariff in force.
+
+A meter that fails is logged and skipped; its watermark doesn't move, so the next run
+fetches it again.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, List, Optional
+
+import pandas as pd
+from sqlalchemy.exc import NoResultFound
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.net_flow import NetFlowManager
+from energy_analyzer.database.rollups import RollupManager
+from energy_analyzer.octopus_data.data_extract import DataExtractor, set_request_slots
+from energy_analyzer.octopus_data.data_handler import DailyDataHandler
+from energy_analyzer.octopus_data.meter_registry import Meter, MeterRegistry
+from energy_analyzer.octopus_data.tariff_catalogue import TariffCatalogue
+from energy_analyzer.octopus_data.url_generator import UrlGenerator
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+
+
+def _get_new_rows(
+    db_connector: DbConnector, data: pd.DataFrame, table: Any, meter: Meter
+) -> pd.DataFrame:
+    """Select the rows after the last stored row of a meter.
+
+    Args:
+        db_connector: connector of the database holding the table
+        data: formatted rows fetched for the meter
+        table: table of the rows
+        meter: registered meter
+
+    Returns:
+        new_rows: rows to be written, with the meter_id of the meter
+    """
+    try:
+        update_point = db_connector.get_latest_row(table, meter_id=meter.meter_id)
+    except NoResultFound:
+        update_point = date(1970, 1, 1)
+    new_rows = DailyDataHandler.select_data_to_add_to_db(data, update_point)
+    return new_rows.assign(meter_id=meter.meter_id)
+
+
+def ingest_meter(meter: Meter) -> dict[str, int]:
+    """Ingest the new daily rates, standing charges and consumption of one meter.
+
+    Args:
+        meter: registered meter
+
+    Returns:
+        rows: number of rates, standing charges and consumption rows written
+    """
+    db_connector = DbConnector(CONFIG.db_url.get_secret_value())
+    rates_table, consumption_table = meter.tables
+    standing_charges_table = meter.standing_charges_table
+    for table in (*meter.tables, standing_charges_table):
+        if table is not None:
+            db_connector.create_table(table.__tablename__)
+
+    url_generator = UrlGenerator()
+    data_extractor = DataExtractor()
+    daily_data_handler = DailyDataHandler()
+    rates_raw = data_extractor.get_tariff_rates(
+        url_generator.get_meter_rates_urls(meter)
+    )
+    consumption_raw = data_extractor.get_consumption_values(
+        url_generator.get_meter_consumption_url(meter),
+        api_key=meter.api_key.get_secret_value(),
+    )
+
+    rates = pd.DataFrame()
+    if rates_raw:
+        rates = _get_new_rows(
+            db_connector,
+            daily_data_handler.format_standard_unit_rates_data(
+                daily_data_handler.parse_data_to_df(rates_raw)
+            ),
+            rates_table,
+            meter,
+        )
+        db_connector.upsert_data_to_db(rates, rates_table.__tablename__)
+
+    standing_charges = pd.DataFrame()
+    if standing_charges_table is not None:
+        standing_charges_raw = data_extractor.get_tariff_standing_charges(
+            url_generator.get_meter_standing_charges_urls(meter)
+        )
+        if standing_charges_raw:
+            standing_charges = _get_new_rows(
+                db_connector,
+                daily_data_handler.format_standing_charges_data(
+                    daily_data_handler.parse_data_to_df(standing_charges_raw)
+                ),
+                standing_charges_table,
+                meter,
+            )
+            db_connector.upsert_data_to_db(
+                standing_charges, standing_charges_table.__tablename__
+            )
+
+    consumption = pd.DataFrame()
+    if consumption_raw:
+        consumption_df = daily_data_handler.parse_data_to_df(consumption_raw)
+        if meter.direction == "export":
+            formatted = daily_data_handler.format_export_data(consumption_df)
+        elif meter.fuel == "gas":
+            formatted = daily_data_handler.format_consumption_data(
+                consumption_df, CONFIG.gas_m3_to_kwh_conversion
+            )
+        else:
+            formatted = daily_data_handler.format_consumption_data(consumption_df)
+        consumption = _get_new_rows(db_connector, formatted, consumption_table, meter)
+        db_connector.upsert_data_to_db(consumption, consumption_table.__tablename__)
+
+    new_days = pd.concat(
+        [data["date"] for data in (rates, consumption) if not data.empty]
+        or [pd.Series(dtype="datetime64[ns]")]
+    )
+    if not new_days.empty:
+        if meter.direction == "import":
+            RollupManager(db_connector).refresh(
+                meter.fuel, new_days.min(), new_days.max(), meter.meter_id
+            )
+        if meter.fuel == "electricity" and not consumption.empty:
+            NetFlowManager(db_connector).refresh(
+                consumption["date"].min(), consumption["date"].max(), meter.meter_id
+            )
+
+    logging.info(
+        f"Ingested {len(rates)} rates, {len(standing_charges)} standing charges and "
+        + f"{len(consumption)} consumption rows of meter {meter.key}."
+    )
+    return {
+        "rates": len(rates),
+        "standing_charges": len(standing_charges),
+        "consumption": len(consumption),
+    }
+
+
+def ingest_meters(
+    meters: List[Meter], workers: Optional[int] = None
+) -> dict[str, dict[str, int]]:
+    """Ingest the new daily data of many meters in parallel.
+
+    Args:
+        meters: registered meters
+        workers: number of worker processes, `meter_ingest_workers` by default
+
+    Returns:
+        rows: rows written per meter key, failed meters are left out
+    """
+    if not meters:
+        return {}
+    if CONFIG.tariff_discovery_enabled:
+        tariff_catalogue = TariffCatalogue()
+        meters = [tariff_catalogue.attach_agreements(meter) for meter in meters]
+    workers = min(workers or CONFIG.meter_ingest_workers, len(meters))
+    # one set of API request slots for the whole pool
+    request_slots = multiprocessing.BoundedSemaphore(
+        CONFIG.octopus_max_concurrent_requests
+    )
+
+    rows: dict[str, dict[str, int]] = {}
+    with ProcessPoolExecutor(
+        workers, initializer=set_request_slots, initargs=(request_slots,)
+    ) as executor:
+        futures = {meter.key: executor.submit(ingest_meter, meter) for meter in meters}
+        for key, future in futures.items():
+            try:
+                rows[key] = future.result()
+            except Exception as error:
+                logging.error(f"Ingestion of meter {key} failed: {error!r}")
+    logging.info(f"Ingested {len(rows)} of {len(meters)} meters.")
+    return rows
+
+
+if __name__ == "__main__":
+    print(ingest_meters(list(MeterRegistry.get_default())))
@@ -0,0 +1,238 @@
+"""Meter registry module.
+
+A registry lists the Octopus accounts served by one deployment and the meters of every
+account, as a JSON file at `meter_registry_path`:
+
+    {
+        "accounts": [
+            {
+                "account": "A-00000001",
+                "api_key": "sk_live_...",
+                "meters": [
+                    {
+                        "meter_id": "household-1",
+                        "fuel": "electricity",
+                        "direction": "import",
+                        "mpxn": "1900000000000",
+                        "serial_no": "21L4000000",
+                        "product_code": "SILVER-23-12-06",
+                        "tariff_code": "E-1R-SILVER-23-12-06-B"
+                    }
+                ]
+            }
+        ]
+    }
+
+`meter_id` keys the rows of a meter in every table, so it only has to be unique per
+fuel and direction: the import, export and gas meters of a household usually share it,
+which pairs the export with the import meter in `electricity_net_flow`. Without a
+registry the meters of `ProjectConfig` are used under the default meter id, where the
+single household assets write their rows.
+
+`product_code` and `tariff_code` may be left out when the agreements of the meter are
+discovered from its account, see `energy_analyzer/octopus_data/tariff_catalogue.py`.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Literal, Optional
+
+from pydantic import BaseModel, SecretStr
+
+from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
+    ElectricityConsumptionTable,
+    ElectricityExportRatesTable,
+    ElectricityExportTable,
+    ElectricityRatesTable,
+    ElectricityStandingChargesTable,
+    GasConsumptionTable,
+    GasRatesTable,
+    GasStandingChargesTable,
+    OctopusTables,
+)
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+METER_TABLES = {
+    ("electricity", "import"): (ElectricityRatesTable, ElectricityConsumptionTable),
+    ("electricity", "export"): (ElectricityExportRatesTable, ElectricityExportTable),
+    ("gas", "import"): (GasRatesTable, GasConsumptionTable),
+}
+# export tariffs pay for exported energy only, without standing charge
+STANDING_CHARGES_TABLES = {
+    ("electricity", "import"): ElectricityStandingChargesTable,
+    ("gas", "import"): GasStandingChargesTable,
+}
+
+
+class TariffAgreement(BaseModel):
+    """Tariff agreement dataclass."""
+
+    tariff_code: str
+    product_code: str
+    valid_from: datetime
+    valid_to: Optional[datetime] = None
+
+
+class Meter(BaseModel):
+    """Registered meter dataclass."""
+
+    meter_id: str
+    account: str
+    api_key: SecretStr
+    fuel: Literal["electricity", "gas"]
+    direction: Literal["import", "export"] = "import"
+    mpxn: str
+    serial_no: str
+    product_code: Optional[str] = None
+    tariff_code: Optional[str] = None
+    agreements: List[TariffAgreement] = []
+
+    @property
+    def key(self) -> str:
+        """Get the unique name of the meter in the registry."""
+        return f"{self.fuel}/{self.direction}/{self.meter_id}"
+
+    @property
+    def tables(self) -> tuple[OctopusTables, OctopusTables]:
+        """Get the rates and readings tables of the meter."""
+        return METER_TABLES[(self.fuel, self.direction)]
+
+    @property
+    def standing_charges_table(self) -> Optional[OctopusTables]:
+        """Get the standing charges table of the meter, None for export meters."""
+        return STANDING_CHARGES_TABLES.get((self.fuel, self.direction))
+
+
+class MeterRegistry:
+    """Meter registry class."""
+
+    def __init__(self, meters: List[Meter]) -> None:
+        """Class constructor method.
+
+        Args:
+            meters: registered meters
+
+        Raises:
+            ValueError: if two meters have the same fuel, direction and meter_id, or a
+                gas meter is an export meter
+        """
+        keys = [meter.key for meter in meters]
+        if duplicates := sorted({key for key in keys if keys.count(key) > 1}):
+            raise ValueError(f"Meters registered more than once: {duplicates}")
+        if unsupported := [
+            meter.key
+            for meter in meters
+            if (meter.fuel, meter.direction) not in METER_TABLES
+        ]:
+            raise ValueError(f"Unsupported meters: {unsupported}")
+        self.meters = meters
+
+    @classmethod
+    def load(cls, path: str | Path) -> "MeterRegistry":
+        """Load a registry file.
+
+        Args:
+            path: JSON registry of accounts and their meters
+
+        Returns:
+            meter_registry: meters of every account
+        """
+        registry = json.loads(Path(path).read_text())
+        return cls(
+            [
+                Meter(account=account["account"], api_key=account["api_key"], **meter)
+                for account in registry["accounts"]
+                for meter in account["meters"]
+            ]
+        )
+
+    @classmethod
+    def from_config(cls) -> "MeterRegistry":
+        """Get the single household meters of `ProjectConfig`.
+
+        Returns:
+            meter_registry: electricity import and export and gas meters set in the
+                config, under the default meter id
+        """
+        account = CONFIG.account.get_secret_value()
+        api_key = CONFIG.octopus_api_key
+        export_serial_no = CONFIG.e_export_serial_no or CONFIG.e_serial_no
+        meters = [
+            Meter(
+                meter_id=DEFAULT_METER_ID,
+                account=account,
+                api_key=api_key,
+                fuel="electricity",
+                mpxn=CONFIG.e_MPAN.get_secret_value(),
+                serial_no=CONFIG.e_serial_no.get_secret_value(),
+                product_code=CONFIG.product_code,
+                tariff_code=CONFIG.e_tariff_code,
+            ),
+            Meter(
+                meter_id=DEFAULT_METER_ID,
+                account=account,
+                api_key=api_key,
+                fuel="electricity",
+                direction="export",
+                mpxn=CONFIG.e_export_MPAN.get_secret_value(),
+                serial_no=export_serial_no.get_secret_value(),
+                product_code=CONFIG.export_product_code,
+                tariff_code=CONFIG.e_export_tariff_code,
+            ),
+            Meter(
+                meter_id=DEFAULT_METER_ID,
+                account=account,
+                api_key=api_key,
+                fuel="gas",
+                mpxn=CONFIG.g_MPRN.get_secret_value(),
+                serial_no=CONFIG.g_serial_no.get_secret_value(),
+                product_code=CONFIG.product_code,
+                tariff_code=CONFIG.g_tariff_code,
+            ),
+        ]
+        return cls(meters)
+
+    @classmethod
+    def get_default(cls) -> "MeterRegistry":
+        """Load the configured registry, or get the meters of the config without one."""
+        if CONFIG.meter_registry_path:
+            return cls.load(CONFIG.meter_registry_path)
+        return cls.from_config()
+
+    def get_accounts(self) -> List[str]:
+        """Get the registered account numbers."""
+        return sorted({meter.account for meter in self.meters})
+
+    def get_meters(
+        self, account: Optional[str] = None, fuel: Optional[str] = None
+    ) -> List[Meter]:
+        """Get the meters of an account or of a fuel.
+
+        Args:
+            account: account number, every account by default
+            fuel: "electricity" or "gas", every fuel by default
+
+        Returns:
+            meters: matching meters in registry order
+        """
+        return [
+            meter
+            for meter in self.meters
+            if account in (None, meter.account) and fuel in (None, meter.fuel)
+        ]
+
+    def __iter__(self) -> Iterator[Meter]:
+        """Iterate over the registered meters."""
+        return iter(self.meters)
+
+    def __len__(self) -> int:
+        """Get the number of registered meters."""
+        return len(self.meters)
+
+
+if __name__ == "__main__":
+    for registered_meter in MeterRegistry.get_default():
+        print(registered_meter.account, registered_meter.key)
@@ -0,0 +1,336 @@
+"""Synthetic Octopus API data generator module.
+
+Generates `standard-unit-rates`, `standing-charges`, `consumption`, `accounts` and
+`products` payloads shaped like the ones returned by the Octopus API, for benchmarks
+and the local API stand-in:
+- timestamps are generated on the Europe/London clock, so the intervals cover the
+  23 and 25 hour days of the DST transitions, and are rendered with the UTC offset
+  the API uses ("Z" in winter, "+01:00" in summer)
+- results are ordered newest first, as the API does
+- every household switches from a variable to a fixed import tariff half way through
+  the generated period, like a real account agreement history
+"""
+
+from datetime import date
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+TIMEZONE = "Europe/London"
+VAT_RATE = 0.05
+REGION = "C"
+IMPORT_PRODUCT_CODES = ("VAR-22-04-02", "SILVER-23-12-06")
+EXPORT_PRODUCT_CODE = "OUTGOING-FIX-12M-19-05-13"
+
+
+class SyntheticOctopusData:
+    """Synthetic Octopus data generator class."""
+
+    def __init__(
+        self,
+        date_from: date = date(2022, 7, 1),
+        date_to: date = date(2024, 7, 1),
+        meters: int = 1,
+        seed: int = 0,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            date_from: first day of generated data
+            date_to: day after the last day of generated data
+            meters: number of electricity and gas meters to generate data for
+            seed: random generator seed, same seed gives the same payloads
+        """
+        self.date_from = date_from
+        self.date_to = date_to
+        self.seed = seed
+        self.meters = [
+            {
+                "mpan": f"{1900000000000 + index}",
+                "mprn": f"{9000000 + index}",
+                "export_mpan": f"{1910000000000 + index}",
+                "serial_no": f"21L{4000000 + index}",
+            }
+            for index in range(meters)
+        ]
+
+    def _intervals(self, interval: str) -> pd.DatetimeIndex:
+        """Generate interval starts on the local clock.
+
+        Args:
+            interval: "half_hour" or "day"
+
+        Returns:
+            intervals: tz-aware interval starts
+        """
+        start = pd.Timestamp(self.date_from, tz=TIMEZONE)
+        end = pd.Timestamp(self.date_to, tz=TIMEZONE)
+        match interval:
+            case "half_hour":
+                return pd.date_range(start, end, freq="30min", inclusive="left")
+            case "day":
+                return pd.date_range(start, end, freq="D", inclusive="left")
+            case _:
+                raise ValueError(f"Unsupported interval: {interval}")
+
+    @staticmethod
+    def _format_timestamps(intervals: pd.DatetimeIndex) -> List[str]:
+        """Format timestamps the way the Octopus API does."""
+        return [
+            timestamp.isoformat().replace("+00:00", "Z")
+            for timestamp in intervals.to_pydatetime()
+        ]
+
+    def standard_unit_rates(self, interval: str = "day") -> List[dict[str, Any]]:
+        """Generate standard unit rates results.
+
+        Args:
+            interval: "day" for daily tracker tariffs, "half_hour" for agile tariffs
+
+        Returns:
+            results: standard unit rates in a format of list of dictionaries
+        """
+        rng = np.random.default_rng(self.seed)
+        starts = self._intervals(interval)
+        ends = starts + (
+            pd.Timedelta(minutes=30) if interval == "half_hour" else pd.DateOffset(1)
+        )
+        seasonal = 6 * np.cos(2 * np.pi * starts.dayofyear.to_numpy() / 365.25)
+        value_exc_vat = np.round(22 + seasonal + rng.normal(0, 2, len(starts)), 4)
+        value_inc_vat = np.round(value_exc_vat * (1 + VAT_RATE), 4)
+
+        results = [
+            {
+                "value_exc_vat": exc_vat,
+                "value_inc_vat": inc_vat,
+                "valid_from": valid_from,
+                "valid_to": valid_to,
+                "payment_method": None,
+            }
+            for exc_vat, inc_vat, valid_from, valid_to in zip(
+                value_exc_vat.tolist(),
+                value_inc_vat.tolist(),
+                self._format_timestamps(starts.tz_convert("UTC")),
+                self._format_timestamps(ends.tz_convert("UTC")),
+            )
+        ]
+        results.reverse()
+        return results
+
+    def standing_charges(self) -> List[dict[str, Any]]:
+        """Generate standing-charges results.
+
+        Returns:
+            results: daily standing charges changing every quarter, the current one
+                without "valid_to"
+        """
+        rng = np.random.default_rng(self.seed + 1000)
+        start = pd.Timestamp(self.date_from, tz=TIMEZONE)
+        end = pd.Timestamp(self.date_to, tz=TIMEZONE)
+        starts = pd.date_range(start, end, freq="QS", inclusive="left").union([start])
+        value_exc_vat = np.round(45 + rng.normal(0, 4, len(starts)), 4)
+        value_inc_vat = np.round(value_exc_vat * (1 + VAT_RATE), 4)
+        valid_from = self._format_timestamps(starts.tz_convert("UTC"))
+
+        results = [
+            {
+                "value_exc_vat": exc_vat,
+                "value_inc_vat": inc_vat,
+                "valid_from": valid_from[index],
+                "valid_to": valid_from[index + 1] if index + 1 < len(starts) else None,
+                "payment_method": None,
+            }
+            for index, (exc_vat, inc_vat) in enumerate(
+                zip(value_exc_vat.tolist(), value_inc_vat.tolist())
+            )
+        ]
+        results.reverse()
+        return results
+
+    def consumption(
+        self, meter: int = 0, group_by: Optional[str] = None
+    ) -> List[dict[str, Any]]:
+        """Generate consumption results.
+
+        Args:
+            meter: index of the meter to generate data for
+            group_by: None for half-hourly readings, "day" or "week" for aggregates
+
+        Returns:
+            results: consumption values in a format of list of dictionaries
+        """
+        rng = np.random.default_rng(self.seed + 1 + meter)
+        starts = self._intervals("half_hour")
+        hours = starts.hour.to_numpy() + starts.minute.to_numpy() / 60
+        daily_profile = 0.15 + 0.25 * np.exp(-((hours - 18.5) ** 2) / 4)
+        seasonal = 1 + 0.4 * np.cos(2 * np.pi * starts.dayofyear.to_numpy() / 365.25)
+        readings = pd.Series(
+            np.round(daily_profile * seasonal * rng.gamma(4, 0.25, len(starts)), 3),
+            index=starts,
+        )
+
+        if group_by == "day":
+            readings = readings.groupby(readings.index.normalize()).sum()
+            ends = readings.index + pd.DateOffset(1)
+        elif group_by == "week":
+            local_days = readings.index.tz_localize(None).normalize()
+            week_start = local_days - pd.to_timedelta(local_days.weekday, unit="D")
+            readings.index = week_start.tz_localize(TIMEZONE)
+            readings = readings.groupby(level=0).sum()
+            ends = readings.index + pd.DateOffset(7)
+        else:
+            ends = readings.index + pd.Timedelta(minutes=30)
+
+        results = [
+            {
+                "consumption": value,
+                "interval_start": interval_start,
+                "interval_end": interval_end,
+            }
+            for value, interval_start, interval_end in zip(
+                np.round(readings.to_numpy(), 3).tolist(),
+                self._format_timestamps(readings.index),
+                self._format_timestamps(ends),
+            )
+        ]
+        results.reverse()
+        return results
+
+    def _agreements(
+        self, prefix: str, product_codes: tuple[str, ...]
+    ) -> List[dict[str, Any]]:
+        """Generate the agreement history of a meter point.
+
+        Args:
+            prefix: "E-1R" or "G-1R"
+            product_codes: products agreed in turn over the generated period
+
+        Returns:
+            agreements: tariff codes with their local validity boundaries
+        """
+        start = pd.Timestamp(self.date_from, tz=TIMEZONE)
+        end = pd.Timestamp(self.date_to, tz=TIMEZONE)
+        boundaries = pd.DatetimeIndex(
+            [
+                start + (end - start) * index / len(product_codes)
+                for index in range(len(product_codes))
+            ]
+        ).normalize()
+        valid_from = self._format_timestamps(boundaries)
+        return [
+            {
+                "tariff_code": f"{prefix}-{product_code}-{REGION}",
+                "valid_from": valid_from[index],
+                "valid_to": valid_from[index + 1]
+                if index + 1 < len(product_codes)
+                else None,
+            }
+            for index, product_code in enumerate(product_codes)
+        ]
+
+    def account(self, number: str = "A-00000000") -> dict[str, Any]:
+        """Generate an account with one property per meter.
+
+        Args:
+            number: account number
+
+        Returns:
+            account: meter points, serial numbers and agreement histories
+        """
+        moved_in_at = self._format_timestamps(
+            pd.DatetimeIndex([pd.Timestamp(self.date_from, tz=TIMEZONE)])
+        )[0]
+        return {
+            "number": number,
+            "properties": [
+                {
+                    "id": index + 1,
+                    "moved_in_at": moved_in_at,
+                    "moved_out_at": None,
+                    "electricity_meter_points": [
+                        {
+                            "mpan": meter["mpan"],
+                            "is_export": False,
+                            "meters": [{"serial_number": meter["serial_no"]}],
+                            "agreements": self._agreements(
+                                "E-1R", IMPORT_PRODUCT_CODES
+                            ),
+                        },
+                        {
+                            "mpan": meter["export_mpan"],
+                            "is_export": True,
+                            "meters": [{"serial_number": meter["serial_no"]}],
+                            "agreements": self._agreements(
+                                "E-1R", (EXPORT_PRODUCT_CODE,)
+                            ),
+                        },
+                    ],
+                    "gas_meter_points": [
+                        {
+                            "mprn": meter["mprn"],
+                            "meters": [{"serial_number": meter["serial_no"]}],
+                            "agreements": self._agreements(
+                                "G-1R", IMPORT_PRODUCT_CODES
+                            ),
+                        }
+                    ],
+                }
+                for index, meter in enumerate(self.meters)
+            ],
+        }
+
+    @staticmethod
+    def products() -> List[dict[str, Any]]:
+        """Generate the products catalogue.
+
+        Returns:
+            results: products in a format of list of dictionaries
+        """
+        return [
+            {
+                "code": product_code,
+                "direction": direction,
+                "full_name": f"Octopus {product_code}",
+                "display_name": product_code.split("-")[0].title(),
+                "is_variable": product_code.startswith("VAR"),
+                "brand": "OCTOPUS_ENERGY",
+            }
+            for product_code, direction in [
+                *((code, "IMPORT") for code in IMPORT_PRODUCT_CODES),
+                (EXPORT_PRODUCT_CODE, "EXPORT"),
+            ]
+        ]
+
+    @staticmethod
+    def to_payload(
+        results: List[dict[str, Any]],
+        next_url: Optional[str] = None,
+        previous_url: Optional[str] = None,
+        count: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Wrap results into an Octopus API paginated response body.
+
+        Args:
+            results: one page of results
+            next_url: url of the next page
+            previous_url: url of the previous page
+            count: total number of results across all pages
+
+        Returns:
+            payload: API response body
+        """
+        return {
+            "count": len(results) if count is None else count,
+            "next": next_url,
+            "previous": previous_url,
+            "results": results,
+        }
+
+
+if __name__ == "__main__":
+    synthetic_data = SyntheticOctopusData(date(2024, 3, 30), date(2024, 4, 1))
+
+    print(synthetic_data.standard_unit_rates()[:2])
+    print(len(synthetic_data.consumption()))
+    print(synthetic_data.consumption(group_by="day"))
@@ -0,0 +1,292 @@
+"""Account and tariff discovery module.
+
+`TariffCatalogue` reads the meter points and tariff agreement history of Octopus
+accounts and the products catalogue, and caches the responses in one JSON file at
+`tariff_catalogue_path`. An entry is only requested again once it is older than
+`tariff_catalogue_ttl_hours`, so the ingestion runs in between make no discovery
+requests, and a stale entry is kept when its refresh fails.
+
+Discovered meters carry their agreements, from which
+`UrlGenerator.get_meter_rates_urls` fetches the rates of every period from the tariff
+in force, instead of the codes of `ProjectConfig`.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+import requests
+from pydantic import SecretStr
+
+from energy_analyzer.octopus_data.data_extract import DataExtractor
+from energy_analyzer.octopus_data.meter_registry import Meter, TariffAgreement
+from energy_analyzer.octopus_data.url_generator import UrlGenerator
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+TARIFF_CODE_PATTERN = re.compile(r"^[EG]-\d+R-(?P<product_code>.+)-[A-P]$")
+
+
+def get_product_code(tariff_code: str) -> str:
+    """Get the product code of a tariff code.
+
+    Args:
+        tariff_code: tariff code, e.g. "E-1R-SILVER-23-12-06-B"
+
+    Returns:
+        product_code: product code, e.g. "SILVER-23-12-06"
+
+    Raises:
+        ValueError: if the tariff code is not of the `<fuel>-<registers>R-...-<region>`
+            form
+    """
+    match = TARIFF_CODE_PATTERN.match(tariff_code)
+    if match is None:
+        raise ValueError(f"Unsupported tariff code: {tariff_code}")
+    return match["product_code"]
+
+
+class TariffCatalogue:
+    """Account and tariff catalogue class."""
+
+    def __init__(
+        self,
+        path: Optional[str | Path] = None,
+        ttl_hours: Optional[float] = None,
+        data_extractor: Optional[DataExtractor] = None,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            path: cache file, `ProjectConfig.tariff_catalogue_path` by default
+            ttl_hours: age after which an entry is requested again,
+                `ProjectConfig.tariff_catalogue_ttl_hours` by default
+            data_extractor: extractor of the API responses
+        """
+        self.path = Path(path or CONFIG.tariff_catalogue_path)
+        self.ttl = timedelta(
+            hours=CONFIG.tariff_catalogue_ttl_hours if ttl_hours is None else ttl_hours
+        )
+        self.data_extractor = data_extractor or DataExtractor()
+        self.url_generator = UrlGenerator()
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, Any]:
+        """Load the cached entries."""
+        return json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def _save(self, catalogue: dict[str, Any]) -> None:
+        """Save the cached entries."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_text(json.dumps(catalogue, indent=2, sort_keys=True))
+        os.replace(temporary_path, self.path)
+
+    def _get_entry(self, key: str, fetch: Callable[[], Any], refresh: bool) -> Any:
+        """Get a cached entry, requesting it again once it has expired.
+
+        Args:
+            key: name of the entry
+            fetch: request of the entry
+            refresh: request the entry even if it hasn't expired
+
+        Returns:
+            data: cached or requested entry
+        """
+        with self._lock:
+            entry = self._load().get(key)
+            now = datetime.now(timezone.utc)
+            if (
+                entry is not None
+                and not refresh
+                and now - datetime.fromisoformat(entry["fetched_at"]) < self.ttl
+            ):
+                return entry["data"]
+
+            try:
+                data = fetch()
+            except requests.RequestException as error:
+                if entry is None:
+                    raise
+                logging.warning(
+                    f"Refreshing {key} failed, using the copy of "
+                    + f"{entry['fetched_at']}: {error!r}"
+                )
+                return entry["data"]
+
+            catalogue = self._load()
+            catalogue[key] = {"fetched_at": now.isoformat(), "data": data}
+            self._save(catalogue)
+            return data
+
+    def get_account(
+        self, account: str, api_key: str | SecretStr, refresh: bool = False
+    ) -> dict[str, Any]:
+        """Get the properties, meter points and agreements of an account.
+
+        Args:
+            account: account number
+            api_key: API Key of the account
+            refresh: request the account even if its cached copy hasn't expired
+
+        Returns:
+            account: accounts endpoint response
+        """
+        if isinstance(api_key, SecretStr):
+            api_key = api_key.get_secret_value()
+        return self._get_entry(
+            f"accounts/{account}",
+            lambda: self.data_extractor.get_account(
+                self.url_generator.get_account_url(account), api_key
+            ),
+            refresh,
+        )
+
+    def get_products(self, refresh: bool = False) -> List[dict[str, Any]]:
+        """Get the products catalogue.
+
+        Args:
+            refresh: request the catalogue even if its cached copy hasn't expired
+
+        Returns:
+            products: products currently offered
+        """
+        return self._get_entry(
+            "products",
+            lambda: self.data_extractor.get_products(
+                self.url_generator.get_products_url()
+            ),
+            refresh,
+        )
+
+    def get_product_code(self, tariff_code: str) -> str:
+        """Get the product code of a tariff code, from the catalogue when it lists it.
+
+        Args:
+            tariff_code: tariff code, e.g. "E-1R-SILVER-23-12-06-B"
+
+        Returns:
+            product_code: longest catalogue product code within the tariff code,
+                parsed from the tariff code for withdrawn products
+        """
+        product_codes = [
+            product["code"]
+            for product in self.get_products()
+            if f"-{product['code']}-" in tariff_code
+        ]
+        if product_codes:
+            return max(product_codes, key=len)
+        return get_product_code(tariff_code)
+
+    def _get_agreements(self, meter_point: dict[str, Any]) -> List[TariffAgreement]:
+        """Get the agreement history of a meter point, oldest first."""
+        return sorted(
+            (
+                TariffAgreement(
+                    tariff_code=agreement["tariff_code"],
+                    product_code=self.get_product_code(agreement["tariff_code"]),
+                    valid_from=agreement["valid_from"],
+                    valid_to=agreement.get("valid_to"),
+                )
+                for agreement in meter_point.get("agreements", [])
+            ),
+            key=lambda agreement: agreement.valid_from,
+        )
+
+    def discover_meters(self, account: str, api_key: str | SecretStr) -> List[Meter]:
+        """Get every meter of an account with its agreement history.
+
+        Args:
+            account: account number
+            api_key: API Key of the account
+
+        Returns:
+            meters: one meter per meter point with agreements, named
+                `<account>-<property id>` so the meters of a property share it, or
+                `<account>-<property id>-<MPAN or MPRN>` where the property has
+                several meter points of the same fuel and direction
+        """
+        meters = []
+        for account_property in self.get_account(account, api_key)["properties"]:
+            meter_points = [
+                (
+                    "electricity",
+                    "export" if meter_point.get("is_export") else "import",
+                    meter_point,
+                    meter_point["mpan"],
+                )
+                for meter_point in account_property.get("electricity_meter_points", [])
+            ] + [
+                ("gas", "import", meter_point, meter_point["mprn"])
+                for meter_point in account_property.get("gas_meter_points", [])
+            ]
+            kinds = [(fuel, direction) for fuel, direction, _, _ in meter_points]
+            for fuel, direction, meter_point, mpxn in meter_points:
+                agreements = self._get_agreements(meter_point)
+                serial_numbers = [
+                    meter["serial_number"]
+                    for meter in meter_point.get("meters", [])
+                    if meter.get("serial_number")
+                ]
+                if not agreements or not serial_numbers:
+                    continue
+                meter_id = f"{account}-{account_property['id']}"
+                if kinds.count((fuel, direction)) > 1:
+                    meter_id += f"-{mpxn}"
+                meters.append(
+                    Meter(
+                        meter_id=meter_id,
+                        account=account,
+                        api_key=api_key,
+                        fuel=fuel,
+                        direction=direction,
+                        mpxn=mpxn,
+                        # the last listed meter is the one installed
+                        serial_no=serial_numbers[-1],
+                        product_code=agreements[-1].product_code,
+                        tariff_code=agreements[-1].tariff_code,
+                        agreements=agreements,
+                    )
+                )
+        return meters
+
+    def attach_agreements(self, meter: Meter) -> Meter:
+        """Get a registered meter with the agreement history of its meter point.
+
+        Args:
+            meter: registered meter
+
+        Returns:
+            meter: copy of the meter with its agreements and current tariff, the meter
+                itself if the account doesn't list its meter point
+        """
+        for account_property in self.get_account(meter.account, meter.api_key)[
+            "properties"
+        ]:
+            for meter_point in account_property.get(f"{meter.fuel}_meter_points", []):
+                if meter.mpxn in (meter_point.get("mpan"), meter_point.get("mprn")):
+                    agreements = self._get_agreements(meter_point)
+                    if agreements:
+                        return meter.model_copy(
+                            update={
+                                "agreements": agreements,
+                                "product_code": agreements[-1].product_code,
+                                "tariff_code": agreements[-1].tariff_code,
+                            }
+                        )
+        logging.warning(f"No agreements of meter {meter.key} in {meter.account}.")
+        return meter
+
+
+if __name__ == "__main__":
+    tariff_catalogue = TariffCatalogue()
+
+    for discovered_meter in tariff_catalogue.discover_meters(
+        CONFIG.account.get_secret_value(), CONFIG.octopus_api_key
+    ):
+        print(discovered_meter.key, discovered_meter.agreements)
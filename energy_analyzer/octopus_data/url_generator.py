@@ -1,19 +1,33 @@
-"""Octopus API endpoint url generation module."""
+"""Octopus API endpoint url generation module.
+
+The urls of the single household assets are built from `ProjectConfig`, the ones of
+registered meters from their `Meter`. Both start 60 days before the last stored row of
+their meter, so every meter keeps its own watermark. Meters with discovered agreements
+get one rates and standing charges url per agreement in force over that period,
+bounded by its validity.
+"""
 
 import datetime
-from datetime import date, timedelta
-from typing import Optional
+from datetime import date, timedelta, timezone
+from typing import List, Optional
 
 from sqlalchemy.exc import NoResultFound
 
 from energy_analyzer.database.db_connector import DbConnector
 from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
     ElectricityConsumptionTable,
+    ElectricityExportRatesTable,
     ElectricityExportTable,
+    ElectricityHalfHourlyConsumptionTable,
     ElectricityRatesTable,
+    ElectricityStandingChargesTable,
     GasConsumptionTable,
+    GasHalfHourlyConsumptionTable,
     GasRatesTable,
+    GasStandingChargesTable,
 )
+from energy_analyzer.octopus_data.meter_registry import Meter
 from energy_analyzer.utils.config import ProjectConfig
 
 CONFIG = ProjectConfig()
@@ -26,26 +40,48 @@ class UrlGenerator:
         """Get group by condition."""
         return f"group_by={group_by}"
 
-    def _get_period_from(self, table, year_from: Optional[str] = None) -> str:
+    def _get_period_from(
+        self,
+        table,
+        year_from: Optional[str] = None,
+        meter_id: str = DEFAULT_METER_ID,
+    ) -> str:
         """Generate period_from date.
 
         Args:
             table: respective data table based on which the period
                 from is being created
             year_from: a year for witch the weekly data to be gathered
+            meter_id: meter whose last stored row is the watermark
         """
         if year_from:
             # calculate the first Monday of the year
             mon_date = datetime.datetime.strptime(year_from + "1" + "1", "%Y%W%w")
             return f"period_from={mon_date}"
         else:
-            db_url = CONFIG.db_url.get_secret_value()
-            db_connector = DbConnector(db_url)
-            try:
-                date_from = db_connector.get_latest_row(table) - timedelta(days=60)
-                return f"period_from={date_from}"
-            except NoResultFound:
-                return "period_from=2022-07-01"
+            return f"period_from={self._get_date_from(table, meter_id)}"
+
+    def _get_date_from(
+        self, table, meter_id: str = DEFAULT_METER_ID, column_name: str = "date"
+    ) -> date | datetime.datetime:
+        """Get the start of the period to be fetched for a meter.
+
+        Args:
+            table: respective data table of the meter rows
+            meter_id: meter whose last stored row is the watermark
+            column_name: time column of the table
+
+        Returns:
+            date_from: 60 days before the last stored row, 2022-07-01 without one
+        """
+        db_url = CONFIG.db_url.get_secret_value()
+        db_connector = DbConnector(db_url)
+        try:
+            return db_connector.get_latest_row(
+                table, column_name=column_name, meter_id=meter_id
+            ) - timedelta(days=60)
+        except NoResultFound:
+            return date(2022, 7, 1)
 
     def _get_period_to(self, year_to: Optional[int] = None) -> str:
         """Generate period_to date.
@@ -78,6 +114,22 @@ class UrlGenerator:
         )
         return url
 
+    def get_electricity_export_rates_url(self) -> str:
+        """Generate electricity export standard-unit-rates url.
+
+        Returns:
+            electricity export standard-unit-rates url
+        """
+        # page_size - default is 100, maximum is 1,500 for rates
+        url = (
+            f"{CONFIG.octopus_api_url}/products/"
+            + f"{CONFIG.export_product_code}/electricity-tariffs/"
+            + f"{CONFIG.e_export_tariff_code}/standard-unit-rates/"
+            + f"?{self._get_period_from(ElectricityExportRatesTable)}"
+            + f"{self._get_period_to()}&page_size=1500"
+        )
+        return url
+
     def get_gas_rates_url(self) -> str:
         """Create gas standard-unit-rates url.
 
@@ -94,6 +146,38 @@ class UrlGenerator:
         )
         return url
 
+    def get_electricity_standing_charges_url(self) -> str:
+        """Generate electricity standing-charges url.
+
+        Returns:
+            electricity standing-charges url
+        """
+        # page_size - default is 100, maximum is 1,500 for standing charges
+        url = (
+            f"{CONFIG.octopus_api_url}/products/"
+            + f"{CONFIG.product_code}/electricity-tariffs/"
+            + f"{CONFIG.e_tariff_code}/standing-charges/"
+            + f"?{self._get_period_from(ElectricityStandingChargesTable)}"
+            + f"{self._get_period_to()}&page_size=1500"
+        )
+        return url
+
+    def get_gas_standing_charges_url(self) -> str:
+        """Generate gas standing-charges url.
+
+        Returns:
+            gas standing-charges url
+        """
+        # page_size - default is 100, maximum is 1,500 for standing charges
+        url = (
+            f"{CONFIG.octopus_api_url}/products/"
+            + f"{CONFIG.product_code}/gas-tariffs/"
+            + f"{CONFIG.g_tariff_code}/standing-charges/"
+            + f"?{self._get_period_from(GasStandingChargesTable)}"
+            + f"{self._get_period_to()}&page_size=1500"
+        )
+        return url
+
     def get_electricity_consumption_url(
         self,
         group_by: Optional[str] = "day",
@@ -148,13 +232,58 @@ class UrlGenerator:
         )
         return url
 
+    def _get_half_hourly_consumption_url(self, meter_url: str, table) -> str:
+        """Generate the half-hourly consumption url of a meter.
+
+        Args:
+            meter_url: url of the meter, up to its serial number
+            table: half-hourly consumption table of the meter
+
+        Returns:
+            consumption url without grouping, from 60 days before the last stored
+                interval in UTC
+        """
+        date_from = self._get_date_from(table, column_name="interval_start")
+        # page_size - default is 100, maximum is 25,000 for consumption
+        return (
+            f"{meter_url}/consumption/"
+            + f"?period_from={date_from:%Y-%m-%dT%H:%M:%SZ}"
+            + f"{self._get_period_to()}&page_size=25000"
+        )
+
+    def get_electricity_half_hourly_consumption_url(self) -> str:
+        """Generate electricity half-hourly consumption url.
+
+        Returns:
+            electricity half-hourly consumption url link
+        """
+        return self._get_half_hourly_consumption_url(
+            f"{CONFIG.octopus_api_url}/electricity-meter-points/"
+            + f"{CONFIG.e_MPAN.get_secret_value()}/meters/"
+            + f"{CONFIG.e_serial_no.get_secret_value()}",
+            ElectricityHalfHourlyConsumptionTable,
+        )
+
+    def get_gas_half_hourly_consumption_url(self) -> str:
+        """Generate gas half-hourly consumption url.
+
+        Returns:
+            gas half-hourly consumption url link
+        """
+        return self._get_half_hourly_consumption_url(
+            f"{CONFIG.octopus_api_url}/gas-meter-points/"
+            + f"{CONFIG.g_MPRN.get_secret_value()}/meters/"
+            + f"{CONFIG.g_serial_no.get_secret_value()}",
+            GasHalfHourlyConsumptionTable,
+        )
+
     def get_electricity_export_url(
         self,
         group_by: Optional[str] = "day",
         year_from: Optional[str] = None,
         year_to: Optional[int] = None,
     ) -> str:
-        """Generate electricity consumption url.
+        """Generate electricity export url.
 
         Args:
             group_by: default day, can be week for weekly data
@@ -162,19 +291,181 @@ class UrlGenerator:
             year_to: mainly required for weekly data
 
         Returns:
-            electricity consumption url link
+            electricity export url link
         """
+        # the export MPAN is usually read by the import meter
+        serial_no = CONFIG.e_export_serial_no or CONFIG.e_serial_no
         # page_size - default is 100, maximum is 25,000 for consumption
         url = (
             f"{CONFIG.octopus_api_url}/electricity-meter-points/"
             + f"{CONFIG.e_export_MPAN.get_secret_value()}/meters/"
-            + f"{CONFIG.e_serial_no.get_secret_value()}/consumption/"
+            + f"{serial_no.get_secret_value()}/consumption/"
             + f"?{self._get_group_by(group_by)}&"
             + f"{self._get_period_from(ElectricityExportTable, year_from)}"
             + f"{self._get_period_to(year_to)}&page_size=25000"
         )
         return url
 
+    def _get_meter_tariff_url(self, meter: Meter, endpoint: str, table) -> str:
+        """Generate a tariff endpoint url of the tariff of a registered meter.
+
+        Args:
+            meter: registered meter
+            endpoint: "standard-unit-rates" or "standing-charges"
+            table: table of the meter rows of the endpoint
+
+        Returns:
+            endpoint url of the meter tariff
+        """
+        # page_size - default is 100, maximum is 1,500 for rates
+        url = (
+            f"{CONFIG.octopus_api_url}/products/"
+            + f"{meter.product_code}/{meter.fuel}-tariffs/"
+            + f"{meter.tariff_code}/{endpoint}/"
+            + f"?{self._get_period_from(table, meter_id=meter.meter_id)}"
+            + f"{self._get_period_to()}&page_size=1500"
+        )
+        return url
+
+    def _get_meter_tariff_urls(
+        self, meter: Meter, endpoint: str, table
+    ) -> List[tuple[Optional[str], str]]:
+        """Generate a tariff endpoint url per tariff in force for a meter.
+
+        Args:
+            meter: registered meter, with its agreements if they were discovered
+            endpoint: "standard-unit-rates" or "standing-charges"
+            table: table of the meter rows of the endpoint
+
+        Returns:
+            tariff code and endpoint url of every agreement overlapping the period to
+                be fetched, bounded by its validity, the meter tariff and its url
+                without agreements
+        """
+        if not meter.agreements:
+            return [
+                (meter.tariff_code, self._get_meter_tariff_url(meter, endpoint, table))
+            ]
+
+        date_from = self._get_date_from(table, meter.meter_id)
+        period_from = datetime.datetime(date_from.year, date_from.month, date_from.day)
+        period_to = datetime.datetime.combine(
+            date.today() + timedelta(days=14), datetime.time()
+        )
+        urls = []
+        for agreement in meter.agreements:
+            start = max(period_from, _to_naive_utc(agreement.valid_from))
+            end = min(
+                period_to,
+                _to_naive_utc(agreement.valid_to) if agreement.valid_to else period_to,
+            )
+            if start >= end:
+                continue
+            # page_size - default is 100, maximum is 1,500 for rates
+            urls.append(
+                (
+                    agreement.tariff_code,
+                    f"{CONFIG.octopus_api_url}/products/"
+                    + f"{agreement.product_code}/{meter.fuel}-tariffs/"
+                    + f"{agreement.tariff_code}/{endpoint}/"
+                    + f"?period_from={start:%Y-%m-%dT%H:%M:%SZ}"
+                    + f"&period_to={end:%Y-%m-%dT%H:%M:%SZ}&page_size=1500",
+                )
+            )
+        return urls
+
+    def get_meter_rates_url(self, meter: Meter) -> str:
+        """Generate the standard-unit-rates url of the tariff of a registered meter.
+
+        Args:
+            meter: registered meter
+
+        Returns:
+            standard-unit-rates url of the meter tariff
+        """
+        rates_table, _ = meter.tables
+        return self._get_meter_tariff_url(meter, "standard-unit-rates", rates_table)
+
+    def get_meter_rates_urls(self, meter: Meter) -> List[tuple[Optional[str], str]]:
+        """Generate the standard-unit-rates urls of the tariffs in force for a meter.
+
+        Args:
+            meter: registered meter, with its agreements if they were discovered
+
+        Returns:
+            tariff code and standard-unit-rates url of every agreement overlapping the
+                period to be fetched, bounded by its validity, the meter tariff and
+                its url without agreements
+        """
+        rates_table, _ = meter.tables
+        return self._get_meter_tariff_urls(meter, "standard-unit-rates", rates_table)
+
+    def get_meter_standing_charges_urls(
+        self, meter: Meter
+    ) -> List[tuple[Optional[str], str]]:
+        """Generate the standing-charges urls of the tariffs in force for a meter.
+
+        Args:
+            meter: registered import meter, with its agreements if they were discovered
+
+        Returns:
+            tariff code and standing-charges url of every agreement overlapping the
+                period to be fetched, bounded by its validity, the meter tariff and
+                its url without agreements
+        """
+        return self._get_meter_tariff_urls(
+            meter, "standing-charges", meter.standing_charges_table
+        )
+
+    def get_meter_consumption_url(
+        self, meter: Meter, group_by: Optional[str] = "day"
+    ) -> str:
+        """Generate the consumption url of a registered meter.
+
+        Args:
+            meter: registered meter, import or export
+            group_by: default day, can be week for weekly data
+
+        Returns:
+            consumption url of the meter
+        """
+        _, consumption_table = meter.tables
+        # page_size - default is 100, maximum is 25,000 for consumption
+        url = (
+            f"{CONFIG.octopus_api_url}/{meter.fuel}-meter-points/"
+            + f"{meter.mpxn}/meters/{meter.serial_no}/consumption/"
+            + f"?{self._get_group_by(group_by)}&"
+            + f"{self._get_period_from(consumption_table, meter_id=meter.meter_id)}"
+            + f"{self._get_period_to()}&page_size=25000"
+        )
+        return url
+
+    def get_account_url(self, account: str) -> str:
+        """Generate the url of an account.
+
+        Args:
+            account: account number
+
+        Returns:
+            accounts url of the account
+        """
+        return f"{CONFIG.octopus_api_url}/accounts/{account}/"
+
+    def get_products_url(self) -> str:
+        """Generate the products catalogue url.
+
+        Returns:
+            products url
+        """
+        return f"{CONFIG.octopus_api_url}/products/?page_size=100"
+
+
+def _to_naive_utc(timestamp: datetime.datetime) -> datetime.datetime:
+    """Convert a timestamp to naive UTC, naive timestamps are UTC already."""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
 
 if __name__ == "__main__":
     url_generator = UrlGenerator()
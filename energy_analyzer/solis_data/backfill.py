@@ -0,0 +1,294 @@
+"""Solis historical backfill module.
+
+Loads the history of every inverter from its commissioning day, the
+`fisGenerateTime` of the inverter list, up to yesterday:
+- one `inverterMonth` request per month into `solis_daily_generation`
+- one `inverterDay` request per day into `solis_telemetry`
+
+Requests run `solis_backfill_concurrency` at a time through the rate limiter shared by
+every Solis client of the process, so a backfill never exceeds the API key quota, even
+next to the telemetry poller. Results are decoded and upserted every
+`solis_backfill_batch_requests` requests, and only then recorded in the checkpoint
+file, so an interrupted backfill resumes where it stopped and failed requests are
+retried by the next run.
+
+```bash
+python -m energy_analyzer.solis_data.backfill
+```
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, List, Literal, NamedTuple, Optional
+
+import pandas as pd
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.solis_data.decoder import (
+    DAILY_GENERATION_SCHEMA,
+    TELEMETRY_SCHEMA,
+    PayloadDecoder,
+    PayloadSchema,
+)
+from energy_analyzer.solis_data.solis_data import SolisClient
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+SCHEMAS = {"month": DAILY_GENERATION_SCHEMA, "day": TELEMETRY_SCHEMA}
+
+
+class BackfillRequest(NamedTuple):
+    """Backfill request class."""
+
+    kind: Literal["month", "day"]
+    inverter_id: str
+    sn: str
+    period: date
+    time_zone: int = 0
+
+
+class BackfillCheckpoint:
+    """Backfill checkpoint class."""
+
+    def __init__(self, path: Optional[str | Path] = None) -> None:
+        """Class constructor method.
+
+        Args:
+            path: checkpoint file, `solis_backfill_checkpoint` by default
+        """
+        self.path = Path(path or CONFIG.solis_backfill_checkpoint)
+        state = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self._done: dict[str, dict[str, set[str]]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+        for sn, kinds in state.items():
+            for kind, periods in kinds.items():
+                self._done[sn][kind].update(periods)
+
+    def is_done(self, request: BackfillRequest) -> bool:
+        """Check whether a request was loaded by a previous batch or run."""
+        return request.period.isoformat() in self._done[request.sn][request.kind]
+
+    def mark_done(self, requests: List[BackfillRequest]) -> None:
+        """Record loaded requests and save the checkpoint.
+
+        Args:
+            requests: requests whose results were written to the database
+        """
+        for request in requests:
+            self._done[request.sn][request.kind].add(request.period.isoformat())
+        state = {
+            sn: {kind: sorted(periods) for kind, periods in kinds.items()}
+            for sn, kinds in self._done.items()
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_text(json.dumps(state))
+        os.replace(temporary_path, self.path)
+
+
+def get_commissioning_date(
+    inverter: dict[str, Any], default: Optional[date] = None
+) -> Optional[date]:
+    """Get the first generation day of an inverter.
+
+    Args:
+        inverter: inverter list record
+        default: day used when the record has no first generation time
+
+    Returns:
+        day: first generation day, `default` if unknown
+    """
+    first_generation = inverter.get("fisGenerateTime")
+    if first_generation in (None, "", 0, "0"):
+        return default
+    return pd.Timestamp(int(first_generation), unit="ms").date()
+
+
+def plan_backfill(
+    inverters: List[dict[str, Any]],
+    checkpoint: BackfillCheckpoint,
+    today: Optional[date] = None,
+    start: Optional[date] = None,
+) -> List[BackfillRequest]:
+    """Plan the requests not loaded yet, from commissioning to yesterday.
+
+    Months come first, then days, oldest first and interleaved across inverters, so
+    every inverter progresses at the same pace.
+
+    Args:
+        inverters: inverter list records
+        checkpoint: requests already loaded
+        today: current day, excluded from the backfill
+        start: first day of inverters without a first generation time
+
+    Returns:
+        requests: requests to be sent
+    """
+    yesterday = (today or date.today()) - timedelta(days=1)
+    requests = []
+    for inverter in inverters:
+        commissioned = get_commissioning_date(inverter, start)
+        if commissioned is None or commissioned > yesterday:
+            logging.warning(f"Inverter {inverter.get('sn')} has nothing to backfill.")
+            continue
+        inverter_id, sn = str(inverter["id"]), str(inverter["sn"])
+        time_zone = int(float(inverter.get("timeZone") or 0))
+        months = pd.date_range(commissioned.replace(day=1), yesterday, freq="MS")
+        days = pd.date_range(commissioned, yesterday, freq="D")
+        requests += [
+            BackfillRequest("month", inverter_id, sn, month.date(), time_zone)
+            for month in months
+        ] + [
+            BackfillRequest("day", inverter_id, sn, day.date(), time_zone)
+            for day in days
+        ]
+    requests = [request for request in requests if not checkpoint.is_done(request)]
+    return sorted(requests, key=lambda request: (request.kind != "month", request[3]))
+
+
+class SolisBackfill:
+    """Solis historical backfill class."""
+
+    def __init__(
+        self,
+        solis_client: SolisClient,
+        db_connector: DbConnector,
+        checkpoint: Optional[BackfillCheckpoint] = None,
+        concurrency: int = CONFIG.solis_backfill_concurrency,
+        batch_requests: int = CONFIG.solis_backfill_batch_requests,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            solis_client: Solis Cloud client
+            db_connector: connector of the database holding the Solis tables
+            checkpoint: requests already loaded, `solis_backfill_checkpoint` by default
+            concurrency: requests in flight
+            batch_requests: requests loaded per database write
+        """
+        self.solis_client = solis_client
+        self.db_connector = db_connector
+        self.checkpoint = checkpoint or BackfillCheckpoint()
+        self.concurrency = concurrency
+        self.batch_requests = batch_requests
+        self.decoders = {
+            kind: PayloadDecoder(schema) for kind, schema in SCHEMAS.items()
+        }
+        self.rows: dict[str, int] = defaultdict(int)
+        self.failed: List[BackfillRequest] = []
+
+    async def _fetch(self, request: BackfillRequest) -> List[dict[str, Any]]:
+        """Send one backfill request."""
+        if request.kind == "month":
+            return await self.solis_client.get_inverter_month(
+                request.inverter_id, request.sn, request.period
+            )
+        return await self.solis_client.get_inverter_day(
+            request.inverter_id, request.sn, request.period, request.time_zone
+        )
+
+    def _load(
+        self,
+        results: List[tuple[BackfillRequest, List[dict[str, Any]]]],
+        today: date,
+    ) -> None:
+        """Decode and upsert the results of a batch, then checkpoint its requests.
+
+        Args:
+            results: requests with their payloads
+            today: current day, months containing it are fetched again next run
+        """
+        for kind, decoder in self.decoders.items():
+            payloads, sns = [], []
+            for request, records in results:
+                if request.kind == kind:
+                    payloads += records
+                    sns += [request.sn] * len(records)
+            if not payloads:
+                continue
+            schema: PayloadSchema = decoder.schema
+            data = (
+                decoder.decode_batch(payloads, sns)
+                .dropna(subset=[schema.time_column])
+                .drop_duplicates(subset=["sn", schema.time_column], keep="last")
+            )
+            self.db_connector.upsert_data_to_db(data, schema.table_name)
+            self.rows[schema.table_name] += len(data)
+
+        current_month = today.replace(day=1)
+        self.checkpoint.mark_done(
+            [
+                request
+                for request, _ in results
+                if request.kind == "day" or request.period < current_month
+            ]
+        )
+
+    async def run(
+        self,
+        inverters: Optional[List[dict[str, Any]]] = None,
+        today: Optional[date] = None,
+        start: Optional[date] = None,
+    ) -> dict[str, int]:
+        """Load the history not loaded yet.
+
+        Args:
+            inverters: inverter list records, every inverter of the account by default
+            today: current day, excluded from the backfill
+            start: first day of inverters without a first generation time
+
+        Returns:
+            rows: number of rows written per table
+        """
+        today = today or date.today()
+        async with self.solis_client:
+            if inverters is None:
+                inverters = await self.solis_client.get_inverters()
+            requests = plan_backfill(inverters, self.checkpoint, today, start)
+            logging.info(f"Backfilling {len(requests)} Solis requests.")
+
+            queue: asyncio.Queue[BackfillRequest] = asyncio.Queue()
+            for request in requests:
+                queue.put_nowait(request)
+            results: List[tuple[BackfillRequest, List[dict[str, Any]]]] = []
+            write_lock = asyncio.Lock()
+
+            async def load_results(force: bool = False) -> None:
+                async with write_lock:
+                    if results and (force or len(results) >= self.batch_requests):
+                        batch = results[:]
+                        results.clear()
+                        # database writes don't hold up the requests in flight
+                        await asyncio.to_thread(self._load, batch, today)
+
+            async def worker() -> None:
+                while not queue.empty():
+                    request = queue.get_nowait()
+                    try:
+                        results.append((request, await self._fetch(request)))
+                    except Exception as error:
+                        logging.error(f"Backfill request {request} failed: {error}")
+                        self.failed.append(request)
+                    await load_results()
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            await load_results(force=True)
+
+        logging.info(
+            f"Backfilled {dict(self.rows)} rows, {len(self.failed)} requests failed."
+        )
+        return dict(self.rows)
+
+
+if __name__ == "__main__":
+    solis_backfill = SolisBackfill(
+        SolisClient(), DbConnector(CONFIG.db_url.get_secret_value())
+    )
+
+    print(asyncio.run(solis_backfill.run()))
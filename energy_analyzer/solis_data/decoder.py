@@ -0,0 +1,217 @@
+"""Solis payload decoder module.
+
+Solis Cloud payloads are flat dictionaries of loosely typed values: numbers arrive as
+numbers or strings, units vary per inverter (`pac` is reported in W or kW, `eTotal` in
+kWh or MWh, as told by the `pacStr`/`eTotalStr` fields), and three phase inverters
+report one value per phase. Every stored table is described once by a
+`PayloadSchema`: the source key, target column, default scale, unit key and phases of
+each field.
+
+`PayloadDecoder.decode_batch` turns a list of payloads, e.g. the polled inverter
+details or an `inverterDay`/`inverterMonth` dump, into typed columns in one pass: the
+payloads are loaded into one frame, then every field is converted, scaled and averaged
+over its phases as a whole column.
+"""
+
+from typing import Any, List, Literal, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from energy_analyzer.database.db_models import (
+    SolisDailyGenerationTable,
+    SolisTelemetryTable,
+)
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+# scales to W for powers and to kWh for energies
+UNIT_SCALES = {
+    "W": 1.0,
+    "kW": 1e3,
+    "MW": 1e6,
+    "Wh": 1e-3,
+    "kWh": 1.0,
+    "MWh": 1e3,
+    "GWh": 1e6,
+}
+
+
+class PayloadField(BaseModel):
+    """Decoded payload field dataclass."""
+
+    source: str
+    column: str
+    scale: float = 1.0
+    unit_source: Optional[str] = None
+    phases: List[str] = []
+
+
+class PayloadSchema(BaseModel):
+    """Decoded payload schema dataclass."""
+
+    table_name: str
+    time_source: str
+    time_column: str
+    time_kind: Literal["epoch_ms", "date"]
+    fields: List[PayloadField]
+
+
+def _power(source: str, column: str, **kwargs: Any) -> PayloadField:
+    """Describe a power field reported in kW unless its unit field says otherwise."""
+    return PayloadField(
+        source=source,
+        column=column,
+        scale=UNIT_SCALES["kW"],
+        unit_source=f"{source}Str",
+        **kwargs,
+    )
+
+
+def _energy(source: str, column: str) -> PayloadField:
+    """Describe an energy field reported in kWh unless its unit field says otherwise."""
+    return PayloadField(source=source, column=column, unit_source=f"{source}Str")
+
+
+TELEMETRY_SCHEMA = PayloadSchema(
+    table_name=SolisTelemetryTable.__tablename__,
+    time_source="dataTimestamp",
+    time_column="recorded_at",
+    time_kind="epoch_ms",
+    fields=[
+        _power("pac", "ac_power"),
+        _power("psum", "grid_power"),
+        _power("familyLoadPower", "load_power"),
+        PayloadField(source="uAc1", column="ac_voltage", phases=["uAc2", "uAc3"]),
+        PayloadField(source="iAc1", column="ac_current", phases=["iAc2", "iAc3"]),
+        PayloadField(source="fac", column="ac_frequency"),
+        *(
+            PayloadField(source=f"{source}{string}", column=f"{column}_pv{string}")
+            for source, column in (
+                ("uPv", "dc_voltage"),
+                ("iPv", "dc_current"),
+                ("pow", "dc_power"),
+            )
+            for string in range(1, 5)
+        ),
+        PayloadField(source="inverterTemperature", column="inverter_temperature"),
+        _energy("eToday", "daily_generation"),
+        _energy("eMonth", "monthly_generation"),
+        _energy("eYear", "annual_generation"),
+        _energy("eTotal", "total_generation"),
+        _energy("gridSellTodayEnergy", "grid_sell_today"),
+        _energy("gridPurchasedTodayEnergy", "grid_purchased_today"),
+        _energy("gridSellTotalEnergy", "grid_sell_total"),
+        _energy("gridPurchasedTotalEnergy", "grid_purchased_total"),
+        _energy("homeLoadTotalEnergy", "load_total"),
+    ],
+)
+
+DAILY_GENERATION_SCHEMA = PayloadSchema(
+    table_name=SolisDailyGenerationTable.__tablename__,
+    time_source="dateStr",
+    time_column="date",
+    time_kind="date",
+    fields=[
+        _energy("energy", "generation"),
+        _energy("gridSellEnergy", "grid_sell"),
+        _energy("gridPurchasedEnergy", "grid_purchased"),
+        _energy("homeLoadEnergy", "load"),
+    ],
+)
+
+
+class PayloadDecoder:
+    """Columnar Solis payload decoder class."""
+
+    def __init__(
+        self,
+        schema: PayloadSchema = TELEMETRY_SCHEMA,
+        single_phase: bool = CONFIG.solis_single_phase,
+    ) -> None:
+        """Compile the schema once, for every batch to reuse.
+
+        Args:
+            schema: schema of the payloads and of their table
+            single_phase: read the first phase only, even on three phase inverters
+        """
+        self.schema = schema
+        self.single_phase = single_phase
+        self.columns = [field.column for field in schema.fields]
+        self.sources = list(
+            dict.fromkeys(
+                [schema.time_source, "acOutputType"]
+                + [
+                    source
+                    for field in schema.fields
+                    for source in (
+                        field.source,
+                        *field.phases,
+                        *([field.unit_source] if field.unit_source else []),
+                    )
+                ]
+            )
+        )
+
+    def decode_batch(
+        self, payloads: List[dict[str, Any]], sn: str | List[str]
+    ) -> pd.DataFrame:
+        """Decode payloads into the rows of the schema table.
+
+        Args:
+            payloads: payloads of one or several inverters
+            sn: serial number of the inverter of every payload, or of all of them
+
+        Returns:
+            rows: serial number, time and one float64 column per schema field, NaN
+                for missing or unparsable values
+        """
+        raw = pd.DataFrame.from_records(payloads, columns=self.sources)
+        rows = {"sn": sn if isinstance(sn, list) else [sn] * len(raw)}
+
+        times = raw[self.schema.time_source]
+        if self.schema.time_kind == "epoch_ms":
+            rows[self.schema.time_column] = pd.to_datetime(
+                pd.to_numeric(times, errors="coerce"), unit="ms"
+            )
+        else:
+            rows[self.schema.time_column] = pd.to_datetime(
+                times, errors="coerce"
+            ).dt.date
+
+        # inverters reporting acOutputType 0 have a single phase
+        three_phase = (
+            pd.to_numeric(raw["acOutputType"], errors="coerce").fillna(0).to_numpy()
+            != 0
+        ) & (not self.single_phase)
+        for field in self.schema.fields:
+            values = self._to_float(raw[field.source])
+            if field.phases and three_phase.any():
+                phases = np.column_stack(
+                    [values] + [self._to_float(raw[phase]) for phase in field.phases]
+                )
+                values = np.where(three_phase, phases.mean(axis=1), values)
+            rows[field.column] = values * self._get_scales(raw, field)
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def _to_float(values: pd.Series) -> np.ndarray:
+        """Convert a payload column of numbers or numeric strings to float64."""
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            return values.to_numpy(dtype=np.float64, na_value=np.nan)
+        return pd.to_numeric(values, errors="coerce").to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+
+    @staticmethod
+    def _get_scales(raw: pd.DataFrame, field: PayloadField) -> np.ndarray | float:
+        """Get the scale of every value of a field from its unit field."""
+        if field.unit_source is None or raw[field.unit_source].isna().all():
+            return field.scale
+        return (
+            raw[field.unit_source]
+            .map(UNIT_SCALES)
+            .fillna(field.scale)
+            .to_numpy(dtype=np.float64)
+        )
@@ -0,0 +1,168 @@
+"""Solis telemetry store module.
+
+Inverter detail payloads carry well over a hundred loosely typed fields. The ones kept
+are described by `TELEMETRY_SCHEMA` (see `energy_analyzer.solis_data.decoder`) and
+stored in the typed `solis_telemetry` table: one row per inverter and reading, powers
+in W and energies in kWh.
+
+`TelemetryBuffer` keeps polled payloads in memory, then decodes them as one batch and
+writes them through the bulk upsert path of `DbConnector` once
+`solis_telemetry_batch_rows` payloads are buffered or the oldest one is
+`solis_telemetry_flush_seconds` old, so polling a whole fleet every 5 minutes costs a
+few database round trips instead of one per inverter and poll.
+
+```bash
+python -m energy_analyzer.solis_data.telemetry
+```
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, List, Optional
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.solis_data.decoder import TELEMETRY_SCHEMA, PayloadDecoder
+from energy_analyzer.solis_data.solis_data import SolisClient
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+
+
+class TelemetryBuffer:
+    """Telemetry micro-batch buffer class."""
+
+    def __init__(
+        self,
+        db_connector: DbConnector,
+        max_rows: int = CONFIG.solis_telemetry_batch_rows,
+        max_delay: float = CONFIG.solis_telemetry_flush_seconds,
+        decoder: Optional[PayloadDecoder] = None,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            db_connector: connector of the database holding `solis_telemetry`
+            max_rows: rows buffered before a flush
+            max_delay: age in seconds of the oldest buffered row before a flush
+            decoder: inverter detail decoder, the `TELEMETRY_SCHEMA` one by default
+        """
+        self.db_connector = db_connector
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.decoder = decoder or PayloadDecoder(TELEMETRY_SCHEMA)
+        self.flushes = 0
+        self._sns: List[str] = []
+        self._details: List[dict[str, Any]] = []
+        self._first_added: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get the number of buffered rows."""
+        return len(self._details)
+
+    def __enter__(self) -> "TelemetryBuffer":
+        """Start buffering."""
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        """Write the rows left in the buffer."""
+        self.flush()
+
+    def add(self, sn: str, detail: dict[str, Any]) -> int:
+        """Buffer an inverter detail payload, decoded at the next flush.
+
+        Args:
+            sn: inverter serial number
+            detail: "data" of an inverterDetail response, with its "dataTimestamp"
+                in epoch milliseconds
+
+        Returns:
+            rows: number of rows written by the flush it triggered, if any
+        """
+        with self._lock:
+            self._sns.append(sn)
+            self._details.append(detail)
+            if self._first_added is None:
+                self._first_added = time.monotonic()
+        return self.flush_if_due()
+
+    def flush_if_due(self) -> int:
+        """Write the buffered rows if the buffer is full or old enough.
+
+        Returns:
+            rows: number of rows written
+        """
+        with self._lock:
+            due = len(self._details) >= self.max_rows or (
+                self._first_added is not None
+                and time.monotonic() - self._first_added >= self.max_delay
+            )
+        return self.flush() if due else 0
+
+    def flush(self) -> int:
+        """Write the buffered rows in one bulk upsert.
+
+        Returns:
+            rows: number of rows written
+        """
+        with self._lock:
+            sns, details = self._sns, self._details
+            self._sns, self._details, self._first_added = [], [], None
+        if not details:
+            return 0
+
+        schema = self.decoder.schema
+        data = self.decoder.decode_batch(details, sns)
+        # a reading polled twice is written once
+        data = data.drop_duplicates(subset=["sn", schema.time_column], keep="last")
+        self.db_connector.upsert_data_to_db(data, schema.table_name)
+        self.flushes += 1
+        logging.info(f"Wrote {len(data)} telemetry rows.")
+        return len(data)
+
+
+async def poll_telemetry(
+    solis_client: SolisClient,
+    telemetry_buffer: TelemetryBuffer,
+    interval: float = 300,
+    polls: Optional[int] = None,
+) -> None:
+    """Poll the detail of every inverter at a fixed interval into the buffer.
+
+    Args:
+        solis_client: Solis Cloud client
+        telemetry_buffer: buffer of the polled readings
+        interval: seconds between the starts of two polls
+        polls: number of polls, forever if None
+    """
+    async with solis_client:
+        inverters = await solis_client.get_inverters()
+        poll = 0
+        while polls is None or poll < polls:
+            started = time.monotonic()
+            details = await asyncio.gather(
+                *(
+                    solis_client.get_inverter_detail(
+                        str(inverter["id"]), str(inverter["sn"])
+                    )
+                    for inverter in inverters
+                ),
+                return_exceptions=True,
+            )
+            for inverter, detail in zip(inverters, details):
+                if isinstance(detail, BaseException):
+                    logging.error(f"Polling inverter {inverter['sn']} failed: {detail}")
+                elif detail:
+                    telemetry_buffer.add(str(inverter["sn"]), detail)
+            telemetry_buffer.flush_if_due()
+            poll += 1
+            if polls is None or poll < polls:
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+    telemetry_buffer.flush()
+
+
+if __name__ == "__main__":
+    with TelemetryBuffer(DbConnector(CONFIG.db_url.get_secret_value())) as buffer:
+        asyncio.run(poll_telemetry(SolisClient(), buffer))
@@ -1,5 +1,7 @@
 """Config module."""
 
+from typing import Optional
+
 from pydantic import Field, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -13,20 +15,62 @@ class ProjectConfig(BaseSettings):
     solis_api_url: str = "https://www.soliscloud.com:13333/"
     solis_key_id: SecretStr = Field(default=None, alias="SOLIS_KEY_ID")
     solis_key_secret: SecretStr = Field(default=None, alias="SOLIS_KEY_SECRET")
+    solis_request_timeout: float = 30
+    solis_max_retries: int = 5
+    solis_retry_backoff: float = 0.5
+    solis_requests_per_second: float = 2
+    solis_request_burst: float = 2
+    solis_max_connections: int = 10
+    solis_currency: str = "GBP"
+    solis_single_phase: bool = False
+    solis_telemetry_batch_rows: int = 1000
+    solis_telemetry_flush_seconds: float = 60
+    solis_backfill_concurrency: int = 4
+    solis_backfill_batch_requests: int = 50
+    solis_backfill_checkpoint: str = "/tmp/io_manager_storage/solis_backfill.json"
+
+    # Solar self-consumption analytics
+    self_consumption_chunk_days: int = 31
 
     # Octopus Info
     octopus_api_url: str = "https://api.octopus.energy/v1"
     product_code: str = "SILVER-23-12-06"
     account: SecretStr = Field(default=None, alias="OCTOPUS_ACCOUNT_NO")
     octopus_api_key: SecretStr = Field(default=None, alias="OCTOPUS_API_KEY")
+    octopus_request_timeout: float = 30
+    octopus_max_retries: int = 5
+    octopus_retry_backoff: float = 0.5
+    octopus_max_concurrent_requests: int = 8
+    # rates are dated by the day they start on in this timezone
+    local_timezone: str = "Europe/London"
+    # rates and charges of other payment methods are dropped, e.g. "NON_DIRECT_DEBIT"
+    octopus_payment_method: str = "DIRECT_DEBIT"
+
+    # Account and tariff discovery
+    tariff_discovery_enabled: bool = False
+    tariff_catalogue_path: str = "/tmp/io_manager_storage/tariff_catalogue.json"
+    tariff_catalogue_ttl_hours: float = 24
+
+    # Multi-meter ingestion
+    meter_registry_path: Optional[str] = None
+    meter_ingest_workers: int = 4
+
+    # Raw API payload landing zone
+    landing_zone_enabled: bool = True
+    landing_zone_replay: bool = False
+    landing_zone_dir: str = "/tmp/io_manager_storage/landing_zone"
 
     # Electricity Info
     e_tariff_code: str = "E-1R-SILVER-23-12-06-B"
     e_MPAN: SecretStr = Field(default=None, alias="ELECTRICITY_MPAN")
     e_serial_no: SecretStr = Field(default=None, alias="ELECTRICITY_SERIAL_NO")
 
+    export_product_code: str = "OUTGOING-FIX-12M-19-05-13"
     e_export_tariff_code: str = "E-1R-OUTGOING-FIX-12M-19-05-13-B"
     e_export_MPAN: SecretStr = Field(default=None, alias="ELECTRICITY_EXPORT_MPAN")
+    e_export_serial_no: Optional[SecretStr] = Field(
+        default=None, alias="ELECTRICITY_EXPORT_SERIAL_NO"
+    )
 
     # Gas Info
     g_tariff_code: str = "G-1R-SILVER-23-12-06-B"
@@ -36,11 +80,40 @@ class ProjectConfig(BaseSettings):
 
     # Database
     db_url: SecretStr = Field(default=None, alias="DATABASE_URL")
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    db_read_batch_size: int = 10000
+    db_partitions_ahead: int = 3
+    db_partition_retention_months: Optional[int] = None
+    db_validate_on_ingest: bool = True
+
+    # Detail readings compaction
+    compaction_max_age_days: int = 90
+    compaction_archive_enabled: bool = True
+    compaction_archive_dir: str = "/tmp/io_manager_storage/cold_archive"
+
+    # Parquet history store
+    history_store_dir: str = "/tmp/io_manager_storage/history"
+    history_cache_dir: str = "/tmp/io_manager_storage/history_cache"
+
+    # Query result cache
+    query_cache_enabled: bool = True
+    query_cache_max_entries: int = 256
+    query_cache_max_bytes: int = 64 * 1024 * 1024
+    # without a directory the cache doesn't see writes of other processes
+    query_cache_dir: Optional[str] = None
 
     # PushStaq
     pushstaq_api_url: str = "https://www.pushstaq.com/api/push/"
     pushstaq_api_key: SecretStr = Field(default=None, alias="PUSHSTAQ_API_KEY")
 
+    # Profiling
+    profiling_enabled: bool = Field(default=False, alias="ENERGY_ANALYZER_PROFILING")
+    profiling_dir: str = "/tmp/io_manager_storage/profiles"
+    profiling_top_allocations: int = 25
+
     POSTGRES_USER: str = "postgres_user"
     POSTGRES_PASSWORD: str = "postgres_password"
     POSTGRES_DB: str = "postgres_db"
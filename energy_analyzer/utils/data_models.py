@@ -1,8 +1,49 @@
-"""Data models module."""
+"""Data models module.
+
+The row models describe single API records. Batches written to the database are
+validated by `BatchValidator` instead, one whole column at a time, against a
+`TableSchema` derived from the `db_models` table: value types, missing values in
+non-nullable columns, plausible value ranges and duplicate primary keys.
+"""
+
 from enum import Enum
-from typing import Any, List
+from typing import Any, List, Literal, Optional
 
+import numpy as np
+import pandas as pd
+import pyarrow as pa
 from pydantic import BaseModel
+from sqlalchemy import Date, DateTime, Float, Integer, String, Table
+
+from energy_analyzer.database.db_models import Base
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+# plausible values per column name, unit rates in p/kWh can go negative on Agile
+VALUE_RANGES = {
+    "consumption": (0.0, None),
+    "export_value": (0.0, None),
+    "generation": (0.0, None),
+    "grid_import": (0.0, None),
+    "grid_export": (0.0, None),
+    "self_consumption": (0.0, None),
+    "load": (0.0, None),
+    "unit_rate_exc_vat": (-100.0, 500.0),
+    "unit_rate_inc_vat": (-100.0, 500.0),
+    "standing_charge_exc_vat": (0.0, 500.0),
+    "standing_charge_inc_vat": (0.0, 500.0),
+    "value_count": (0.0, None),
+    "days": (0.0, 31.0),
+}
+# end of an interval of `RateTimeline` without end
+OPEN_END = np.iinfo(np.int64).max
+COLUMN_KINDS = {
+    DateTime: "datetime",
+    Date: "date",
+    Float: "float",
+    Integer: "integer",
+    String: "string",
+}
 
 
 class RatesData(BaseModel):
@@ -68,3 +109,889 @@ class ElectricityData(EnergyData):
 
 class GasData(EnergyData):
     """Gas data dataclass."""
+
+
+class BatchValidationError(ValueError):
+    """Batch validation error class."""
+
+
+class ColumnSchema(BaseModel):
+    """Column validation schema dataclass."""
+
+    name: str
+    kind: Literal["datetime", "date", "float", "integer", "string"]
+    nullable: bool = True
+    has_default: bool = False
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+
+class TableSchema(BaseModel):
+    """Table validation schema dataclass."""
+
+    table_name: str
+    columns: List[ColumnSchema]
+    primary_key: List[str] = []
+
+
+class ValidationReport(BaseModel):
+    """Batch validation report dataclass."""
+
+    table_name: str
+    rows: int
+    missing_columns: List[str] = []
+    errors: dict[str, List[int]] = {}
+
+    @property
+    def is_valid(self) -> bool:
+        """Whether the batch passed every check."""
+        return not self.missing_columns and not self.errors
+
+    def raise_for_errors(self) -> None:
+        """Raise a `BatchValidationError` summarising the failed checks."""
+        if self.is_valid:
+            return
+        problems = [f"missing columns {self.missing_columns}"] * bool(
+            self.missing_columns
+        ) + [
+            f"{check} in {len(rows)} rows, e.g. {rows[:5]}"
+            for check, rows in self.errors.items()
+        ]
+        raise BatchValidationError(
+            f"Invalid {self.table_name} batch of {self.rows} rows: "
+            + "; ".join(problems)
+        )
+
+
+def get_table_schema(table: Table) -> TableSchema:
+    """Derive the validation schema of a database table.
+
+    Args:
+        table: `db_models` table
+
+    Returns:
+        schema: column types and nullability of the table, `VALUE_RANGES` bounds
+    """
+    columns = []
+    for column in table.columns:
+        min_value, max_value = VALUE_RANGES.get(column.name, (None, None))
+        columns.append(
+            ColumnSchema(
+                name=column.name,
+                kind=next(
+                    kind
+                    for column_type, kind in COLUMN_KINDS.items()
+                    if isinstance(column.type, column_type)
+                ),
+                nullable=bool(column.nullable) and not column.primary_key,
+                has_default=column.server_default is not None,
+                min_value=min_value,
+                max_value=max_value,
+            )
+        )
+    return TableSchema(
+        table_name=table.name,
+        columns=columns,
+        primary_key=[column.name for column in table.primary_key.columns],
+    )
+
+
+def _convert_column(
+    values: pd.Series, kind: str
+) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """Convert a column to a NumPy array of its schema type.
+
+    Columns already of the right type are converted without a Python loop; other
+    columns are coerced value by value to locate the ones of the wrong type.
+
+    Args:
+        values: column of the batch
+        kind: schema type of the column
+
+    Returns:
+        converted: converted values, missing or invalid values as NaN/NaT/None
+        invalid: mask of the present values of the wrong type, None if there are none
+    """
+    if kind in ("date", "datetime"):
+        unit = "datetime64[D]" if kind == "date" else "datetime64[us]"
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            return values.to_numpy().astype(unit), None
+        arrow_type = pa.date32() if kind == "date" else pa.timestamp("us")
+        try:
+            converted = pa.array(values, type=arrow_type, from_pandas=True)
+            return converted.to_numpy(zero_copy_only=False).astype(unit), None
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+            coerced = pd.to_datetime(values, errors="coerce", format="mixed")
+            invalid = (coerced.isna() & values.notna()).to_numpy()
+            return coerced.to_numpy().astype(unit), invalid
+
+    if kind in ("float", "integer"):
+        if pd.api.types.is_numeric_dtype(values.dtype) and not (
+            pd.api.types.is_bool_dtype(values.dtype)
+        ):
+            converted = values.to_numpy(dtype=float, na_value=np.nan)
+            invalid = None
+        else:
+            coerced = pd.to_numeric(values, errors="coerce")
+            converted = coerced.to_numpy(dtype=float, na_value=np.nan)
+            invalid = (coerced.isna() & values.notna()).to_numpy()
+        if kind == "integer":
+            fractional = np.isfinite(converted) & (converted != np.round(converted))
+            if fractional.any():
+                invalid = fractional if invalid is None else invalid | fractional
+        return converted, invalid
+
+    if pd.api.types.is_string_dtype(values.dtype) and pd.api.types.infer_dtype(
+        values, skipna=True
+    ) in ("string", "empty"):
+        return values.to_numpy(), None
+    invalid = (
+        values.notna() & ~values.map(lambda value: isinstance(value, str))
+    ).to_numpy()
+    return values.to_numpy(), invalid
+
+
+def _find_duplicates(keys: List[np.ndarray]) -> np.ndarray:
+    """Flag every row sharing its key with another row.
+
+    Single time keys, the key of every time series table, are compared as integers,
+    in one pass when the rows are already in time order and after a sort otherwise.
+
+    Args:
+        keys: converted values of every primary key column
+
+    Returns:
+        duplicated: mask of the rows with a duplicate key
+    """
+    if len(keys) > 1 or keys[0].dtype.kind != "M":
+        return pd.DataFrame(dict(enumerate(keys))).duplicated(keep=False).to_numpy()
+
+    values = keys[0].view("int64")
+    duplicated = np.zeros(len(values), dtype=bool)
+    if (np.diff(values) > 0).all():
+        return duplicated
+    order = np.argsort(values, kind="stable")
+    ordered = values[order]
+    same = (ordered[1:] == ordered[:-1]) & (ordered[1:] != np.iinfo("int64").min)
+    duplicated[order[1:][same]] = True
+    duplicated[order[:-1][same]] = True
+    return duplicated
+
+
+class BatchValidator:
+    """Columnar batch validator class."""
+
+    def __init__(self, schema: TableSchema) -> None:
+        """Class constructor method.
+
+        Args:
+            schema: validation schema of the destination table
+        """
+        self.schema = schema
+
+    @classmethod
+    def for_table(cls, table_name: str) -> "BatchValidator":
+        """Build the validator of a `db_models` table.
+
+        Args:
+            table_name: name of the table
+
+        Returns:
+            validator: validator of the table schema
+        """
+        return cls(get_table_schema(Base.metadata.tables[table_name]))
+
+    def validate(self, data: pd.DataFrame) -> ValidationReport:
+        """Validate a batch of rows.
+
+        Args:
+            data: rows to be written to the table
+
+        Returns:
+            report: failed checks with the positions of the offending rows
+        """
+        errors: dict[str, np.ndarray] = {}
+        converted: dict[str, np.ndarray] = {}
+        missing_columns = []
+        for column in self.schema.columns:
+            if column.name not in data:
+                if not column.nullable and not column.has_default:
+                    missing_columns.append(column.name)
+                continue
+            values, invalid = _convert_column(data[column.name], column.kind)
+            converted[column.name] = values
+            if invalid is not None:
+                errors[f"{column.name}: not {column.kind}"] = invalid
+
+            if not column.nullable:
+                errors[f"{column.name}: missing value"] = (
+                    data[column.name].isna().to_numpy()
+                )
+            if column.min_value is not None or column.max_value is not None:
+                with np.errstate(invalid="ignore"):
+                    out_of_range = np.isinf(values)
+                    if column.min_value is not None:
+                        out_of_range |= values < column.min_value
+                    if column.max_value is not None:
+                        out_of_range |= values > column.max_value
+                errors[f"{column.name}: out of range"] = out_of_range
+
+        # key columns left to their default, or holding one value, e.g. the meter id
+        # of a single meter batch, don't tell rows apart
+        keys = [
+            converted[column.name]
+            for column in self.schema.columns
+            if column.name in self.schema.primary_key
+            and column.name in converted
+            and not (
+                column.kind == "string"
+                and len(data)
+                and (converted[column.name] == converted[column.name][0]).all()
+            )
+        ]
+        if self.schema.primary_key and not missing_columns:
+            if keys:
+                errors["duplicate primary key"] = _find_duplicates(keys)
+            elif len(data) > 1:
+                errors["duplicate primary key"] = np.ones(len(data), dtype=bool)
+
+        return ValidationReport(
+            table_name=self.schema.table_name,
+            rows=len(data),
+            missing_columns=missing_columns,
+            errors={
+                check: np.flatnonzero(rows).tolist()
+                for check, rows in errors.items()
+                if rows.any()
+            },
+        )
+
+
+class ReadingSeries:
+    """Array-backed reading series class.
+
+    Readings are kept in two contiguous arrays, epoch nanoseconds (UTC) as int64 and
+    values as float64, 16 bytes per reading instead of a dictionary of boxed Python
+    objects. Slices and range lookups are views sharing the arrays.
+    """
+
+    def __init__(
+        self,
+        name: str = "value",
+        timestamps: Optional[Any] = None,
+        values: Optional[Any] = None,
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            name: name of the value column, e.g. "unit_rate_inc_vat"
+            timestamps: epoch nanoseconds or datetime64 values of the readings
+            values: values of the readings
+        """
+        self.name = name
+        self._timestamps = _to_epoch_ns(timestamps if timestamps is not None else [])
+        self._values = np.ascontiguousarray(
+            values if values is not None else [], dtype=np.float64
+        )
+        if len(self._timestamps) != len(self._values):
+            raise ValueError("Timestamps and values must have the same length")
+        self._size = len(self._values)
+        self._sorted = bool((np.diff(self._timestamps) >= 0).all())
+
+    @classmethod
+    def from_records(
+        cls,
+        records: List[dict[str, Any]],
+        time_key: str,
+        value_key: str,
+        name: Optional[str] = None,
+    ) -> "ReadingSeries":
+        """Build a series from API results.
+
+        Args:
+            records: API results, e.g. unit rates or consumption
+            time_key: key of the ISO 8601 timestamps, e.g. "valid_from"
+            value_key: key of the values, e.g. "value_inc_vat"
+            name: name of the value column, `value_key` by default
+
+        Returns:
+            series: readings of the records
+        """
+        series = cls(name or value_key)
+        series.extend_records(records, time_key, value_key)
+        return series
+
+    def __len__(self) -> int:
+        """Get the number of readings."""
+        return self._size
+
+    def __getitem__(
+        self, index: int | slice
+    ) -> "tuple[pd.Timestamp, float] | ReadingSeries":
+        """Get a reading, or a series view of a slice of the readings."""
+        if isinstance(index, slice):
+            return self._view(*index.indices(self._size)[:2], index.step)
+        timestamp = self.timestamps[index]
+        return pd.Timestamp(timestamp, unit="ns", tz="UTC"), float(self.values[index])
+
+    def __repr__(self) -> str:
+        """Get a short description of the series."""
+        return f"ReadingSeries(name={self.name!r}, readings={self._size})"
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Epoch nanoseconds of the readings."""
+        return self._timestamps[: self._size]
+
+    @property
+    def values(self) -> np.ndarray:
+        """Values of the readings."""
+        return self._values[: self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the readings."""
+        return self.timestamps.nbytes + self.values.nbytes
+
+    def _view(
+        self, start: int, stop: int, step: Optional[int] = None
+    ) -> "ReadingSeries":
+        """Get a series sharing the arrays of a range of readings."""
+        view = ReadingSeries(self.name)
+        view._timestamps = self._timestamps[start:stop:step]
+        view._values = self._values[start:stop:step]
+        view._size = len(view._values)
+        view._sorted = self._sorted and (step is None or step > 0)
+        return view
+
+    def _reserve(self, extra: int) -> None:
+        """Grow the arrays, doubling their capacity, to fit more readings."""
+        if self._size + extra <= len(self._values):
+            return
+        capacity = max(self._size + extra, 2 * len(self._values), 64)
+        for attribute in ("_timestamps", "_values"):
+            array = getattr(self, attribute)
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[: self._size] = array[: self._size]
+            setattr(self, attribute, grown)
+
+    def append(self, timestamp: Any, value: float) -> None:
+        """Add a reading.
+
+        Args:
+            timestamp: epoch nanoseconds, datetime or ISO 8601 string of the reading
+            value: value of the reading
+        """
+        self.extend([timestamp], [value])
+
+    def extend(self, timestamps: Any, values: Any) -> None:
+        """Add readings, in any order.
+
+        Args:
+            timestamps: epoch nanoseconds, datetimes or ISO 8601 strings
+            values: values of the readings
+        """
+        new_timestamps = _to_epoch_ns(timestamps)
+        new_values = np.asarray(values, dtype=np.float64)
+        if len(new_timestamps) != len(new_values):
+            raise ValueError("Timestamps and values must have the same length")
+        if not len(new_values):
+            return
+        self._reserve(len(new_values))
+        end = self._size + len(new_values)
+        self._timestamps[self._size : end] = new_timestamps
+        self._values[self._size : end] = new_values
+        self._sorted = self._sorted and bool(
+            (np.diff(self._timestamps[max(self._size - 1, 0) : end]) >= 0).all()
+        )
+        self._size = end
+
+    def extend_records(
+        self, records: List[dict[str, Any]], time_key: str, value_key: str
+    ) -> None:
+        """Add the readings of API results.
+
+        Args:
+            records: API results, e.g. one page of unit rates or consumption
+            time_key: key of the ISO 8601 timestamps, e.g. "valid_from"
+            value_key: key of the values, e.g. "value_inc_vat"
+        """
+        self.extend(
+            [record[time_key] for record in records],
+            [record[value_key] for record in records],
+        )
+
+    def sort(self) -> None:
+        """Order the readings by time, keeping the order of equal timestamps."""
+        if self._sorted:
+            return
+        order = np.argsort(self.timestamps, kind="stable")
+        self._timestamps = self.timestamps[order]
+        self._values = self.values[order]
+        self._sorted = True
+
+    def range(self, start: Any = None, end: Any = None) -> "ReadingSeries":
+        """Get the readings of a time range with a binary search.
+
+        Args:
+            start: first time of the range (inclusive), from the first reading if None
+            end: last time of the range (exclusive), up to the last reading if None
+
+        Returns:
+            series: view of the readings of the range
+        """
+        self.sort()
+        timestamps = self.timestamps
+        first = (
+            np.searchsorted(timestamps, _to_epoch_ns([start])[0], side="left")
+            if start is not None
+            else 0
+        )
+        last = (
+            np.searchsorted(timestamps, _to_epoch_ns([end])[0], side="left")
+            if end is not None
+            else self._size
+        )
+        return self._view(int(first), int(last))
+
+    def to_numpy(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get the readings as NumPy arrays, without copying them.
+
+        Returns:
+            timestamps: datetime64[ns] times of the readings, in UTC
+            values: values of the readings
+        """
+        return self.timestamps.view("datetime64[ns]"), self.values
+
+    def to_arrow(self, time_name: str = "timestamp") -> pa.Table:
+        """Get the readings as an Arrow table, without copying them.
+
+        Args:
+            time_name: name of the time column
+
+        Returns:
+            table: time and value columns
+        """
+        timestamps, values = self.timestamps, self.values
+        return pa.table(
+            {
+                time_name: pa.Array.from_buffers(
+                    pa.timestamp("ns", tz="UTC"),
+                    len(timestamps),
+                    [None, pa.py_buffer(np.ascontiguousarray(timestamps))],
+                ),
+                self.name: pa.array(np.ascontiguousarray(values)),
+            }
+        )
+
+    def to_pandas(self, time_name: str = "timestamp") -> pd.DataFrame:
+        """Get the readings as a DataFrame.
+
+        Args:
+            time_name: name of the time column
+
+        Returns:
+            df: time and value columns
+        """
+        timestamps, values = self.to_numpy()
+        return pd.DataFrame(
+            {
+                time_name: pd.DatetimeIndex(timestamps).tz_localize("UTC"),
+                self.name: values,
+            }
+        )
+
+
+class RateTimeline:
+    """Tariff-aware unit rate timeline class.
+
+    The rates of successive tariffs are stitched into one series of non-overlapping
+    `[start, end)` intervals ordered by start, kept in contiguous arrays: interval
+    bounds as int64 epoch nanoseconds (UTC), rates as float64 and the tariff of every
+    interval as an index into `tariff_codes`. The rate and tariff in force at n
+    timestamps are found with one vectorized binary search over the k interval
+    starts, so pricing mixed-tariff history costs O(n log k).
+    """
+
+    def __init__(
+        self,
+        starts: Any,
+        ends: Any,
+        rates: Any,
+        tariffs: Optional[Any] = None,
+        tariff_codes: Optional[List[Optional[str]]] = None,
+        name: str = "unit_rate_inc_vat",
+    ) -> None:
+        """Class constructor method.
+
+        Args:
+            starts: epoch nanoseconds or datetime64 values of the interval starts
+            ends: epoch nanoseconds or datetime64 values of the interval ends
+                (exclusive), `OPEN_END` for a rate without end
+            rates: rate of every interval
+            tariffs: index in `tariff_codes` of the tariff of every interval, the
+                first tariff by default
+            tariff_codes: codes of the tariffs, e.g. "E-1R-VAR-22-04-02-B"
+            name: name of the rate column, e.g. "unit_rate_inc_vat"
+
+        Raises:
+            ValueError: if the arrays differ in length, an interval is empty, the
+                intervals are unordered or overlap, or a tariff index is unknown
+        """
+        self.name = name
+        self.starts = _to_epoch_ns(starts)
+        self.ends = _to_epoch_ns(ends)
+        self.rates = np.ascontiguousarray(rates, dtype=np.float64)
+        self.tariffs = np.ascontiguousarray(
+            tariffs if tariffs is not None else np.zeros(len(self.rates)),
+            dtype=np.int64,
+        )
+        self.tariff_codes = list(tariff_codes) if tariff_codes is not None else [None]
+        if (
+            len({len(self.starts), len(self.ends), len(self.rates), len(self.tariffs)})
+            > 1
+        ):
+            raise ValueError(
+                "Starts, ends, rates and tariffs must have the same length"
+            )
+        if (self.ends <= self.starts).any():
+            raise ValueError("Intervals must end after they start")
+        if (self.starts[1:] < self.ends[:-1]).any():
+            raise ValueError("Intervals must be ordered by start and must not overlap")
+        if len(self.tariffs) and (
+            self.tariffs.min() < 0 or self.tariffs.max() >= len(self.tariff_codes)
+        ):
+            raise ValueError("Tariff indices must point into the tariff codes")
+
+    @classmethod
+    def from_records(
+        cls,
+        records: List[dict[str, Any]],
+        tariff_code: Optional[str] = None,
+        valid_from: Any = None,
+        valid_to: Any = None,
+        value_key: str = "value_inc_vat",
+        name: Optional[str] = None,
+    ) -> "RateTimeline":
+        """Build the timeline of one tariff from its standard-unit-rates results.
+
+        Args:
+            records: API results with "valid_from", "valid_to" and the rate
+            tariff_code: code of the tariff of the rates
+            valid_from: start of the agreement, the rates are cut to it
+            valid_to: end of the agreement, the rates are cut to it
+            value_key: key of the rates, e.g. "value_inc_vat"
+            name: name of the rate column, "unit_rate_inc_vat" by default
+
+        Returns:
+            timeline: rates of the tariff within the agreement, a rate without
+                "valid_to" lasting until the next one starts
+        """
+        starts = _to_epoch_ns([record["valid_from"] for record in records])
+        order = np.argsort(starts, kind="stable")
+        starts = starts[order]
+        rates = np.asarray([record[value_key] for record in records], dtype=np.float64)[
+            order
+        ]
+        open_ended = np.asarray(
+            [record.get("valid_to") is None for record in records], dtype=bool
+        )[order]
+        ends = np.full(len(starts), OPEN_END, dtype=np.int64)
+        if (~open_ended).any():
+            ends[~open_ended] = _to_epoch_ns(
+                [records[index]["valid_to"] for index in order[~open_ended]]
+            )
+        ends = np.where(open_ended, np.append(starts[1:], OPEN_END), ends)
+
+        if valid_from is not None:
+            starts = np.maximum(starts, _to_epoch_ns([valid_from])[0])
+        if valid_to is not None:
+            ends = np.minimum(ends, _to_epoch_ns([valid_to])[0])
+        kept = starts < ends
+        return cls(
+            starts[kept],
+            ends[kept],
+            rates[kept],
+            tariff_codes=[tariff_code],
+            name=name or "unit_rate_inc_vat",
+        )
+
+    @classmethod
+    def from_agreements(
+        cls,
+        agreements: List[Any],
+        rates: dict[str, List[dict[str, Any]]],
+        value_key: str = "value_inc_vat",
+        name: Optional[str] = None,
+    ) -> "RateTimeline":
+        """Build the timeline of a meter from its agreement history.
+
+        Args:
+            agreements: `TariffAgreement`s of the meter
+            rates: standard-unit-rates results per tariff code
+            value_key: key of the rates, e.g. "value_inc_vat"
+            name: name of the rate column, "unit_rate_inc_vat" by default
+
+        Returns:
+            timeline: rates of every agreement within its validity
+        """
+        return cls.stitch(
+            [
+                cls.from_records(
+                    rates.get(agreement.tariff_code, []),
+                    agreement.tariff_code,
+                    agreement.valid_from,
+                    agreement.valid_to,
+                    value_key=value_key,
+                    name=name,
+                )
+                for agreement in agreements
+            ]
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        time_column: str = "date",
+        value_column: str = "unit_rate_inc_vat",
+        tariff_column: str = "tariff_code",
+        interval: Optional[pd.Timedelta] = pd.Timedelta(days=1),
+        timezone: Optional[str] = None,
+    ) -> "RateTimeline":
+        """Build a timeline from the rows of one meter in a rates table.
+
+        Args:
+            df: rates rows, e.g. read with `DbConnector.read_range`
+            time_column: name of the column of the interval starts
+            value_column: name of the rates column
+            tariff_column: name of the tariff codes column, if the rows have one
+            interval: length of every interval on the clock of `timezone`, so a day
+                lasts 23 or 25 hours over a clock change, every rate lasting until
+                the next one starts if None
+            timezone: timezone of naive times, `local_timezone` by default as rates
+                tables are dated by local day, "UTC" for naive UTC times
+
+        Returns:
+            timeline: rates of the rows
+        """
+        times = pd.Series(pd.to_datetime(df[time_column]))
+        if times.dt.tz is None:
+            timezone = timezone or CONFIG.local_timezone
+            starts = _to_epoch_ns(times.dt.tz_localize(timezone))
+            if interval is not None:
+                ends = _to_epoch_ns((times + interval).dt.tz_localize(timezone))
+        else:
+            starts = _to_epoch_ns(times)
+            if interval is not None:
+                ends = starts + pd.Timedelta(interval).value
+        order = np.argsort(starts, kind="stable")
+        starts = starts[order]
+        if interval is not None:
+            ends = ends[order]
+        else:
+            ends = np.append(starts[1:], OPEN_END)
+        tariff_codes: List[Optional[str]] = []
+        tariffs = np.zeros(len(starts), dtype=np.int64)
+        if tariff_column in df:
+            tariffs, uniques = pd.factorize(df[tariff_column].to_numpy()[order])
+            tariff_codes = list(uniques)
+        if (tariffs < 0).any() or not tariff_codes:
+            # rows without a tariff code
+            tariffs = np.where(tariffs < 0, len(tariff_codes), tariffs)
+            tariff_codes.append(None)
+        return cls(
+            starts,
+            ends,
+            df[value_column].to_numpy(dtype=np.float64)[order],
+            tariffs,
+            tariff_codes,
+            value_column,
+        )
+
+    @classmethod
+    def stitch(cls, timelines: List["RateTimeline"]) -> "RateTimeline":
+        """Stitch the timelines of successive tariffs into one.
+
+        Args:
+            timelines: timelines of the tariffs, where two overlap the one starting
+                later is in force from its first interval on
+
+        Returns:
+            timeline: intervals of every tariff, non-overlapping
+        """
+        timelines = sorted(
+            (timeline for timeline in timelines if len(timeline)),
+            key=lambda timeline: timeline.starts[0],
+        )
+        if not timelines:
+            return cls([], [], [], tariff_codes=[])
+        tariff_codes: List[Optional[str]] = []
+        parts = []
+        for timeline, next_timeline in zip(timelines, timelines[1:] + [None]):
+            cut = next_timeline.starts[0] if next_timeline is not None else OPEN_END
+            kept = timeline.starts < cut
+            for tariff_code in timeline.tariff_codes:
+                if tariff_code not in tariff_codes:
+                    tariff_codes.append(tariff_code)
+            tariff_index = np.asarray(
+                [tariff_codes.index(code) for code in timeline.tariff_codes],
+                dtype=np.int64,
+            )
+            parts.append(
+                (
+                    timeline.starts[kept],
+                    np.minimum(timeline.ends[kept], cut),
+                    timeline.rates[kept],
+                    tariff_index[timeline.tariffs[kept]],
+                )
+            )
+        return cls(
+            *(np.concatenate(arrays) for arrays in zip(*parts)),
+            tariff_codes,
+            timelines[0].name,
+        )
+
+    def __len__(self) -> int:
+        """Get the number of intervals."""
+        return len(self.rates)
+
+    def __repr__(self) -> str:
+        """Get a short description of the timeline."""
+        return (
+            f"RateTimeline(name={self.name!r}, intervals={len(self)}, "
+            + f"tariff_codes={self.tariff_codes!r})"
+        )
+
+    def locate(self, timestamps: Any) -> np.ndarray:
+        """Get the interval in force at every timestamp with a binary search.
+
+        Args:
+            timestamps: epoch nanoseconds, datetimes or ISO 8601 strings
+
+        Returns:
+            positions: interval index per timestamp, -1 where no interval covers it
+        """
+        epoch_ns = _to_epoch_ns(timestamps if np.ndim(timestamps) else [timestamps])
+        positions = np.searchsorted(self.starts, epoch_ns, side="right") - 1
+        covered = positions >= 0
+        covered[covered] = epoch_ns[covered] < self.ends[positions[covered]]
+        return np.where(covered, positions, -1)
+
+    def rate_at(self, timestamps: Any) -> float | np.ndarray:
+        """Get the rate in force at one timestamp or a batch of timestamps.
+
+        Args:
+            timestamps: epoch nanoseconds, datetimes or ISO 8601 strings
+
+        Returns:
+            rates: rate per timestamp, NaN where no rate is known
+        """
+        positions = self.locate(timestamps)
+        rates = np.append(self.rates, np.nan)[positions]
+        return float(rates[0]) if np.ndim(timestamps) == 0 else rates
+
+    def tariff_at(self, timestamps: Any) -> Optional[str] | np.ndarray:
+        """Get the tariff in force at one timestamp or a batch of timestamps.
+
+        Args:
+            timestamps: epoch nanoseconds, datetimes or ISO 8601 strings
+
+        Returns:
+            tariff_codes: tariff code per timestamp, None where no rate is known
+        """
+        positions = self.locate(timestamps)
+        tariff_codes = np.asarray(self.tariff_codes + [None], dtype=object)
+        tariffs = np.append(self.tariffs, -1)[positions]
+        codes = tariff_codes[tariffs]
+        return codes[0] if np.ndim(timestamps) == 0 else codes
+
+    def cost(self, timestamps: Any, consumption: Any) -> np.ndarray:
+        """Price readings at the rate in force at their timestamps.
+
+        Args:
+            timestamps: epoch nanoseconds, datetimes or ISO 8601 strings of the readings
+            consumption: consumption of the readings
+
+        Returns:
+            costs: cost per reading, NaN where no rate is known
+        """
+        return np.asarray(consumption, dtype=np.float64) * self.rate_at(timestamps)
+
+    def cost_by_tariff(self, timestamps: Any, consumption: Any) -> pd.DataFrame:
+        """Price readings and total their consumption and cost per tariff.
+
+        Args:
+            timestamps: epoch nanoseconds, datetimes or ISO 8601 strings of the readings
+            consumption: consumption of the readings
+
+        Returns:
+            totals: tariff_code, readings, consumption and cost of every tariff that
+                priced a reading, readings without a known rate left out
+        """
+        positions = self.locate(timestamps)
+        consumption = np.asarray(consumption, dtype=np.float64)
+        priced = positions >= 0
+        tariffs = self.tariffs[positions[priced]]
+        size = len(self.tariff_codes)
+        readings = np.bincount(tariffs, minlength=size)
+        totals = pd.DataFrame(
+            {
+                "tariff_code": self.tariff_codes,
+                "readings": readings,
+                "consumption": np.bincount(
+                    tariffs, weights=consumption[priced], minlength=size
+                ),
+                "cost": np.bincount(
+                    tariffs,
+                    weights=consumption[priced] * self.rates[positions[priced]],
+                    minlength=size,
+                ),
+            }
+        )
+        return totals[readings > 0].reset_index(drop=True)
+
+    def to_pandas(self) -> pd.DataFrame:
+        """Get the intervals as a DataFrame.
+
+        Returns:
+            df: start, end (NaT for an open end), rate and tariff_code columns
+        """
+        ends = self.ends.view("datetime64[ns]").copy()
+        ends[self.ends == OPEN_END] = np.datetime64("NaT")
+        return pd.DataFrame(
+            {
+                "start": pd.DatetimeIndex(
+                    self.starts.view("datetime64[ns]")
+                ).tz_localize("UTC"),
+                "end": pd.DatetimeIndex(ends).tz_localize("UTC"),
+                self.name: self.rates,
+                "tariff_code": np.asarray(self.tariff_codes, dtype=object)[
+                    self.tariffs
+                ],
+            }
+        )
+
+
+def _to_epoch_ns(timestamps: Any) -> np.ndarray:
+    """Convert timestamps to UTC epoch nanoseconds.
+
+    Args:
+        timestamps: epoch nanoseconds, datetimes or ISO 8601 strings
+
+    Returns:
+        epoch_ns: contiguous int64 array
+    """
+    if isinstance(timestamps, (pd.Series, pd.Index)) and isinstance(
+        timestamps.dtype, pd.DatetimeTZDtype
+    ):
+        return np.ascontiguousarray(pd.DatetimeIndex(timestamps).as_unit("ns").asi8)
+    array = np.asarray(timestamps)
+    if array.dtype.kind in "iu":
+        return np.ascontiguousarray(array, dtype=np.int64)
+    if array.dtype.kind == "M":
+        return np.ascontiguousarray(array.astype("datetime64[ns]").view(np.int64))
+    if not len(array):
+        return np.empty(0, dtype=np.int64)
+    parsed = pd.to_datetime(array.ravel(), utc=True, format="ISO8601")
+    return np.ascontiguousarray(parsed.as_unit("ns").asi8)
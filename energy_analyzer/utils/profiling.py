@@ -0,0 +1,126 @@
+"""Asset profiling module.
+
+Profiling is switched on either for every run with the `ENERGY_ANALYZER_PROFILING`
+environment variable (see `ProjectConfig.profiling_enabled`) or for a single run with
+the `energy_analyzer/profile` Dagster run tag set to `true`.
+
+For every profiled asset two artifacts are written into
+`<profiling_dir>/<run_id>/`:
+- `<asset_name>.pstats`: cProfile statistics, open with `python -m pstats` or snakeviz
+- `<asset_name>.allocations.txt`: top memory allocation sites traced by tracemalloc
+"""
+
+import cProfile
+import functools
+import logging
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+from dagster import AssetExecutionContext
+
+from energy_analyzer.utils.config import ProjectConfig
+
+CONFIG = ProjectConfig()
+PROFILE_RUN_TAG = "energy_analyzer/profile"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _get_execution_context() -> Optional[AssetExecutionContext]:
+    """Get the current Dagster execution context if there is one."""
+    try:
+        return AssetExecutionContext.get()
+    except Exception:  # not executed within a Dagster run
+        return None
+
+
+def _profiling_requested(context: Optional[AssetExecutionContext]) -> bool:
+    """Check whether profiling is enabled by config or by the run tag."""
+    if CONFIG.profiling_enabled:
+        return True
+    if context is None:
+        return False
+    return context.run.tags.get(PROFILE_RUN_TAG, "").lower() == "true"
+
+
+def _write_allocations(snapshot: tracemalloc.Snapshot, peak: int, path: Path) -> None:
+    """Write the top allocation sites of a tracemalloc snapshot to a text file.
+
+    Args:
+        snapshot: tracemalloc snapshot taken at the end of the asset
+        peak: peak traced memory size in bytes
+        path: output text file path
+    """
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+    )
+    top_stats = snapshot.statistics("lineno")
+    total = sum(stat.size for stat in top_stats)
+    lines = [
+        f"Peak traced memory: {peak / 1024:.1f} KiB",
+        f"Allocated at the end of the asset: {total / 1024:.1f} KiB",
+    ]
+    for index, stat in enumerate(top_stats[: CONFIG.profiling_top_allocations], 1):
+        frame = stat.traceback[0]
+        lines.append(
+            f"#{index}: {frame.filename}:{frame.lineno}: "
+            + f"{stat.size / 1024:.1f} KiB in {stat.count} blocks"
+        )
+    path.write_text("\n".join(lines) + "\n")
+
+
+def profile_asset(fn: F) -> F:
+    """Wrap an asset function in a CPU profiler and a memory allocation tracer.
+
+    Use it under the `@asset` decorator. When profiling is not requested the wrapped
+    function is called straight away.
+
+    Args:
+        fn: asset compute function
+
+    Returns:
+        wrapper: the asset function with profiling hooks
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        context = _get_execution_context()
+        if not _profiling_requested(context):
+            return fn(*args, **kwargs)
+
+        if context is not None:
+            run_id = context.run.run_id
+            # the op is named after the asset, or the assets of a multi-asset
+            asset_name = context.op_def.name
+        else:
+            run_id = f"local-{time.strftime('%Y%m%dT%H%M%S')}"
+            asset_name = fn.__name__
+        output_dir = Path(CONFIG.profiling_dir) / run_id
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            profiler.dump_stats(output_dir / f"{asset_name}.pstats")
+            _write_allocations(
+                snapshot, peak, output_dir / f"{asset_name}.allocations.txt"
+            )
+            logging.info(f"Profile of {asset_name} written to {output_dir}.")
+
+    return wrapper  # type: ignore[return-value]
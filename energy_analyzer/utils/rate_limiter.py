@@ -0,0 +1,77 @@
+"""Rate limiter module.
+
+`TokenBucket` spreads requests evenly at a sustained rate while allowing short bursts.
+Callers reserve tokens under a lock and then wait outside of it, so a bucket can be
+shared by threads and coroutines alike and requests are served in arrival order.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Token bucket rate limiter class."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        """Class constructor method.
+
+        Args:
+            rate: tokens added per second, the sustained request rate
+            capacity: maximum tokens kept, the burst size, `rate` (at least 1) by
+                default
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens, possibly ahead of time.
+
+        Args:
+            tokens: number of tokens taken
+
+        Returns:
+            delay: seconds to wait before the tokens are actually available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until tokens are available.
+
+        Args:
+            tokens: number of tokens taken
+
+        Returns:
+            delay: seconds waited
+        """
+        delay = self._reserve(tokens)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """Wait, without blocking the event loop, until tokens are available.
+
+        Args:
+            tokens: number of tokens taken
+
+        Returns:
+            delay: seconds waited
+        """
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
@@ -0,0 +1,198 @@
+"""Pytest configuration, database and benchmark fixtures.
+
+The project modules build `ProjectConfig` at import time, so the environment is set
+up here before any of them gets imported. The database and the raw payload landing
+zone always point at a temporary directory, even when the environment already
+defines them, so the benchmarks never write to a real database.
+
+Benchmark settings (environment variables):
+- BENCHMARK_DIR: where results are written, `.benchmarks` in the repo by default
+- BENCHMARK_ROUNDS: number of timed rounds per stage, the median is reported
+- BENCHMARK_TOLERANCE: allowed slowdown against the baseline, 0.5 means +50%
+- BENCHMARK_SAVE_BASELINE: set to 1 to store this run as the new baseline
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pytest
+
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="energy_analyzer_tests_")
+_TEST_ENVIRONMENT = {
+    "SOLIS_KEY_ID": "test_key_id",
+    "SOLIS_KEY_SECRET": "test_key_secret",
+    "OCTOPUS_ACCOUNT_NO": "A-00000000",
+    "OCTOPUS_API_KEY": "sk_test",
+    "ELECTRICITY_MPAN": "1900000000000",
+    "ELECTRICITY_SERIAL_NO": "21L4000000",
+    "ELECTRICITY_EXPORT_MPAN": "1900000000001",
+    "GAS_MPRN": "9000000",
+    "GAS_SERIAL_NO": "21L4000000",
+    "PUSHSTAQ_API_KEY": "test_pushstaq",
+    "ENERGY_ANALYZER_PROFILING": "false",
+}
+for _key, _value in _TEST_ENVIRONMENT.items():
+    os.environ.setdefault(_key, _value)
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DB_DIR}/energy_analyzer.db"
+os.environ["LANDING_ZONE_DIR"] = f"{_TEST_DB_DIR}/landing_zone"
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BENCHMARK_DIR = Path(os.environ.get("BENCHMARK_DIR", REPO_ROOT / ".benchmarks"))
+BENCHMARK_ROUNDS = int(os.environ.get("BENCHMARK_ROUNDS", 3))
+BENCHMARK_TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", 0.5))
+BENCHMARK_SAVE_BASELINE = os.environ.get("BENCHMARK_SAVE_BASELINE", "0") == "1"
+
+
+def _get_commit() -> str:
+    """Get the current git commit hash."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class StageTimer:
+    """Benchmark stage timer class."""
+
+    def __init__(self, baseline: dict[str, Any], tolerance: float) -> None:
+        """Class constructor method.
+
+        Args:
+            baseline: stage results of the baseline run
+            tolerance: allowed relative slowdown of the median against the baseline
+        """
+        self.baseline = baseline
+        self.tolerance = tolerance
+        self.results: dict[str, dict[str, Any]] = {}
+
+    def __call__(
+        self,
+        stage: str,
+        function: Callable[..., Any],
+        setup: Optional[Callable[[], tuple]] = None,
+        rows: Optional[int] = None,
+        number: int = 1,
+        rounds: int = BENCHMARK_ROUNDS,
+    ) -> Any:
+        """Time a benchmark stage and compare it against the baseline.
+
+        Args:
+            stage: unique stage name
+            function: the code to be timed
+            setup: untimed callable run before every round, returns function arguments
+            rows: number of rows processed by one call, used to report throughput
+            number: number of calls per round
+            rounds: number of timed rounds
+
+        Returns:
+            result: the result of the last call of the function
+        """
+        timings = []
+        for _ in range(rounds):
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            for _ in range(number):
+                result = function(*args)
+            timings.append((time.perf_counter() - start) / number)
+
+        median = statistics.median(timings)
+        self.results[stage] = {
+            "median_s": median,
+            "min_s": min(timings),
+            "rounds": rounds,
+            "rows": rows,
+            "rows_per_s": rows / median if rows and median else None,
+        }
+
+        baseline = self.baseline.get(stage)
+        if baseline and median > baseline["median_s"] * (1 + self.tolerance):
+            pytest.fail(
+                f"Benchmark regression in '{stage}': median {median * 1000:.2f} ms "
+                + f"vs baseline {baseline['median_s'] * 1000:.2f} ms "
+                + f"(commit {self.baseline_commit}, tolerance {self.tolerance:.0%})"
+            )
+        return result
+
+    def annotate(self, stage: str, **metrics: Any) -> None:
+        """Add extra metrics to the results of a timed stage.
+
+        Args:
+            stage: name of an already timed stage
+            metrics: metrics to be stored next to the stage timings
+        """
+        self.results[stage].update(metrics)
+
+    @property
+    def baseline_commit(self) -> str:
+        """Get the commit the baseline was recorded at."""
+        return self.baseline.get("_commit", {}).get("id", "unknown")
+
+
+@pytest.fixture(scope="session")
+def stage_timer():
+    """Time benchmark stages and persist the results at the end of the session."""
+    baseline_path = BENCHMARK_DIR / "baseline.json"
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    timer = StageTimer(baseline, BENCHMARK_TOLERANCE)
+
+    yield timer
+
+    commit = _get_commit()
+    results = {"_commit": {"id": commit, "timestamp": time.time()}, **timer.results}
+    BENCHMARK_DIR.mkdir(parents=True, exist_ok=True)
+    (BENCHMARK_DIR / f"{commit}.json").write_text(json.dumps(results, indent=2))
+    if BENCHMARK_SAVE_BASELINE:
+        baseline_path.write_text(json.dumps(results, indent=2))
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Create all tables in the local test database."""
+    from energy_analyzer.database.db_connector import DbConnector
+    from energy_analyzer.database.db_models import Base
+
+    db_connector = DbConnector(os.environ["DATABASE_URL"])
+    Base.metadata.create_all(db_connector.engine)
+    return db_connector
+
+
+@pytest.fixture
+def db_connector(tmp_path):
+    """Empty database with every table and query cache, private to one test."""
+    from energy_analyzer.database.db_connector import DbConnector
+    from energy_analyzer.database.db_models import Base
+    from energy_analyzer.database.query_cache import QueryCache
+
+    db_connector = DbConnector(
+        f"sqlite:///{tmp_path}/energy_analyzer.db",
+        query_cache=QueryCache(cache_dir=None),
+    )
+    Base.metadata.create_all(db_connector.engine)
+    return db_connector
+
+
+@pytest.fixture
+def watermark_db(monkeypatch, db_connector):
+    """Read the watermarks of the generated urls from the test database."""
+    from pydantic import SecretStr
+
+    from energy_analyzer.octopus_data import url_generator
+
+    monkeypatch.setattr(
+        url_generator.CONFIG,
+        "db_url",
+        SecretStr(db_connector.engine.url.render_as_string(hide_password=False)),
+    )
+    return db_connector
@@ -0,0 +1,89 @@
+"""Solis historical backfill tests."""
+
+import asyncio
+from datetime import date
+
+import pandas as pd
+from aiohttp import web
+from sqlalchemy import func, select
+
+from energy_analyzer.database.db_models import SolisTelemetryTable
+from energy_analyzer.solis_data.backfill import BackfillCheckpoint, SolisBackfill
+from energy_analyzer.solis_data.solis_data import SolisClient
+from energy_analyzer.utils.rate_limiter import TokenBucket
+
+COMMISSIONED = int(pd.Timestamp("2024-01-01").timestamp() * 1000)
+INVERTERS = [
+    {"id": str(index), "sn": f"SN{index:04d}", "fisGenerateTime": COMMISSIONED}
+    for index in range(2)
+]
+TODAY = date(2024, 3, 15)
+
+
+def test_backfill_resumes_after_failures(db_connector, tmp_path):
+    """A rerun only fetches the failed requests and the current month again."""
+    checkpoint_path = tmp_path / "solis_backfill.json"
+    failing = {("SN0001", "2024-02-10"), ("SN0000", "2024-01")}
+    requests: list[str] = []
+
+    async def handle(request: web.Request) -> web.Response:
+        payload = await request.json()
+        period = payload.get("time") or payload["month"]
+        requests.append(f"{payload['sn']}/{period}")
+        if (payload["sn"], period) in failing:
+            return web.json_response({"success": False, "code": "1", "msg": "busy"})
+        if request.path.endswith("inverterMonth"):
+            days = pd.date_range(f"{period}-01", periods=28, freq="D")
+            data = [{"dateStr": f"{day:%Y-%m-%d}", "energy": 12.5} for day in days]
+        else:
+            start = pd.Timestamp(period).value // 1_000_000
+            data = [
+                {"dataTimestamp": str(start + hour * 3_600_000), "pac": 1.5}
+                for hour in range(24)
+            ]
+        return web.json_response({"success": True, "data": data})
+
+    async def backfill():
+        app = web.Application()
+        app.router.add_post("/{path:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            client = SolisClient(
+                "key",
+                "secret",
+                api_url=f"http://127.0.0.1:{port}/",
+                rate_limiter=TokenBucket(1000),
+            )
+            solis_backfill = SolisBackfill(
+                client,
+                db_connector,
+                BackfillCheckpoint(checkpoint_path),
+                concurrency=8,
+                batch_requests=20,
+            )
+            return await solis_backfill.run(INVERTERS, TODAY)
+        finally:
+            await runner.cleanup()
+
+    rows = asyncio.run(backfill())
+
+    # 3 months and 74 days per inverter
+    assert len(requests) == len(INVERTERS) * 77
+    assert rows["solis_telemetry"] == (len(INVERTERS) * 74 - 1) * 24
+    assert rows["solis_daily_generation"] == (len(INVERTERS) * 3 - 1) * 28
+
+    requests.clear()
+    failing.clear()
+    asyncio.run(backfill())
+
+    assert sorted(requests) == sorted(
+        ["SN0001/2024-02-10", "SN0000/2024-01"]
+        + [f"{inverter['sn']}/2024-03" for inverter in INVERTERS]
+    )
+    with db_connector.engine.connect() as connection:
+        count = select(func.count()).select_from(SolisTelemetryTable)
+        assert connection.execute(count).scalar_one() == len(INVERTERS) * 74 * 24
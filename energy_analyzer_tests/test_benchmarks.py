@@ -0,0 +1,949 @@
+"""Ingestion pipeline benchmarks.
+
+Every stage of the Octopus ingestion path is timed on synthetic payloads. Run only
+the benchmarks with `pytest -m benchmark`, see `conftest.py` for the settings.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from aiohttp import web
+from sqlalchemy import delete
+
+from energy_analyzer.database.billing import BillEngine, get_billing_periods
+from energy_analyzer.database.db_models import (
+    ElectricityConsumptionTable,
+    ElectricityExportTable,
+    ElectricityHalfHourlyConsumptionTable,
+    ElectricityNetFlowTable,
+    ElectricityRatesTable,
+    ElectricityStandingChargesTable,
+    EnergyRollupTable,
+    GasConsumptionTable,
+    GasRatesTable,
+    SolarSelfConsumptionTable,
+    SolisDailyGenerationTable,
+    SolisTelemetryTable,
+)
+from energy_analyzer.database.history_cache import HistoryCache
+from energy_analyzer.database.net_flow import NetFlowManager
+from energy_analyzer.database.self_consumption import SelfConsumptionManager
+from energy_analyzer.octopus_data import data_extract, meter_ingestion
+from energy_analyzer.octopus_data.data_analysis import EnergyAnalyzer
+from energy_analyzer.octopus_data.data_extract import DataExtractor
+from energy_analyzer.octopus_data.data_handler import (
+    DailyDataHandler,
+    HalfHourlyDataHandler,
+    WeeklyDataHandler,
+)
+from energy_analyzer.octopus_data.fake_api import FakeOctopusApi
+from energy_analyzer.octopus_data.meter_registry import Meter, TariffAgreement
+from energy_analyzer.octopus_data.synthetic_data import SyntheticOctopusData
+from energy_analyzer.octopus_data.tariff_catalogue import (
+    TariffCatalogue,
+    get_product_code,
+)
+from energy_analyzer.octopus_data.url_generator import UrlGenerator
+from energy_analyzer.solis_data import solis_data
+from energy_analyzer.solis_data.backfill import BackfillCheckpoint, SolisBackfill
+from energy_analyzer.solis_data.decoder import PayloadDecoder
+from energy_analyzer.solis_data.solis_data import SolisClient
+from energy_analyzer.solis_data.telemetry import TelemetryBuffer
+from energy_analyzer.utils.data_models import (
+    BatchValidator,
+    RateTimeline,
+    ReadingSeries,
+)
+from energy_analyzer.utils.rate_limiter import TokenBucket
+
+pytestmark = pytest.mark.benchmark
+
+BENCHMARK_METERS = int(os.environ.get("BENCHMARK_METERS", 2))
+BENCHMARK_CONCURRENCY = int(os.environ.get("BENCHMARK_CONCURRENCY", 8))
+
+
+class _StubResponse:
+    """Stubbed requests response decoding a pre-serialised body."""
+
+    def __init__(self, content: bytes) -> None:
+        """Class constructor method."""
+        self.content = content
+        self.status_code = 200
+        self.headers: dict[str, str] = {}
+
+    def raise_for_status(self) -> None:
+        """Stubbed responses are always successful."""
+
+    def json(self) -> dict:
+        """Decode the response body."""
+        return json.loads(self.content)
+
+
+@pytest.fixture(scope="module")
+def synthetic_data() -> SyntheticOctopusData:
+    """Two years of synthetic data for every benchmarked meter."""
+    return SyntheticOctopusData(
+        date_from=date(2022, 7, 1), date_to=date(2024, 7, 1), meters=BENCHMARK_METERS
+    )
+
+
+@pytest.fixture(scope="module")
+def rates_raw(synthetic_data):
+    """Daily standard unit rates results."""
+    return synthetic_data.standard_unit_rates()
+
+
+@pytest.fixture(scope="module")
+def consumption_raw(synthetic_data):
+    """Daily consumption results of the first meter."""
+    return synthetic_data.consumption(group_by="day")
+
+
+@pytest.fixture(scope="module")
+def half_hourly_raw(synthetic_data):
+    """Half-hourly consumption results of every meter."""
+    return [
+        synthetic_data.consumption(meter=meter)
+        for meter in range(len(synthetic_data.meters))
+    ]
+
+
+@pytest.fixture(scope="module")
+def weekly_raw(synthetic_data):
+    """Weekly consumption results of the first meter."""
+    return synthetic_data.consumption(group_by="week")
+
+
+def test_url_build(stage_timer, database):
+    """Time building the rates and consumption urls."""
+    url_generator = UrlGenerator()
+
+    def build_urls():
+        url_generator.get_electricity_rates_url()
+        url_generator.get_gas_rates_url()
+        url_generator.get_electricity_consumption_url()
+        url_generator.get_gas_consumption_url()
+
+    stage_timer("url_build", build_urls, number=10)
+
+
+def test_extraction(stage_timer, monkeypatch, rates_raw, half_hourly_raw):
+    """Time extraction through a stubbed transport."""
+    payloads = {
+        f"https://octopus.test/meter/{meter}/": json.dumps(
+            SyntheticOctopusData.to_payload(raw)
+        ).encode()
+        for meter, raw in enumerate(half_hourly_raw)
+    }
+    payloads["https://octopus.test/rates/"] = json.dumps(
+        SyntheticOctopusData.to_payload(rates_raw)
+    ).encode()
+    data_extractor = DataExtractor()
+    monkeypatch.setattr(
+        data_extractor.session, "get", lambda url, **_: _StubResponse(payloads[url])
+    )
+
+    stage_timer(
+        "extract_standard_unit_rates",
+        lambda: data_extractor.get_standard_unit_rates("https://octopus.test/rates/"),
+        rows=len(rates_raw),
+    )
+
+    def extract_all_meters():
+        for meter in range(len(half_hourly_raw)):
+            data_extractor.get_consumption_values(
+                f"https://octopus.test/meter/{meter}/", api_key="sk_test"
+            )
+
+    stage_timer(
+        "extract_consumption_values",
+        extract_all_meters,
+        rows=sum(len(raw) for raw in half_hourly_raw),
+    )
+
+
+def test_import_export_extraction(stage_timer, synthetic_data):
+    """Time fetching two meters concurrently against fetching them in turn."""
+    fake_api = FakeOctopusApi(synthetic_data, latency=0.02)
+
+    with fake_api as api_url:
+        urls = [
+            f"{api_url}/electricity-meter-points/{meter['mpan']}/meters/"
+            + f"{meter['serial_no']}/consumption/"
+            + "?period_from=2024-01-01T00:00:00Z&page_size=500"
+            for meter in synthetic_data.meters[:2]
+        ]
+        data_extractor = DataExtractor(replay=False)
+        sequential = [
+            data_extractor.get_consumption_values(url, api_key="sk_test")
+            for url in urls
+        ]
+        started = time.perf_counter()
+        data_extractor.get_consumption_values(urls[0], api_key="sk_test")
+        data_extractor.get_consumption_values(urls[1], api_key="sk_test")
+        sequential_s = time.perf_counter() - started
+
+        stage_timer(
+            "import_export_extraction",
+            lambda: data_extractor.get_consumption_values_concurrently(
+                urls, api_key="sk_test"
+            ),
+            rows=sum(len(results) for results in sequential),
+        )
+
+    stage_timer.annotate("import_export_extraction", sequential_s=sequential_s)
+
+
+def test_tariff_discovery(stage_timer, monkeypatch, tmp_path, database, synthetic_data):
+    """Time discovering the meters of an account from the cached catalogue."""
+    fake_api = FakeOctopusApi(synthetic_data)
+
+    with fake_api as api_url:
+        monkeypatch.setattr(
+            "energy_analyzer.octopus_data.url_generator.CONFIG.octopus_api_url",
+            api_url,
+        )
+        catalogue = TariffCatalogue(
+            tmp_path / "tariff_catalogue.json",
+            data_extractor=DataExtractor(replay=False),
+        )
+        meters = catalogue.discover_meters("A-00000000", "sk_test")
+
+        stage_timer(
+            "tariff_discovery_cached",
+            lambda: catalogue.discover_meters("A-00000000", "sk_test"),
+            rows=len(meters),
+        )
+
+
+def test_extraction_under_load(stage_timer, monkeypatch, synthetic_data):
+    """Time concurrent paginated extraction from the local fake API."""
+    monkeypatch.setattr(data_extract.CONFIG, "octopus_retry_backoff", 0.01)
+    fake_api = FakeOctopusApi(
+        synthetic_data,
+        latency=0.002,
+        latency_jitter=0.002,
+        rate_limit_probability=0.01,
+        server_error_probability=0.01,
+        retry_after=0,
+    )
+    extractions = 4 * BENCHMARK_CONCURRENCY
+    latencies = []
+
+    with fake_api as api_url:
+        urls = [
+            f"{api_url}/electricity-meter-points/{meter['mpan']}/meters/"
+            + f"{meter['serial_no']}/consumption/"
+            + "?period_from=2024-04-01T00:00:00%2B01:00&page_size=1000"
+            for meter in synthetic_data.meters
+        ]
+
+        def extract(index: int) -> int:
+            start = time.perf_counter()
+            results = DataExtractor().get_consumption_values(
+                urls[index % len(urls)], api_key="sk_test"
+            )
+            latencies.append(time.perf_counter() - start)
+            return len(results)
+
+        def warm_up():
+            # the fake API generates and caches every series on the first request
+            for url in urls:
+                DataExtractor().get_consumption_values(url, api_key="sk_test")
+            fake_api.request_count = 0
+            latencies.clear()
+            return ()
+
+        def run_load():
+            with ThreadPoolExecutor(BENCHMARK_CONCURRENCY) as executor:
+                return sum(executor.map(extract, range(extractions)))
+
+        stage_timer("extraction_under_load", run_load, setup=warm_up, rounds=1)
+
+    median = stage_timer.results["extraction_under_load"]["median_s"]
+    stage_timer.annotate(
+        "extraction_under_load",
+        requests=fake_api.request_count,
+        requests_per_s=fake_api.request_count / median,
+        extraction_p50_s=float(np.percentile(latencies, 50)),
+        extraction_p95_s=float(np.percentile(latencies, 95)),
+        extraction_p99_s=float(np.percentile(latencies, 99)),
+    )
+
+
+def test_reading_series(stage_timer, half_hourly_raw):
+    """Time packing the half-hourly results of every meter into reading series."""
+
+    def pack_all_meters():
+        return [
+            ReadingSeries.from_records(raw, "interval_start", "consumption")
+            for raw in half_hourly_raw
+        ]
+
+    stage_timer(
+        "reading_series",
+        pack_all_meters,
+        rows=sum(len(raw) for raw in half_hourly_raw),
+    )
+
+
+def test_rate_timeline(stage_timer, synthetic_data, half_hourly_raw):
+    """Time pricing half-hourly readings over a tariff change with a rate timeline."""
+    agreements = [
+        TariffAgreement(
+            product_code=get_product_code(agreement["tariff_code"]), **agreement
+        )
+        for agreement in synthetic_data.account()["properties"][0][
+            "electricity_meter_points"
+        ][0]["agreements"]
+    ]
+    old_tariff, new_tariff = [agreement.tariff_code for agreement in agreements]
+    rates = synthetic_data.standard_unit_rates()
+    tariff_rates = {
+        old_tariff: rates,
+        new_tariff: [
+            {**rate, "value_inc_vat": rate["value_inc_vat"] + 10} for rate in rates
+        ],
+    }
+    timeline = RateTimeline.from_agreements(agreements, tariff_rates)
+    readings = [
+        ReadingSeries.from_records(raw, "interval_start", "consumption")
+        for raw in half_hourly_raw
+    ]
+    timestamps = np.concatenate([series.timestamps for series in readings])
+    consumption = np.concatenate([series.values for series in readings])
+
+    stage_timer(
+        "rate_timeline_cost",
+        lambda: timeline.cost(timestamps, consumption),
+        rows=len(timestamps),
+    )
+
+
+def test_solis_fleet_poll(stage_timer, monkeypatch):
+    """Time polling a fleet of inverters through a slow Solis Cloud stand-in."""
+    inverters = [{"id": str(index), "sn": f"SN{index:04d}"} for index in range(60)]
+    latency = 0.05
+    failed_once: set[str] = set()
+    monkeypatch.setattr(solis_data.CONFIG, "solis_retry_backoff", 0.01)
+
+    async def handle(request: web.Request) -> web.Response:
+        body = await request.read()
+        expected = hmac.new(
+            b"secret",
+            "\n".join(
+                [
+                    "POST",
+                    request.headers["Content-MD5"],
+                    request.headers["Content-Type"],
+                    request.headers["Date"],
+                    request.path,
+                ]
+            ).encode(),
+            hashlib.sha1,
+        ).digest()
+        if request.headers["Authorization"] != (
+            f"API key:{base64.b64encode(expected).decode()}"
+        ):
+            return web.json_response({"success": False, "code": "403"})
+        await asyncio.sleep(latency)
+        payload = json.loads(body)
+        if request.path.endswith("inverterList"):
+            return web.json_response(
+                {"success": True, "data": {"page": {"records": inverters}}}
+            )
+        if payload["sn"] not in failed_once:
+            failed_once.add(payload["sn"])
+            return web.Response(status=503)
+        if request.path.endswith("inverterDetail"):
+            return web.json_response({"success": True, "data": {"sn": payload["sn"]}})
+        return web.json_response({"success": True, "data": [{"sn": payload["sn"]}]})
+
+    async def poll_fleet():
+        app = web.Application()
+        app.router.add_post("/{path:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            client = SolisClient(
+                "key",
+                "secret",
+                api_url=f"http://127.0.0.1:{port}/",
+                rate_limiter=TokenBucket(1000),
+            )
+            return await client.poll_fleet()
+        finally:
+            await runner.cleanup()
+
+    stage_timer(
+        "solis_fleet_poll", lambda: asyncio.run(poll_fleet()), rows=len(inverters)
+    )
+
+
+def test_decode_inverter_day(stage_timer):
+    """Time decoding the 5 minute readings of a day of 100 three phase inverters."""
+    payloads = [
+        {
+            **{f"field{index}": index for index in range(100)},
+            "dataTimestamp": str(1_704_067_200_000 + reading * 300_000),
+            "acOutputType": "1",
+            "pac": "1.5",
+            "pacStr": "kW",
+            "uAc1": 230.0,
+            "uAc2": "232.0",
+            "uAc3": 234.0,
+            "eTotal": 12.5,
+            "eTotalStr": "MWh",
+        }
+        for reading in range(288)
+        for _ in range(100)
+    ]
+    sns = [f"SN{inverter:04d}" for _ in range(288) for inverter in range(100)]
+    decoder = PayloadDecoder()
+
+    stage_timer(
+        "decode_inverter_day",
+        lambda: decoder.decode_batch(payloads, sns),
+        rows=len(payloads),
+    )
+
+
+def test_telemetry_buffer(stage_timer, database):
+    """Time buffering an hour of 5 minute polls of a large fleet."""
+    polls = [
+        (
+            f"SN{inverter:04d}",
+            {
+                "dataTimestamp": str(1_704_067_200_000 + poll * 300_000),
+                "pac": "1.234",
+                "eToday": 5.6,
+                "uPv1": "230.1",
+                "inverterTemperature": None,
+            },
+        )
+        for poll in range(12)
+        for inverter in range(200)
+    ]
+
+    def clear_table():
+        with database.engine.begin() as connection:
+            connection.execute(delete(SolisTelemetryTable))
+        return ()
+
+    def buffer_polls():
+        with TelemetryBuffer(database, max_rows=1000, max_delay=300) as buffer:
+            for sn, detail in polls:
+                buffer.add(sn, detail)
+
+    stage_timer("telemetry_buffer", buffer_polls, setup=clear_table, rows=len(polls))
+
+
+def test_solis_backfill(stage_timer, database, tmp_path):
+    """Time backfilling months of inverter history."""
+    commissioned = int(pd.Timestamp("2024-01-01").timestamp() * 1000)
+    inverters = [
+        {"id": str(index), "sn": f"SN{index:04d}", "fisGenerateTime": commissioned}
+        for index in range(4)
+    ]
+    today = date(2024, 3, 15)
+    checkpoint_path = tmp_path / "solis_backfill.json"
+
+    async def handle(request: web.Request) -> web.Response:
+        await asyncio.sleep(0.01)
+        payload = await request.json()
+        period = payload.get("time") or payload["month"]
+        if request.path.endswith("inverterMonth"):
+            days = pd.date_range(f"{period}-01", periods=28, freq="D")
+            data = [{"dateStr": f"{day:%Y-%m-%d}", "energy": 12.5} for day in days]
+        else:
+            start = pd.Timestamp(period).value // 1_000_000
+            data = [
+                {"dataTimestamp": str(start + hour * 3_600_000), "pac": 1.5}
+                for hour in range(24)
+            ]
+        return web.json_response({"success": True, "data": data})
+
+    async def backfill():
+        app = web.Application()
+        app.router.add_post("/{path:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            client = SolisClient(
+                "key",
+                "secret",
+                api_url=f"http://127.0.0.1:{port}/",
+                rate_limiter=TokenBucket(1000),
+            )
+            solis_backfill = SolisBackfill(
+                client,
+                database,
+                BackfillCheckpoint(checkpoint_path),
+                concurrency=8,
+                batch_requests=50,
+            )
+            return await solis_backfill.run(inverters, today)
+        finally:
+            await runner.cleanup()
+
+    def reset():
+        checkpoint_path.unlink(missing_ok=True)
+        with database.engine.begin() as connection:
+            connection.execute(delete(SolisTelemetryTable))
+            connection.execute(delete(SolisDailyGenerationTable))
+        return ()
+
+    # 3 months and 74 days per inverter
+    stage_timer(
+        "solis_backfill",
+        lambda: asyncio.run(backfill()),
+        setup=reset,
+        rows=len(inverters) * 77,
+    )
+
+
+def test_self_consumption(stage_timer, database):
+    """Time analysing 90 days of solar readings."""
+    days = 90
+    meter_intervals = pd.date_range("2024-03-01", periods=days * 48, freq="30min")
+    readings = pd.date_range("2024-03-01", periods=days * 288, freq="5min")
+    # 2 kW from each of 2 inverters between 10:00 and 14:00 UTC, 1 kW exported
+    daytime = (readings.hour >= 10) & (readings.hour < 14)
+    telemetry = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "sn": sn,
+                    "recorded_at": readings[daytime],
+                    "ac_power": 2000.0,
+                    "grid_power": 500.0,
+                }
+            )
+            for sn in ("SN0001", "SN0002")
+        ],
+        ignore_index=True,
+    )
+    rates = pd.DataFrame(
+        {
+            "date": pd.date_range("2024-02-29", periods=days + 2).date,
+            "unit_rate_exc_vat": 20.0,
+            "unit_rate_inc_vat": 21.0,
+        }
+    )
+    manager = SelfConsumptionManager(database)
+
+    with database.engine.begin() as connection:
+        for table in (SolisTelemetryTable, ElectricityHalfHourlyConsumptionTable):
+            connection.execute(delete(table))
+    database.upsert_data_to_db(telemetry, "solis_telemetry")
+    database.upsert_data_to_db(
+        pd.DataFrame({"interval_start": meter_intervals, "consumption": 0.25}),
+        "electricity_half_hourly_consumption",
+    )
+    database.upsert_data_to_db(rates, "electricity_rates")
+
+    def clear_table():
+        with database.engine.begin() as connection:
+            connection.execute(delete(SolarSelfConsumptionTable))
+        return ()
+
+    stage_timer("self_consumption", manager.refresh, setup=clear_table, rows=days * 48)
+
+
+def test_net_flow(stage_timer, database):
+    """Time recomputing three years of daily net flow."""
+    days = pd.date_range("2022-01-01", "2024-12-31").date
+    rng = np.random.default_rng(0)
+    consumption = pd.DataFrame(
+        {"date": days, "consumption": rng.uniform(5, 15, len(days))}
+    )
+    export = pd.DataFrame({"date": days, "export_value": rng.uniform(0, 20, len(days))})
+    with database.engine.begin() as connection:
+        for table in (
+            ElectricityConsumptionTable,
+            ElectricityExportTable,
+            ElectricityNetFlowTable,
+        ):
+            table.__table__.create(connection, checkfirst=True)
+            connection.execute(delete(table))
+    database.add_data_to_db(consumption, "electricity_consumption")
+    database.add_data_to_db(export, "electricity_export")
+    manager = NetFlowManager(database)
+
+    stage_timer(
+        "net_flow",
+        lambda: manager.refresh(days[0], days[-1]),
+        rows=len(days),
+    )
+
+
+def test_meter_fan_out(stage_timer, monkeypatch, database):
+    """Time ingesting many meters with 1 and 4 worker processes."""
+    fan_out_data = SyntheticOctopusData(
+        date_from=date(2024, 1, 1), date_to=date(2024, 4, 1), meters=8
+    )
+    # latency bound like the real API, workers overlap their requests
+    fake_api = FakeOctopusApi(fan_out_data, latency=0.25)
+    meters = [
+        Meter(
+            meter_id=f"household-{index}",
+            account=f"A-{index:08d}",
+            api_key="sk_test",
+            fuel="electricity",
+            mpxn=meter["mpan"],
+            serial_no=meter["serial_no"],
+            product_code="SILVER-23-12-06",
+            tariff_code="E-1R-SILVER-23-12-06-B",
+        )
+        for index, meter in enumerate(fan_out_data.meters)
+    ]
+    tables = (
+        ElectricityRatesTable,
+        ElectricityStandingChargesTable,
+        ElectricityConsumptionTable,
+        ElectricityNetFlowTable,
+        EnergyRollupTable,
+    )
+
+    def clear_meters():
+        with database.engine.begin() as connection:
+            for table in tables:
+                table.__table__.create(connection, checkfirst=True)
+                connection.execute(
+                    delete(table).where(table.meter_id.like("household-%"))
+                )
+        return ()
+
+    with fake_api as api_url:
+        monkeypatch.setattr(
+            "energy_analyzer.octopus_data.url_generator.CONFIG.octopus_api_url",
+            api_url,
+        )
+        for workers in (1, 4):
+            stage = f"meter_fan_out_{workers}_workers"
+            stage_timer(
+                stage,
+                lambda: meter_ingestion.ingest_meters(meters, workers=workers),
+                setup=clear_meters,
+                rows=len(meters),
+                rounds=1,
+            )
+            median = stage_timer.results[stage]["median_s"]
+            stage_timer.annotate(stage, meters_per_s=len(meters) / median)
+
+
+def test_bill_statements(stage_timer, database, synthetic_data):
+    """Time reconstructing a year of monthly bills of many meters."""
+    meter_ids = [f"bill-{index}" for index in range(200)]
+    days = pd.date_range("2024-01-01", "2024-12-31", freq="D")
+    rng = np.random.default_rng(0)
+    daily = pd.DataFrame(
+        {
+            "date": np.tile(days.date, len(meter_ids)),
+            "meter_id": np.repeat(meter_ids, len(days)),
+        }
+    )
+    consumption = daily.assign(consumption=np.round(rng.gamma(4, 2, len(daily)), 3))
+    rates = daily.assign(
+        unit_rate_exc_vat=np.round(rng.normal(22, 2, len(daily)), 4),
+    ).assign(unit_rate_inc_vat=lambda df: np.round(df["unit_rate_exc_vat"] * 1.05, 4))
+    daily_data_handler = DailyDataHandler()
+    standing_charges = daily_data_handler.format_standing_charges_data(
+        daily_data_handler.parse_data_to_df(synthetic_data.standing_charges())
+    )
+    database.add_data_to_db(
+        consumption, table_name=ElectricityConsumptionTable.__tablename__
+    )
+    database.add_data_to_db(rates, table_name=ElectricityRatesTable.__tablename__)
+    database.add_data_to_db(
+        pd.concat(
+            [standing_charges.assign(meter_id=meter_id) for meter_id in meter_ids]
+        ),
+        table_name=ElectricityStandingChargesTable.__tablename__,
+    )
+
+    # monthly bills plus a bill running from the 15th over a month change
+    periods = pd.concat(
+        [
+            get_billing_periods(
+                meter_ids, pd.date_range("2024-01-01", periods=13, freq="MS")
+            ),
+            get_billing_periods(meter_ids[:1], ["2024-03-15", "2024-04-15"]),
+        ],
+        ignore_index=True,
+    )
+    bill_engine = BillEngine(database)
+
+    def clear_cache():
+        database.query_cache.clear()
+        return ()
+
+    stage_timer(
+        "bill_statements",
+        lambda: bill_engine.get_statements("electricity", periods),
+        setup=clear_cache,
+        rows=len(periods),
+    )
+    stage_timer(
+        "bill_statements_cached",
+        lambda: bill_engine.get_statements("electricity", periods),
+        rows=len(periods),
+    )
+
+
+def test_parse_data_to_df(stage_timer, rates_raw, half_hourly_raw):
+    """Time parsing raw results into DataFrames."""
+    stage_timer(
+        "parse_data_to_df_rates",
+        lambda: DailyDataHandler.parse_data_to_df(rates_raw),
+        rows=len(rates_raw),
+    )
+    stage_timer(
+        "parse_data_to_df_half_hourly_consumption",
+        lambda: DailyDataHandler.parse_data_to_df(half_hourly_raw[0]),
+        rows=len(half_hourly_raw[0]),
+    )
+
+
+def test_format_standard_unit_rates_data(stage_timer, rates_raw):
+    """Time formatting standard unit rates."""
+    daily_data_handler = DailyDataHandler()
+    rates_df = daily_data_handler.parse_data_to_df(rates_raw)
+
+    stage_timer(
+        "format_standard_unit_rates_data",
+        lambda: daily_data_handler.format_standard_unit_rates_data(rates_df),
+        rows=len(rates_df),
+    )
+
+
+def test_format_consumption_data(stage_timer, consumption_raw, half_hourly_raw):
+    """Time formatting daily and half-hourly consumption."""
+    daily_data_handler = DailyDataHandler()
+    daily_df = daily_data_handler.parse_data_to_df(consumption_raw)
+    half_hourly_df = daily_data_handler.parse_data_to_df(half_hourly_raw[0])
+
+    stage_timer(
+        "format_consumption_data_daily",
+        lambda: daily_data_handler.format_consumption_data(daily_df, 11.2),
+        rows=len(daily_df),
+    )
+    stage_timer(
+        "format_consumption_data_half_hourly",
+        lambda: daily_data_handler.format_consumption_data(half_hourly_df),
+        rows=len(half_hourly_df),
+    )
+
+
+def test_add_half_hourly_consumption_to_db(stage_timer, database, half_hourly_raw):
+    """Time formatting half-hourly consumption and writing it into the database."""
+    half_hourly_data_handler = HalfHourlyDataHandler()
+    half_hourly_df = half_hourly_data_handler.parse_data_to_df(half_hourly_raw[0])
+    table_name = ElectricityHalfHourlyConsumptionTable.__tablename__
+
+    def clear_table():
+        with database.engine.begin() as connection:
+            connection.execute(delete(ElectricityHalfHourlyConsumptionTable))
+        return ()
+
+    def format_and_write_table():
+        consumption = half_hourly_data_handler.format_consumption_data(half_hourly_df)
+        database.add_data_to_db(consumption, table_name)
+
+    stage_timer(
+        "add_half_hourly_consumption_to_db",
+        format_and_write_table,
+        setup=clear_table,
+        rows=len(half_hourly_df),
+    )
+    clear_table()
+
+
+def test_format_weekly_consumption_data(stage_timer, weekly_raw):
+    """Time formatting weekly consumption."""
+    weekly_data_handler = WeeklyDataHandler()
+    weekly_df = weekly_data_handler.parse_data_to_df(weekly_raw)
+
+    stage_timer(
+        "format_weekly_consumption_data",
+        lambda: weekly_data_handler.format_weekly_consumption_data(weekly_df),
+        rows=len(weekly_df),
+        number=10,
+    )
+
+
+def test_select_data_to_add_to_db(stage_timer, half_hourly_raw):
+    """Time selecting rows newer than the update point."""
+    daily_data_handler = DailyDataHandler()
+    formatted = daily_data_handler.format_consumption_data(
+        daily_data_handler.parse_data_to_df(half_hourly_raw[0])
+    )
+    update_point = formatted["date"].iloc[len(formatted) // 2].date()
+
+    stage_timer(
+        "select_data_to_add_to_db",
+        lambda: daily_data_handler.select_data_to_add_to_db(formatted, update_point),
+        rows=len(formatted),
+        number=10,
+    )
+
+
+def test_validate_batch(stage_timer):
+    """Time validating a million half-hourly readings before they are written."""
+    validator = BatchValidator.for_table(
+        ElectricityHalfHourlyConsumptionTable.__tablename__
+    )
+    readings = pd.DataFrame(
+        {
+            "interval_start": pd.date_range(
+                "2000-01-01", periods=1_000_000, freq="30min"
+            ),
+            "consumption": np.random.default_rng(0).random(1_000_000),
+        }
+    )
+
+    stage_timer(
+        "validate_batch",
+        lambda: validator.validate(readings),
+        rows=len(readings),
+        number=10,
+    )
+
+
+def test_add_data_to_db(stage_timer, database, synthetic_data, consumption_raw):
+    """Time writing daily consumption into the local database."""
+    daily_data_handler = DailyDataHandler()
+    electricity = daily_data_handler.format_consumption_data(
+        daily_data_handler.parse_data_to_df(consumption_raw)
+    )
+    gas = daily_data_handler.format_consumption_data(
+        daily_data_handler.parse_data_to_df(
+            synthetic_data.consumption(meter=BENCHMARK_METERS - 1, group_by="day")
+        ),
+        11.2,
+    )
+
+    def clear_tables():
+        with database.engine.begin() as connection:
+            connection.execute(delete(ElectricityConsumptionTable))
+            connection.execute(delete(GasConsumptionTable))
+        return ()
+
+    def write_tables():
+        database.add_data_to_db(electricity, ElectricityConsumptionTable.__tablename__)
+        database.add_data_to_db(gas, GasConsumptionTable.__tablename__)
+
+    stage_timer(
+        "add_data_to_db",
+        write_tables,
+        setup=clear_tables,
+        rows=len(electricity) + len(gas),
+    )
+
+
+def test_add_rates_to_db(stage_timer, database, rates_raw):
+    """Time formatting unit rates and writing them into the local database."""
+    daily_data_handler = DailyDataHandler()
+    rates_df = daily_data_handler.parse_data_to_df(rates_raw)
+
+    def clear_tables():
+        with database.engine.begin() as connection:
+            connection.execute(delete(ElectricityRatesTable))
+            connection.execute(delete(GasRatesTable))
+        return ()
+
+    def format_and_write_tables():
+        rates = daily_data_handler.format_standard_unit_rates_data(rates_df)
+        database.add_data_to_db(rates, ElectricityRatesTable.__tablename__)
+        database.add_data_to_db(rates, GasRatesTable.__tablename__)
+
+    stage_timer(
+        "add_rates_to_db",
+        format_and_write_tables,
+        setup=clear_tables,
+        rows=2 * len(rates_df),
+    )
+
+
+@pytest.mark.parametrize("as_arrow", [False, True], ids=["dataframe", "arrow"])
+def test_read_range(stage_timer, database, as_arrow):
+    """Time streaming a date range of a table back in batches."""
+    days = pd.date_range("2000-01-01", "2024-12-31", freq="D").date
+    with database.engine.begin() as connection:
+        connection.execute(delete(GasConsumptionTable))
+    database.add_data_to_db(
+        pd.DataFrame({"date": days, "consumption": 1.0}),
+        GasConsumptionTable.__tablename__,
+    )
+
+    def read_range():
+        for _ in database.read_range(
+            GasConsumptionTable,
+            date(2010, 1, 1),
+            date(2019, 12, 31),
+            columns=["consumption"],
+            batch_size=1000,
+            as_arrow=as_arrow,
+        ):
+            pass
+
+    stage_timer(
+        f"read_range[{'arrow' if as_arrow else 'dataframe'}]",
+        read_range,
+        rows=3652,
+    )
+
+
+def test_read_cached(stage_timer, database):
+    """Time a repeated monthly aggregation served by the query result cache."""
+    days = pd.date_range("2000-01-01", "2024-12-31", freq="D").date
+    with database.engine.begin() as connection:
+        connection.execute(delete(GasConsumptionTable))
+    database.add_data_to_db(
+        pd.DataFrame({"date": days, "consumption": 1.0}),
+        GasConsumptionTable.__tablename__,
+    )
+
+    stage_timer(
+        "read_cached",
+        lambda: database.read_cached(
+            GasConsumptionTable, aggregation="sum", period="month"
+        ),
+        rows=len(days),
+        number=10,
+    )
+
+
+def test_history_cache_load(stage_timer, tmp_path):
+    """Time a cold start of the analyzer over five years of half-hourly readings."""
+    history_cache = HistoryCache(tmp_path)
+    interval_starts = pd.date_range("2019-07-01", "2024-07-01", freq="30min")
+    history_cache.append(
+        "electricity",
+        "half_hourly_consumption",
+        pd.DataFrame({"interval_start": interval_starts, "consumption": 0.25}),
+    )
+
+    def load_history():
+        history = history_cache.load("electricity", "half_hourly_consumption")
+        return EnergyAnalyzer(history).energy_data_to_df()
+
+    stage_timer(
+        "history_cache_load", load_history, rows=len(interval_starts), number=10
+    )
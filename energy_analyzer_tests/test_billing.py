@@ -0,0 +1,124 @@
+"""Bill reconstruction tests."""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_analyzer.database.billing import BillEngine, get_billing_periods
+from energy_analyzer.database.db_models import (
+    ElectricityConsumptionTable,
+    ElectricityRatesTable,
+    ElectricityStandingChargesTable,
+)
+from energy_analyzer.octopus_data.data_handler import DailyDataHandler
+from energy_analyzer.octopus_data.synthetic_data import SyntheticOctopusData
+
+METER_IDS = [f"bill-{index}" for index in range(3)]
+
+
+@pytest.fixture
+def daily() -> pd.DataFrame:
+    """Every day of 2024 for every meter."""
+    days = pd.date_range("2024-01-01", "2024-12-31", freq="D")
+    return pd.DataFrame(
+        {
+            "date": np.tile(days.date, len(METER_IDS)),
+            "meter_id": np.repeat(METER_IDS, len(days)),
+        }
+    )
+
+
+@pytest.fixture
+def consumption(daily) -> pd.DataFrame:
+    """Random daily consumption."""
+    rng = np.random.default_rng(0)
+    return daily.assign(consumption=np.round(rng.gamma(4, 2, len(daily)), 3))
+
+
+@pytest.fixture
+def rates(daily) -> pd.DataFrame:
+    """Random daily unit rates."""
+    rng = np.random.default_rng(1)
+    return daily.assign(
+        unit_rate_exc_vat=np.round(rng.normal(22, 2, len(daily)), 4),
+    ).assign(unit_rate_inc_vat=lambda df: np.round(df["unit_rate_exc_vat"] * 1.05, 4))
+
+
+@pytest.fixture
+def standing_charges() -> pd.DataFrame:
+    """Standing charges of the synthetic tariff."""
+    daily_data_handler = DailyDataHandler()
+    return daily_data_handler.format_standing_charges_data(
+        daily_data_handler.parse_data_to_df(SyntheticOctopusData().standing_charges())
+    )
+
+
+@pytest.fixture
+def bill_engine(db_connector, consumption, rates, standing_charges) -> BillEngine:
+    """Bill engine over the stored days of every meter."""
+    db_connector.add_data_to_db(consumption, ElectricityConsumptionTable.__tablename__)
+    db_connector.add_data_to_db(rates, ElectricityRatesTable.__tablename__)
+    db_connector.add_data_to_db(
+        pd.concat(
+            [standing_charges.assign(meter_id=meter_id) for meter_id in METER_IDS]
+        ),
+        ElectricityStandingChargesTable.__tablename__,
+    )
+    return BillEngine(db_connector)
+
+
+def test_statements(bill_engine, consumption, rates, standing_charges):
+    """Every day costs its consumption at its rate plus the charge in force."""
+    # monthly bills plus a bill running from the 15th over a month change
+    periods = pd.concat(
+        [
+            get_billing_periods(
+                METER_IDS, pd.date_range("2024-01-01", periods=13, freq="MS")
+            ),
+            get_billing_periods(METER_IDS[:1], ["2024-03-15", "2024-04-15"]),
+        ],
+        ignore_index=True,
+    )
+
+    statements = bill_engine.get_statements("electricity", periods)
+
+    assert len(statements) == 12 * len(METER_IDS) + 1
+    assert statements["days"].sum() == 366 * len(METER_IDS) + 31
+    assert (statements["read_days"] == statements["days"]).all()
+    assert (statements["unpriced_days"] == 0).all()
+
+    days = consumption.merge(rates, on=["date", "meter_id"])
+    charges = standing_charges.sort_values("date")
+    for row in statements.itertuples():
+        period = days[
+            (days["meter_id"] == row.meter_id)
+            & days["date"].between(row.period_start, row.period_end)
+        ]
+        in_force = charges["standing_charge_inc_vat"].to_numpy()[
+            np.searchsorted(
+                pd.to_datetime(charges["date"]).to_numpy(),
+                pd.to_datetime(period["date"]).to_numpy(),
+                side="right",
+            )
+            - 1
+        ]
+        assert row.consumption == pytest.approx(period["consumption"].sum())
+        assert row.total_cost == pytest.approx(
+            (period["consumption"] * period["unit_rate_inc_vat"]).sum() + in_force.sum()
+        )
+
+
+def test_cached_statements(bill_engine, db_connector):
+    """Repeated statements are served by the query cache."""
+    periods = get_billing_periods(METER_IDS, ["2024-01-01", "2024-07-01"])
+
+    statements = bill_engine.get_statements("electricity", periods)
+    hits = db_connector.query_cache.hits
+
+    pd.testing.assert_frame_equal(
+        bill_engine.get_statements("electricity", periods), statements
+    )
+    assert db_connector.query_cache.hits > hits
+    assert statements["period_end"].tolist() == [date(2024, 6, 30)] * len(METER_IDS)
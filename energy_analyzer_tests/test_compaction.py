@@ -0,0 +1,324 @@
+"""Detail readings compaction tests."""
+
+import asyncio
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from aiohttp import web
+from sqlalchemy import func, select
+
+from energy_analyzer.database.compaction import (
+    COMPACTION_POLICIES,
+    Compactor,
+    aggregate_readings,
+)
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
+    ElectricityHalfHourlyConsumptionTable,
+    ReadingRollupTable,
+    SolarSelfConsumptionTable,
+    SolisTelemetryTable,
+)
+from energy_analyzer.database.self_consumption import SelfConsumptionManager
+from energy_analyzer.solis_data.backfill import BackfillCheckpoint, SolisBackfill
+from energy_analyzer.solis_data.solis_data import SolisClient
+from energy_analyzer.utils.rate_limiter import TokenBucket
+
+POLICIES = {policy.table_name: policy for policy in COMPACTION_POLICIES}
+CONSUMPTION_POLICY = POLICIES[ElectricityHalfHourlyConsumptionTable.__tablename__]
+TELEMETRY_POLICY = POLICIES[SolisTelemetryTable.__tablename__]
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.fixture
+def compactor(db_connector, tmp_path) -> Compactor:
+    """Compactor archiving under the test directory."""
+    return Compactor(db_connector, archive_dir=tmp_path / "cold_archive")
+
+
+def _add_half_hours(
+    db_connector: DbConnector, start: str, periods: int, meter_id: str = "meter-1"
+) -> pd.DataFrame:
+    """Add half-hourly readings 1, 2, 3... starting at a timestamp."""
+    readings = pd.DataFrame(
+        {
+            "interval_start": pd.date_range(start, periods=periods, freq="30min"),
+            "consumption": np.arange(1, periods + 1, dtype=float),
+            "meter_id": meter_id,
+        }
+    )
+    db_connector.add_data_to_db(
+        readings, ElectricityHalfHourlyConsumptionTable.__tablename__
+    )
+    return readings
+
+
+def _analyse_up_to(db_connector: DbConnector, interval_start: str) -> None:
+    """Store a self-consumption interval, the watermark of the analysis."""
+    db_connector.upsert_data_to_db(
+        pd.DataFrame(
+            {
+                "interval_start": [pd.Timestamp(interval_start)],
+                "generation": 0.0,
+                "grid_import": 0.0,
+                "grid_export": 0.0,
+                "self_consumption": 0.0,
+                "load": 0.0,
+            }
+        ),
+        SolarSelfConsumptionTable.__tablename__,
+    )
+
+
+def _count(db_connector: DbConnector, table) -> int:
+    """Count the rows of a table."""
+    with db_connector.session_scope(read_only=True) as session:
+        return session.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_aggregate_readings_per_bucket():
+    """Every meter, field and hour gets the sum, min, max and count of its readings."""
+    detail = pd.DataFrame(
+        {
+            "interval_start": pd.to_datetime(
+                [
+                    "2024-01-01 00:00",
+                    "2024-01-01 00:30",
+                    "2024-01-01 01:00",
+                    "2024-01-01 00:00",
+                    "2024-01-01 00:30",
+                ]
+            ),
+            "consumption": [1.0, 3.0, 5.0, 2.0, np.nan],
+            "meter_id": ["a", "a", "a", "b", "b"],
+        }
+    )
+
+    rollups = aggregate_readings(detail, CONSUMPTION_POLICY).set_index(
+        ["meter_id", "bucket_start"]
+    )
+
+    assert len(rollups) == 3
+    first_hour = rollups.loc[("a", pd.Timestamp("2024-01-01 00:00"))]
+    assert (first_hour["value_sum"], first_hour["value_min"]) == (4.0, 1.0)
+    assert (first_hour["value_max"], first_hour["value_count"]) == (3.0, 2)
+    # missing readings are not counted
+    assert rollups.loc[("b", pd.Timestamp("2024-01-01 00:00")), "value_count"] == 1
+    assert (rollups["series"] == "electricity_half_hourly_consumption").all()
+    assert (rollups["field"] == "consumption").all()
+    assert (rollups["grain"] == "hour").all()
+
+
+def test_aggregate_telemetry_per_inverter():
+    """Inverter readings are rolled up per serial number and field."""
+    detail = pd.DataFrame(
+        {
+            "sn": "inverter-1",
+            "recorded_at": pd.date_range("2024-01-01", periods=12, freq="5min"),
+            "ac_power": np.arange(12, dtype=float),
+            "inverter_temperature": 30.0,
+        }
+    )
+    policy = TELEMETRY_POLICY.model_copy(
+        update={"value_columns": ["ac_power", "inverter_temperature"]}
+    )
+
+    rollups = aggregate_readings(detail, policy).set_index("field")
+
+    assert (rollups["meter_id"] == "inverter-1").all()
+    assert rollups.loc["ac_power", "value_sum"] == sum(range(12))
+    assert rollups.loc["ac_power", "value_max"] == 11.0
+    assert rollups.loc["inverter_temperature", "value_count"] == 12
+
+
+def test_compact_archives_then_removes_old_rows(db_connector, compactor, tmp_path):
+    """Rows past the maximum age are archived, rolled up and removed."""
+    old = _add_half_hours(db_connector, "2024-01-31 22:00", periods=8)
+    _add_half_hours(db_connector, "2024-05-31 00:00", periods=4)
+
+    compacted = compactor.compact(CONSUMPTION_POLICY, now=NOW)
+
+    assert compacted == 8
+    assert _count(db_connector, ElectricityHalfHourlyConsumptionTable) == 4
+    archived = pd.concat(
+        pd.read_parquet(path)
+        for path in sorted((tmp_path / "cold_archive").rglob("*.parquet"))
+    )
+    assert archived["consumption"].tolist() == old["consumption"].tolist()
+    assert sorted(
+        path.relative_to(tmp_path / "cold_archive").parts[1:3]
+        for path in (tmp_path / "cold_archive").rglob("*.parquet")
+    ) == [("year=2024", "month=01"), ("year=2024", "month=02")]
+    assert not list((tmp_path / "cold_archive").rglob("*.tmp"))
+
+    rollups = compactor.get_rollups(
+        CONSUMPTION_POLICY, datetime(2024, 1, 1), datetime(2024, 3, 1)
+    )
+    assert len(rollups) == 4
+    assert rollups["value_sum"].sum() == old["consumption"].sum()
+    assert (rollups["value_count"] == 2).all()
+
+
+def test_compact_merges_late_readings(db_connector, compactor):
+    """Readings arriving for an already compacted bucket are merged into its rollup."""
+    _add_half_hours(db_connector, "2024-01-10 10:00", periods=1)
+    compactor.compact(CONSUMPTION_POLICY, now=NOW)
+    late = pd.DataFrame(
+        {
+            "interval_start": [pd.Timestamp("2024-01-10 10:30")],
+            "consumption": [7.0],
+            "meter_id": ["meter-1"],
+        }
+    )
+    db_connector.add_data_to_db(
+        late, ElectricityHalfHourlyConsumptionTable.__tablename__
+    )
+
+    assert compactor.compact(CONSUMPTION_POLICY, now=NOW) == 1
+
+    with db_connector.session_scope(read_only=True) as session:
+        rollups = session.execute(select(ReadingRollupTable.__table__)).all()
+    assert len(rollups) == 1
+    rollup = rollups[0]._mapping
+    assert (rollup["value_sum"], rollup["value_count"]) == (8.0, 2)
+    assert (rollup["value_min"], rollup["value_max"]) == (1.0, 7.0)
+    assert _count(db_connector, ElectricityHalfHourlyConsumptionTable) == 0
+
+
+def test_rows_are_kept_when_archive_fails(db_connector, compactor, monkeypatch):
+    """Detail rows are only deleted after their archive file is written."""
+    _add_half_hours(db_connector, "2024-01-10 10:00", periods=4)
+
+    def fail_archive(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(compactor, "_archive", fail_archive)
+    with pytest.raises(OSError):
+        compactor.compact(CONSUMPTION_POLICY, now=NOW)
+
+    assert _count(db_connector, ElectricityHalfHourlyConsumptionTable) == 4
+    assert _count(db_connector, ReadingRollupTable) == 0
+
+
+def test_compact_telemetry(db_connector, compactor):
+    """Solis 5 minute telemetry is compacted per inverter."""
+    telemetry = pd.DataFrame(
+        {
+            "sn": ["inverter-1"] * 24 + ["inverter-2"] * 24,
+            "recorded_at": list(pd.date_range("2024-01-01", periods=24, freq="5min"))
+            * 2,
+            "ac_power": np.r_[np.full(24, 100.0), np.full(24, 200.0)],
+        }
+    )
+    db_connector.add_data_to_db(telemetry, SolisTelemetryTable.__tablename__)
+    _analyse_up_to(db_connector, "2024-01-02")
+
+    assert compactor.compact(TELEMETRY_POLICY, now=NOW) == 48
+
+    rollups = compactor.get_rollups(
+        TELEMETRY_POLICY, datetime(2024, 1, 1), datetime(2024, 1, 2), "inverter-2"
+    )
+    assert rollups["field"].unique().tolist() == ["ac_power"]
+    assert rollups["value_count"].tolist() == [12, 12]
+    assert rollups["value_sum"].tolist() == [2400.0, 2400.0]
+    assert _count(db_connector, SolisTelemetryTable) == 0
+
+
+def test_unanalysed_readings_are_kept(db_connector, compactor):
+    """Telemetry and import readings wait for the self-consumption analysis."""
+    readings = _add_half_hours(
+        db_connector, "2024-01-01 00:00", periods=96, meter_id=DEFAULT_METER_ID
+    )
+    db_connector.add_data_to_db(
+        pd.DataFrame(
+            {
+                "sn": "inverter-1",
+                "recorded_at": readings["interval_start"],
+                "ac_power": 100.0,
+            }
+        ),
+        SolisTelemetryTable.__tablename__,
+    )
+
+    assert compactor.compact_all(now=NOW) == {
+        policy.table_name: 0 for policy in COMPACTION_POLICIES
+    }
+
+    # the last stored interval is analysed again by the next refresh
+    _analyse_up_to(db_connector, "2024-01-01 12:30")
+    assert compactor.compact(CONSUMPTION_POLICY, now=NOW) == 24
+    assert compactor.compact(TELEMETRY_POLICY, now=NOW) == 24
+    assert _count(db_connector, ElectricityHalfHourlyConsumptionTable) == 72
+
+
+def test_no_history_is_lost_between_backfill_and_analysis(db_connector, compactor):
+    """Backfilled telemetry is analysed before compaction removes it."""
+    commissioned = int(pd.Timestamp("2024-01-01").timestamp() * 1000)
+    inverters = [{"id": "0", "sn": "SN0000", "fisGenerateTime": commissioned}]
+
+    async def handle(request: web.Request) -> web.Response:
+        payload = await request.json()
+        period = payload.get("time") or payload["month"]
+        if request.path.endswith("inverterMonth"):
+            return web.json_response({"success": True, "data": []})
+        start = pd.Timestamp(period).value // 1_000_000
+        data = [
+            {"dataTimestamp": str(start + minutes * 60_000), "pac": 1.5}
+            for minutes in range(8 * 60, 16 * 60, 5)
+        ]
+        return web.json_response({"success": True, "data": data})
+
+    async def backfill():
+        app = web.Application()
+        app.router.add_post("/{path:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            client = SolisClient(
+                "key",
+                "secret",
+                api_url=f"http://127.0.0.1:{port}/",
+                rate_limiter=TokenBucket(1000),
+            )
+            solis_backfill = SolisBackfill(
+                client,
+                db_connector,
+                BackfillCheckpoint(compactor.archive_dir / "solis_backfill.json"),
+            )
+            return await solis_backfill.run(inverters, date(2024, 3, 1))
+        finally:
+            await runner.cleanup()
+
+    telemetry_rows = asyncio.run(backfill())["solis_telemetry"]
+    _add_half_hours(
+        db_connector, "2024-01-01 00:00", periods=60 * 48, meter_id=DEFAULT_METER_ID
+    )
+    manager = SelfConsumptionManager(db_connector)
+
+    # the compaction running before the first analysis keeps every reading
+    compactor.compact_all(now=NOW)
+    assert _count(db_connector, SolisTelemetryTable) == telemetry_rows
+    manager.refresh()
+    generation = manager.get_summary(date(2024, 1, 1), date(2024, 2, 29), "month")
+
+    compacted = compactor.compact_all(now=NOW)
+    manager.refresh()
+
+    # the hour of the last analysed interval, processed again next time, is kept
+    assert _count(db_connector, SolisTelemetryTable) == 12
+    assert compacted[SolisTelemetryTable.__tablename__] == telemetry_rows - 12
+    pd.testing.assert_frame_equal(
+        manager.get_summary(date(2024, 1, 1), date(2024, 2, 29), "month"),
+        generation,
+    )
+    assert generation["generation"].sum() > 0
+    rollups = compactor.get_rollups(
+        TELEMETRY_POLICY, datetime(2024, 1, 1), datetime(2024, 3, 1)
+    )
+    assert rollups["value_count"].sum() == telemetry_rows
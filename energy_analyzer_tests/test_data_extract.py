@@ -0,0 +1,112 @@
+"""Octopus API extraction tests."""
+
+from datetime import date
+
+import pytest
+import requests
+
+from energy_analyzer.octopus_data import data_extract
+from energy_analyzer.octopus_data.data_extract import DataExtractor
+from energy_analyzer.octopus_data.fake_api import FakeOctopusApi
+from energy_analyzer.octopus_data.synthetic_data import SyntheticOctopusData
+
+
+@pytest.fixture(scope="module")
+def synthetic_data() -> SyntheticOctopusData:
+    """Three months of synthetic data for an import and an export meter."""
+    return SyntheticOctopusData(
+        date_from=date(2024, 4, 1), date_to=date(2024, 7, 1), meters=2
+    )
+
+
+def _get_consumption_urls(api_url: str, synthetic_data: SyntheticOctopusData) -> list:
+    """Get the half-hourly consumption urls of every meter, in pages of 1000."""
+    return [
+        f"{api_url}/electricity-meter-points/{meter['mpan']}/meters/"
+        + f"{meter['serial_no']}/consumption/"
+        + "?period_from=2024-04-01T00:00:00%2B01:00&page_size=1000"
+        for meter in synthetic_data.meters
+    ]
+
+
+def test_extraction_follows_pages(synthetic_data):
+    """Every page of a consumption request is fetched."""
+    with FakeOctopusApi(synthetic_data) as api_url:
+        url = _get_consumption_urls(api_url, synthetic_data)[0]
+        results = DataExtractor(replay=False).get_consumption_values(
+            url, api_key="sk_test"
+        )
+
+    assert len(results) == 91 * 48
+    assert len({result["interval_start"] for result in results}) == 91 * 48
+
+
+def test_extraction_retries_rate_limits_and_server_errors(monkeypatch, synthetic_data):
+    """429 and 5xx responses are retried until the results are complete."""
+    monkeypatch.setattr(data_extract.CONFIG, "octopus_retry_backoff", 0.001)
+    with FakeOctopusApi(synthetic_data) as api_url:
+        url = _get_consumption_urls(api_url, synthetic_data)[0]
+        expected = DataExtractor(replay=False).get_consumption_values(
+            url, api_key="sk_test"
+        )
+    faulty_api = FakeOctopusApi(
+        synthetic_data,
+        rate_limit_probability=0.2,
+        server_error_probability=0.2,
+        retry_after=0,
+    )
+
+    with faulty_api as api_url:
+        url = _get_consumption_urls(api_url, synthetic_data)[0]
+        results = DataExtractor(replay=False).get_consumption_values(
+            url, api_key="sk_test"
+        )
+
+    assert results == expected
+    assert faulty_api.request_count > 5
+
+
+def test_extraction_retries_timeouts(monkeypatch, synthetic_data):
+    """Requests timing out are retried, up to the maximum number of retries."""
+    monkeypatch.setattr(data_extract.CONFIG, "octopus_retry_backoff", 0.001)
+    monkeypatch.setattr(data_extract.CONFIG, "octopus_max_retries", 2)
+    timeouts = [requests.ReadTimeout, requests.ConnectTimeout]
+
+    with FakeOctopusApi(synthetic_data) as api_url:
+        url = _get_consumption_urls(api_url, synthetic_data)[0]
+        data_extractor = DataExtractor(replay=False)
+        expected = data_extractor.get_consumption_values(url, api_key="sk_test")
+        session_get = data_extractor.session.get
+
+        def get(*args, **kwargs):
+            if timeouts:
+                raise timeouts.pop()()
+            return session_get(*args, **kwargs)
+
+        monkeypatch.setattr(data_extractor.session, "get", get)
+        assert data_extractor.get_consumption_values(url, api_key="sk_test") == expected
+
+        timeouts.extend([requests.ReadTimeout] * 3)
+        with pytest.raises(requests.ReadTimeout):
+            data_extractor.get_consumption_values(url, api_key="sk_test")
+
+
+def test_meters_are_extracted_concurrently(synthetic_data):
+    """The import and export meters are fetched at the same time, in url order."""
+    fake_api = FakeOctopusApi(synthetic_data, latency=0.05)
+
+    with fake_api as api_url:
+        urls = _get_consumption_urls(api_url, synthetic_data)
+        data_extractor = DataExtractor(replay=False)
+        sequential = [
+            data_extractor.get_consumption_values(url, api_key="sk_test")
+            for url in urls
+        ]
+        fake_api.max_in_flight = 0
+        concurrent = data_extractor.get_consumption_values_concurrently(
+            urls, api_key="sk_test"
+        )
+
+    assert concurrent == sequential
+    assert concurrent[0] != concurrent[1]
+    assert fake_api.max_in_flight == 2
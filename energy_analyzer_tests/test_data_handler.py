@@ -0,0 +1,183 @@
+"""Octopus data formatting tests."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.database.db_models import (
+    ElectricityHalfHourlyConsumptionTable,
+    ElectricityRatesTable,
+    GasRatesTable,
+)
+from energy_analyzer.octopus_data import data_handler
+from energy_analyzer.octopus_data.data_handler import (
+    DailyDataHandler,
+    HalfHourlyDataHandler,
+)
+from energy_analyzer.octopus_data.synthetic_data import SyntheticOctopusData
+
+
+@pytest.fixture(scope="module")
+def synthetic_data() -> SyntheticOctopusData:
+    """A year of synthetic data, over both clock changes."""
+    return SyntheticOctopusData(date_from=date(2023, 7, 1), date_to=date(2024, 7, 1))
+
+
+def _by_payment_method(records: list[dict]) -> list[dict]:
+    """Publish records for direct debit and, 10% dearer, for other payment methods."""
+    return [{**record, "payment_method": "DIRECT_DEBIT"} for record in records] + [
+        {
+            **record,
+            "payment_method": "NON_DIRECT_DEBIT",
+            "value_exc_vat": 1.1 * record["value_exc_vat"],
+            "value_inc_vat": 1.1 * record["value_inc_vat"],
+        }
+        for record in records
+    ]
+
+
+@pytest.fixture(scope="module")
+def rates_by_payment_method(synthetic_data) -> pd.DataFrame:
+    """Unit rates published for both payment methods."""
+    return DailyDataHandler.parse_data_to_df(
+        _by_payment_method(synthetic_data.standard_unit_rates())
+    )
+
+
+@pytest.fixture(scope="module")
+def standing_charges_by_payment_method(synthetic_data) -> pd.DataFrame:
+    """Standing charges published for both payment methods."""
+    return DailyDataHandler.parse_data_to_df(
+        _by_payment_method(synthetic_data.standing_charges())
+    )
+
+
+def test_rates_are_dated_by_local_day(synthetic_data):
+    """Every day, clock change days included, gets one rate with both VAT values."""
+    daily_data_handler = DailyDataHandler()
+    rates_raw = synthetic_data.standard_unit_rates()
+
+    rates = daily_data_handler.format_standard_unit_rates_data(
+        daily_data_handler.parse_data_to_df(rates_raw)
+    )
+
+    assert len(rates) == len(rates_raw) == 366
+    assert rates["date"].is_unique
+    assert rates["date"].is_monotonic_increasing
+    assert rates["date"].iloc[0] == pd.Timestamp("2023-07-01")
+    assert rates["unit_rate_exc_vat"].notna().all()
+    assert "tariff_code" not in rates
+
+
+def test_rates_of_other_payment_methods_are_dropped(
+    monkeypatch, synthetic_data, rates_by_payment_method
+):
+    """Only the rates of the configured payment method are kept, one per day."""
+    daily_data_handler = DailyDataHandler()
+    direct_debit = synthetic_data.standard_unit_rates()
+
+    rates = daily_data_handler.format_standard_unit_rates_data(rates_by_payment_method)
+
+    assert rates["date"].is_unique
+    assert sorted(rates["unit_rate_inc_vat"]) == pytest.approx(
+        sorted(rate["value_inc_vat"] for rate in direct_debit)
+    )
+
+    monkeypatch.setattr(
+        data_handler.CONFIG, "octopus_payment_method", "NON_DIRECT_DEBIT"
+    )
+    rates = daily_data_handler.format_standard_unit_rates_data(rates_by_payment_method)
+
+    assert sorted(rates["unit_rate_inc_vat"]) == pytest.approx(
+        sorted(1.1 * rate["value_inc_vat"] for rate in direct_debit)
+    )
+
+
+def test_standing_charges_of_other_payment_methods_are_dropped(
+    synthetic_data, standing_charges_by_payment_method
+):
+    """Standing charges keep the direct debit charge of every change."""
+    standing_charges = DailyDataHandler().format_standing_charges_data(
+        standing_charges_by_payment_method
+    )
+
+    assert standing_charges["date"].is_unique
+    assert sorted(standing_charges["standing_charge_inc_vat"]) == pytest.approx(
+        sorted(charge["value_inc_vat"] for charge in synthetic_data.standing_charges())
+    )
+
+
+def test_add_rates_to_db(db_connector, synthetic_data):
+    """Formatted rates are written into both rates tables."""
+    daily_data_handler = DailyDataHandler()
+    rates = daily_data_handler.format_standard_unit_rates_data(
+        daily_data_handler.parse_data_to_df(synthetic_data.standard_unit_rates())
+    )
+
+    db_connector.add_data_to_db(rates, ElectricityRatesTable.__tablename__)
+    db_connector.add_data_to_db(rates, GasRatesTable.__tablename__)
+
+    stored = pd.concat(db_connector.read_range(GasRatesTable))
+    assert len(stored) == len(rates)
+    assert stored["unit_rate_exc_vat"].notna().all()
+    assert stored["unit_rate_inc_vat"].to_numpy() == pytest.approx(
+        rates["unit_rate_inc_vat"].to_numpy()
+    )
+    assert db_connector.get_latest_row(ElectricityRatesTable) == date(2024, 6, 30)
+
+
+def test_format_consumption_data(synthetic_data):
+    """Daily consumption is dated by day, gas is converted to kWh."""
+    daily_data_handler = DailyDataHandler()
+    consumption_raw = synthetic_data.consumption(group_by="day")
+    consumption_df = daily_data_handler.parse_data_to_df(consumption_raw)
+
+    electricity = daily_data_handler.format_consumption_data(consumption_df)
+    gas = daily_data_handler.format_consumption_data(consumption_df, 11.2)
+
+    assert len(electricity) == len(consumption_raw)
+    assert gas["consumption"].to_numpy() == pytest.approx(
+        11.2 * electricity["consumption"].to_numpy()
+    )
+
+
+def test_select_data_to_add_to_db(synthetic_data):
+    """Only the rows after the update point are selected."""
+    daily_data_handler = DailyDataHandler()
+    consumption = daily_data_handler.format_consumption_data(
+        daily_data_handler.parse_data_to_df(synthetic_data.consumption(group_by="day"))
+    )
+
+    new_data = daily_data_handler.select_data_to_add_to_db(
+        consumption, date(2024, 6, 27)
+    )
+
+    assert new_data["date"].tolist() == list(
+        pd.date_range("2024-06-28", "2024-06-30", freq="D")
+    )
+
+
+def test_add_half_hourly_consumption_to_db(db_connector, synthetic_data):
+    """Half-hourly intervals are stored in UTC, so both clock changes stay unique."""
+    half_hourly_data_handler = HalfHourlyDataHandler()
+    consumption_raw = synthetic_data.consumption()
+
+    consumption = half_hourly_data_handler.format_consumption_data(
+        half_hourly_data_handler.parse_data_to_df(consumption_raw)
+    )
+    db_connector.add_data_to_db(
+        consumption, ElectricityHalfHourlyConsumptionTable.__tablename__
+    )
+
+    assert consumption["interval_start"].is_unique
+    assert len(consumption) == len(consumption_raw)
+    assert consumption["interval_start"].iloc[0] == pd.Timestamp(
+        consumption_raw[-1]["interval_start"]
+    ).tz_convert("UTC").tz_localize(None)
+    assert (
+        db_connector.get_latest_row(
+            ElectricityHalfHourlyConsumptionTable, column_name="interval_start"
+        )
+        == consumption["interval_start"].max().to_pydatetime()
+    )
@@ -0,0 +1,190 @@
+"""Reading series, rate timeline and batch validation tests."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_analyzer.database.db_models import (
+    ElectricityHalfHourlyConsumptionTable,
+    ElectricityRatesTable,
+)
+from energy_analyzer.octopus_data.data_extract import DataExtractor
+from energy_analyzer.octopus_data.data_handler import DailyDataHandler
+from energy_analyzer.octopus_data.meter_registry import TariffAgreement
+from energy_analyzer.octopus_data.synthetic_data import SyntheticOctopusData
+from energy_analyzer.octopus_data.tariff_catalogue import get_product_code
+from energy_analyzer.utils.data_models import (
+    BatchValidator,
+    RateTimeline,
+    ReadingSeries,
+)
+
+
+@pytest.fixture(scope="module")
+def synthetic_data() -> SyntheticOctopusData:
+    """Two years of synthetic data, over a tariff change."""
+    return SyntheticOctopusData()
+
+
+@pytest.fixture(scope="module")
+def readings(synthetic_data) -> ReadingSeries:
+    """Half-hourly consumption of the synthetic meter."""
+    return ReadingSeries.from_records(
+        synthetic_data.consumption(), "interval_start", "consumption"
+    )
+
+
+@pytest.fixture(scope="module")
+def agreements(synthetic_data) -> list[TariffAgreement]:
+    """Agreements of the synthetic import meter, oldest first."""
+    return [
+        TariffAgreement(
+            product_code=get_product_code(agreement["tariff_code"]), **agreement
+        )
+        for agreement in synthetic_data.account()["properties"][0][
+            "electricity_meter_points"
+        ][0]["agreements"]
+    ]
+
+
+def test_reading_series(synthetic_data, readings):
+    """Readings are packed in 16 bytes each and sliced by time."""
+    assert readings.nbytes == 16 * len(synthetic_data.consumption())
+    day = readings.range("2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z")
+    assert len(day) == 48
+    assert day.to_arrow().num_rows == 48
+
+
+def test_rate_timeline_prices_readings(synthetic_data, readings, agreements):
+    """Readings are priced at the rate of the tariff in force."""
+    old_tariff, new_tariff = [agreement.tariff_code for agreement in agreements]
+    rates = synthetic_data.standard_unit_rates()
+    tariff_rates = {
+        old_tariff: rates,
+        new_tariff: [
+            {**rate, "value_inc_vat": rate["value_inc_vat"] + 10} for rate in rates
+        ],
+    }
+
+    timeline = RateTimeline.from_agreements(agreements, tariff_rates)
+
+    assert len(timeline) == len(rates)
+    assert timeline.tariff_codes == [old_tariff, new_tariff]
+    switch = agreements[1].valid_from
+    assert timeline.tariff_at(switch - pd.Timedelta(minutes=1)) == old_tariff
+    assert timeline.tariff_at(switch) == new_tariff
+
+    costs = timeline.cost(readings.timestamps, readings.values)
+    # the rate in force is the last one starting at or before every reading
+    ordered_rates = sorted(rates, key=lambda rate: rate["valid_from"])
+    rate_starts = pd.to_datetime(
+        [rate["valid_from"] for rate in ordered_rates], utc=True
+    )
+    rate_values = np.array([rate["value_inc_vat"] for rate in ordered_rates])
+    position = (
+        rate_starts.searchsorted(
+            pd.to_datetime(readings.timestamps, utc=True), side="right"
+        )
+        - 1
+    )
+    expected = rate_values[position] + 10 * (
+        readings.timestamps >= pd.Timestamp(switch).value
+    )
+    np.testing.assert_allclose(costs, readings.values * expected)
+
+    totals = timeline.cost_by_tariff(readings.timestamps, readings.values)
+    assert totals["tariff_code"].tolist() == [old_tariff, new_tariff]
+    assert totals["readings"].sum() == len(readings)
+    assert np.isclose(totals["cost"].sum(), costs.sum())
+
+
+def test_rate_timeline_from_stored_rates(db_connector, synthetic_data, agreements):
+    """The tariff of every day is stored with its rate and read back in a timeline."""
+    old_tariff, new_tariff = [agreement.tariff_code for agreement in agreements]
+    switch = agreements[1].valid_from
+    switch_from = f"{pd.Timestamp(switch).tz_convert('UTC'):%Y-%m-%dT%H:%M:%SZ}"
+    rates = synthetic_data.standard_unit_rates()
+    agreement_rates = {
+        old_tariff: [rate for rate in rates if rate["valid_from"] < switch_from],
+        new_tariff: [
+            {**rate, "value_inc_vat": rate["value_inc_vat"] + 10}
+            for rate in rates
+            if rate["valid_from"] >= switch_from
+        ],
+    }
+    data_extractor = DataExtractor()
+    data_extractor.get_standard_unit_rates = agreement_rates.__getitem__
+    daily_data_handler = DailyDataHandler()
+    rates_df = daily_data_handler.format_standard_unit_rates_data(
+        daily_data_handler.parse_data_to_df(
+            data_extractor.get_tariff_rates(
+                [(tariff_code, tariff_code) for tariff_code in agreement_rates]
+            )
+        )
+    )
+    db_connector.upsert_data_to_db(rates_df, ElectricityRatesTable.__tablename__)
+
+    stored = pd.concat(db_connector.read_range(ElectricityRatesTable))
+    stored_timeline = RateTimeline.from_frame(stored)
+
+    assert stored_timeline.tariff_codes == [old_tariff, new_tariff]
+    assert stored_timeline.tariff_at(
+        [f"{switch:%Y-%m-%d}", "2022-12-01", "2024-06-01"]
+    ).tolist() == [new_tariff, old_tariff, new_tariff]
+    assert (
+        stored_timeline.rate_at("2023-01-15T12:00:00Z")
+        == stored.loc[
+            pd.to_datetime(stored["date"]) == "2023-01-15", "unit_rate_inc_vat"
+        ].item()
+    )
+
+
+def test_rate_timeline_from_local_days():
+    """Stored days start at local midnight and last 23 or 25 hours over clock changes."""
+    rates = pd.DataFrame(
+        {
+            "date": pd.to_datetime(
+                ["2024-03-30", "2024-03-31", "2024-04-01", "2024-07-01", "2024-07-02"]
+            ),
+            "unit_rate_inc_vat": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+
+    timeline = RateTimeline.from_frame(rates)
+
+    np.testing.assert_array_equal(
+        timeline.rate_at(
+            [
+                "2024-03-30T23:30:00Z",
+                "2024-03-31T22:30:00Z",
+                "2024-03-31T23:30:00Z",
+                "2024-06-30T22:30:00Z",
+                "2024-06-30T23:30:00Z",
+                "2024-07-01T23:00:00Z",
+            ]
+        ),
+        [1.0, 2.0, 3.0, np.nan, 4.0, 5.0],
+    )
+
+
+def test_validate_batch():
+    """Missing, out of range and duplicate rows are reported by position."""
+    validator = BatchValidator.for_table(
+        ElectricityHalfHourlyConsumptionTable.__tablename__
+    )
+    readings = pd.DataFrame(
+        {
+            "interval_start": pd.date_range("2024-01-01", periods=100, freq="30min"),
+            "consumption": np.random.default_rng(0).random(100),
+        }
+    )
+    readings.loc[[10, 20], "consumption"] = [-1.0, np.nan]
+    readings.loc[30, "interval_start"] = readings.loc[31, "interval_start"]
+
+    report = validator.validate(readings)
+
+    assert report.errors == {
+        "consumption: missing value": [20],
+        "consumption: out of range": [10],
+        "duplicate primary key": [30, 31],
+    }
@@ -0,0 +1,110 @@
+"""Database connector tests."""
+
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from energy_analyzer.database.db_models import (
+    ElectricityConsumptionTable,
+    ElectricityHalfHourlyConsumptionTable,
+    GasConsumptionTable,
+)
+
+DAYS = pd.date_range("2020-01-01", "2024-12-31", freq="D").date
+
+
+@pytest.fixture
+def gas_consumption(db_connector) -> pd.DataFrame:
+    """1 kWh of gas every day of five years."""
+    consumption = pd.DataFrame({"date": DAYS, "consumption": 1.0})
+    db_connector.add_data_to_db(consumption, GasConsumptionTable.__tablename__)
+    return consumption
+
+
+def test_add_data_to_db(db_connector):
+    """Written rows are counted and the latest one is found per meter."""
+    db_connector.add_data_to_db(
+        pd.DataFrame(
+            {
+                "date": pd.date_range("2024-01-01", periods=10, freq="D"),
+                "consumption": 1.0,
+                "meter_id": ["a"] * 5 + ["b"] * 5,
+            }
+        ),
+        ElectricityConsumptionTable.__tablename__,
+    )
+
+    assert db_connector.get_latest_row(ElectricityConsumptionTable) == date(2024, 1, 10)
+    assert db_connector.get_latest_row(
+        ElectricityConsumptionTable, meter_id="a"
+    ) == date(2024, 1, 5)
+
+
+@pytest.mark.parametrize("as_arrow", [False, True], ids=["dataframe", "arrow"])
+def test_read_range_batches(db_connector, gas_consumption, as_arrow):
+    """A date range is streamed in batches of at most `batch_size` rows."""
+    batches = list(
+        db_connector.read_range(
+            GasConsumptionTable,
+            date(2021, 1, 1),
+            date(2022, 12, 31),
+            columns=["consumption"],
+            batch_size=100,
+            as_arrow=as_arrow,
+        )
+    )
+
+    assert all(
+        isinstance(batch, pa.RecordBatch if as_arrow else pd.DataFrame)
+        for batch in batches
+    )
+    assert sum(len(batch) for batch in batches) == 730
+    assert max(len(batch) for batch in batches) == 100
+
+
+def test_read_range_includes_the_whole_last_day(db_connector):
+    """A date bound of a timestamp table includes the intervals after midnight."""
+    intervals = pd.date_range("2024-01-01", "2024-01-03 23:30", freq="30min")
+    db_connector.add_data_to_db(
+        pd.DataFrame({"interval_start": intervals, "consumption": 0.25}),
+        ElectricityHalfHourlyConsumptionTable.__tablename__,
+    )
+
+    def read(date_from, date_to) -> pd.DataFrame:
+        return pd.concat(
+            db_connector.read_range(
+                ElectricityHalfHourlyConsumptionTable,
+                date_from,
+                date_to,
+                column_name="interval_start",
+            )
+        )
+
+    day = read(date(2024, 1, 2), date(2024, 1, 2))
+    assert len(day) == 48
+    assert day["interval_start"].iloc[-1] == pd.Timestamp("2024-01-02 23:30")
+    # timestamp bounds stay inclusive
+    assert len(read(pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-02 12:00"))) == 25
+
+
+def test_read_cached_invalidation(db_connector, gas_consumption):
+    """Cached aggregations are served until a write overlaps their dates."""
+
+    def read_monthly():
+        return db_connector.read_cached(
+            GasConsumptionTable, aggregation="sum", period="month"
+        )
+
+    monthly = read_monthly()
+    assert len(monthly) == 60
+    assert read_monthly().equals(monthly)
+    assert db_connector.query_cache.hits == 1
+
+    db_connector.upsert_data_to_db(
+        pd.DataFrame({"date": [date(2024, 12, 31)], "consumption": [3.0]}),
+        GasConsumptionTable.__tablename__,
+    )
+
+    assert read_monthly()["consumption"].iloc[-1] == 33.0
@@ -0,0 +1,33 @@
+"""Solis payload decoding tests."""
+
+from energy_analyzer.solis_data.decoder import PayloadDecoder
+
+
+def test_decode_batch_converts_units():
+    """Values are converted to the base units, absent fields are missing."""
+    payloads = [
+        {
+            "dataTimestamp": str(1_704_067_200_000 + reading * 300_000),
+            "acOutputType": "1",
+            "pac": "1.5",
+            "pacStr": "kW",
+            "uAc1": 230.0,
+            "uAc2": "232.0",
+            "uAc3": 234.0,
+            "eTotal": 12.5,
+            "eTotalStr": "MWh",
+        }
+        for reading in range(12)
+        for _ in range(3)
+    ]
+    sns = [f"SN{inverter:04d}" for _ in range(12) for inverter in range(3)]
+
+    rows = PayloadDecoder().decode_batch(payloads, sns)
+
+    assert len(rows) == len(payloads)
+    assert rows["sn"].tolist() == sns
+    assert (rows["ac_power"] == 1500.0).all()
+    # three phase inverters report the mean of the phase voltages
+    assert (rows["ac_voltage"] == 232.0).all()
+    assert (rows["total_generation"] == 12500.0).all()
+    assert rows["dc_voltage_pv1"].isna().all()
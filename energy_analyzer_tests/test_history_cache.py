@@ -0,0 +1,25 @@
+"""Memory-mapped history cache tests."""
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.database.history_cache import HistoryCache
+from energy_analyzer.octopus_data.data_analysis import EnergyAnalyzer
+
+
+def test_analyzer_loads_cached_history(tmp_path):
+    """Appended readings are loaded back into the analyzer."""
+    history_cache = HistoryCache(tmp_path)
+    interval_starts = pd.date_range("2024-01-01", "2024-07-01", freq="30min")
+    history_cache.append(
+        "electricity",
+        "half_hourly_consumption",
+        pd.DataFrame({"interval_start": interval_starts, "consumption": 0.25}),
+    )
+
+    history = EnergyAnalyzer(
+        history_cache.load("electricity", "half_hourly_consumption")
+    ).energy_data_to_df()
+
+    assert len(history) == len(interval_starts)
+    assert history["consumption"].sum() == pytest.approx(0.25 * len(interval_starts))
@@ -0,0 +1,92 @@
+"""Parquet history store tests."""
+
+import json
+from datetime import date
+
+import pandas as pd
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import ElectricityConsumptionTable
+from energy_analyzer.database.history_store import (
+    HISTORY_SERIES,
+    STATE_FILE,
+    ParquetHistoryStore,
+)
+
+CONSUMPTION_SERIES = next(
+    history_series
+    for history_series in HISTORY_SERIES
+    if history_series.table_name == ElectricityConsumptionTable.__tablename__
+)
+
+
+def _add_days(db_connector: DbConnector, date_from: str, date_to: str) -> pd.DataFrame:
+    """Add a daily consumption equal to the day of the month."""
+    days = pd.date_range(date_from, date_to, freq="D")
+    consumption = pd.DataFrame({"date": days, "consumption": days.day.astype(float)})
+    db_connector.add_data_to_db(consumption, ElectricityConsumptionTable.__tablename__)
+    return consumption
+
+
+def test_sync_round_trip(db_connector, tmp_path):
+    """Syncs write one partition per month, then only rewrite the open month."""
+    history_store = ParquetHistoryStore(tmp_path / "history")
+    series_dir = history_store.root / "fuel=electricity" / "series=consumption"
+    first = _add_days(db_connector, "2024-01-01", "2024-02-10")
+
+    assert history_store.sync_table(db_connector, CONSUMPTION_SERIES) == len(first)
+    assert sorted(
+        path.relative_to(series_dir).as_posix()
+        for path in series_dir.rglob("*.parquet")
+    ) == [
+        "year=2024/month=01/part-0.parquet",
+        "year=2024/month=02/part-0.parquet",
+    ]
+    state = json.loads((history_store.root / STATE_FILE).read_text())
+    assert pd.Timestamp(state[CONSUMPTION_SERIES.table_name]) == pd.Timestamp(
+        "2024-02-10"
+    )
+    january = series_dir / "year=2024" / "month=01" / "part-0.parquet"
+    january_written = january.stat().st_mtime_ns
+
+    second = _add_days(db_connector, "2024-02-11", "2024-03-05")
+
+    # February is exported again with its new rows, January is left untouched
+    assert history_store.sync_table(db_connector, CONSUMPTION_SERIES) == 29 + 5
+    assert january.stat().st_mtime_ns == january_written
+    assert (series_dir / "year=2024" / "month=03" / "part-0.parquet").exists()
+    assert not list(series_dir.rglob("*.tmp"))
+
+    history = history_store.read("electricity", "consumption").to_pandas()
+    expected = pd.concat([first, second], ignore_index=True)
+    assert history["date"].is_unique
+    assert pd.to_datetime(history["date"]).tolist() == expected["date"].tolist()
+    assert history["consumption"].tolist() == expected["consumption"].tolist()
+
+    february = history_store.read(
+        "electricity",
+        "consumption",
+        date_from=date(2024, 2, 1),
+        date_to=date(2024, 2, 29),
+        columns=["date", "consumption"],
+    ).to_pandas()
+    assert february.columns.tolist() == ["date", "consumption"]
+    assert len(february) == 29
+    assert february["consumption"].sum() == sum(range(1, 30))
+
+
+def test_sync_without_new_rows(db_connector, tmp_path):
+    """A sync of an unchanged table rewrites the last month only."""
+    history_store = ParquetHistoryStore(tmp_path / "history")
+    _add_days(db_connector, "2024-01-20", "2024-02-03")
+    history_store.sync_table(db_connector, CONSUMPTION_SERIES)
+
+    assert history_store.sync_table(db_connector, CONSUMPTION_SERIES) == 3
+    assert len(history_store.read("electricity", "consumption")) == 15
+
+
+def test_read_before_any_sync(tmp_path):
+    """Reading a series that was never exported returns an empty table."""
+    history_store = ParquetHistoryStore(tmp_path / "history")
+
+    assert history_store.read("gas", "rates").num_rows == 0
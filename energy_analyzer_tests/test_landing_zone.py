@@ -0,0 +1,110 @@
+"""Raw payload landing zone tests."""
+
+import gzip
+import json
+
+from energy_analyzer.octopus_data.landing_zone import LandingZone
+
+RATES_URL = (
+    "https://api.octopus.energy/v1/products/AGILE-24-10-01/electricity-tariffs/"
+    + "E-1R-AGILE-24-10-01-C/standard-unit-rates/"
+)
+CONSUMPTION_URL = (
+    "https://api.octopus.energy/v1/electricity-meter-points/1900000000000/meters/"
+    + "21L4000000/consumption/?group_by=day"
+)
+
+
+def _rates_page(*days: int, value: float = 20.0) -> dict:
+    """Get an API page with one rate per day of January 2024, newest first."""
+    return {
+        "count": len(days),
+        "next": None,
+        "results": [
+            {
+                "value_exc_vat": value / 1.05,
+                "value_inc_vat": value,
+                "valid_from": f"2024-01-{day:02d}T00:00:00Z",
+                "valid_to": f"2024-01-{day + 1:02d}T00:00:00Z",
+            }
+            for day in sorted(days, reverse=True)
+        ],
+    }
+
+
+def test_archive_writes_compressed_record(tmp_path):
+    """A page is archived once per endpoint and fetch date with its url."""
+    landing_zone = LandingZone(tmp_path)
+    payload = _rates_page(1, 2)
+
+    path = landing_zone.archive(
+        RATES_URL + "?period_from=2024-01-01T00:00:00Z", payload
+    )
+
+    assert path.relative_to(tmp_path).parts[:6] == (
+        "products",
+        "AGILE-24-10-01",
+        "electricity-tariffs",
+        "E-1R-AGILE-24-10-01-C",
+        "standard-unit-rates",
+        path.parent.name,
+    )
+    assert path.parent.name.startswith("date=")
+    record = json.loads(gzip.decompress(path.read_bytes()))
+    assert record["url"].startswith(RATES_URL)
+    assert record["payload"] == payload
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_archive_groups_consumption_by_aggregation(tmp_path):
+    """Consumption grouped by day lands apart from the half-hourly readings."""
+    landing_zone = LandingZone(tmp_path)
+
+    daily_path = landing_zone.archive(CONSUMPTION_URL, {"results": []})
+    half_hourly_path = landing_zone.archive(
+        CONSUMPTION_URL.split("?")[0], {"results": [], "count": 0}
+    )
+
+    assert daily_path.parent.parent.name == "group_by=day"
+    assert half_hourly_path.parent.parent.name == "consumption"
+
+
+def test_archive_skips_duplicate_pages(tmp_path):
+    """The same content is only archived once, whatever the requested period."""
+    landing_zone = LandingZone(tmp_path)
+
+    assert landing_zone.archive(RATES_URL, _rates_page(1, 2)) is not None
+    assert landing_zone.archive(RATES_URL + "?page=2", _rates_page(1, 2)) is None
+    assert landing_zone.archive(RATES_URL, _rates_page(3)) is not None
+    assert len(list(tmp_path.rglob("*.json.gz"))) == 2
+
+
+def test_replay_merges_and_filters_pages(tmp_path):
+    """Replay de-duplicates intervals, keeps the latest fetch and filters the period."""
+    landing_zone = LandingZone(tmp_path)
+    landing_zone.archive(RATES_URL, _rates_page(1, 2, 3))
+    landing_zone.archive(RATES_URL, _rates_page(3, 4, value=30.0))
+
+    results = landing_zone.replay(
+        RATES_URL + "?period_from=2024-01-02T00:00:00Z&period_to=2024-01-04T00:00:00Z"
+    )
+
+    assert [result["valid_from"] for result in results] == [
+        "2024-01-03T00:00:00Z",
+        "2024-01-02T00:00:00Z",
+    ]
+    assert [result["value_inc_vat"] for result in results] == [30.0, 20.0]
+    assert len(landing_zone.replay(RATES_URL)) == 4
+
+
+def test_replay_of_unknown_endpoint_is_empty(tmp_path):
+    """Nothing is replayed for an endpoint that was never archived."""
+    assert LandingZone(tmp_path).replay(CONSUMPTION_URL) == []
+
+
+def test_parse_timestamp_accepts_api_formats():
+    """UTC designators, offsets and naive timestamps all parse to aware times."""
+    parse = LandingZone._parse_timestamp
+
+    assert parse("2024-01-01T00:00:00Z") == parse("2024-01-01T00:00:00")
+    assert parse("2024-07-01T01:00:00+01:00") == parse("2024-07-01T00:00:00Z")
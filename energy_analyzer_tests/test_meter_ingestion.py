@@ -0,0 +1,95 @@
+"""Multi-meter ingestion tests."""
+
+from datetime import date
+
+import pytest
+from pydantic import SecretStr
+from sqlalchemy import func, select
+
+from energy_analyzer.database.db_models import ElectricityConsumptionTable
+from energy_analyzer.database.rollups import RollupManager
+from energy_analyzer.octopus_data import meter_ingestion
+from energy_analyzer.octopus_data.fake_api import FakeOctopusApi
+from energy_analyzer.octopus_data.meter_registry import Meter
+from energy_analyzer.octopus_data.synthetic_data import SyntheticOctopusData
+
+
+@pytest.fixture
+def synthetic_data() -> SyntheticOctopusData:
+    """A quarter of synthetic data for three households."""
+    return SyntheticOctopusData(
+        date_from=date(2024, 1, 1), date_to=date(2024, 4, 1), meters=3
+    )
+
+
+@pytest.fixture
+def meters(synthetic_data) -> list[Meter]:
+    """Registered import meters of the households."""
+    return [
+        Meter(
+            meter_id=f"household-{index}",
+            account=f"A-{index:08d}",
+            api_key="sk_test",
+            fuel="electricity",
+            mpxn=meter["mpan"],
+            serial_no=meter["serial_no"],
+            product_code="SILVER-23-12-06",
+            tariff_code="E-1R-SILVER-23-12-06-B",
+        )
+        for index, meter in enumerate(synthetic_data.meters)
+    ]
+
+
+@pytest.fixture
+def fake_api(monkeypatch, watermark_db, synthetic_data):
+    """Fake API the worker processes ingest into the test database from."""
+    monkeypatch.setattr(
+        meter_ingestion.CONFIG,
+        "db_url",
+        SecretStr(watermark_db.engine.url.render_as_string(hide_password=False)),
+    )
+    fake_api = FakeOctopusApi(synthetic_data, latency=0.02)
+    with fake_api as api_url:
+        monkeypatch.setattr(
+            "energy_analyzer.octopus_data.url_generator.CONFIG.octopus_api_url",
+            api_url,
+        )
+        yield fake_api
+
+
+def test_ingest_meters(fake_api, db_connector, meters):
+    """Every meter is ingested under its own meter id and rolled up."""
+    results = meter_ingestion.ingest_meters(meters, workers=2)
+
+    assert results == {
+        meter.key: {"rates": 91, "standing_charges": 1, "consumption": 91}
+        for meter in meters
+    }
+    with db_connector.session_scope(read_only=True) as session:
+        stored = dict(
+            session.execute(
+                select(ElectricityConsumptionTable.meter_id, func.count()).group_by(
+                    ElectricityConsumptionTable.meter_id
+                )
+            ).all()
+        )
+    assert stored == {meter.meter_id: 91 for meter in meters}
+    rollups = RollupManager(db_connector).get_rollups(
+        "electricity", "month", date(2024, 1, 1), date(2024, 3, 1), "household-2"
+    )
+    assert rollups["days"].tolist() == [31, 29, 31]
+
+    # a second run has nothing new to write
+    assert meter_ingestion.ingest_meters(meters, workers=2) == {
+        meter.key: {"rates": 0, "standing_charges": 0, "consumption": 0}
+        for meter in meters
+    }
+
+
+def test_workers_share_the_request_slots(monkeypatch, fake_api, meters):
+    """The worker processes never send more requests at a time than the cap."""
+    monkeypatch.setattr(meter_ingestion.CONFIG, "octopus_max_concurrent_requests", 2)
+
+    meter_ingestion.ingest_meters(meters, workers=3)
+
+    assert 0 < fake_api.max_in_flight <= 2
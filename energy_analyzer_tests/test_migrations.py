@@ -0,0 +1,189 @@
+"""Schema migration tests."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import inspect, text
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
+    ElectricityConsumptionTable,
+    ElectricityExportRatesTable,
+    ElectricityRatesTable,
+    GasRatesTable,
+)
+from energy_analyzer.database.migrations import migrate_table
+
+TABLE_NAME = ElectricityConsumptionTable.__tablename__
+
+
+@pytest.fixture
+def db_connector(tmp_path) -> DbConnector:
+    """Empty database."""
+    return DbConnector(f"sqlite:///{tmp_path}/migrations.db")
+
+
+def _get_primary_key(db_connector: DbConnector) -> set[str]:
+    """Get the primary key columns of the consumption table."""
+    return set(
+        inspect(db_connector.engine).get_pk_constraint(TABLE_NAME)[
+            "constrained_columns"
+        ]
+    )
+
+
+def test_meter_id_is_added_to_tables_created_before_meters(db_connector):
+    """A table keyed on date only gets `meter_id` and is keyed on both."""
+    with db_connector.engine.begin() as connection:
+        connection.execute(
+            text(
+                f"CREATE TABLE {TABLE_NAME} "
+                + "(date DATE NOT NULL, consumption FLOAT NOT NULL, PRIMARY KEY (date))"
+            )
+        )
+        connection.execute(
+            text(
+                f"INSERT INTO {TABLE_NAME} VALUES "
+                + "('2024-01-01', 1.0), ('2024-01-02', 2.0)"
+            )
+        )
+
+    # the first read of the table migrates it
+    assert db_connector.get_latest_row(
+        ElectricityConsumptionTable, meter_id=DEFAULT_METER_ID
+    ) == date(2024, 1, 2)
+    assert _get_primary_key(db_connector) == {"date", "meter_id"}
+
+    db_connector.add_data_to_db(
+        pd.DataFrame(
+            {
+                "date": pd.to_datetime(["2024-01-02", "2024-01-03"]),
+                "consumption": [5.0, 6.0],
+                "meter_id": "meter-2",
+            }
+        ),
+        TABLE_NAME,
+    )
+    stored = pd.concat(db_connector.read_range(ElectricityConsumptionTable))
+    assert sorted(zip(stored["meter_id"], stored["consumption"])) == [
+        (DEFAULT_METER_ID, 1.0),
+        (DEFAULT_METER_ID, 2.0),
+        ("meter-2", 5.0),
+        ("meter-2", 6.0),
+    ]
+    assert migrate_table(db_connector.engine, TABLE_NAME) == []
+
+
+def test_primary_key_is_added_to_tables_created_by_pandas(db_connector):
+    """Tables written by `DataFrame.to_sql` without a primary key get the model one."""
+    pd.DataFrame({"date": pd.to_datetime(["2024-01-01"]), "consumption": [1.0]}).to_sql(
+        TABLE_NAME, db_connector.engine, index=False
+    )
+
+    changes = migrate_table(db_connector.engine, TABLE_NAME)
+
+    assert changes == [
+        "added column meter_id",
+        "converted column date to dates",
+        "rebuilt primary key on ['date', 'meter_id']",
+    ]
+    assert _get_primary_key(db_connector) == {"date", "meter_id"}
+    with db_connector.engine.connect() as connection:
+        rows = connection.execute(
+            text(f"SELECT meter_id, consumption FROM {TABLE_NAME}")
+        ).all()
+    assert [tuple(row) for row in rows] == [(DEFAULT_METER_ID, 1.0)]
+
+
+def test_missing_and_current_tables_are_left_untouched(db_connector):
+    """Only existing tables that differ from their model are migrated."""
+    assert migrate_table(db_connector.engine, TABLE_NAME) == []
+
+    ElectricityConsumptionTable.__table__.create(db_connector.engine)
+
+    assert migrate_table(db_connector.engine, TABLE_NAME) == []
+
+
+@pytest.mark.parametrize(
+    "table",
+    [ElectricityRatesTable, ElectricityExportRatesTable, GasRatesTable],
+)
+def test_tariff_code_is_added_to_rates_tables(db_connector, table):
+    """Rates stored before `tariff_code` keep no tariff, new rates record theirs."""
+    table_name = table.__tablename__
+    with db_connector.engine.begin() as connection:
+        connection.execute(
+            text(
+                f"CREATE TABLE {table_name} (date DATE NOT NULL, "
+                + "unit_rate_exc_vat FLOAT NOT NULL, unit_rate_inc_vat FLOAT NOT NULL, "
+                + "meter_id VARCHAR NOT NULL DEFAULT 'default', "
+                + "PRIMARY KEY (date, meter_id))"
+            )
+        )
+        connection.execute(
+            text(f"INSERT INTO {table_name} VALUES ('2024-01-01', 20.0, 21.0, 'a')")
+        )
+
+    db_connector.add_data_to_db(
+        pd.DataFrame(
+            {
+                "date": pd.to_datetime(["2024-01-02"]),
+                "unit_rate_exc_vat": [24.0],
+                "unit_rate_inc_vat": [25.2],
+                "tariff_code": ["E-1R-AGILE-24-10-01-C"],
+                "meter_id": ["a"],
+            }
+        ),
+        table_name,
+    )
+
+    stored = pd.concat(db_connector.read_range(table)).sort_values("date")
+    assert stored["tariff_code"].isna().tolist() == [True, False]
+    assert stored["tariff_code"].iloc[1] == "E-1R-AGILE-24-10-01-C"
+    assert stored["unit_rate_exc_vat"].tolist() == [20.0, 24.0]
+    assert migrate_table(db_connector.engine, table_name) == []
+
+
+def test_columns_are_added_together(db_connector):
+    """Tables missing both `meter_id` and `tariff_code` are migrated in one go."""
+    table_name = ElectricityRatesTable.__tablename__
+    with db_connector.engine.begin() as connection:
+        connection.execute(
+            text(
+                f"CREATE TABLE {table_name} (date DATE NOT NULL PRIMARY KEY, "
+                + "unit_rate_exc_vat FLOAT NOT NULL, unit_rate_inc_vat FLOAT NOT NULL)"
+            )
+        )
+
+    assert migrate_table(db_connector.engine, table_name) == [
+        "added column tariff_code",
+        "added column meter_id",
+        "rebuilt primary key on ['date', 'meter_id']",
+    ]
+
+
+def test_rates_tables_written_by_the_baseline_are_migrated(db_connector):
+    """Rates stored by `DataFrame.to_sql` with their VAT inclusive value only."""
+    table_name = ElectricityRatesTable.__tablename__
+    pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+            "unit_rate_inc_vat": [21.0, 25.2],
+        }
+    ).to_sql(table_name, db_connector.engine, index=False)
+
+    assert migrate_table(db_connector.engine, table_name) == [
+        "added column unit_rate_exc_vat",
+        "added column tariff_code",
+        "added column meter_id",
+        "converted column date to dates",
+        "rebuilt primary key on ['date', 'meter_id']",
+    ]
+    stored = pd.concat(db_connector.read_range(ElectricityRatesTable))
+    assert stored["unit_rate_exc_vat"].tolist() == pytest.approx([20.0, 24.0])
+    assert stored["date"].tolist() == [date(2024, 1, 1), date(2024, 1, 2)]
+    assert stored["meter_id"].tolist() == [DEFAULT_METER_ID] * 2
+    assert not inspect(db_connector.engine).get_columns(table_name)[1]["nullable"]
+    assert migrate_table(db_connector.engine, table_name) == []
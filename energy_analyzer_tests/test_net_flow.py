@@ -0,0 +1,39 @@
+"""Daily electricity net flow tests."""
+
+import numpy as np
+import pandas as pd
+
+from energy_analyzer.database.net_flow import NetFlowManager
+
+DAYS = pd.date_range("2024-01-01", "2024-03-31").date
+
+
+def test_late_export_recomputes_its_days(db_connector):
+    """Days without export count their whole import until the export arrives."""
+    rng = np.random.default_rng(0)
+    consumption = pd.DataFrame(
+        {"date": DAYS, "consumption": rng.uniform(5, 15, len(DAYS))}
+    )
+    # the export of the last week is not published yet
+    export = pd.DataFrame(
+        {"date": DAYS[:-7], "export_value": rng.uniform(0, 20, len(DAYS) - 7)}
+    )
+    db_connector.add_data_to_db(consumption, "electricity_consumption")
+    db_connector.add_data_to_db(export, "electricity_export")
+    manager = NetFlowManager(db_connector)
+
+    net_flow = manager.refresh(DAYS[0], DAYS[-1])
+
+    assert len(net_flow) == len(DAYS)
+    expected = consumption["consumption"].to_numpy() - np.append(
+        export["export_value"].to_numpy(), np.zeros(7)
+    )
+    np.testing.assert_allclose(net_flow["net_consumption"], expected)
+
+    db_connector.add_data_to_db(
+        pd.DataFrame({"date": DAYS[-7:], "export_value": 1.0}), "electricity_export"
+    )
+    net_flow = manager.refresh(DAYS[-7], DAYS[-1])
+
+    assert len(net_flow) == 7
+    np.testing.assert_allclose(net_flow["net_consumption"], expected[-7:] - 1.0)
@@ -0,0 +1,269 @@
+"""Monthly table partition tests.
+
+PostgreSQL isn't available to the tests, so the DDL sent by `PartitionManager` is
+recorded by a connection double answering the catalog queries.
+"""
+
+from datetime import date
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Optional
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.database import partitions
+from energy_analyzer.database.db_models import Base, ElectricityConsumptionTable
+from energy_analyzer.database.partitions import (
+    PartitionManager,
+    get_month_starts,
+    get_retention_cutoff,
+)
+
+TABLE_NAME = "electricity_consumption"
+
+
+class _RecordingConnection:
+    """Connection double recording statements and answering catalog queries."""
+
+    def __init__(self, partition_names: List[str], relkind: Optional[str]) -> None:
+        """Class constructor method."""
+        self.partition_names = partition_names
+        self.relkind = relkind
+        self.statements: List[str] = []
+
+    def __enter__(self) -> "_RecordingConnection":
+        """Open the connection."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the connection."""
+
+    def execute(self, stmt: Any, parameters: Optional[dict] = None) -> Any:
+        """Record a statement and return the catalog rows it asks for."""
+        sql = str(stmt)
+        if "relkind" in sql:
+            return SimpleNamespace(scalar=lambda: self.relkind)
+        if "pg_inherits" in sql:
+            return SimpleNamespace(scalars=lambda: iter(self.partition_names))
+        self.statements.append(sql)
+        return None
+
+
+class _RecordingEngine:
+    """PostgreSQL engine double handing out one recording connection."""
+
+    def __init__(
+        self, partition_names: Optional[List[str]] = None, relkind: str = "p"
+    ) -> None:
+        """Class constructor method."""
+        self.dialect = SimpleNamespace(name="postgresql")
+        self.connection = _RecordingConnection(partition_names or [], relkind)
+
+    def connect(self) -> _RecordingConnection:
+        """Get the recording connection."""
+        return self.connection
+
+    def begin(self) -> _RecordingConnection:
+        """Get the recording connection in a transaction."""
+        return self.connection
+
+    @property
+    def statements(self) -> List[str]:
+        """Statements executed so far."""
+        return self.connection.statements
+
+
+@pytest.fixture
+def partitions_ahead(monkeypatch) -> Iterator[int]:
+    """Create one month ahead of the written rows."""
+    monkeypatch.setattr(partitions.CONFIG, "db_partitions_ahead", 1)
+    yield 1
+
+
+def test_month_starts_span_year_end():
+    """Month starts cover both ends of the range."""
+    assert get_month_starts(date(2023, 11, 30), date(2024, 2, 1)) == [
+        date(2023, 11, 1),
+        date(2023, 12, 1),
+        date(2024, 1, 1),
+        date(2024, 2, 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "month_start, partition_name, lower, upper",
+    [
+        (
+            date(2024, 2, 1),
+            "electricity_consumption_2024_02",
+            "2024-02-01",
+            "2024-03-01",
+        ),
+        (
+            date(2023, 12, 1),
+            "electricity_consumption_2023_12",
+            "2023-12-01",
+            "2024-01-01",
+        ),
+    ],
+)
+def test_create_statement_bounds(month_start, partition_name, lower, upper):
+    """A partition holds its month, upper bound excluded."""
+    assert PartitionManager.get_create_statement(TABLE_NAME, month_start) == (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name}" '
+        + f'PARTITION OF "{TABLE_NAME}" '
+        + f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+
+
+def test_detach_statement():
+    """Partitions are detached from their parent table by name."""
+    assert PartitionManager.get_detach_statement(TABLE_NAME, date(2022, 3, 1)) == (
+        f'ALTER TABLE "{TABLE_NAME}" '
+        + 'DETACH PARTITION "electricity_consumption_2022_03"'
+    )
+
+
+def test_ensure_creates_missing_months_only(partitions_ahead):
+    """Only the months of the range plus the months ahead without partition are made."""
+    engine = _RecordingEngine(["electricity_consumption_2024_02"])
+    partition_manager = PartitionManager(engine)
+
+    created = partition_manager.ensure_partitions(
+        TABLE_NAME, date(2024, 1, 15), date(2024, 3, 10)
+    )
+
+    assert created == [
+        "electricity_consumption_2024_01",
+        "electricity_consumption_2024_03",
+        "electricity_consumption_2024_04",
+    ]
+    assert engine.statements == [
+        PartitionManager.get_create_statement(TABLE_NAME, month_start)
+        for month_start in (date(2024, 1, 1), date(2024, 3, 1), date(2024, 4, 1))
+    ]
+    # known partitions are cached, nothing is created twice
+    assert (
+        partition_manager.ensure_partitions(
+            TABLE_NAME, date(2024, 1, 1), date(2024, 3, 31)
+        )
+        == []
+    )
+
+
+def test_ensure_skips_unpartitioned_tables(partitions_ahead):
+    """Plain tables created before partitioning get no partitions."""
+    engine = _RecordingEngine(relkind="r")
+    partition_manager = PartitionManager(engine)
+
+    assert (
+        partition_manager.ensure_partitions(
+            TABLE_NAME, date(2024, 1, 1), date(2024, 1, 31)
+        )
+        == []
+    )
+    assert partition_manager.detach_partitions(TABLE_NAME, date(2030, 1, 1)) == []
+    assert engine.statements == []
+
+
+def test_ensure_is_a_no_op_off_postgresql():
+    """Other databases don't support partitioning."""
+    engine = _RecordingEngine()
+    engine.dialect.name = "sqlite"
+
+    assert (
+        PartitionManager(engine).ensure_partitions(
+            TABLE_NAME, date(2024, 1, 1), date(2024, 1, 31)
+        )
+        == []
+    )
+    assert engine.statements == []
+
+
+def test_detach_keeps_the_month_of_the_cutoff():
+    """Months starting before the month of the cutoff are detached."""
+    engine = _RecordingEngine(
+        [
+            "electricity_consumption_2023_12",
+            "electricity_consumption_2024_01",
+            "electricity_consumption_2024_02",
+        ]
+    )
+
+    detached = PartitionManager(engine).detach_partitions(TABLE_NAME, date(2024, 2, 15))
+
+    assert detached == [
+        "electricity_consumption_2023_12",
+        "electricity_consumption_2024_01",
+    ]
+    assert engine.statements == [
+        PartitionManager.get_detach_statement(TABLE_NAME, month_start)
+        for month_start in (date(2023, 12, 1), date(2024, 1, 1))
+    ]
+
+
+@pytest.mark.parametrize(
+    "today, retention_months, cutoff",
+    [
+        (date(2024, 5, 20), 3, date(2024, 2, 1)),
+        (date(2024, 3, 31), 1, date(2024, 2, 1)),
+        (date(2024, 1, 10), 13, date(2022, 12, 1)),
+        (date(2024, 1, 10), None, None),
+    ],
+)
+def test_retention_cutoff(today, retention_months, cutoff):
+    """The retention keeps whole months back from the current one."""
+    assert get_retention_cutoff(today, retention_months) == cutoff
+
+
+def test_apply_retention_detaches_expired_months(monkeypatch):
+    """Retention detaches the months before the cutoff, and nothing when unset."""
+    engine = _RecordingEngine(
+        ["electricity_consumption_2000_01", "electricity_consumption_2999_01"]
+    )
+    partition_manager = PartitionManager(engine)
+
+    monkeypatch.setattr(partitions.CONFIG, "db_partition_retention_months", None)
+    assert partition_manager.apply_retention(TABLE_NAME) == []
+
+    monkeypatch.setattr(partitions.CONFIG, "db_partition_retention_months", 12)
+    assert partition_manager.apply_retention(TABLE_NAME) == [
+        "electricity_consumption_2000_01"
+    ]
+
+
+def test_tables_are_created_with_partitions(db_connector, partitions_ahead):
+    """The current month is partitioned when the connector creates a table."""
+    engine = _RecordingEngine()
+    db_connector.partition_manager = PartitionManager(engine)
+
+    next(db_connector.read_range(ElectricityConsumptionTable), None)
+
+    this_month = get_month_starts(date.today(), date.today())[0]
+    assert engine.statements == [
+        PartitionManager.get_create_statement(TABLE_NAME, month_start)
+        for month_start in get_month_starts(
+            this_month, (pd.Timestamp(this_month) + pd.DateOffset(months=1)).date()
+        )
+    ]
+
+
+def test_retention_is_applied_once_per_run(db_connector, monkeypatch):
+    """Writes leave the retention to `DbConnector.apply_retention`."""
+    engine = _RecordingEngine(["electricity_consumption_2000_01"])
+    db_connector.partition_manager = PartitionManager(engine)
+    monkeypatch.setattr(partitions.CONFIG, "db_partition_retention_months", 12)
+
+    db_connector.add_data_to_db(
+        pd.DataFrame({"date": [date(2024, 1, 1)], "consumption": [1.0]}),
+        TABLE_NAME,
+    )
+    assert not any("DETACH" in statement for statement in engine.statements)
+
+    detached = db_connector.apply_retention()
+    assert detached[TABLE_NAME] == ["electricity_consumption_2000_01"]
+    assert set(detached) == {
+        table.name
+        for table in Base.metadata.sorted_tables
+        if partitions.is_partitioned(table)
+    }
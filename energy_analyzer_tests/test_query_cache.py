@@ -0,0 +1,137 @@
+"""Query result cache tests."""
+
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.db_models import (
+    ElectricityConsumptionTable,
+    ElectricityHalfHourlyConsumptionTable,
+)
+from energy_analyzer.database.query_cache import QueryCache, QueryCacheKey
+
+TABLE_NAME = ElectricityConsumptionTable.__tablename__
+
+
+@pytest.fixture
+def consumption(db_connector) -> pd.DataFrame:
+    """January daily consumption of two meters, 1 kWh for "a" and 2 kWh for "b"."""
+    days = pd.date_range("2024-01-01", "2024-01-31").date
+    consumption = pd.concat(
+        [
+            pd.DataFrame({"date": days, "consumption": value, "meter_id": meter_id})
+            for meter_id, value in (("a", 1.0), ("b", 2.0))
+        ],
+        ignore_index=True,
+    )
+    db_connector.add_data_to_db(consumption, TABLE_NAME)
+    return consumption
+
+
+def _read_total(db_connector: DbConnector, meter_id: str) -> float:
+    """Read the January total of a meter through the cache."""
+    return db_connector.read_cached(
+        ElectricityConsumptionTable,
+        date(2024, 1, 1),
+        date(2024, 1, 31),
+        columns=["consumption"],
+        aggregation="sum",
+        meter_id=meter_id,
+    )["consumption"].item()
+
+
+def test_results_are_cached_per_meter(db_connector, consumption):
+    """A write only drops the cached results of the meters it writes."""
+    assert _read_total(db_connector, "a") == 31.0
+    assert _read_total(db_connector, "b") == 62.0
+
+    db_connector.upsert_data_to_db(
+        pd.DataFrame({"date": [date(2024, 1, 31)], "consumption": [5.0]}).assign(
+            meter_id="b"
+        ),
+        TABLE_NAME,
+    )
+
+    hits = db_connector.query_cache.hits
+    assert _read_total(db_connector, "a") == 31.0
+    assert _read_total(db_connector, "b") == 65.0
+    assert db_connector.query_cache.hits == hits + 1
+
+
+def test_results_are_cached_by_exact_bounds(db_connector):
+    """A day and a time range within it are different results."""
+    db_connector.add_data_to_db(
+        pd.DataFrame(
+            {
+                "interval_start": pd.date_range("2024-01-02", periods=48, freq="30min"),
+                "consumption": 0.5,
+            }
+        ),
+        ElectricityHalfHourlyConsumptionTable.__tablename__,
+    )
+
+    def read_total(date_from: date, date_to: date) -> float:
+        return db_connector.read_cached(
+            ElectricityHalfHourlyConsumptionTable,
+            date_from,
+            date_to,
+            columns=["consumption"],
+            aggregation="sum",
+        )["consumption"].item()
+
+    assert read_total(datetime(2024, 1, 2), datetime(2024, 1, 2, 12)) == 12.5
+    assert read_total(date(2024, 1, 2), date(2024, 1, 2)) == 24.0
+    assert read_total(datetime(2024, 1, 2, 12), datetime(2024, 1, 2, 23, 30)) == 12.0
+
+
+def test_key_overlaps():
+    """Keys overlap the writes sharing a day and a meter with them."""
+    key = QueryCacheKey(
+        TABLE_NAME,
+        datetime(2024, 1, 2, 12),
+        date(2024, 1, 31),
+        ("consumption",),
+        "sum",
+        None,
+        "a",
+    )
+
+    assert key.overlaps(TABLE_NAME, date(2024, 1, 2), date(2024, 1, 2))
+    assert key.overlaps(TABLE_NAME, date(2024, 1, 31), None, {"a", "b"})
+    assert not key.overlaps(TABLE_NAME, date(2024, 1, 31), None, {"b"})
+    assert not key.overlaps(TABLE_NAME, date(2024, 2, 1), None)
+    assert not key.overlaps("gas_consumption", None, None)
+    assert QueryCacheKey.from_json(key.to_json()) == key
+
+
+def test_invalidations_are_shared_through_the_cache_dir(tmp_path):
+    """Writes of a meter in another process drop the results of that meter only."""
+    reader, writer = QueryCache(cache_dir=tmp_path), QueryCache(cache_dir=tmp_path)
+    keys = {
+        meter_id: QueryCacheKey(
+            TABLE_NAME, date(2024, 1, 1), date(2024, 1, 31), None, "sum", None, meter_id
+        )
+        for meter_id in ("a", "b")
+    }
+    for key in keys.values():
+        reader.put(key, pd.DataFrame({"consumption": [1.0]}))
+
+    writer.invalidate(TABLE_NAME, date(2024, 1, 15), date(2024, 1, 15), {"b"})
+
+    assert reader.get(keys["a"]) is not None
+    assert reader.get(keys["b"]) is None
+    assert QueryCache(cache_dir=tmp_path).get(keys["b"]) is None
+
+
+def test_databases_have_their_own_cache(tmp_path):
+    """Connectors of one database share a cache, other databases don't."""
+    first = DbConnector(f"sqlite:///{tmp_path}/first.db")
+
+    assert DbConnector(f"sqlite:///{tmp_path}/first.db").query_cache is (
+        first.query_cache
+    )
+    assert DbConnector(f"sqlite:///{tmp_path}/second.db").query_cache is not (
+        first.query_cache
+    )
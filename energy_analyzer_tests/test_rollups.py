@@ -0,0 +1,98 @@
+"""Consumption and cost rollup tests."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.database.db_connector import DbConnector
+from energy_analyzer.database.rollups import RollupManager
+
+METER_ID = "meter-1"
+
+
+def _add_days(
+    db_connector: DbConnector, date_from: str, date_to: str, consumption: float
+) -> None:
+    """Add daily consumption and a 20 p/kWh unit rate for every day of a range."""
+    days = pd.date_range(date_from, date_to, freq="D")
+    db_connector.add_data_to_db(
+        pd.DataFrame({"date": days, "consumption": consumption, "meter_id": METER_ID}),
+        "electricity_consumption",
+    )
+    db_connector.add_data_to_db(
+        pd.DataFrame(
+            {
+                "date": days,
+                "unit_rate_exc_vat": 20.0 / 1.05,
+                "unit_rate_inc_vat": 20.0,
+                "meter_id": METER_ID,
+            }
+        ),
+        "electricity_rates",
+    )
+
+
+def test_refresh_over_overlapping_windows(db_connector):
+    """Re-running over an overlapping window neither duplicates nor loses periods."""
+    rollup_manager = RollupManager(db_connector)
+    _add_days(db_connector, "2024-01-01", "2024-01-20", consumption=1.0)
+    rollup_manager.refresh(
+        "electricity", date(2024, 1, 1), date(2024, 1, 20), meter_id=METER_ID
+    )
+    _add_days(db_connector, "2024-01-21", "2024-02-10", consumption=2.0)
+    rollup_manager.refresh(
+        "electricity", date(2024, 1, 15), date(2024, 2, 10), meter_id=METER_ID
+    )
+
+    def get_rollups(period: str) -> pd.DataFrame:
+        return rollup_manager.get_rollups(
+            "electricity",
+            period,
+            date(2023, 12, 1),
+            date(2024, 3, 1),
+            meter_id=METER_ID,
+        )
+
+    daily = get_rollups("day")
+    assert daily["period_start"].is_unique
+    assert daily["period_start"].tolist() == list(
+        pd.date_range("2024-01-01", "2024-02-10").date
+    )
+    assert daily["consumption"].sum() == pytest.approx(20 * 1.0 + 21 * 2.0)
+
+    weekly = get_rollups("week")
+    assert weekly["period_start"].is_unique
+    assert weekly["days"].sum() == 41
+    # the week of 15 January straddles both refreshes
+    week = weekly.set_index("period_start").loc[date(2024, 1, 15)]
+    assert week["days"] == 7
+    assert week["consumption"] == pytest.approx(6 * 1.0 + 1 * 2.0)
+
+    monthly = get_rollups("month").set_index("period_start")
+    assert monthly.index.tolist() == [date(2024, 1, 1), date(2024, 2, 1)]
+    assert monthly.loc[date(2024, 1, 1), "days"] == 31
+    assert monthly.loc[date(2024, 1, 1), "consumption"] == pytest.approx(20 + 11 * 2)
+    assert monthly.loc[date(2024, 1, 1), "cost_inc_vat"] == pytest.approx(20 * 42.0)
+    assert monthly.loc[date(2024, 2, 1), "days"] == 10
+
+
+def test_refresh_is_idempotent(db_connector):
+    """Refreshing the same window twice leaves the rollups unchanged."""
+    rollup_manager = RollupManager(db_connector)
+    _add_days(db_connector, "2024-03-01", "2024-03-31", consumption=1.5)
+
+    first = rollup_manager.refresh(
+        "electricity", date(2024, 3, 1), date(2024, 3, 31), meter_id=METER_ID
+    )
+    second = rollup_manager.refresh(
+        "electricity", date(2024, 3, 10), date(2024, 3, 12), meter_id=METER_ID
+    )
+
+    daily = rollup_manager.get_rollups(
+        "electricity", "day", date(2024, 3, 1), date(2024, 3, 31), meter_id=METER_ID
+    )
+    assert first == 31 + 5 + 1
+    assert second == 3 + 2 + 1
+    assert len(daily) == 31
+    assert daily["consumption"].sum() == pytest.approx(31 * 1.5)
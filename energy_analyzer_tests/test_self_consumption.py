@@ -0,0 +1,103 @@
+"""Solar self-consumption tests."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.database.self_consumption import SelfConsumptionManager
+
+DAYS = 31
+LAST_DAY = pd.Timestamp("2024-03-01") + pd.Timedelta(days=DAYS)
+
+
+@pytest.fixture
+def telemetry() -> pd.DataFrame:
+    """2 kW from each of 2 inverters between 10:00 and 14:00 UTC, 1 kW exported."""
+    readings = pd.date_range("2024-03-01", periods=(DAYS + 1) * 288, freq="5min")
+    daytime = (readings.hour >= 10) & (readings.hour < 14)
+    return pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "sn": sn,
+                    "recorded_at": readings[daytime],
+                    "ac_power": 2000.0,
+                    "grid_power": 500.0,
+                }
+            )
+            for sn in ("SN0001", "SN0002")
+        ],
+        ignore_index=True,
+    )
+
+
+@pytest.fixture
+def meter() -> pd.DataFrame:
+    """0.5 kWh imported per hour."""
+    return pd.DataFrame(
+        {
+            "interval_start": pd.date_range(
+                "2024-03-01", periods=(DAYS + 1) * 48, freq="30min"
+            ),
+            "consumption": 0.25,
+        }
+    )
+
+
+def _add_rates(db_connector) -> None:
+    """Add a 21 p/kWh unit rate for every day."""
+    db_connector.upsert_data_to_db(
+        pd.DataFrame(
+            {
+                "date": pd.date_range("2024-02-29", periods=DAYS + 3).date,
+                "unit_rate_exc_vat": 20.0,
+                "unit_rate_inc_vat": 21.0,
+            }
+        ),
+        "electricity_rates",
+    )
+
+
+def test_refresh_is_incremental(db_connector, telemetry, meter):
+    """Only the last stored interval and the new day are processed again."""
+    _add_rates(db_connector)
+    db_connector.upsert_data_to_db(
+        telemetry[telemetry["recorded_at"] < LAST_DAY], "solis_telemetry"
+    )
+    db_connector.upsert_data_to_db(
+        meter[meter["interval_start"] < LAST_DAY],
+        "electricity_half_hourly_consumption",
+    )
+    manager = SelfConsumptionManager(db_connector)
+
+    # from the first solar reading at 10:00 to the last one at 13:55
+    assert manager.refresh() == DAYS * 48 - 40
+
+    db_connector.upsert_data_to_db(
+        telemetry[telemetry["recorded_at"] >= LAST_DAY], "solis_telemetry"
+    )
+    db_connector.upsert_data_to_db(
+        meter[meter["interval_start"] >= LAST_DAY],
+        "electricity_half_hourly_consumption",
+    )
+    assert manager.refresh() == 48 + 1
+    assert manager.refresh() == 1
+
+
+def test_summary_ratios(db_connector, telemetry, meter):
+    """Monthly ratios and savings of 4 hours of 4 kW per day, 1 kW exported."""
+    _add_rates(db_connector)
+    db_connector.upsert_data_to_db(telemetry, "solis_telemetry")
+    db_connector.upsert_data_to_db(meter, "electricity_half_hourly_consumption")
+    manager = SelfConsumptionManager(db_connector)
+    manager.refresh()
+
+    summary = manager.get_summary(date(2024, 3, 1), date(2024, 3, 31), "month")
+
+    march = summary.iloc[0]
+    assert march["generation"] == pytest.approx(31 * 16)
+    assert march["self_consumption_ratio"] == pytest.approx(0.75)
+    assert march["export_ratio"] == pytest.approx(0.25)
+    assert march["self_sufficiency"] == pytest.approx(12 / (12 + 12), rel=0.05)
+    assert march["savings_inc_vat"] == pytest.approx(31 * 12 * 21.0, rel=0.05)
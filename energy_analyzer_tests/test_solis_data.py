@@ -0,0 +1,83 @@
+"""Solis Cloud client tests."""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+
+from aiohttp import web
+
+from energy_analyzer.solis_data import solis_data
+from energy_analyzer.solis_data.solis_data import SolisClient
+from energy_analyzer.utils.rate_limiter import TokenBucket
+
+
+def test_poll_fleet(monkeypatch):
+    """Every inverter is polled concurrently with signed requests, retrying 503s."""
+    inverters = [{"id": str(index), "sn": f"SN{index:04d}"} for index in range(20)]
+    failed_once: set[str] = set()
+    in_flight = [0, 0]
+    monkeypatch.setattr(solis_data.CONFIG, "solis_retry_backoff", 0.01)
+
+    async def handle(request: web.Request) -> web.Response:
+        body = await request.read()
+        expected = hmac.new(
+            b"secret",
+            "\n".join(
+                [
+                    "POST",
+                    request.headers["Content-MD5"],
+                    request.headers["Content-Type"],
+                    request.headers["Date"],
+                    request.path,
+                ]
+            ).encode(),
+            hashlib.sha1,
+        ).digest()
+        if request.headers["Authorization"] != (
+            f"API key:{base64.b64encode(expected).decode()}"
+        ):
+            return web.json_response({"success": False, "code": "403"})
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        payload = json.loads(body)
+        if request.path.endswith("inverterList"):
+            return web.json_response(
+                {"success": True, "data": {"page": {"records": inverters}}}
+            )
+        if payload["sn"] not in failed_once:
+            failed_once.add(payload["sn"])
+            return web.Response(status=503)
+        if request.path.endswith("inverterDetail"):
+            return web.json_response({"success": True, "data": {"sn": payload["sn"]}})
+        return web.json_response({"success": True, "data": [{"sn": payload["sn"]}]})
+
+    async def poll_fleet():
+        app = web.Application()
+        app.router.add_post("/{path:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            client = SolisClient(
+                "key",
+                "secret",
+                api_url=f"http://127.0.0.1:{port}/",
+                rate_limiter=TokenBucket(1000),
+            )
+            return await client.poll_fleet()
+        finally:
+            await runner.cleanup()
+
+    snapshots = asyncio.run(poll_fleet())
+
+    assert sorted(snapshot.sn for snapshot in snapshots) == [
+        inverter["sn"] for inverter in inverters
+    ]
+    assert all(snapshot.detail == {"sn": snapshot.sn} for snapshot in snapshots)
+    assert in_flight[1] > 1
@@ -0,0 +1,126 @@
+"""Account and tariff discovery tests."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.octopus_data.data_extract import DataExtractor
+from energy_analyzer.octopus_data.fake_api import FakeOctopusApi
+from energy_analyzer.octopus_data.meter_registry import MeterRegistry
+from energy_analyzer.octopus_data.synthetic_data import SyntheticOctopusData
+from energy_analyzer.octopus_data.tariff_catalogue import (
+    TariffCatalogue,
+    get_product_code,
+)
+from energy_analyzer.octopus_data.url_generator import UrlGenerator
+
+pytestmark = pytest.mark.usefixtures("watermark_db")
+
+
+@pytest.fixture(scope="module")
+def synthetic_data() -> SyntheticOctopusData:
+    """Two years of synthetic data for two households."""
+    return SyntheticOctopusData(
+        date_from=date(2022, 7, 1), date_to=date(2024, 7, 1), meters=2
+    )
+
+
+@pytest.fixture
+def fake_api(monkeypatch, synthetic_data):
+    """Fake API serving the synthetic data, where the generated urls point."""
+    fake_api = FakeOctopusApi(synthetic_data)
+    with fake_api as api_url:
+        monkeypatch.setattr(
+            "energy_analyzer.octopus_data.url_generator.CONFIG.octopus_api_url",
+            api_url,
+        )
+        yield fake_api
+
+
+def test_get_product_code():
+    """The product code is the tariff code without fuel, registers and region."""
+    assert get_product_code("E-1R-SILVER-23-12-06-B") == "SILVER-23-12-06"
+    assert get_product_code("G-1R-VAR-22-04-02-C") == "VAR-22-04-02"
+    with pytest.raises(ValueError):
+        get_product_code("SILVER-23-12-06")
+
+
+def test_discovery_is_cached(fake_api, tmp_path, synthetic_data):
+    """The account is requested once, then only after its entry expires."""
+    catalogue_path = tmp_path / "tariff_catalogue.json"
+    data_extractor = DataExtractor(replay=False)
+    catalogue = TariffCatalogue(catalogue_path, data_extractor=data_extractor)
+
+    meters = catalogue.discover_meters("A-00000000", "sk_test")
+    discovery_requests = fake_api.request_count
+
+    assert len(meters) == 3 * len(synthetic_data.meters)
+    # the account and the products catalogue
+    assert discovery_requests == 2
+    assert catalogue.discover_meters("A-00000000", "sk_test") == meters
+    assert fake_api.request_count == discovery_requests
+
+    TariffCatalogue(
+        catalogue_path, ttl_hours=0, data_extractor=data_extractor
+    ).get_account("A-00000000", "sk_test")
+    assert fake_api.request_count == discovery_requests + 1
+
+
+def test_meter_points_of_a_kind_get_their_own_meter_id(
+    monkeypatch, tmp_path, synthetic_data
+):
+    """A second import MPAN of a property is keyed by its MPAN, not merged."""
+    account = synthetic_data.account()
+    meter_points = account["properties"][0]["electricity_meter_points"]
+    meter_points.append({**meter_points[0], "mpan": "1900000000099"})
+    catalogue = TariffCatalogue(
+        tmp_path / "tariff_catalogue.json", data_extractor=DataExtractor(replay=False)
+    )
+    monkeypatch.setattr(catalogue, "get_account", lambda *args: account)
+    monkeypatch.setattr(catalogue, "get_product_code", get_product_code)
+
+    meters = catalogue.discover_meters("A-00000000", "sk_test")
+
+    assert sorted(
+        meter.key for meter in meters if meter.meter_id.startswith("A-00000000-1")
+    ) == [
+        "electricity/export/A-00000000-1",
+        f"electricity/import/A-00000000-1-{meter_points[0]['mpan']}",
+        "electricity/import/A-00000000-1-1900000000099",
+        "gas/import/A-00000000-1",
+    ]
+    assert len(MeterRegistry(meters).meters) == len(meters)
+
+
+def test_rates_follow_the_agreements(fake_api, tmp_path, synthetic_data):
+    """Every period is fetched from the tariff in force, without gap or overlap."""
+    data_extractor = DataExtractor(replay=False)
+    meters = TariffCatalogue(
+        tmp_path / "tariff_catalogue.json", data_extractor=data_extractor
+    ).discover_meters("A-00000000", "sk_test")
+    meter = next(
+        meter for meter in meters if meter.key == "electricity/import/A-00000000-1"
+    )
+
+    assert [agreement.tariff_code for agreement in meter.agreements] == [
+        "E-1R-VAR-22-04-02-C",
+        "E-1R-SILVER-23-12-06-C",
+    ]
+    assert meter.product_code == "SILVER-23-12-06"
+
+    rates_urls = UrlGenerator().get_meter_rates_urls(meter)
+    assert [tariff_code for tariff_code, _ in rates_urls] == [
+        "E-1R-VAR-22-04-02-C",
+        "E-1R-SILVER-23-12-06-C",
+    ]
+    valid_from = [
+        rate["valid_from"] for rate in data_extractor.get_tariff_rates(rates_urls)
+    ]
+    period_from = pd.Timestamp("2022-07-01", tz="UTC")
+    expected = [
+        rate["valid_from"]
+        for rate in synthetic_data.standard_unit_rates()
+        if pd.Timestamp(rate["valid_from"]) >= period_from
+    ]
+    assert sorted(valid_from) == sorted(expected)
@@ -0,0 +1,33 @@
+"""Solis telemetry buffer tests."""
+
+from sqlalchemy import func, select
+
+from energy_analyzer.database.db_models import SolisTelemetryTable
+from energy_analyzer.solis_data.telemetry import TelemetryBuffer
+
+
+def test_buffer_flushes_in_batches(db_connector):
+    """Polls are written every `max_rows` readings and on exit."""
+    polls = [
+        (
+            f"SN{inverter:04d}",
+            {
+                "dataTimestamp": str(1_704_067_200_000 + poll * 300_000),
+                "pac": "1.234",
+                "eToday": 5.6,
+                "uPv1": "230.1",
+                "inverterTemperature": None,
+            },
+        )
+        for poll in range(12)
+        for inverter in range(20)
+    ]
+
+    with TelemetryBuffer(db_connector, max_rows=100, max_delay=300) as buffer:
+        for sn, detail in polls:
+            buffer.add(sn, detail)
+
+    assert buffer.flushes == 3
+    with db_connector.engine.connect() as connection:
+        count = select(func.count()).select_from(SolisTelemetryTable)
+        assert connection.execute(count).scalar_one() == len(polls)
@@ -0,0 +1,45 @@
+"""Octopus API url generation tests."""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.database.db_models import (
+    DEFAULT_METER_ID,
+    ElectricityHalfHourlyConsumptionTable,
+)
+from energy_analyzer.octopus_data.url_generator import UrlGenerator
+
+pytestmark = pytest.mark.usefixtures("watermark_db")
+
+
+def test_half_hourly_url_without_history():
+    """Half-hourly consumption is fetched ungrouped from the start of the history."""
+    url = UrlGenerator().get_electricity_half_hourly_consumption_url()
+
+    assert "group_by" not in url
+    assert "?period_from=2022-07-01T00:00:00Z&" in url
+
+
+def test_half_hourly_url_from_watermark(db_connector):
+    """Half-hourly consumption is fetched again from 60 days before the last interval."""
+    db_connector.add_data_to_db(
+        pd.DataFrame(
+            {
+                "interval_start": pd.date_range(
+                    "2024-03-31 00:00", periods=4, freq="30min"
+                ),
+                "consumption": 0.25,
+                "meter_id": DEFAULT_METER_ID,
+            }
+        ),
+        ElectricityHalfHourlyConsumptionTable.__tablename__,
+    )
+
+    url = UrlGenerator().get_electricity_half_hourly_consumption_url()
+
+    assert "?period_from=2024-01-31T01:30:00Z&" in url
+    assert db_connector.get_latest_row(
+        ElectricityHalfHourlyConsumptionTable, column_name="interval_start"
+    ) == datetime(2024, 3, 31, 1, 30)
@@ -12,5 +12,8 @@ setup(
         "dagster-webserver",
         "dagster-postgres",
     ],
-    extras_require={"dev": ["dagster-webserver", "pytest", "pre_commit"]},
+    extras_require={
+        "dev": ["dagster-webserver", "pytest", "pre_commit"],
+        "duckdb": ["duckdb", "duckdb-engine"],
+    },
 )